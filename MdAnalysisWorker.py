@@ -0,0 +1,143 @@
+"""Running an analysis off the GUI thread.
+
+An analysis run has three phases with different threading needs:
+
+1. **Load** -- read the dataset's objects, the superimposition cache and the
+   grouping variables. Touches the database, so it runs on the main thread
+   (``ModanController._begin_analysis``).
+2. **Compute** -- superimposition, PCA, CVA with its cross-validation, MANOVA.
+   Pure numerics on what phase 1 loaded; this is the part that takes minutes
+   on a large dataset, and the part :class:`AnalysisWorker` moves to a thread.
+3. **Persist** -- create the ``MdAnalysis`` row and serialise the results. A
+   database write, so back on the main thread once the worker reports success.
+
+The compute phase reports progress and checks for cancellation through an
+:class:`AnalysisProgress`, whose :meth:`~AnalysisProgress.callback` is the
+``progress_callback(done, total)`` the numerical code already accepts. It is
+the same object whether the phase runs in the worker or synchronously in
+``ModanController.run_analysis``, so both report the same progress.
+"""
+
+import logging
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from MdStatistics import AnalysisCancelledError
+
+logger = logging.getLogger(__name__)
+
+# Share of the progress bar each stage gets, as (start, end) percentages. The
+# superimposition and CVA's cross-validation are the stages whose cost grows
+# with the data, so they get most of it.
+ANALYSIS_STAGES = {
+    "superimposition": (0, 40),
+    "pca": (40, 50),
+    "cva": (50, 85),
+    "manova": (85, 95),
+    "saving": (95, 100),
+}
+
+
+class AnalysisProgress:
+    """Progress reporting and cancellation checkpoints for one analysis run.
+
+    ``report(stage, done, total, percent)`` receives every checkpoint;
+    ``should_cancel()`` is polled at each one, and a true answer raises
+    :class:`MdStatistics.AnalysisCancelledError` from inside the computation.
+    """
+
+    def __init__(self, report=None, should_cancel=None):
+        self.report = report
+        self.should_cancel = should_cancel
+        self.percent = 0
+
+    def checkpoint(self, stage, done=0, total=1):
+        if self.should_cancel and self.should_cancel():
+            raise AnalysisCancelledError
+        start, end = ANALYSIS_STAGES[stage]
+        fraction = min(done / total, 1.0) if total else 1.0
+        # Never backwards: some stages restart their own count part-way (an
+        # imputation round, a CVA solver fallback), which is not lost work.
+        self.percent = max(self.percent, int(start + (end - start) * fraction))
+        if self.report:
+            self.report(stage, done, total, self.percent)
+
+    def callback(self, stage):
+        """A ``progress_callback(done, total)`` that checkpoints within ``stage``."""
+        return lambda done, total: self.checkpoint(stage, done, total)
+
+
+class AnalysisJob:
+    """One analysis run: what it was asked for, what it loaded, what it produced.
+
+    Created and filled in on the main thread before the compute phase, handed
+    to the worker, and handed back for persisting. Nothing in it is shared with
+    the GUI while the worker holds it.
+    """
+
+    def __init__(
+        self,
+        analysis_type,
+        analysis_name="",
+        superimposition_method="",
+        cva_group_by=None,
+        manova_group_by=None,
+        params=None,
+    ):
+        self.analysis_type = analysis_type
+        self.analysis_name = analysis_name
+        self.superimposition_method = superimposition_method
+        self.cva_group_by = cva_group_by
+        self.manova_group_by = manova_group_by
+        self.params = params or {}
+
+        # Loaded on the main thread (ModanController._begin_analysis)
+        self.ds_ops = None
+        self.cache_key = None
+        self.cached = False
+        self.objects_by_id = {}
+
+        # Produced by the compute phase
+        self.result = None
+        self.cva_result = None
+        self.manova_result = None
+        # Requested CVA/MANOVA runs that failed while PCA succeeded
+        self.subordinate_failures = []
+
+
+class AnalysisWorker(QThread):
+    """Runs an analysis's compute phase on its own thread.
+
+    ``compute(job, progress)`` does the work; the worker only supplies an
+    :class:`AnalysisProgress` wired to its signals and to
+    ``QThread.requestInterruption``, and reports how it ended. Its signals are
+    emitted from the worker thread and delivered queued to receivers on the
+    main thread.
+    """
+
+    progress = pyqtSignal(str, int, int, int)  # stage, done, total, percent
+    succeeded = pyqtSignal(object)  # AnalysisJob
+    cancelled = pyqtSignal()
+    failed = pyqtSignal(str)  # error_message
+
+    def __init__(self, job, compute, parent=None):
+        super().__init__(parent)
+        self.job = job
+        self.compute = compute
+
+    def cancel(self):
+        """Ask the computation to stop at its next checkpoint."""
+        self.requestInterruption()
+
+    def run(self):
+        progress = AnalysisProgress(self.progress.emit, self.isInterruptionRequested)
+        try:
+            self.compute(self.job, progress)
+        except AnalysisCancelledError:
+            logger.info("Analysis cancelled")
+            self.cancelled.emit()
+        except Exception as e:
+            logger.exception("Analysis failed in worker thread")
+            self.failed.emit(str(e))
+        else:
+            self.succeeded.emit(self.job)
@@ -0,0 +1,219 @@
+"""Preparing image files for storage.
+
+Attaching a photograph means hashing it, reading its EXIF date, writing a
+working copy (downscaled if the photo is oversized, see ``MdModel.IMAGE_MAX_DIM``)
+and archiving the original, all into the content-addressed store
+(``MdMediaStore``). :func:`store_image` does that for one file,
+reading it once to hash it in chunks and opening it once with PIL: the EXIF
+comes from the header, and only an oversized photo is decoded at all.
+
+It touches nothing but the files, so the images of an import can be prepared
+on a pool of worker processes (:func:`store_images`) while the database rows
+are written from the results on the main thread. Decoding and resampling a
+24 MP photograph takes most of a second, and an import may reference
+thousands. This module is imported by the workers, so it keeps to the
+standard library and PIL.
+"""
+
+import datetime
+import logging
+import os
+import shutil
+import time
+
+from PIL import Image
+from PIL.ExifTags import TAGS
+
+import MdMediaStore
+
+logger = logging.getLogger(__name__)
+
+
+def open_image(path, data=None):
+    """``path`` opened with PIL, or None when PIL cannot read it.
+
+    Opening reads only the header; pixels are decoded when first used. ``data``
+    is the file's content, when it has been read already. A file that cannot
+    be opened at all raises.
+    """
+    try:
+        return Image.open(data if data is not None else path)
+    except (FileNotFoundError, PermissionError) as e:
+        logger.error(f"Cannot open image file {path}: {e}")
+        raise
+    except Exception as e:
+        logger.warning(f"Cannot process image {path}: {e}")
+        return None
+
+
+def exif_info(path, img):
+    """Date and GPS position of an image, from its EXIF where present.
+
+    ``img`` is ``path`` opened with :func:`open_image`; when it is None every
+    field is empty. Without an EXIF date the file's modification time is used.
+    """
+    image_info = {"date": "", "time": "", "latitude": "", "longitude": "", "map_datum": ""}
+    if img is None:
+        return {"datetime": "", "latitude": "", "longitude": "", "map_datum": ""}
+    ret = {}
+    try:
+        info = img._getexif()
+        for tag, value in info.items():
+            decoded = TAGS.get(tag, tag)
+            ret[decoded] = value
+        try:
+            if ret["GPSInfo"] is not None:
+                gps_info = ret["GPSInfo"]
+            degree_symbol = "°"
+            minute_symbol = "'"
+            longitude = str(int(gps_info[4][0])) + degree_symbol + str(gps_info[4][1]) + minute_symbol + gps_info[3]
+            latitude = str(int(gps_info[2][0])) + degree_symbol + str(gps_info[2][1]) + minute_symbol + gps_info[1]
+            map_datum = gps_info[18]
+            image_info["latitude"] = latitude
+            image_info["longitude"] = longitude
+            image_info["map_datum"] = map_datum
+        except KeyError:
+            pass
+
+        for tag in ("DateTimeOriginal", "DateTimeDigitized", "DateTime"):
+            try:
+                if ret[tag] is not None:
+                    image_info["date"], image_info["time"] = ret[tag].split()
+            except KeyError:
+                pass
+    except Exception:
+        pass
+
+    if image_info["date"] == "":
+        str1 = time.ctime(os.path.getmtime(path))
+        datetime_object = datetime.datetime.strptime(str1, "%a %b %d %H:%M:%S %Y").astimezone()
+        image_info["date"] = datetime_object.strftime("%Y-%m-%d")
+        image_info["time"] = datetime_object.strftime("%H:%M:%S")
+    else:
+        image_info["date"] = "-".join(image_info["date"].split(":"))
+    image_info["datetime"] = image_info["date"] + " " + image_info["time"]
+    return image_info
+
+
+def downscale_image(img, source_path, target_path, max_dim, jpeg_quality):
+    """Write a downscaled working copy of the open image ``img`` to ``target_path``.
+
+    Returns True only when the image is oversized (longer side above
+    ``max_dim``) and the downscaled copy was written successfully. Returns
+    False when no downscale is needed OR on any failure, so the caller falls
+    back to copying the original verbatim — an attach must never fail or lose
+    data because downscaling did. ``img`` is resized in place.
+    """
+    try:
+        if max(img.size) <= max_dim:
+            return False
+        exif = img.info.get("exif")
+        img.thumbnail((max_dim, max_dim), Image.LANCZOS)
+        save_kwargs = {}
+        if target_path.split(".")[-1].lower() in ("jpg", "jpeg"):
+            if img.mode not in ("RGB", "L", "CMYK"):
+                img = img.convert("RGB")
+            save_kwargs["quality"] = jpeg_quality
+            save_kwargs["optimize"] = True
+            if exif:
+                save_kwargs["exif"] = exif
+        img.save(target_path, **save_kwargs)
+        logger.info(f"Stored downscaled working copy {img.size} of {source_path}")
+        return True
+    except Exception as e:
+        logger.warning(f"Downscale of {source_path} failed, storing original verbatim: {e}")
+        return False
+
+
+def store_image(source_path, storage_base, extension, max_dim, jpeg_quality):
+    """Store ``source_path`` as an image's working copy and describe it.
+
+    The working copy is downscaled to ``max_dim`` when the photo is larger,
+    in which case the original is archived verbatim as well; otherwise it is
+    the file itself. Both go into the store under ``storage_base`` as files
+    with ``extension``. Returns a dict with the file's ``size``, ``ctime``,
+    ``mtime``, ``md5hash``, the EXIF fields of :func:`exif_info`, the content
+    hashes of the working copy (``file_hash``) and the archived original
+    (``original_hash``, None when there is none) and whether it was
+    ``downscaled``.
+    """
+    stat_result = os.stat(source_path)
+    file_info = {"size": stat_result.st_size, "ctime": stat_result.st_ctime, "mtime": stat_result.st_mtime}
+    try:
+        file_info["md5hash"] = MdMediaStore.md5_of_file(source_path)
+    except OSError as e:
+        logger.error(f"Cannot read file for MD5 hash {source_path}: {e}")
+        raise
+
+    try:
+        working_path = MdMediaStore.temporary_path(storage_base, extension)
+    except OSError as e:
+        logger.error(f"Failed to create a file in {storage_base}: {e}")
+        raise ValueError(f"Cannot create directory for file storage: {e}") from e
+
+    try:
+        img = open_image(source_path)
+        try:
+            exif = exif_info(source_path, img)
+            downscaled = img is not None and downscale_image(img, source_path, working_path, max_dim, jpeg_quality)
+        finally:
+            if img is not None:
+                img.close()
+        file_info["exifdatetime"] = exif["datetime"]
+        file_info["latitude"] = exif["latitude"]
+        file_info["longitude"] = exif["longitude"]
+        file_info["map_datum"] = exif["map_datum"]
+        file_info["downscaled"] = downscaled
+
+        if downscaled:
+            # Working copy is downscaled: archive the pristine original
+            # alongside it so nothing is lost.
+            file_info["file_hash"] = MdMediaStore.put_file(storage_base, working_path, extension, move=True)
+            try:
+                file_info["original_hash"] = MdMediaStore.put_file(
+                    storage_base, source_path, extension, digest=file_info["md5hash"]
+                )
+            except (OSError, shutil.Error) as e:
+                logger.error(f"Failed to archive original {source_path}: {e}")
+                raise ValueError(f"Cannot archive original file: {e}") from e
+        else:
+            # Small enough (or not downscalable): store verbatim
+            file_info["original_hash"] = None
+            try:
+                file_info["file_hash"] = MdMediaStore.put_file(
+                    storage_base, source_path, extension, digest=file_info["md5hash"]
+                )
+            except (OSError, shutil.Error) as e:
+                logger.error(f"Failed to copy file from {source_path} to {storage_base}: {e}")
+                raise ValueError(f"Cannot copy file: {e}") from e
+    finally:
+        if os.path.exists(working_path):
+            os.remove(working_path)
+    return file_info
+
+
+def default_jobs():
+    """Worker processes to use for a batch of images: one per core."""
+    return max(1, os.cpu_count() or 1)
+
+
+def store_images(jobs, max_dim, jpeg_quality, n_jobs=1):
+    """:func:`store_image` each ``(source_path, storage_base, extension)`` in ``jobs``.
+
+    Yields the file descriptions in the order of ``jobs``. With more than one
+    job they are prepared on a joblib process pool and yielded as they
+    finish; the pool stays up between calls, so batch after batch of an
+    import reuses the same workers. An error in any file is raised here.
+    """
+    n_jobs = max(1, int(n_jobs or 1))
+    if n_jobs == 1 or len(jobs) < 2:
+        for source_path, storage_base, extension in jobs:
+            yield store_image(source_path, storage_base, extension, max_dim, jpeg_quality)
+        return
+
+    from joblib import Parallel, delayed
+
+    yield from Parallel(n_jobs=min(n_jobs, len(jobs)), return_as="generator")(
+        delayed(store_image)(source_path, storage_base, extension, max_dim, jpeg_quality)
+        for source_path, storage_base, extension in jobs
+    )
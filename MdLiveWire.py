@@ -17,10 +17,20 @@ The module is split so each half is independently testable:
 
 :func:`build_livewire` ties them together and, for large images, works on a
 downscaled cost field while exposing full-resolution ``(x, y)`` coordinates.
+
+:class:`WindowedLiveWire` answers the same queries without a whole-image pass
+at all, so it can work on the full-resolution image. Its cost field and edge
+weights are computed tile by tile as searches reach them. Each Dijkstra run
+covers only a window around the seed and the cursor, growing it while the
+path runs along its side, and stops once every node cheaper than the straight
+line to the cursor is settled. A segment too long for such a window is routed
+over a coarser level and refined at full resolution near the cursor.
 """
 
 from __future__ import annotations
 
+from collections import OrderedDict
+
 import numpy as np
 from scipy import ndimage
 from scipy.sparse import csr_matrix
@@ -260,7 +270,431 @@ class LiveWire:
         return self.path_to(target)
 
 
-def build_livewire(gray, max_dim=1024):
+# -- windowed live-wire ------------------------------------------------------ #
+
+# Side of the tiles WindowedLiveWire computes its cost field and edge weights
+# in, as searches first reach them.
+_TILE = 64
+# Tiles of edge weights kept: 8 float32 weights per pixel, 128 KB a tile.
+_TILE_CACHE_CAP = 256
+# Pixels a single windowed search may span before a segment is routed over
+# the coarse level instead.
+_WINDOW_NODE_BUDGET = 512 * 512
+# Least margin (in cost-field pixels) around the box spanned by seed and
+# cursor; it is at least half the box's longer side as well.
+_MIN_MARGIN = 16
+# A search settles every node up to this many times the cost of the straight
+# line to the cursor, so nearby cursor positions reuse it.
+_LIMIT_SLACK = 1.5
+# Full-resolution pixels at the cursor end of a segment routed over the coarse
+# level that are traced at full resolution.
+_REFINE_RADIUS = 48
+
+
+class _SobelField:
+    """Traversal cost and edge direction of a grayscale image, computed on demand."""
+
+    def __init__(self, gray):
+        arr = np.asarray(gray, dtype=np.float32)
+        if arr.ndim != 2 or arr.size == 0:
+            raise ValueError("gray must be a non-empty 2D image")
+        self.height, self.width = arr.shape
+        # Two edge pixels on every side: a tile's fields need their one-pixel
+        # ring, and Sobel one more, the same as mode="nearest" on the image.
+        self._padded = np.pad(arr, 2, mode="edge")
+        self.peak = 0.0
+        for y0 in range(0, self.height, 256):
+            _gx, _gy, magnitude = self.gradient(y0, min(y0 + 256, self.height), 0, self.width)
+            self.peak = max(self.peak, float(magnitude.max()))
+
+    def gradient(self, y0, y1, x0, x1):
+        """Sobel ``(gx, gy, magnitude)`` of image rows ``y0:y1``, columns ``x0:x1``.
+
+        The bounds may reach one pixel outside the image, where it is
+        continued by its edge pixels.
+        """
+        block = self._padded[y0 + 1 : y1 + 3, x0 + 1 : x1 + 3]
+        gx, gy, magnitude = _sobel_gradient(block)
+        return gx[1:-1, 1:-1], gy[1:-1, 1:-1], magnitude[1:-1, 1:-1]
+
+    def fields(self, y0, y1, x0, x1):
+        """Cost and unit edge direction ``(cost, dirx, diry)`` of rows ``y0:y1``, columns ``x0:x1``.
+
+        As :func:`compute_cost_field` and :meth:`LiveWire._unit_edge_direction`
+        give them; the bounds may reach one pixel outside the image.
+        """
+        gx, gy, magnitude = self.gradient(y0, y1, x0, x1)
+        if self.peak <= 0:
+            cost = np.ones_like(magnitude)
+        else:
+            cost = np.clip(1.0 - magnitude / self.peak, _MIN_COST, 1.0)
+        safe = magnitude > 0
+        dirx = np.where(safe, gy / np.where(safe, magnitude, 1.0), 0.0)
+        diry = np.where(safe, -gx / np.where(safe, magnitude, 1.0), 0.0)
+        return cost, dirx, diry
+
+
+class EncodedField:
+    """Traversal cost and edge direction of an image at two bytes a pixel.
+
+    ``strength`` is the Sobel magnitude relative to the image's strongest
+    edge, in 255ths, and ``angle`` the direction along the edge, in 256ths of
+    a turn: uint8 arrays of the image's shape, small enough to keep on disk
+    beside the image and memory-map (``MdLiveWireStore``). A pixel whose
+    strength rounds to 0 has no direction, as one without any gradient.
+    """
+
+    def __init__(self, strength, angle):
+        if strength.ndim != 2 or strength.shape != angle.shape or strength.size == 0:
+            raise ValueError("strength and angle must be non-empty 2D arrays of one shape")
+        self.strength = strength
+        self.angle = angle
+        self.height, self.width = strength.shape
+
+    @classmethod
+    def from_gray(cls, gray):
+        """Encode the gradient of a 2D grayscale image, a strip of rows at a time."""
+        source = _SobelField(gray)
+        strength = np.empty((source.height, source.width), dtype=np.uint8)
+        angle = np.empty((source.height, source.width), dtype=np.uint8)
+        for y0 in range(0, source.height, 256):
+            y1 = min(y0 + 256, source.height)
+            gx, gy, magnitude = source.gradient(y0, y1, 0, source.width)
+            if source.peak > 0:
+                strength[y0:y1] = np.rint(magnitude / source.peak * 255.0)
+            else:
+                strength[y0:y1] = 0
+            # Along the edge is the gradient turned a quarter: (gy, -gx).
+            turns = np.arctan2(-gx, gy) / (2.0 * np.pi)
+            angle[y0:y1] = np.rint(turns * 256.0).astype(np.int64) % 256
+        return cls(strength, angle)
+
+    def fields(self, y0, y1, x0, x1):
+        """As :meth:`_SobelField.fields`, decoded; the bounds may reach one pixel outside."""
+        pad = ((max(0, -y0), max(0, y1 - self.height)), (max(0, -x0), max(0, x1 - self.width)))
+        rows = slice(max(0, y0), min(y1, self.height))
+        cols = slice(max(0, x0), min(x1, self.width))
+        strength = np.pad(np.asarray(self.strength[rows, cols]), pad, mode="edge").astype(np.float32) / 255.0
+        turns = np.pad(np.asarray(self.angle[rows, cols]), pad, mode="edge").astype(np.float32) / 256.0
+        cost = np.clip(1.0 - strength, _MIN_COST, 1.0)
+        safe = strength > 0
+        dirx = np.where(safe, np.cos(2.0 * np.pi * turns), 0.0)
+        diry = np.where(safe, np.sin(2.0 * np.pi * turns), 0.0)
+        return cost, dirx, diry
+
+
+class _Search:
+    """One Dijkstra run: its window, the distances and predecessors in it, and
+    the ``limit`` it settled nodes up to.
+
+    ``open_sides`` tells, for the left, top, right and bottom side of the
+    window, whether the image goes on past it.
+    """
+
+    def __init__(self, window, image_size, dist, predecessors, limit):
+        self.x0, self.y0, self.x1, self.y1 = window
+        self.dist = dist
+        self.predecessors = predecessors
+        self.limit = limit
+        # Set once the window could not grow within the node budget.
+        self.maxed = False
+        width, height = image_size
+        self.open_sides = (self.x0 > 0, self.y0 > 0, self.x1 < width, self.y1 < height)
+
+    def local_index(self, cx, cy):
+        """Index of cost-field pixel ``(cx, cy)`` in the window, or None outside it."""
+        if self.x0 <= cx < self.x1 and self.y0 <= cy < self.y1:
+            return (cy - self.y0) * (self.x1 - self.x0) + (cx - self.x0)
+        return None
+
+    def trace(self, seed, target):
+        """Cost-field pixels of the path ``seed`` -> ``target``, seed first; None if unsettled."""
+        index = self.local_index(*target)
+        if index is None or not np.isfinite(self.dist[index]):
+            return None
+        width = self.x1 - self.x0
+        seed_index = self.local_index(*seed)
+        chain = [index]
+        while index != seed_index:
+            index = int(self.predecessors[index])
+            chain.append(index)
+        chain.reverse()
+        return [(self.x0 + i % width, self.y0 + i // width) for i in chain]
+
+    def sides_touched(self, pixels):
+        """Which open sides of the window ``pixels`` run along, as four bools."""
+        xs = [cx for cx, _cy in pixels]
+        ys = [cy for _cx, cy in pixels]
+        left, top, right, bottom = self.open_sides
+        return (
+            left and min(xs) == self.x0,
+            top and min(ys) == self.y0,
+            right and max(xs) == self.x1 - 1,
+            bottom and max(ys) == self.y1 - 1,
+        )
+
+
+class WindowedLiveWire:
+    """Live-wire over a grayscale image, searching only around the seed.
+
+    Answers the queries of :class:`LiveWire` (``set_seed``, ``path_to``,
+    ``find_path``) with the same edge costs, magnitude and direction terms
+    alike, but builds no more of the graph than a search needs. A query runs
+    Dijkstra over the
+    window spanned by seed and cursor plus a margin, bounded by the cost of
+    the straight line between them, so the cursor is settled at the latest
+    when the straight line would be. The run is kept per seed and reused
+    for every cursor position it has settled.
+
+    The path is the cheapest within the window. Where it runs along a side,
+    a cheaper one may lie beyond, so that side grows and the search runs
+    again. A detour that leaves the window while the path inside it stays
+    clear of its sides is not found: the margin is half the seed-cursor
+    distance, and an outline wandering further than that between two
+    clicks is rarely the one being traced.
+
+    Args:
+        gray: 2D grayscale image, or its :class:`EncodedField`.
+        scale: full-resolution pixels per pixel of ``gray``.
+        coarse: optional :class:`WindowedLiveWire` over a downscaled copy of
+            the image. Segments whose window would exceed the node budget are
+            routed over it and traced at full resolution only near the cursor.
+            Without one, a search whose window has to grow covers the whole
+            image, as :class:`LiveWire` does.
+    """
+
+    _W_MAGNITUDE = LiveWire._W_MAGNITUDE
+    _W_DIRECTION = LiveWire._W_DIRECTION
+    _SEED_CACHE_CAP = LiveWire._SEED_CACHE_CAP
+
+    def __init__(self, gray, scale=1.0, coarse=None):
+        self._field = gray if isinstance(gray, EncodedField) else _SobelField(gray)
+        self.height, self.width = self._field.height, self._field.width
+        self.scale = float(scale)
+        self.coarse = coarse
+        self._tiles = OrderedDict()
+        # The graph of the whole image, once a search has needed it.
+        self._graph = None
+        self._seed = None
+        self._searches = OrderedDict()
+
+    # -- fields and weights -------------------------------------------------- #
+    def _tile_weights(self, tx, ty):
+        """Edge weights out of the pixels of tile ``(tx, ty)``, shape ``(8, h, w)``.
+
+        Weight ``k`` is that of the step ``_NEIGHBOURS[k]``, as
+        :meth:`LiveWire._build_graph` weighs it; inf where the step leaves
+        the image.
+        """
+        key = (tx, ty)
+        weights = self._tiles.get(key)
+        if weights is not None:
+            self._tiles.move_to_end(key)
+            return weights
+        x0, y0 = tx * _TILE, ty * _TILE
+        x1, y1 = min(x0 + _TILE, self.width), min(y0 + _TILE, self.height)
+        cost, dirx, diry = self._field.fields(y0 - 1, y1 + 1, x0 - 1, x1 + 1)
+        h, w = y1 - y0, x1 - x0
+        rows = np.arange(y0, y1)[:, None]
+        cols = np.arange(x0, x1)[None, :]
+        weights = np.empty((len(_NEIGHBOURS), h, w), dtype=np.float32)
+        for k, (dx, dy, dist) in enumerate(_NEIGHBOURS):
+            src = (slice(1, 1 + h), slice(1, 1 + w))
+            dst = (slice(1 + dy, 1 + dy + h), slice(1 + dx, 1 + dx + w))
+            lx, ly = dx / dist, dy / dist
+            dp_signed = dirx[src] * lx + diry[src] * ly
+            sign = np.where(dp_signed >= 0, 1.0, -1.0)
+            dq = sign * (dirx[dst] * lx + diry[dst] * ly)
+            fdir = (np.arccos(np.clip(np.abs(dp_signed), -1.0, 1.0)) + np.arccos(np.clip(dq, -1.0, 1.0))) / np.pi
+            local = (self._W_MAGNITUDE * cost[dst] + self._W_DIRECTION * fdir) * dist
+            inside = (rows + dy >= 0) & (rows + dy < self.height) & (cols + dx >= 0) & (cols + dx < self.width)
+            weights[k] = np.where(inside, local, np.inf)
+        self._tiles[key] = weights
+        if len(self._tiles) > _TILE_CACHE_CAP:
+            self._tiles.popitem(last=False)
+        return weights
+
+    def _window_weights(self, x0, y0, x1, y1):
+        """Edge weights out of every pixel of a window, shape ``(8, h, w)``."""
+        weights = np.empty((len(_NEIGHBOURS), y1 - y0, x1 - x0), dtype=np.float32)
+        for ty in range(y0 // _TILE, (y1 - 1) // _TILE + 1):
+            for tx in range(x0 // _TILE, (x1 - 1) // _TILE + 1):
+                tile = self._tile_weights(tx, ty)
+                ax0, ay0 = max(x0, tx * _TILE), max(y0, ty * _TILE)
+                ax1, ay1 = min(x1, (tx + 1) * _TILE), min(y1, (ty + 1) * _TILE)
+                weights[:, ay0 - y0 : ay1 - y0, ax0 - x0 : ax1 - x0] = tile[
+                    :, ay0 - ty * _TILE : ay1 - ty * _TILE, ax0 - tx * _TILE : ax1 - tx * _TILE
+                ]
+        return weights
+
+    def _window_graph(self, x0, y0, x1, y1):
+        """The 8-connected graph of a window's pixels, in window-local indices."""
+        weights = self._window_weights(x0, y0, x1, y1)
+        h, w = y1 - y0, x1 - x0
+        index = np.arange(h * w).reshape(h, w)
+        src_all, dst_all, wgt_all = [], [], []
+        for k, (dx, dy, _dist) in enumerate(_NEIGHBOURS):
+            rows = slice(max(0, -dy), h - max(0, dy))
+            cols = slice(max(0, -dx), w - max(0, dx))
+            moved_rows = slice(rows.start + dy, rows.stop + dy)
+            moved_cols = slice(cols.start + dx, cols.stop + dx)
+            wgt = weights[k][rows, cols].reshape(-1)
+            finite = np.isfinite(wgt)
+            src_all.append(index[rows, cols].reshape(-1)[finite])
+            dst_all.append(index[moved_rows, moved_cols].reshape(-1)[finite])
+            wgt_all.append(wgt[finite])
+        n = h * w
+        return csr_matrix(
+            (np.concatenate(wgt_all).astype(np.float64), (np.concatenate(src_all), np.concatenate(dst_all))),
+            shape=(n, n),
+        )
+
+    def _line_cost(self, start, end):
+        """Cost of the 8-connected straight line ``start`` -> ``end``: a bound on the best path."""
+        (x, y), (ex, ey) = start, end
+        total = 0.0
+        steps = {(dx, dy): k for k, (dx, dy, _dist) in enumerate(_NEIGHBOURS)}
+        while (x, y) != (ex, ey):
+            remaining = max(abs(ex - x), abs(ey - y))
+            dx = int(round((ex - x) / remaining))
+            dy = int(round((ey - y) / remaining))
+            tile = self._tile_weights(x // _TILE, y // _TILE)
+            total += float(tile[steps[(dx, dy)], y % _TILE, x % _TILE])
+            x, y = x + dx, y + dy
+        return total
+
+    # -- searching ----------------------------------------------------------- #
+    def _search(self, seed, target, grow=True):
+        """The path ``seed`` -> ``target`` (cost-field pixels), reusing the seed's search.
+
+        The window starts at the box spanned by the two plus a margin, or the
+        seed's last window if that is larger. With ``grow``, each side the
+        path runs along then doubles its margin until the path touches none;
+        without, the best path inside the first window is taken. Returns None
+        when growing would exceed the node budget and there is a coarse level
+        to route over instead. Without a coarse level, a search that has to
+        grow covers the whole image.
+        """
+        route = grow and self.coarse is not None
+        cached = self._searches.get(seed)
+        if cached is not None:
+            self._searches.move_to_end(seed)
+            pixels = cached.trace(seed, target)
+            if pixels is not None and not any(cached.sides_touched(pixels)):
+                return pixels
+            if cached.maxed and route:
+                return None
+        limit = _LIMIT_SLACK * self._line_cost(seed, target) + _MIN_COST
+        margin = max(_MIN_MARGIN, max(abs(target[0] - seed[0]), abs(target[1] - seed[1])) // 2)
+        # The box spanned by seed and target, and the window around it as
+        # left, top, right, bottom (exclusive).
+        box = (min(seed[0], target[0]), min(seed[1], target[1]), max(seed[0], target[0]), max(seed[1], target[1]))
+        window = [box[0] - margin, box[1] - margin, box[2] + margin + 1, box[3] + margin + 1]
+        if cached is not None:
+            # Cursor moves from one seed grow its window rather than start over.
+            limit = max(limit, cached.limit)
+            window = [
+                min(window[0], cached.x0),
+                min(window[1], cached.y0),
+                max(window[2], cached.x1),
+                max(window[3], cached.y1),
+            ]
+        search = None
+        while True:
+            x0, y0 = max(0, window[0]), max(0, window[1])
+            x1, y1 = min(self.width, window[2]), min(self.height, window[3])
+            over_budget = (x1 - x0) * (y1 - y0) > _WINDOW_NODE_BUDGET
+            if over_budget and route:
+                if search is not None:
+                    search.maxed = True
+                    self._keep(seed, search)
+                return None
+            if (x0, y0, x1, y1) == (0, 0, self.width, self.height):
+                # The whole image: settle all of it, once for every target.
+                limit = np.inf
+                if self._graph is None:
+                    self._graph = self._window_graph(x0, y0, x1, y1)
+                graph = self._graph
+            else:
+                graph = self._window_graph(x0, y0, x1, y1)
+            dist, predecessors = dijkstra(
+                graph,
+                directed=True,
+                indices=(seed[1] - y0) * (x1 - x0) + (seed[0] - x0),
+                return_predecessors=True,
+                limit=limit,
+            )
+            search = _Search((x0, y0, x1, y1), (self.width, self.height), dist, predecessors, limit)
+            # The straight line lies inside the window and within the limit,
+            # so the target is always settled.
+            pixels = search.trace(seed, target)
+            touched = search.sides_touched(pixels)
+            # Past the budget with nothing to route over, the window's own
+            # best path is the answer.
+            if not grow or over_budget or not any(touched):
+                break
+            if not route:
+                # Nothing coarser to turn to, so this level is small enough
+                # to search whole, as LiveWire does.
+                window = [0, 0, self.width, self.height]
+                continue
+            left, top, right, bottom = touched
+            window = [
+                x0 - (box[0] - x0) if left else x0,
+                y0 - (box[1] - y0) if top else y0,
+                x1 + (x1 - box[2]) if right else x1,
+                y1 + (y1 - box[3]) if bottom else y1,
+            ]
+        self._keep(seed, search)
+        return pixels
+
+    def _keep(self, seed, search):
+        self._searches[seed] = search
+        self._searches.move_to_end(seed)
+        if len(self._searches) > self._SEED_CACHE_CAP:
+            self._searches.popitem(last=False)
+
+    # -- coordinate helpers -------------------------------------------------- #
+    _clamp = LiveWire._clamp
+    _to_full = LiveWire._to_full
+
+    # -- queries ------------------------------------------------------------- #
+    def set_seed(self, seed):
+        """Start paths at ``seed`` (full-res ``(x, y)``). The search runs per target."""
+        self._seed = self._clamp(seed[0], seed[1])
+
+    def path_to(self, target):
+        """Least-cost path seed -> ``target`` as full-res ``[[x, y], ...]``.
+
+        Includes both endpoints. Without a seed, the target alone; see
+        :meth:`LiveWire.path_to`.
+        """
+        cx, cy = self._clamp(target[0], target[1])
+        if self._seed is None:
+            return [self._to_full(cx, cy)]
+        pixels = self._search(self._seed, (cx, cy))
+        if pixels is None:
+            return self._coarse_path(self._to_full(*self._seed), [target[0], target[1]])
+        return [self._to_full(px, py) for px, py in pixels]
+
+    def _coarse_path(self, seed, target):
+        """Path over the coarse level, traced at this level's resolution near ``target``."""
+        route = self.coarse.find_path(seed, target)
+        junction = next(
+            (i for i, (x, y) in enumerate(route) if max(abs(x - target[0]), abs(y - target[1])) <= _REFINE_RADIUS),
+            len(route) - 1,
+        )
+        start = self._clamp(*route[junction])
+        pixels = self._search(start, self._clamp(target[0], target[1]), grow=False)
+        return route[:junction] + [self._to_full(px, py) for px, py in pixels]
+
+    def find_path(self, seed, target):
+        """Convenience: :meth:`set_seed` then :meth:`path_to` in one call."""
+        self.set_seed(seed)
+        return self.path_to(target)
+
+
+def build_livewire(gray, max_dim=1024, windowed=False):
     """Build a :class:`LiveWire` from a grayscale image, downscaling if large.
 
     Args:
@@ -268,9 +702,13 @@ def build_livewire(gray, max_dim=1024):
         max_dim: cap on the cost field's longer side. Images above this are
             downsampled by an integer factor so the graph stays tractable; the
             returned live-wire still speaks full-resolution ``(x, y)``.
+        windowed: build a :class:`WindowedLiveWire` over the full-resolution
+            image instead. ``max_dim`` then caps its coarse level, which long
+            segments are routed over.
 
     Returns:
-        A :class:`LiveWire`, or ``None`` if ``gray`` is empty / not 2D.
+        A :class:`LiveWire` (or :class:`WindowedLiveWire`), or ``None`` if
+        ``gray`` is empty / not 2D.
     """
     arr = np.asarray(gray)
     if arr.ndim != 2 or arr.size == 0:
@@ -278,8 +716,11 @@ def build_livewire(gray, max_dim=1024):
 
     scale = 1.0
     longer = max(arr.shape)
-    if max_dim and longer > max_dim:
-        factor = int(np.ceil(longer / max_dim))
+    factor = int(np.ceil(longer / max_dim)) if max_dim and longer > max_dim else 1
+    if windowed:
+        coarse = WindowedLiveWire(arr[::factor, ::factor], scale=float(factor)) if factor > 1 else None
+        return WindowedLiveWire(arr, coarse=coarse)
+    if factor > 1:
         arr = arr[::factor, ::factor]
         scale = float(factor)
 
@@ -0,0 +1,271 @@
+"""Live-wire cost fields of images, kept on disk.
+
+Snapping a trace needs the Sobel gradient of the image. Computing it from the
+pixmap each time a specimen is opened costs about as much as the trace itself,
+and for a whole image. This module keeps each image's field, encoded at two
+bytes a pixel (``MdLiveWire.EncodedField``), and that of the coarse level that
+long segments are routed over. They live as ``.npy`` files in a directory of
+the storage directory (``MdMediaStore.derived_path``): beside a stored image,
+so they go when it does, and under its content hash for an image traced from
+anywhere else, never beside the user's own file. Without a storage directory
+they are only kept in memory. Opening them memory-maps the files, so only the
+tiles a trace reaches are read.
+
+Fields are built the first time an image is traced (:func:`open_livewire`), or
+ahead of time: while :func:`start_background_builds` has a builder running,
+``MdModel`` hands it every image it stores (:func:`schedule_builds`).
+"""
+
+import json
+import logging
+import math
+import os
+import queue
+import shutil
+import threading
+
+import numpy as np
+from PIL import Image
+
+import MdLiveWire
+import MdMediaStore
+
+logger = logging.getLogger(__name__)
+
+# MdMediaStore.derived_path kind of the field directory.
+SIDECAR_KIND = "livewire"
+
+# Name of the file in the field directory recording what was built from which
+# file; bumping FORMAT_VERSION makes every stored field rebuild.
+MANIFEST_NAME = "fields.json"
+FORMAT_VERSION = 1
+
+# Longer side of the coarse level, as MdLiveWire.build_livewire's max_dim.
+COARSE_MAX_DIM = 1024
+
+
+def field_directory(path, storage_base=None):
+    """Where the live-wire fields of the image at ``path`` are kept under ``storage_base``.
+
+    None without ``storage_base``: they are not kept.
+    """
+    return MdMediaStore.derived_path(path, SIDECAR_KIND, storage_base)
+
+
+def _signature(path):
+    stat_result = os.stat(path)
+    return {
+        "version": FORMAT_VERSION,
+        "size": stat_result.st_size,
+        "mtime_ns": stat_result.st_mtime_ns,
+        "coarse_max_dim": COARSE_MAX_DIM,
+    }
+
+
+def _read_manifest(path, directory):
+    """The manifest of the fields of ``path`` in ``directory`` if they were built from this file, else None."""
+    if directory is None:
+        return None
+    try:
+        with open(os.path.join(directory, MANIFEST_NAME), encoding="utf-8") as f:
+            manifest = json.load(f)
+        signature = _signature(path)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get("signature") == signature else None
+
+
+def is_built(path, storage_base=None):
+    """Whether current fields of the image at ``path`` are on disk; see :func:`field_directory`."""
+    return _read_manifest(path, field_directory(path, storage_base)) is not None
+
+
+# Held while fields are built, so the background builder and a viewer never
+# write the same directory at once.
+_build_lock = threading.Lock()
+
+
+def build_fields(path, storage_base=None):
+    """Compute the fields of the image at ``path`` and write them under ``storage_base``.
+
+    Does nothing when current fields are there already, and replaces any
+    built from another version of the file. Returns False (logged) when the
+    image cannot be read or the fields cannot be written, as without
+    ``storage_base``.
+    """
+    if storage_base is None:
+        logger.warning(f"Cannot build live-wire fields for {path}: no storage directory to keep them in")
+        return False
+    with _build_lock:
+        try:
+            directory = field_directory(path, storage_base)
+            if _read_manifest(path, directory) is not None:
+                return True
+            signature = _signature(path)
+            factor, levels = _encode(path)
+            _write_fields(directory, signature, factor, levels)
+        except Exception as e:
+            logger.warning(f"Cannot build live-wire fields for {path}: {e}")
+            return False
+    return True
+
+
+def _encode(path):
+    """The coarse level's downscale factor and the encoded field of each level."""
+    with Image.open(path) as img:
+        gray = np.asarray(img.convert("L"))
+    longer = max(gray.shape)
+    factor = math.ceil(longer / COARSE_MAX_DIM) if longer > COARSE_MAX_DIM else 1
+    levels = [MdLiveWire.EncodedField.from_gray(gray)]
+    if factor > 1:
+        levels.append(MdLiveWire.EncodedField.from_gray(gray[::factor, ::factor]))
+    return factor, levels
+
+
+def _write_fields(directory, signature, factor, levels):
+    if os.path.isdir(directory):
+        shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory, exist_ok=True)
+    for level, field in enumerate(levels):
+        MdMediaStore.write_atomically(
+            os.path.join(directory, f"{level}_strength.npy"), lambda f, a=field.strength: np.save(f, a)
+        )
+        MdMediaStore.write_atomically(
+            os.path.join(directory, f"{level}_angle.npy"), lambda f, a=field.angle: np.save(f, a)
+        )
+    manifest = {"signature": signature, "width": levels[0].width, "height": levels[0].height, "factor": factor}
+    # Last (see MdMediaStore.write_atomically).
+    MdMediaStore.write_atomically(
+        os.path.join(directory, MANIFEST_NAME), lambda f: f.write(json.dumps(manifest).encode())
+    )
+
+
+def _livewire(factor, levels):
+    coarse = MdLiveWire.WindowedLiveWire(levels[1], scale=float(factor)) if factor > 1 else None
+    return MdLiveWire.WindowedLiveWire(levels[0], coarse=coarse)
+
+
+def load_livewire(path, storage_base=None):
+    """A ``MdLiveWire.WindowedLiveWire`` over the stored fields of ``path``.
+
+    The fields are memory-mapped, not read. None when there are no current
+    fields for the file or they cannot be read.
+    """
+    return _load(path, field_directory(path, storage_base))
+
+
+def _load(path, directory):
+    manifest = _read_manifest(path, directory)
+    if manifest is None:
+        return None
+    try:
+        factor = int(manifest["factor"])
+        levels = [
+            MdLiveWire.EncodedField(
+                np.load(os.path.join(directory, f"{level}_strength.npy"), mmap_mode="r"),
+                np.load(os.path.join(directory, f"{level}_angle.npy"), mmap_mode="r"),
+            )
+            for level in range(2 if factor > 1 else 1)
+        ]
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"Cannot read the live-wire fields of {path}: {e}")
+        return None
+    if (levels[0].width, levels[0].height) != (manifest["width"], manifest["height"]):
+        return None
+    return _livewire(factor, levels)
+
+
+def open_livewire(path, storage_base=None):
+    """The live-wire of the image at ``path``, building its fields first if need be.
+
+    None (logged) when the image cannot be read. Without ``storage_base``,
+    or when the fields cannot be written, the ones just computed are used
+    from memory.
+    """
+    try:
+        directory = field_directory(path, storage_base)
+    except OSError as e:
+        logger.warning(f"Cannot read image {path} for live-wire: {e}")
+        return None
+    wire = _load(path, directory)
+    if wire is not None:
+        return wire
+    with _build_lock:
+        # The background builder may have got to it in the meantime.
+        wire = _load(path, directory)
+        if wire is not None:
+            return wire
+        try:
+            signature = _signature(path)
+            factor, levels = _encode(path)
+        except Exception as e:
+            logger.warning(f"Cannot read image {path} for live-wire: {e}")
+            return None
+        if directory is not None:
+            try:
+                _write_fields(directory, signature, factor, levels)
+            except OSError as e:
+                logger.warning(f"Cannot write live-wire fields of {path}, keeping them in memory: {e}")
+    return _livewire(factor, levels)
+
+
+class _Builder:
+    """A daemon thread building the fields of queued image files in turn.
+
+    Daemon, so quitting never waits for it; a build cut short leaves no
+    manifest, and the image is built again when next needed.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="livewire-fields", daemon=True)
+        self._thread.start()
+
+    def schedule(self, paths, storage_base):
+        for path in paths:
+            self._queue.put((path, storage_base))
+
+    def stop(self):
+        self._queue.put(None)
+
+    def join(self, timeout=None):
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            path, storage_base = job
+            if os.path.exists(path):
+                build_fields(path, storage_base)
+
+
+_builder = None
+_builder_lock = threading.Lock()
+
+
+def start_background_builds():
+    """Start building the fields of images handed to :func:`schedule_builds`."""
+    global _builder
+    with _builder_lock:
+        if _builder is None:
+            _builder = _Builder()
+
+
+def schedule_builds(paths, storage_base):
+    """Queue the image files at ``paths`` for their fields under ``storage_base``; a no-op unless started."""
+    with _builder_lock:
+        if _builder is not None:
+            _builder.schedule(paths, storage_base)
+
+
+def stop_background_builds(wait=False):
+    """Stop the builder after the builds already queued, waiting for it with ``wait``."""
+    global _builder
+    with _builder_lock:
+        builder, _builder = _builder, None
+    if builder is not None:
+        builder.stop()
+        if wait:
+            builder.join()
@@ -0,0 +1,200 @@
+"""Content-addressed storage of attached images and 3D models.
+
+Each stored file is named by the MD5 of its content, under the storage
+directory as ``blobs/<first two hex digits>/<md5>.<ext>``. The rows that use a
+file (``MdImage.file_hash`` / ``original_hash``, ``MdThreeDModel.file_hash``)
+record its hash, so the same photograph attached to many objects, or carried
+into another dataset by a copy, is one file on disk, and copying or moving an
+object copies no bytes at all.
+
+Files derived from a stored file -- the image viewer's tile pyramid, live-wire
+fields, the parsed arrays of a 3D model -- are kept beside it in a sidecar
+directory (:func:`sidecar_path`) and are deleted with it. Those of a file
+outside the store go where they would be were it stored (:func:`derived_path`),
+never beside the user's own file.
+
+A file is not owned by any one row. The rows referring to a hash are its
+references, and it is deleted only when the last one is gone; see
+``MdModel.remove_media_files``. That count lives in the database, so it
+cannot drift from the rows it counts.
+
+This module works on files only, and keeps to the standard library: the
+image-import workers (``MdImageIngest``) write into the store from other
+processes.
+"""
+
+import glob
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+# Subdirectory of the storage directory that holds the stored files.
+BLOB_DIRNAME = "blobs"
+
+# Bytes read at a time when hashing a file.
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def md5_of_file(path):
+    """MD5 hex digest of the file at ``path``, read in chunks."""
+    hasher = hashlib.md5(usedforsecurity=False)
+    with open(path, "rb") as afile:
+        for chunk in iter(lambda: afile.read(HASH_CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def blob_path(storage_base, digest, extension):
+    """Where the file with content hash ``digest`` is stored."""
+    name = f"{digest}.{extension}" if extension else digest
+    return os.path.join(storage_base, BLOB_DIRNAME, digest[:2], name)
+
+
+def blob_digest(path):
+    """The content hash a stored file is named by, or None for any other path."""
+    shard = os.path.dirname(path)
+    digest = os.path.basename(path).split(".")[0]
+    if os.path.basename(os.path.dirname(shard)) != BLOB_DIRNAME or os.path.basename(shard) != digest[:2]:
+        return None
+    if len(digest) != 32 or any(c not in "0123456789abcdef" for c in digest):
+        return None
+    return digest
+
+
+def sidecar_path(path, kind):
+    """Directory for the files of ``kind`` derived from the file at ``path``.
+
+    It sits next to the file and goes when the file does (:func:`remove_file`,
+    :func:`remove_blob`), so a cache built from a file never outlives it.
+    """
+    return f"{path}.{kind}"
+
+
+def _inside(path, directory):
+    path, directory = os.path.realpath(path), os.path.realpath(directory)
+    try:
+        return os.path.commonpath([path, directory]) == directory
+    except ValueError:  # on another drive
+        return False
+
+
+def derived_path(path, kind, storage_base, digest=None):
+    """Directory for the files of ``kind`` derived from the file at ``path``, or None.
+
+    Beside a stored file or any file inside ``storage_base``
+    (:func:`sidecar_path`). Any other file's go where they would be were it
+    stored, by its content hash (``digest`` when the caller has it): they are
+    found wherever it is opened from, are in place once it is stored, and go
+    with :func:`remove_blob`. None for such a file without ``storage_base``,
+    for a caller to keep them in memory.
+    """
+    if blob_digest(path) is not None or (storage_base is not None and _inside(path, storage_base)):
+        return sidecar_path(path, kind)
+    if storage_base is None:
+        return None
+    extension = os.path.splitext(path)[1][1:]
+    return sidecar_path(blob_path(storage_base, digest or md5_of_file(path), extension), kind)
+
+
+def write_atomically(target, write):
+    """Write the file at ``target`` with ``write(f)``, ``f`` a binary file, all or nothing.
+
+    It is written beside ``target`` and renamed into place, so a reader never
+    sees it half-written, and nothing is left behind when ``write`` fails.
+    A directory of derived files writes its manifest this way last, so files
+    cut short by a crash are never taken for current ones.
+    """
+    partial = target + ".partial-" + os.urandom(4).hex()
+    try:
+        with open(partial, "wb") as f:
+            write(f)
+        os.replace(partial, target)
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+
+
+def temporary_path(storage_base, extension):
+    """A new empty file inside the store to write a file into before :func:`put_file`.
+
+    On the same volume as the stored files, so moving it into place is a
+    rename. The extension is kept: PIL picks the format to write from it.
+    """
+    directory = os.path.join(storage_base, BLOB_DIRNAME)
+    os.makedirs(directory, exist_ok=True)
+    fd, path = tempfile.mkstemp(suffix="." + extension if extension else "", prefix=".incoming-", dir=directory)
+    os.close(fd)
+    return path
+
+
+def put_file(storage_base, source_path, extension, digest=None, move=False, link=False):
+    """Store the file at ``source_path`` and return its content hash.
+
+    ``digest`` is the file's MD5 when the caller has already computed it.
+    Nothing is written when the store already holds the content. With
+    ``move`` the source is moved in (or deleted, when it is already held)
+    rather than copied; with ``link`` the stored file is a hard link to it
+    where the filesystem allows one. A copy is written beside its final name
+    and renamed into place, so an interrupted copy never leaves a partial
+    file under a hash it does not have.
+    """
+    if digest is None:
+        digest = md5_of_file(source_path)
+    target = blob_path(storage_base, digest, extension)
+    if os.path.exists(target):
+        if move:
+            os.remove(source_path)
+        return digest
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    if move:
+        os.replace(source_path, target)
+        return digest
+    if link:
+        try:
+            os.link(source_path, target)
+            return digest
+        except OSError:
+            pass
+    with open(source_path, "rb") as source:
+        write_atomically(target, lambda f: shutil.copyfileobj(source, f, HASH_CHUNK_SIZE))
+    return digest
+
+
+def remove_blob(storage_base, digest):
+    """Delete every stored file with content hash ``digest``, best-effort.
+
+    Returns the number of files removed. Only for a hash nothing refers to
+    any more; the store cannot tell.
+    """
+    removed = 0
+    pattern = os.path.join(glob.escape(os.path.join(storage_base, BLOB_DIRNAME, digest[:2])), glob.escape(digest) + "*")
+    for path in glob.glob(pattern):
+        try:
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+                removed += 1
+        except OSError as e:
+            logger.warning(f"Could not remove stored file {path}: {e}")
+    return removed
+
+
+def remove_file(path):
+    """Delete the file at ``path`` and its sidecar directories.
+
+    Raises OSError when the file itself cannot be removed; a sidecar that
+    cannot is only logged.
+    """
+    os.remove(path)
+    for sidecar in glob.glob(glob.escape(path) + ".*"):
+        if os.path.isdir(sidecar):
+            try:
+                shutil.rmtree(sidecar)
+            except OSError as e:
+                logger.warning(f"Could not remove {sidecar}: {e}")
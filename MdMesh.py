@@ -0,0 +1,523 @@
+"""Triangle meshes of 3D models as NumPy arrays, and their on-disk cache.
+
+OBJ, STL and PLY files are all read straight into the same arrays
+(:func:`read_mesh`); nothing is converted to another format on the way.
+
+A :class:`Mesh` is four contiguous arrays: ``vertices`` and ``normals``
+(float32, one row per point) and, one row per triangle, ``faces`` (int32
+vertex indices) and ``face_normals`` (int32 indices into ``normals``, -1
+where the file gives none). Polygons are split into triangle fans.
+
+:func:`parse_obj` reads a Wavefront OBJ file without a Python loop over its
+lines: the lines of each kind are picked out with one regular expression, and
+their numbers read in one ``numpy.fromstring`` call. A scan with millions of
+faces opens in seconds rather than minutes, in about the memory of its arrays.
+
+:func:`load_mesh` keeps what it read as ``.npy`` files in a directory of the
+storage directory (:func:`cache_directory`), recording the MD5 of the file
+they came from, and memory-maps them the next time, so reopening a
+specimen's model parses nothing at all. Nothing is ever written beside a
+model opened from outside the store.
+
+:func:`load_levels` keeps coarser versions of a dense mesh in the same
+directory, for drawing while the model is turned; :func:`decimate` builds
+them.
+"""
+
+import json
+import logging
+import os
+import re
+import shutil
+
+import numpy as np
+
+import MdMediaStore
+
+logger = logging.getLogger(__name__)
+
+# MdMediaStore.derived_path kind of the cache directory.
+SIDECAR_KIND = "mesh"
+
+# Name of the file in the cache directory recording which file it was parsed
+# from; bumping FORMAT_VERSION makes every cached mesh parse again.
+MANIFEST_NAME = "mesh.json"
+FORMAT_VERSION = 1
+
+_ARRAYS = ("vertices", "normals", "faces", "face_normals")
+
+# Triangle counts of the coarse levels load_levels keeps of a mesh with more
+# triangles, finest first (drawn while the 3D viewer turns by itself and
+# while it is dragged); and the name of their manifest in the cache
+# directory.
+LEVEL_FACE_COUNTS = (200_000, 50_000)
+LEVELS_MANIFEST_NAME = "levels.json"
+
+# Grid resolutions decimate tries before settling for the best below its
+# target, and how close below it is close enough.
+_DECIMATE_TRIES = 8
+_DECIMATE_CLOSE = 0.85
+
+# Lines of each kind, matched from the newline before them (the text is read
+# with one prepended): a literal to search for is much faster than "^".
+_VERTEX_LINES = re.compile(rb"\n[ \t]*v[ \t]+([^\n]*)")
+_NORMAL_LINES = re.compile(rb"\n[ \t]*vn[ \t]+([^\n]*)")
+_FACE_LINES = re.compile(rb"\n[ \t]*f[ \t]+([^\n]*)")
+
+
+class Mesh:
+    """A triangle mesh; see the module docstring for the arrays."""
+
+    def __init__(self, vertices, faces, normals=None, face_normals=None):
+        self.vertices = np.ascontiguousarray(vertices, dtype=np.float32).reshape(-1, 3)
+        self.faces = np.ascontiguousarray(faces, dtype=np.int32).reshape(-1, 3)
+        self.normals = np.ascontiguousarray(np.zeros((0, 3)) if normals is None else normals, dtype=np.float32).reshape(
+            -1, 3
+        )
+        if face_normals is None:
+            face_normals = np.full(self.faces.shape, -1)
+        self.face_normals = np.ascontiguousarray(face_normals, dtype=np.int32).reshape(-1, 3)
+
+
+def vertex_normals(vertices, faces, normals, face_normals):
+    """One unit normal per vertex, so the mesh can be drawn from a single index array.
+
+    Where the normals are already indexed like the vertices they are returned
+    as they are. Otherwise the normals given for each corner are averaged
+    over the corners of a vertex or, if any corner has none, the normals of
+    the triangles around it, weighted by their area. A vertex on no triangle
+    gets a zero normal.
+    """
+    if len(normals) == len(vertices) and np.array_equal(face_normals, faces):
+        return normals
+    if len(normals) and np.all(face_normals >= 0):
+        corner_normals = normals[face_normals.reshape(-1)]
+    else:
+        triangles = vertices[faces]
+        # The cross product's length is twice the triangle's area.
+        area_normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+        corner_normals = np.repeat(area_normals, 3, axis=0)
+    corners = faces.reshape(-1)
+    summed = np.stack(
+        [np.bincount(corners, weights=corner_normals[:, i], minlength=len(vertices)) for i in range(3)], axis=1
+    )
+    length = np.linalg.norm(summed, axis=1, keepdims=True)
+    return np.divide(summed, length, out=np.zeros_like(summed), where=length > 0).astype(np.float32)
+
+
+def _canonical(faces):
+    """``faces`` each rotated to start at its smallest index, keeping its winding."""
+    first = faces.argmin(axis=1)[:, np.newaxis]
+    return np.take_along_axis(faces, (first + np.arange(3)) % 3, axis=1)
+
+
+def _cluster(vertices, faces, resolution):
+    """Vertices gathered into the cells of a grid of ``resolution`` cubes along the longest side.
+
+    Returns the cell of each vertex as (cell indices, cell coordinates of
+    each occupied cell) and the triangles left between distinct cells, each
+    once, in cell indices.
+    """
+    lower = vertices.min(axis=0)
+    size = max(float((vertices.max(axis=0) - lower).max()), 1e-30) / resolution
+    cells = np.minimum(((vertices - lower) / size).astype(np.int64), resolution - 1)
+    keys = (cells[:, 2] * resolution + cells[:, 1]) * resolution + cells[:, 0]
+    keys, cluster = np.unique(keys, return_inverse=True)
+    coordinates = np.stack([keys % resolution, keys // resolution % resolution, keys // resolution**2], axis=1)
+    clustered = cluster[faces]
+    distinct = (
+        (clustered[:, 0] != clustered[:, 1])
+        & (clustered[:, 1] != clustered[:, 2])
+        & (clustered[:, 0] != clustered[:, 2])
+    )
+    return cluster, lower + coordinates * size, size, np.unique(_canonical(clustered[distinct]), axis=0)
+
+
+def _representatives(vertices, faces, cluster, cell_lower, size):
+    """The point of each cell that best keeps the surface through it.
+
+    That is the point nearest, in squared distance, to the planes of the
+    triangles touching the cell (weighted by their area): the quadric error
+    metric. Along directions those planes leave free (a flat or straight
+    patch) it stays at the mean of the cell's vertices, and it never leaves
+    the cell.
+    """
+    count = len(cell_lower)
+    corners = vertices[faces]
+    normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    doubled_area = np.linalg.norm(normals, axis=1)
+    normals = np.divide(
+        normals, doubled_area[:, np.newaxis], out=np.zeros_like(normals), where=doubled_area[:, np.newaxis] > 0
+    )
+    offsets = -np.einsum("ij,ij->i", normals, corners[:, 0])
+    rows, columns = np.triu_indices(3)
+    terms = np.concatenate([normals[:, rows] * normals[:, columns], normals * offsets[:, np.newaxis]], axis=1)
+    terms *= doubled_area[:, np.newaxis] / 2
+
+    sums = np.zeros((count, terms.shape[1]))
+    for corner in range(3):
+        cells = cluster[faces[:, corner]]
+        for i in range(terms.shape[1]):
+            sums[:, i] += np.bincount(cells, weights=terms[:, i], minlength=count)
+    quadric = np.zeros((count, 3, 3))
+    quadric[:, rows, columns] = sums[:, : len(rows)]
+    quadric[:, columns, rows] = sums[:, : len(rows)]
+    linear = sums[:, len(rows) :]
+
+    members = np.bincount(cluster, minlength=count)[:, np.newaxis]
+    mean = np.stack([np.bincount(cluster, weights=vertices[:, i], minlength=count) for i in range(3)], axis=1) / members
+    # Minimise around the mean through the pseudo-inverse, ignoring
+    # directions with next to no curvature.
+    values, vectors = np.linalg.eigh(quadric)
+    kept = values > 1e-3 * values[:, -1:]
+    inverse = np.divide(1.0, values, out=np.zeros_like(values), where=kept)
+    residual = -linear - np.einsum("kij,kj->ki", quadric, mean)
+    step = np.einsum("kij,kj->ki", vectors, inverse * np.einsum("kji,kj->ki", vectors, residual))
+    return np.clip(mean + step, cell_lower, cell_lower + size)
+
+
+def decimate(vertices, faces, target_faces):
+    """A coarser :class:`Mesh` of ``vertices`` and ``faces``, with at most ``target_faces`` triangles.
+
+    Vertices are clustered on a grid, each cell's placed by the quadric
+    error metric of the triangles around it, and the triangles that still
+    span three cells kept (Lindstrom's out-of-core simplification). The
+    grid is sized, in a few tries, for a count close below the target. The
+    mesh is returned unchanged if it has no more than ``target_faces``
+    triangles already.
+    """
+    vertices = np.asarray(vertices, dtype=float)
+    faces = np.asarray(faces, dtype=np.int64)
+    if len(faces) <= target_faces:
+        return Mesh(vertices, faces)
+    best = None
+    # Resolutions known to give at most, and more than, the target.
+    low, high = 1, None
+    # The triangles of a surface grow with the square of the resolution.
+    resolution = max(2, int(np.sqrt(target_faces / 2)))
+    for _ in range(_DECIMATE_TRIES):
+        clusters = _cluster(vertices, faces, resolution)
+        count = len(clusters[3])
+        if count > target_faces:
+            high = resolution
+        else:
+            low, best = resolution, clusters
+            if count >= _DECIMATE_CLOSE * target_faces:
+                break
+        guess = max(int(resolution * np.sqrt(target_faces / max(count, 1))), low + 1)
+        resolution = guess if high is None else min(guess, high - 1)
+        if resolution <= low:
+            break
+    if best is None:
+        best = _cluster(vertices, faces, low)
+    cluster, cell_lower, size, kept = best
+    used, kept = np.unique(kept, return_inverse=True)
+    points = _representatives(vertices, faces, cluster, cell_lower, size)
+    return Mesh(points[used], kept.reshape(-1, 3))
+
+
+def _numbers(lines, dtype, blob=None):
+    """The numbers on each of ``lines`` (bytes): a flat array, and how many each line has.
+
+    ``blob`` is the lines already joined by newlines, when the caller has it.
+    """
+    if not lines:
+        return np.zeros(0, dtype=dtype), np.zeros(0, dtype=np.int64)
+    if blob is None:
+        blob = b"\n".join(lines)
+    values = np.fromstring(blob, dtype=dtype, sep=" ")
+    # A number starts wherever a non-blank follows a blank.
+    chars = np.frombuffer(blob, dtype=np.uint8)
+    blank = chars <= 32
+    starts = np.flatnonzero(~blank & np.concatenate(([True], blank[:-1])))
+    line_ends = np.append(np.flatnonzero(chars == 10), len(chars))
+    counts = np.diff(np.searchsorted(starts, line_ends), prepend=0)
+    if len(values) != len(starts):
+        raise ValueError("unreadable number")
+    return values, counts
+
+
+def _first_three(values, counts, what):
+    """The first three numbers of each line, as an (n, 3) array."""
+    if len(counts) and counts.min() < 3:
+        raise ValueError(f"{what} with fewer than 3 coordinates")
+    starts = np.cumsum(counts) - counts
+    return values[starts[:, np.newaxis] + np.arange(3)]
+
+
+def _corners(face_lines):
+    """Vertex and normal index of every polygon corner, and the corners of each polygon.
+
+    Indices are as written (1-based, or negative for relative ones); a
+    missing normal index is 0.
+    """
+    first = face_lines[0].split() if face_lines else []
+    slots = first[0].count(b"/") + 1 if first else 1
+    if slots == 1:
+        vertex, counts = _numbers(face_lines, np.int64)
+        return vertex, np.zeros_like(vertex), counts
+    # v//vn: fill in the missing texture index, so every corner has the same slots.
+    blob = b"\n".join(face_lines)
+    values, counts = _numbers(face_lines, np.int64, blob.replace(b"//", b"/0/").replace(b"/", b" "))
+    corners = len(values) // slots
+    consistent = (
+        len(values) == corners * slots and not np.any(counts % slots) and blob.count(b"/") == corners * (slots - 1)
+    )
+    if not consistent:
+        return _corners_one_by_one(face_lines)
+    values = values.reshape(-1, slots)
+    normal = values[:, 2] if slots == 3 else np.zeros(corners, dtype=np.int64)
+    return values[:, 0], normal, counts // slots
+
+
+def _corners_one_by_one(face_lines):
+    """:func:`_corners` for files mixing corner formats."""
+    vertex, normal, counts = [], [], []
+    for line in face_lines:
+        tokens = line.split()
+        for token in tokens:
+            parts = token.split(b"/")
+            vertex.append(int(parts[0]))
+            normal.append(int(parts[2]) if len(parts) >= 3 and parts[2] else 0)
+        counts.append(len(tokens))
+    return np.array(vertex, dtype=np.int64), np.array(normal, dtype=np.int64), np.array(counts, dtype=np.int64)
+
+
+def _resolve(indices, defined, what):
+    """0-based from the file's indices; ``defined`` is how many items precede each corner."""
+    indices = np.where(indices < 0, defined + indices, indices - 1)
+    if np.any(indices < 0) or np.any(indices >= defined):
+        raise ValueError(f"face refers to a {what} that is not in the file")
+    return indices
+
+
+def _triangulate(corner_index, counts):
+    """Fan triangles of the polygons with ``counts`` corners, as rows of ``corner_index``."""
+    keep = counts >= 3
+    first = (np.cumsum(counts) - counts)[keep]
+    fans = counts[keep] - 2
+    polygon = np.repeat(np.arange(len(fans)), fans)
+    step = np.arange(fans.sum()) - np.repeat(np.cumsum(fans) - fans, fans)
+    rows = np.column_stack((first[polygon], first[polygon] + step + 1, first[polygon] + step + 2))
+    return corner_index[rows]
+
+
+def parse_obj(path):
+    """The :class:`Mesh` of the Wavefront OBJ file at ``path``.
+
+    Raises ValueError when the file has no vertices or is malformed.
+    """
+    with open(path, "rb") as f:
+        data = b"\n" + f.read()
+    vertex_lines = _VERTEX_LINES.findall(data)
+    if not vertex_lines:
+        raise ValueError(f"No vertices in {path}")
+    normal_lines = _NORMAL_LINES.findall(data)
+    face_lines = _FACE_LINES.findall(data)
+    try:
+        vertices = _first_three(*_numbers(vertex_lines, np.float64), "vertex")
+        normals = _first_three(*_numbers(normal_lines, np.float64), "normal")
+        vertex_index, normal_index, counts = _corners(face_lines)
+    except ValueError as e:
+        raise ValueError(f"Cannot read {path}: {e}") from e
+
+    defined_vertices = np.full(len(vertex_index), len(vertices))
+    defined_normals = np.full(len(normal_index), len(normals))
+    if np.any(vertex_index < 0) or np.any(normal_index < 0):
+        # Relative indices count back from the face's own line.
+        face_at = np.repeat([m.start() for m in _FACE_LINES.finditer(data)], counts)
+        vertex_at = [m.start() for m in _VERTEX_LINES.finditer(data)]
+        normal_at = [m.start() for m in _NORMAL_LINES.finditer(data)]
+        defined_vertices = np.searchsorted(vertex_at, face_at)
+        defined_normals = np.searchsorted(normal_at, face_at)
+    vertex_index = _resolve(vertex_index, defined_vertices, "vertex")
+    has_normal = normal_index != 0
+    normal_index[has_normal] = _resolve(normal_index[has_normal], defined_normals[has_normal], "normal")
+    normal_index[~has_normal] = -1
+    return Mesh(
+        vertices,
+        _triangulate(vertex_index, counts),
+        normals,
+        _triangulate(normal_index, counts),
+    )
+
+
+def _read_with_trimesh(path):
+    """The :class:`Mesh` of an STL or PLY file, as trimesh reads it."""
+    # Imported here: only these formats need it, and it is slow to import.
+    import trimesh
+
+    try:
+        loaded = trimesh.load(path, force="mesh")
+    except Exception as e:
+        raise ValueError(f"Cannot read {path}: {e}") from e
+    if len(loaded.vertices) == 0:
+        raise ValueError(f"No vertices in {path}")
+    if len(loaded.faces) == 0:
+        return Mesh(loaded.vertices, np.zeros((0, 3)))
+    # STL keeps no normals per vertex, and a PLY may not; trimesh averages
+    # those of the faces around each vertex.
+    return Mesh(loaded.vertices, loaded.faces, loaded.vertex_normals, loaded.faces)
+
+
+def read_mesh(path):
+    """The :class:`Mesh` of the OBJ, STL or PLY file at ``path``, by its extension.
+
+    Raises ValueError for another extension or a file that cannot be read.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".obj":
+        return parse_obj(path)
+    if extension in (".stl", ".ply"):
+        return _read_with_trimesh(path)
+    raise ValueError(f"Unsupported 3D model format: {path}")
+
+
+def _cache_location(path, storage_base):
+    """The cache directory of the model file at ``path`` and the file's MD5; (None, None) when it is not kept.
+
+    A stored file is named by its MD5 already, and a file that will not be
+    cached is not read through to hash it.
+    """
+    digest = MdMediaStore.blob_digest(path)
+    if digest is None:
+        if storage_base is None:
+            return None, None
+        digest = MdMediaStore.md5_of_file(path)
+    return MdMediaStore.derived_path(path, SIDECAR_KIND, storage_base, digest), digest
+
+
+def cache_directory(path, storage_base=None):
+    """Where the arrays read from the model file at ``path`` are kept (``MdMediaStore.derived_path``).
+
+    Beside the file when it is in the media store, or anywhere inside
+    ``storage_base``. The arrays of any other file go where they would be
+    were it stored under ``storage_base``: they are found by its content
+    wherever it is opened from, and are in place once it is stored. None
+    for such a file without ``storage_base``: its arrays are not kept, and
+    nothing is written beside it.
+    """
+    return _cache_location(path, storage_base)[0]
+
+
+def _read_cache(directory, digest):
+    if directory is None:
+        return None
+    try:
+        with open(os.path.join(directory, MANIFEST_NAME), encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") != FORMAT_VERSION or manifest.get("digest") != digest:
+            return None
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r") for name in _ARRAYS}
+    except (OSError, ValueError):
+        return None
+    return Mesh(**arrays)
+
+
+def _write_cache(directory, digest, mesh):
+    if os.path.isdir(directory):
+        shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory, exist_ok=True)
+    for name in _ARRAYS:
+        array = getattr(mesh, name)
+        MdMediaStore.write_atomically(os.path.join(directory, f"{name}.npy"), lambda f, a=array: np.save(f, a))
+    manifest = {"version": FORMAT_VERSION, "digest": digest}
+    # Last (see MdMediaStore.write_atomically).
+    MdMediaStore.write_atomically(
+        os.path.join(directory, MANIFEST_NAME), lambda f: f.write(json.dumps(manifest).encode())
+    )
+
+
+def is_cached(path, storage_base=None):
+    """Whether current arrays of the model file at ``path`` are on disk."""
+    return _read_cache(*_cache_location(path, storage_base)) is not None
+
+
+def load_mesh(path, storage_base=None):
+    """The :class:`Mesh` of the model file at ``path``, from the cache when it is current.
+
+    See :func:`cache_directory` for ``storage_base``. A file read is cached
+    for next time; when the cache cannot be written that is logged and the
+    mesh is returned all the same. Raises as :func:`read_mesh` does, and
+    OSError when the file cannot be read.
+    """
+    directory, digest = _cache_location(path, storage_base)
+    mesh = _read_cache(directory, digest)
+    if mesh is not None:
+        return mesh
+    mesh = read_mesh(path)
+    if directory is None:
+        return mesh
+    try:
+        _write_cache(directory, digest, mesh)
+    except OSError as e:
+        logger.warning(f"Cannot cache the mesh of {path}: {e}")
+    return mesh
+
+
+def _read_levels(directory, digest):
+    if directory is None:
+        return None
+    try:
+        with open(os.path.join(directory, LEVELS_MANIFEST_NAME), encoding="utf-8") as f:
+            manifest = json.load(f)
+        if (
+            manifest.get("version") != FORMAT_VERSION
+            or manifest.get("digest") != digest
+            or manifest.get("face_counts") != list(LEVEL_FACE_COUNTS)
+        ):
+            return None
+        return [
+            Mesh(
+                np.load(os.path.join(directory, f"level{i}_vertices.npy"), mmap_mode="r"),
+                np.load(os.path.join(directory, f"level{i}_faces.npy"), mmap_mode="r"),
+            )
+            for i in range(manifest["levels"])
+        ]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _write_levels(directory, digest, levels):
+    os.makedirs(directory, exist_ok=True)
+    for i, level in enumerate(levels):
+        for name in ("vertices", "faces"):
+            array = getattr(level, name)
+            MdMediaStore.write_atomically(
+                os.path.join(directory, f"level{i}_{name}.npy"), lambda f, a=array: np.save(f, a)
+            )
+    manifest = {
+        "version": FORMAT_VERSION,
+        "digest": digest,
+        "face_counts": list(LEVEL_FACE_COUNTS),
+        "levels": len(levels),
+    }
+    MdMediaStore.write_atomically(
+        os.path.join(directory, LEVELS_MANIFEST_NAME), lambda f: f.write(json.dumps(manifest).encode())
+    )
+
+
+def load_levels(path, storage_base=None, mesh=None):
+    """Coarser :class:`Mesh` levels of the model file at ``path``, finest first, for drawing it while it moves.
+
+    One level, by :func:`decimate`, for each of ``LEVEL_FACE_COUNTS`` below
+    the triangle count of the mesh, so a mesh that small already has none.
+    They are kept beside its cached arrays (see :func:`cache_directory`) and
+    memory-mapped from there next time, or only returned when those are not
+    kept. ``mesh`` is the file's mesh when the
+    caller has it loaded. Raises as :func:`load_mesh` does.
+    """
+    directory, digest = _cache_location(path, storage_base)
+    levels = _read_levels(directory, digest)
+    if levels is not None:
+        return levels
+    if mesh is None:
+        mesh = load_mesh(path, storage_base)
+    levels = [decimate(mesh.vertices, mesh.faces, count) for count in LEVEL_FACE_COUNTS if count < len(mesh.faces)]
+    if directory is None:
+        return levels
+    try:
+        _write_levels(directory, digest, levels)
+    except OSError as e:
+        logger.warning(f"Cannot cache the coarse levels of {path}: {e}")
+    return levels
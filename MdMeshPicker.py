@@ -0,0 +1,186 @@
+"""Picking points on a triangle mesh with a ray, without a loop over the mesh.
+
+:class:`MeshPicker` is built once per model, a bounding volume hierarchy in
+NumPy arrays. It sorts the triangles along a Morton (Z-order) curve through
+their centroids and groups them, in that order, into leaves of
+``LEAF_SIZE``; above the leaves is a complete tree of bounding boxes with
+``BRANCHING`` children a node, each level one array. A ray goes down the tree
+a level at a time, every box of the level tested in one vectorized slab test,
+so only the few leaves it passes through are intersected triangle by
+triangle (again all at once).
+
+On a scan of a million triangles a pick takes a fraction of a millisecond,
+where testing every vertex from Python took seconds.
+"""
+
+import numpy as np
+
+# Triangles per leaf, and children per node, of the tree: more means fewer
+# levels to go down, each a round of NumPy calls, but more boxes and
+# triangles tested on the way.
+LEAF_SIZE = 8
+BRANCHING = 8
+
+# Bits per axis of the Morton codes sorting the triangles.
+_MORTON_BITS = 10
+
+# Rays this close to parallel to a triangle (the sine of the angle, roughly)
+# miss it.
+_PARALLEL = 1e-9
+
+
+def _spread_bits(values):
+    """``values`` (< 1024) with two zero bits inserted after each bit."""
+    values = values.astype(np.uint64)
+    for shift, mask in ((16, 0x030000FF), (8, 0x0300F00F), (4, 0x030C30C3), (2, 0x09249249)):
+        values = (values | (values << np.uint64(shift))) & np.uint64(mask)
+    return values
+
+
+def _morton_codes(points):
+    lower = points.min(axis=0)
+    extent = np.maximum(points.max(axis=0) - lower, 1e-30)
+    cells = ((points - lower) / extent * ((1 << _MORTON_BITS) - 1)).astype(np.uint64)
+    return (
+        _spread_bits(cells[:, 0]) << np.uint64(2)
+        | _spread_bits(cells[:, 1]) << np.uint64(1)
+        | _spread_bits(cells[:, 2])
+    )
+
+
+def _enclosing(groups):
+    """The box around each group of boxes in ``groups`` (g, n, 2, 3), NaN boxes left out."""
+    return np.stack([np.fmin.reduce(groups[:, :, 0], axis=1), np.fmax.reduce(groups[:, :, 1], axis=1)], axis=1)
+
+
+class MeshPicker:
+    """A ray-picking index over ``vertices`` (n, 3) and triangles ``faces`` (m, 3).
+
+    A mesh without triangles is indexed as a point cloud, so that
+    :meth:`vertex_near_ray` still works on it.
+    """
+
+    def __init__(self, vertices, faces):
+        self.vertices = np.ascontiguousarray(vertices, dtype=np.float32).reshape(-1, 3)
+        faces = np.asarray(faces, dtype=np.int32).reshape(-1, 3)
+        self.original_faces = faces
+        self.has_triangles = len(faces) > 0
+        if not self.has_triangles:
+            faces = np.repeat(np.arange(len(self.vertices), dtype=np.int32), 3).reshape(-1, 3)
+        corners = self.vertices[faces]
+        self.order = np.argsort(_morton_codes(corners.mean(axis=1)), kind="stable").astype(np.int32)
+        self.faces = faces[self.order]
+        corners = corners[self.order]
+
+        leaves = -(-len(faces) // LEAF_SIZE)
+        self.depth = 0
+        while BRANCHING**self.depth < leaves:
+            self.depth += 1
+        # Each level's boxes as one (nodes, 2, 3) array of lower and upper
+        # corners, the root's first. Missing triangles and nodes get NaN
+        # boxes, which fail every comparison of the slab test and which
+        # fmin / fmax leave out of their parents.
+        boxes = np.full((leaves * LEAF_SIZE, 2, 3), np.nan, dtype=np.float32)
+        boxes[: len(faces), 0] = corners.min(axis=1)
+        boxes[: len(faces), 1] = corners.max(axis=1)
+        level = np.full((BRANCHING**self.depth, 2, 3), np.nan, dtype=np.float32)
+        level[:leaves] = _enclosing(boxes.reshape(leaves, LEAF_SIZE, 2, 3))
+        self.levels = [level]
+        while len(level) > 1:
+            level = _enclosing(level.reshape(-1, BRANCHING, 2, 3))
+            self.levels.insert(0, level)
+
+    def _leaves_along(self, origin, direction, margin=0.0):
+        """The leaves whose boxes, grown by ``margin``, the ray passes through."""
+        # An axis the ray does not move along gets a tiny step rather than
+        # none, so the slab test needs no special case for it.
+        inverse = 1.0 / np.where(direction == 0, 1e-30, direction)
+        grow = np.array([[-margin], [margin]])
+        nodes = np.zeros(1, dtype=np.int64)
+        for depth, boxes in enumerate(self.levels):
+            if depth:
+                nodes = (nodes[:, np.newaxis] * BRANCHING + np.arange(BRANCHING)).reshape(-1)
+            with np.errstate(invalid="ignore", over="ignore"):
+                t = (boxes[nodes] + grow - origin) * inverse
+            t_near = t.min(axis=1).max(axis=1)
+            t_far = t.max(axis=1).min(axis=1)
+            nodes = nodes[(t_near <= t_far) & (t_far >= 0)]
+            if len(nodes) == 0:
+                break
+        return nodes
+
+    def _triangles_in(self, leaves):
+        """Positions in ``self.faces`` of the triangles of ``leaves``."""
+        slots = (leaves[:, np.newaxis] * LEAF_SIZE + np.arange(LEAF_SIZE)).reshape(-1)
+        return slots[slots < len(self.faces)]
+
+    def intersect(self, origin, direction):
+        """Where the ray from ``origin`` along ``direction`` first meets the surface.
+
+        Returns ``(face, point, distance)``: the index of the triangle in the
+        ``faces`` given, the point hit, and how far along ``direction`` (in
+        its units) it is. None if the ray meets no triangle in front of
+        ``origin``.
+        """
+        if not self.has_triangles:
+            return None
+        origin = np.asarray(origin, dtype=float)
+        direction = np.asarray(direction, dtype=float)
+        candidates = self._triangles_in(self._leaves_along(origin, direction))
+        if len(candidates) == 0:
+            return None
+        corners = self.vertices[self.faces[candidates]].astype(float)
+        # Moller-Trumbore, for all candidate triangles at once.
+        edge1 = corners[:, 1] - corners[:, 0]
+        edge2 = corners[:, 2] - corners[:, 0]
+        p = np.cross(direction, edge2)
+        determinant = np.einsum("ij,ij->i", edge1, p)
+        scale = np.linalg.norm(edge1, axis=1) * np.linalg.norm(edge2, axis=1)
+        facing = np.abs(determinant) > _PARALLEL * scale
+        inverse = np.divide(1.0, determinant, out=np.zeros_like(determinant), where=facing)
+        s = origin - corners[:, 0]
+        u = np.einsum("ij,ij->i", s, p) * inverse
+        q = np.cross(s, edge1)
+        v = (q @ direction) * inverse
+        t = np.einsum("ij,ij->i", edge2, q) * inverse
+        hit = facing & (u >= 0) & (v >= 0) & (u + v <= 1) & (t > 0)
+        if not hit.any():
+            return None
+        nearest = np.flatnonzero(hit)[np.argmin(t[hit])]
+        distance = float(t[nearest])
+        return int(self.order[candidates[nearest]]), origin + distance * direction, distance
+
+    def nearest_corner(self, face, point):
+        """The vertex of triangle ``face`` nearest ``point``, e.g. where a ray hit it."""
+        corners = self.original_faces[face]
+        return int(corners[np.argmin(np.linalg.norm(self.vertices[corners] - point, axis=1))])
+
+    def vertex_near_ray(self, origin, direction, radius):
+        """The vertex closest to the ray, within ``radius`` of it and in front of ``origin``.
+
+        ``direction`` must be of unit length. None if there is no such vertex.
+        """
+        origin = np.asarray(origin, dtype=float)
+        direction = np.asarray(direction, dtype=float)
+        leaves = self._leaves_along(origin, direction, radius)
+        candidates = np.unique(self.faces[self._triangles_in(leaves)])
+        if len(candidates) == 0:
+            return None
+        offsets = self.vertices[candidates] - origin
+        along = offsets @ direction
+        distances = np.linalg.norm(offsets - along[:, np.newaxis] * direction, axis=1)
+        near = (along >= 0) & (distances < radius)
+        if not near.any():
+            return None
+        return int(candidates[near][np.argmin(distances[near])])
+
+    def pick(self, origin, direction, radius):
+        """The vertex a ray picks: the corner nearest where it meets the surface.
+
+        A ray missing the surface picks the vertex :meth:`vertex_near_ray`
+        finds within ``radius``, as for a point cloud. None if neither.
+        """
+        hit = self.intersect(origin, direction)
+        if hit is not None:
+            return self.nearest_corner(hit[0], hit[1])
+        return self.vertex_near_ray(origin, direction, radius)
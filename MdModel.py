@@ -1,3 +1,4 @@
+import contextlib
 import copy
 import datetime
 import hashlib
@@ -9,16 +10,32 @@ import os
 
 # from MdUtils import *
 import shutil
-import time
+import sqlite3
+import struct
 import warnings
+import zlib
 from pathlib import Path
 
 import numpy as np
-from peewee import CharField, DateTimeField, DoubleField, ForeignKeyField, IntegerField, Model, SqliteDatabase
+from peewee import (
+    BlobField,
+    CharField,
+    DateTimeField,
+    DoubleField,
+    ForeignKeyField,
+    IntegerField,
+    Model,
+    SqliteDatabase,
+    fn,
+)
 from PIL import Image
-from PIL.ExifTags import TAGS
 
+import MdImageIngest
+import MdLiveWireStore
+import MdMediaStore
 import MdUtils as mu
+from MdProcrustes import ProcrustesEngine, array_to_landmarks
+from MdSuperimpositionCache import SuperimpositionCache, content_key
 
 logger = logging.getLogger(__name__)
 
@@ -195,16 +212,34 @@ def find_unimputable_landmarks(objects):
 
 database_path = os.path.join(mu.DEFAULT_DB_DIRECTORY, DATABASE_FILENAME)
 
-gDatabase = SqliteDatabase(database_path, pragmas={"foreign_keys": 1})
+# Connection profile for the library database, applied on every connect.
+# WAL lets the viewer keep reading while an import writes, and under WAL
+# synchronous=NORMAL stays consistent after a crash (it may lose the last
+# commits, never the file) while saving an fsync per transaction. A negative
+# cache_size is in KiB.
+DATABASE_PRAGMAS = {
+    "foreign_keys": 1,
+    "journal_mode": "wal",
+    "synchronous": "normal",
+    "cache_size": -64 * 1024,
+    "mmap_size": 256 * 1024 * 1024,
+    "temp_store": "memory",
+}
 
+gDatabase = SqliteDatabase(database_path, pragmas=dict(DATABASE_PRAGMAS))
 
-def set_database_path(path):
+
+def set_database_path(path, pragmas=None):
     """Point the application at a different database file.
 
     Every model binds to ``gDatabase`` at import time, so the file cannot be
     changed by reassigning ``database_path`` alone -- peewee has to be told, via
     ``init``, to reuse the same Database object against another file. Call this
     before anything queries the database (``--db`` does, at startup).
+
+    ``pragmas`` overrides entries of :data:`DATABASE_PRAGMAS` for this file,
+    e.g. ``{"journal_mode": "delete"}`` for a library on a network share,
+    where WAL's shared-memory index does not work.
     """
     global database_path
 
@@ -215,12 +250,31 @@ def set_database_path(path):
 
     if not gDatabase.is_closed():
         gDatabase.close()
-    gDatabase.init(path, pragmas={"foreign_keys": 1})
+    gDatabase.init(path, pragmas={**DATABASE_PRAGMAS, **(pragmas or {})})
     database_path = path
     logger.info("database path set to %s", path)
     return path
 
 
+# Subdirectory of the database's directory that holds the superimposition cache.
+SUPERIMPOSITION_CACHE_DIRNAME = os.path.join("cache", "superimposition")
+
+_superimposition_cache = None
+
+
+def get_superimposition_cache():
+    """The superimposition cache for the current database.
+
+    Lives beside the database file, so pointing the application at another
+    library (``set_database_path``) also switches caches.
+    """
+    global _superimposition_cache
+    directory = os.path.join(os.path.dirname(database_path), SUPERIMPOSITION_CACHE_DIRNAME)
+    if _superimposition_cache is None or _superimposition_cache.directory != directory:
+        _superimposition_cache = SuperimpositionCache(directory)
+    return _superimposition_cache
+
+
 def _storage_base(base_path):
     """Resolve an optional explicit storage root to a concrete one.
 
@@ -287,6 +341,59 @@ class MdDataset(Model):
     def set_curve_config(self, config):
         """Store semi-landmark curve configuration (see :meth:`get_curve_config`)."""
         self.curve_config_json = json.dumps(config) if config else None
+        get_superimposition_cache().invalidate_dataset(self.id)
+
+    def superimposition_key(self, method):
+        """Content key of this dataset's superimposition inputs.
+
+        Covers the method, dimension, baseline, curve configuration and every
+        object's id, landmark text and raw curve traces -- read with a single
+        query, without unpacking anything. See
+        :func:`MdSuperimpositionCache.content_key`.
+        """
+        rows = (
+            MdObject.select(MdObject.id, MdObject.landmark_str, MdObject.curve_raw_json)
+            .where(MdObject.dataset == self)
+            .order_by(MdObject.sequence, MdObject.id)
+            .tuples()
+        )
+        return content_key(method, self.dimension, self.baseline, self.curve_config_json, rows)
+
+    def get_landmark_matrix(self):
+        """Every object's landmarks as one :class:`LandmarkMatrix`, in a single query.
+
+        Covers the objects that have landmarks, in sequence order. Each object's
+        coordinates come straight from its ``landmark_blob``; only objects
+        without a current one are parsed. Coordinates are cut or padded to the
+        dataset's dimension (2 or 3), as the superimposition uses them.
+
+        Raises:
+            LandmarkCountMismatchError: when the objects do not all have the same
+                number of landmark positions -- there is no one array for them.
+        """
+        rows = (
+            MdObject.select(MdObject.id, MdObject.landmark_str, MdObject.landmark_blob)
+            .where(MdObject.dataset == self)
+            .order_by(MdObject.sequence, MdObject.id)
+            .tuples()
+        )
+        n_dim = 3 if self.dimension == 3 else 2
+        object_ids = []
+        shapes = []
+        for object_id, landmark_str, landmark_blob in rows:
+            shape = landmark_array(landmark_str, landmark_blob)
+            if not len(shape):
+                continue
+            if shapes and len(shape) != len(shapes[0]):
+                raise LandmarkCountMismatchError(object_id, len(shapes[0]), len(shape))
+            object_ids.append(object_id)
+            shapes.append(shape)
+
+        landmarks = np.full((len(shapes), len(shapes[0]) if shapes else 0, n_dim), np.nan)
+        for i, shape in enumerate(shapes):
+            width = min(shape.shape[1], n_dim)
+            landmarks[i, :, :width] = shape[:, :width]
+        return LandmarkMatrix(object_ids, landmarks)
 
     def get_landmark_names(self):
         """Per-landmark names as a list, ``[]`` when unset or unreadable.
@@ -481,11 +588,187 @@ class MdDataset(Model):
         return self.get_by_id(self.id)
 
 
+# Binary landmark storage (MdObject.landmark_blob): a fixed header -- magic,
+# row width, row count and the CRC-32 of the landmark_str the values were read
+# from -- followed by the coordinates as little-endian float64, row-major, NaN
+# where a value is missing. landmark_str stays the text of record; the blob is a
+# parsed copy of it, trusted only while the CRC still matches the text, so a
+# writer that updates landmark_str alone (an older Modan2, a bulk UPDATE) can
+# never make the two disagree.
+LANDMARK_BLOB_MAGIC = b"MDL1"
+_LANDMARK_BLOB_HEADER = struct.Struct("<4sIII")
+
+
+def _landmark_text_crc(landmark_str):
+    return zlib.crc32(landmark_str.encode("utf-8"))
+
+
+def _parse_landmark_value(field):
+    """A landmark field as a float, ``None`` when blank or non-numeric."""
+    if field == "Missing" or field == "missing" or field == "":
+        return None
+    try:
+        return float(field)
+    except ValueError:
+        return None
+
+
+def parse_landmark_rows(landmark_str):
+    """Parse landmark text into rows of floats (``None`` where missing).
+
+    Each line is one landmark. The separator is sniffed per line: tab, then
+    comma, then runs of spaces, then a single space. Tab- and comma-delimited
+    blanks keep their position; whitespace padding does not. Rows are returned
+    as found -- :meth:`MdObject.unpack_landmark` pads them to the dataset's
+    dimension.
+    """
+    rows = []
+    if not landmark_str:
+        return rows
+    for lm in landmark_str.split(LINE_SEPARATOR):
+        if lm == "":
+            continue
+        positional = True
+        if "\t" in lm:
+            separator = "\t"
+        elif "," in lm:
+            separator = ","
+        elif "  " in lm:  # Multiple spaces
+            rows.append([_parse_landmark_value(x) for x in lm.split() if x])
+            continue
+        elif " " in lm:
+            separator = " "
+            positional = False
+        else:
+            # Single value or unknown format
+            separator = LANDMARK_SEPARATOR
+        coords = [x.strip() for x in lm.split(separator)]
+        if not positional:
+            # Space-separated: an empty field is just extra spacing.
+            coords = [x for x in coords if x]
+        rows.append([_parse_landmark_value(x) for x in coords])
+    return rows
+
+
+def pad_landmark_rows(rows, width):
+    """Give every row at least ``width`` slots, padding with ``None``, in place.
+
+    Only *trailing* ``None``s beyond ``width`` are trimmed, so a row carrying
+    more real numbers than the dimension keeps them.
+    """
+    for lm in rows:
+        if len(lm) < width:
+            lm.extend([None] * (width - len(lm)))
+        while len(lm) > width and lm[-1] is None:
+            lm.pop()
+    return rows
+
+
+def encode_landmark_blob(rows, landmark_str):
+    """Pack landmark rows into the ``landmark_blob`` format.
+
+    ``rows`` is a landmark list (``None`` for missing) or a 2-D array (``NaN``
+    for missing); ``landmark_str`` is the text they were read from, whose CRC
+    goes into the header. Returns ``None`` for no landmarks.
+    """
+    if isinstance(rows, np.ndarray):
+        values = np.ascontiguousarray(rows, dtype="<f8")
+    else:
+        if not rows:
+            return None
+        width = max(len(lm) for lm in rows)
+        values = np.full((len(rows), width), np.nan, dtype="<f8")
+        for i, lm in enumerate(rows):
+            values[i, : len(lm)] = [np.nan if v is None else v for v in lm]
+    if values.size == 0:
+        return None
+    count, width = values.shape
+    header = _LANDMARK_BLOB_HEADER.pack(LANDMARK_BLOB_MAGIC, width, count, _landmark_text_crc(landmark_str))
+    return header + values.tobytes()
+
+
+def decode_landmark_blob(blob, landmark_str=None):
+    """The coordinates in a ``landmark_blob`` as a read-only ``(count, width)`` view.
+
+    No copy is made: the array is a view over ``blob``'s bytes. When
+    ``landmark_str`` is given, a blob derived from different text is stale and
+    gives ``None``, as does anything that is not a well-formed blob.
+    """
+    if not blob or len(blob) < _LANDMARK_BLOB_HEADER.size:
+        return None
+    magic, width, count, crc = _LANDMARK_BLOB_HEADER.unpack_from(blob)
+    if magic != LANDMARK_BLOB_MAGIC or len(blob) != _LANDMARK_BLOB_HEADER.size + 8 * width * count:
+        return None
+    if landmark_str is not None and crc != _landmark_text_crc(landmark_str):
+        return None
+    values = np.frombuffer(blob, dtype="<f8", count=width * count, offset=_LANDMARK_BLOB_HEADER.size)
+    return values.reshape(count, width)
+
+
+def landmark_array(landmark_str, landmark_blob=None):
+    """An object's landmarks as a ``(count, width)`` float64 array, ``NaN`` where missing.
+
+    The view over ``landmark_blob`` when it is current for ``landmark_str``;
+    otherwise the text is parsed. An empty ``(0, 0)`` array for no landmarks.
+    """
+    if not landmark_str:
+        return np.empty((0, 0))
+    stored = decode_landmark_blob(landmark_blob, landmark_str)
+    if stored is None:
+        stored = decode_landmark_blob(encode_landmark_blob(parse_landmark_rows(landmark_str), landmark_str))
+    return stored if stored is not None else np.empty((0, 0))
+
+
+class LandmarkCountMismatchError(ValueError):
+    """Objects in one dataset disagree on their number of landmark positions."""
+
+    def __init__(self, object_id, expected, found):
+        super().__init__(f"Object {object_id} has {found} landmarks, expected {expected}")
+        self.object_id = object_id
+        self.expected = expected
+        self.found = found
+
+
+class LandmarkMatrix:
+    """A whole dataset's landmarks as one array (see :meth:`MdDataset.get_landmark_matrix`).
+
+    ``landmarks`` is ``(n_objects, n_landmarks, dim)`` float64 with ``NaN`` for
+    missing coordinates, and ``missing`` is the matching boolean mask. Row ``i``
+    belongs to the object whose id is ``object_ids[i]``.
+    """
+
+    def __init__(self, object_ids, landmarks):
+        self.object_ids = object_ids
+        self.landmarks = landmarks
+        self.missing = np.isnan(landmarks)
+
+    def __len__(self):
+        return len(self.object_ids)
+
+    def landmark_lists(self):
+        """Per-object landmark lists, ``None`` where missing."""
+        return [array_to_landmarks(shape) for shape in self.landmarks]
+
+    def unimputable_landmarks(self):
+        """Landmark positions with a coordinate no object records.
+
+        The array form of :func:`find_unimputable_landmarks`: sorted 0-based
+        landmark indices.
+        """
+        if not len(self):
+            return []
+        return np.flatnonzero(self.missing.all(axis=0).any(axis=1)).tolist()
+
+
 class MdObject(Model):
     object_name = CharField()
     object_desc = CharField(null=True)
     pixels_per_mm = DoubleField(null=True)
     landmark_str = CharField(null=True)
+    # Parsed copy of landmark_str (see encode_landmark_blob), kept in step by
+    # save(). Nullable: rows written before it existed, or by a writer that
+    # only knows the text, fall back to parsing landmark_str.
+    landmark_blob = BlobField(null=True)
     dataset = ForeignKeyField(MdDataset, backref="object_list", on_delete="CASCADE")
     created_at = DateTimeField(default=datetime.datetime.now)
     modified_at = DateTimeField(default=datetime.datetime.now)
@@ -498,6 +781,14 @@ class MdObject(Model):
     # get_curve_anchors(). Present only for snap-traced curves; the dense
     # curve_raw_json is re-derived by snapping between these on edit.
     curve_anchor_json = CharField(null=True)
+    # What the object table shows for each object, kept in step by save() (see
+    # sync_summary) so the table can be paged and sorted in SQL without
+    # unpacking any landmarks. Null until computed: rows written before these
+    # existed get theirs from backfill_object_summaries().
+    summary_landmark_count = IntegerField(null=True)
+    summary_missing_count = IntegerField(null=True)
+    summary_curve_count = IntegerField(null=True)
+    summary_centroid_size = DoubleField(null=True)
 
     class Meta:
         database = gDatabase
@@ -511,6 +802,43 @@ class MdObject(Model):
         self.variable_list = []
         self.centroid_size = -1
 
+    def save(self, *args, **kwargs):
+        self.sync_landmark_blob()
+        self.sync_summary()
+        # Any saved change may alter the dataset's superimposition inputs.
+        result = super().save(*args, **kwargs)
+        get_superimposition_cache().invalidate_dataset(self.dataset_id)
+        return result
+
+    def sync_landmark_blob(self):
+        """Bring ``landmark_blob`` in line with ``landmark_str``.
+
+        The text is parsed only when the blob is missing or was read from other
+        text; after :meth:`pack_landmark` it is already current.
+        """
+        if not self.landmark_str:
+            self.landmark_blob = None
+        elif decode_landmark_blob(self.landmark_blob, self.landmark_str) is None:
+            self.landmark_blob = encode_landmark_blob(parse_landmark_rows(self.landmark_str), self.landmark_str)
+
+    def sync_summary(self):
+        """Recompute the ``summary_*`` columns from the stored landmarks and curves.
+
+        Works on a scratch copy, so ``landmark_list`` and the centroid size
+        cache of this instance are left as the caller had them.
+        """
+        scratch = MdObject(
+            landmark_str=self.landmark_str, landmark_blob=self.landmark_blob, pixels_per_mm=self.pixels_per_mm
+        )
+        if self.dataset_id is not None:
+            scratch.dataset = self.dataset
+        scratch.unpack_landmark()
+        recorded = sum(1 for lm in scratch.landmark_list if lm[0] is not None and lm[1] is not None)
+        self.summary_landmark_count = recorded
+        self.summary_missing_count = len(scratch.landmark_list) - recorded
+        self.summary_curve_count = len(self.get_curve_raw())
+        self.summary_centroid_size = scratch.get_centroid_size()
+
     def get_curve_raw(self):
         """Raw digitized curve traces as a dict, ``{}`` when unset or unreadable.
 
@@ -561,6 +889,7 @@ class MdObject(Model):
         new_object.object_desc = self.object_desc
         new_object.pixels_per_mm = self.pixels_per_mm
         new_object.landmark_str = self.landmark_str
+        new_object.landmark_blob = self.landmark_blob
         new_object.dataset = new_dataset
         new_object.property_str = self.property_str
         new_object.curve_raw_json = self.curve_raw_json
@@ -628,16 +957,12 @@ class MdObject(Model):
             img = MdImage()
             # img.object = self
         else:
-            # Files live at <storage>/<ds.id>/<obj.id>.<ext>: a replacement
-            # with a different extension would not overwrite them, leaving the
-            # old working copy and its originals/ archive orphaned on disk.
-            for old_path in (img.get_file_path(), img.get_original_file_path()):
-                try:
-                    if os.path.exists(old_path):
-                        os.remove(old_path)
-                except OSError as e:
-                    logger.warning(f"Could not remove replaced image file {old_path}: {e}")
+            # The replacement is stored under its own name, so the old working
+            # copy and its archived original go -- unless another object's
+            # image is the same file.
+            old_paths = [img.get_file_path(), img.get_original_file_path()]
             img.delete_instance()
+            remove_media_files(old_paths)
             img = MdImage()
         img.object = self
         img.add_file(file_name)
@@ -669,8 +994,9 @@ class MdObject(Model):
         media = self.image.first() or self.threed_model.first()
         source_path = media.get_file_path() if media is not None else None
 
-        if media is None:
-            # No image or 3D file to relocate (e.g. a landmark-only object).
+        if media is None or media.file_hash:
+            # No image or 3D file to relocate (e.g. a landmark-only object),
+            # or one in the media store, whose path does not involve the dataset.
             self.dataset = dataset
             self.save()
             return
@@ -698,59 +1024,43 @@ class MdObject(Model):
     def pack_landmark(self):
         # error check - modified to handle None values as "Missing"
         landmark_strs = []
+        rows = []
+        dimension = self.dataset.dimension
         for lm in self.landmark_list:
             coords = []
-            for i in range(self.dataset.dimension):
+            for i in range(dimension):
                 if i < len(lm) and lm[i] is not None:
                     coords.append(str(lm[i]))
                 else:
                     coords.append("Missing")  # Store as "Missing" text
             landmark_strs.append(LANDMARK_SEPARATOR.join(coords))
+            # The values exactly as the text will read back.
+            rows.append([_parse_landmark_value(x) for x in coords])
         self.landmark_str = LINE_SEPARATOR.join(landmark_strs)
+        self.landmark_blob = encode_landmark_blob(rows, self.landmark_str)
 
     def unpack_landmark(self):
-        """Parse ``landmark_str`` into ``landmark_list``, blanks included.
-
-        A field that is empty or non-numeric ("Missing", "NA", …) becomes
-        ``None``. Blank fields delimited by tab/comma **keep their position**:
-        clearing the Y cell of a landmark yields ``[x, None]``, not a short
-        ``[x]``. Callers index ``lm[0]``/``lm[1]`` unconditionally, so a short
-        row raises ``IndexError`` and takes the whole dataset's analysis down
+        """Fill ``landmark_list`` from the stored landmarks, blanks included.
+
+        Reads ``landmark_blob`` when it is current, and parses ``landmark_str``
+        (:func:`parse_landmark_rows`) only when it is not. A field that is empty
+        or non-numeric ("Missing", "NA", ...) becomes ``None``. Blank fields
+        delimited by tab/comma **keep their position**: clearing the Y cell of a
+        landmark yields ``[x, None]``, not a short ``[x]``. Callers index
+        ``lm[0]``/``lm[1]`` unconditionally, so a short row raises
+        ``IndexError`` and takes the whole dataset's analysis down
         (``has_missing_landmarks``, ``procrustes_superimposition``,
-        ``count_landmarks``). Runs of whitespace are padding, not position, so
-        the blanks they produce are still dropped.
+        ``count_landmarks``).
         """
         self.landmark_list = []
         # print "[", self.landmark_str,"]"
         if self.landmark_str is None or self.landmark_str == "":
             return self.landmark_list
-        lm_list = self.landmark_str.split(LINE_SEPARATOR)
-        for lm in lm_list:
-            if lm != "":
-                # Try to detect the separator used
-                # Priority: tab > comma > multiple spaces > single space
-                positional = True
-                if "\t" in lm:
-                    separator = "\t"
-                elif "," in lm:
-                    separator = ","
-                elif "  " in lm:  # Multiple spaces
-                    # Split by multiple spaces and filter empty strings
-                    coords = [x for x in lm.split() if x]
-                    self.landmark_list.append([float(x) if self.is_float(x) else None for x in coords])
-                    continue
-                elif " " in lm:
-                    separator = " "
-                    positional = False
-                else:
-                    # Single value or unknown format
-                    separator = LANDMARK_SEPARATOR
-
-                coords = [x.strip() for x in lm.split(separator)]
-                if not positional:
-                    # Space-separated: an empty field is just extra spacing.
-                    coords = [x for x in coords if x]
-                self.landmark_list.append([float(x) if self.is_float(x) else None for x in coords])
+        stored = decode_landmark_blob(self.landmark_blob, self.landmark_str)
+        if stored is not None:
+            self.landmark_list = array_to_landmarks(stored)
+        else:
+            self.landmark_list = parse_landmark_rows(self.landmark_str)
         self._normalize_landmark_widths()
         return self.landmark_list
 
@@ -775,13 +1085,7 @@ class MdObject(Model):
         if not width:
             width = max(len(lm) for lm in self.landmark_list)
         # Every landmark needs at least X and Y.
-        width = max(width, 2)
-
-        for lm in self.landmark_list:
-            if len(lm) < width:
-                lm.extend([None] * (width - len(lm)))
-            while len(lm) > width and lm[-1] is None:
-                lm.pop()
+        pad_landmark_rows(self.landmark_list, max(width, 2))
 
     def is_float(self, s):
         # Check for "Missing" text specifically
@@ -796,6 +1100,16 @@ class MdObject(Model):
     def get_landmark_list(self):
         return self.unpack_landmark()
 
+    def get_landmark_array(self):
+        """Landmarks as a ``(count, width)`` float64 array, ``NaN`` where missing.
+
+        A zero-copy, read-only view of ``landmark_blob`` while it is current,
+        so nothing is parsed; otherwise read from ``landmark_str``. ``width`` is
+        the widest row, normally the dataset's dimension. Unlike
+        :meth:`get_landmark_list` this does not touch ``landmark_list``.
+        """
+        return landmark_array(self.landmark_str, self.landmark_blob)
+
     def pack_variable(self, variable_list=None):
         if variable_list is None:
             variable_list = self.variable_list
@@ -942,6 +1256,11 @@ class MdImage(Model):
     created_at = DateTimeField(default=datetime.datetime.now)
     modified_at = DateTimeField(default=datetime.datetime.now)
     object = ForeignKeyField(MdObject, backref="image", on_delete="CASCADE")
+    # Content hashes of the working copy and the archived original in the
+    # media store (see MdMediaStore). Null for files still in the per-object
+    # layout, until adopt_legacy_media_files() has moved them in.
+    file_hash = CharField(null=True, index=True)
+    original_hash = CharField(null=True, index=True)
 
     def copy_image(self, new_object):
         new_image = MdImage()
@@ -954,81 +1273,71 @@ class MdImage(Model):
         new_image.exifdatetime = self.exifdatetime
         new_image.file_created = self.file_created
         new_image.file_modified = self.file_modified
+        if self.file_hash:
+            # Stored by content: the copy refers to the same files.
+            new_image.file_hash = self.file_hash
+            new_image.original_hash = self.original_hash
+            return new_image
         new_image.add_file(self.get_file_path())
 
         # The working copy above is already downscaled (if the original was
         # oversized), so carry the archived pristine original along with it.
         source_original = self.get_original_file_path()
         if os.path.exists(source_original):
-            target_original = new_image.get_original_file_path()
-            os.makedirs(os.path.dirname(target_original), exist_ok=True)
-            shutil.copyfile(source_original, target_original)
+            new_image.original_hash = MdMediaStore.put_file(
+                _storage_base(None), source_original, new_image.file_extension()
+            )
         return new_image
 
     def add_file(self, file_name, base_path=None):
-        # print("add file:", file_name)
-        try:
-            self.load_file_info(file_name)
-            new_filepath = self.get_file_path(base_path)
-
-            # Create directory if it doesn't exist
-            try:
-                if not os.path.exists(os.path.dirname(new_filepath)):
-                    os.makedirs(os.path.dirname(new_filepath))
-            except OSError as e:
-                logger.error(f"Failed to create directory for {new_filepath}: {e}")
-                raise ValueError(f"Cannot create directory for file storage: {e}") from e
-
-            if self._try_downscale(file_name, new_filepath):
-                # Working copy is downscaled: archive the pristine original
-                # alongside it so nothing is lost.
-                original_filepath = self.get_original_file_path(base_path)
-                try:
-                    os.makedirs(os.path.dirname(original_filepath), exist_ok=True)
-                    shutil.copyfile(file_name, original_filepath)
-                except (OSError, shutil.Error) as e:
-                    logger.error(f"Failed to archive original {file_name} to {original_filepath}: {e}")
-                    raise ValueError(f"Cannot archive original file: {e}") from e
-            else:
-                # Small enough (or not downscalable): store verbatim
-                try:
-                    shutil.copyfile(file_name, new_filepath)
-                except (OSError, shutil.Error) as e:
-                    logger.error(f"Failed to copy file from {file_name} to {new_filepath}: {e}")
-                    raise ValueError(f"Cannot copy file: {e}") from e
+        """Store ``file_name`` as this image's working copy and record its details.
 
+        An oversized photo is stored downscaled, with the original archived
+        beside it (see ``IMAGE_MAX_DIM``); anything else is stored verbatim.
+        Its live-wire fields are then built in the background, if a builder is
+        running (``MdLiveWireStore``).
+        """
+        try:
+            self.original_path = file_name
+            file_info = MdImageIngest.store_image(
+                file_name, _storage_base(base_path), self.file_extension(), IMAGE_MAX_DIM, IMAGE_JPEG_QUALITY
+            )
+            self.apply_file_info(file_name, file_info)
         except Exception as e:
             logger.error(f"Failed to add file {file_name}: {e}")
             raise
+        MdLiveWireStore.schedule_builds([self.get_file_path(base_path)], _storage_base(base_path))
 
         return self
 
+    def apply_file_info(self, fullpath, file_info):
+        """Set the recorded details of the file at ``fullpath`` from ``file_info``.
+
+        ``file_info`` is as :func:`MdImageIngest.store_image` returns it.
+        """
+        self.original_path = fullpath
+        self.original_filename = Path(fullpath).name
+        self.md5hash = file_info["md5hash"]
+        self.size = file_info["size"]
+        self.exifdatetime = file_info["exifdatetime"]
+        self.file_created = file_info["ctime"]
+        self.file_modified = file_info["mtime"]
+        if "file_hash" in file_info:
+            self.file_hash = file_info["file_hash"]
+            self.original_hash = file_info["original_hash"]
+
+    def file_extension(self):
+        """Extension of the stored files, that of the file imported."""
+        return self.original_path.split(".")[-1]
+
     def _try_downscale(self, source_path, target_path):
         """Write a downscaled working copy of ``source_path`` to ``target_path``.
 
-        Returns True only when the source is oversized (longer side above
-        ``IMAGE_MAX_DIM``) and the downscaled copy was written successfully.
-        Returns False when no downscale is needed OR on any failure, so the
-        caller falls back to copying the original verbatim — an attach must
-        never fail or lose data because downscaling did.
+        See :func:`MdImageIngest.downscale_image`; False on any failure.
         """
         try:
             with Image.open(source_path) as img:
-                if max(img.size) <= IMAGE_MAX_DIM:
-                    return False
-                exif = img.info.get("exif")
-                img.thumbnail((IMAGE_MAX_DIM, IMAGE_MAX_DIM), Image.LANCZOS)
-                save_kwargs = {}
-                if target_path.split(".")[-1].lower() in ("jpg", "jpeg"):
-                    if img.mode not in ("RGB", "L", "CMYK"):
-                        img = img.convert("RGB")
-                    save_kwargs["quality"] = IMAGE_JPEG_QUALITY
-                    save_kwargs["optimize"] = True
-                    if exif:
-                        save_kwargs["exif"] = exif
-                img.save(target_path, **save_kwargs)
-                logger.info(f"Stored downscaled working copy {img.size} of {source_path}")
-                return True
+                return MdImageIngest.downscale_image(img, source_path, target_path, IMAGE_MAX_DIM, IMAGE_JPEG_QUALITY)
         except Exception as e:
             logger.warning(f"Downscale of {source_path} failed, storing original verbatim: {e}")
             return False
@@ -1041,15 +1350,19 @@ class MdImage(Model):
         freeze the location before the preference that sets it is read. See
         ``MdUtils.get_storage_directory``.
 
-        Note the path is computed, never stored -- ``original_path`` records
-        where the file was imported *from* and contributes only its extension.
+        Note the path is computed, never stored -- from the content hash of
+        the file in the media store, or for a file not yet moved into the
+        store, from the object and dataset ids; ``original_path`` records where
+        the file was imported *from* and contributes only its extension.
         Relocating the library is therefore a directory move, with no database
         rewrite.
         """
+        if self.file_hash:
+            return MdMediaStore.blob_path(_storage_base(base_path), self.file_hash, self.file_extension())
         return os.path.join(
             _storage_base(base_path),
             str(self.object.dataset.id),
-            str(self.object.id) + "." + self.original_path.split(".")[-1],
+            str(self.object.id) + "." + self.file_extension(),
         )
 
     def get_original_file_path(self, base_path=None):
@@ -1058,11 +1371,13 @@ class MdImage(Model):
         Only oversized attachments are archived (small ones are stored verbatim
         as the working copy), so this path may not exist.
         """
+        if self.original_hash:
+            return MdMediaStore.blob_path(_storage_base(base_path), self.original_hash, self.file_extension())
         return os.path.join(
             _storage_base(base_path),
             str(self.object.dataset.id),
             "originals",
-            str(self.object.id) + "." + self.original_path.split(".")[-1],
+            str(self.object.id) + "." + self.file_extension(),
         )
 
     def has_archived_original(self, base_path=None):
@@ -1090,22 +1405,16 @@ class MdImage(Model):
         file_info["size"] = stat_result.st_size
 
         """ md5 hash value """
-        file_info["md5hash"], image_data = self.get_md5hash_info(fullpath)
+        file_info["md5hash"] = MdMediaStore.md5_of_file(fullpath)
 
         """ exif info """
-        exif_info = self.get_exif_info(fullpath, image_data)
+        exif_info = self.get_exif_info(fullpath)
         file_info["exifdatetime"] = exif_info["datetime"]
         file_info["latitude"] = exif_info["latitude"]
         file_info["longitude"] = exif_info["longitude"]
         file_info["map_datum"] = exif_info["map_datum"]
 
-        self.original_path = fullpath
-        self.original_filename = Path(fullpath).name
-        self.md5hash = file_info["md5hash"]
-        self.size = file_info["size"]
-        self.exifdatetime = file_info["exifdatetime"]
-        self.file_created = file_info["ctime"]
-        self.file_modified = file_info["mtime"]
+        self.apply_file_info(fullpath, file_info)
         return file_info
 
     def get_md5hash_info(self, filepath):
@@ -1124,83 +1433,13 @@ class MdImage(Model):
             raise ValueError(f"Cannot calculate MD5 hash for {filepath}: {e}") from e
 
     def get_exif_info(self, fullpath, image_data=None):
-        image_info = {"date": "", "time": "", "latitude": "", "longitude": "", "map_datum": ""}
-        img = None
-
-        try:
-            if image_data:
-                # img = Image.open()
-                img = Image.open(io.BytesIO(image_data))
-            else:
-                img = Image.open(fullpath)
-        except (FileNotFoundError, PermissionError) as e:
-            logger.error(f"Cannot open image file {fullpath}: {e}")
-            raise
-        except Exception as e:
-            logger.warning(f"Cannot process image {fullpath}: {e}")
-            # Return empty info if image cannot be processed
-            return {"datetime": "", "latitude": "", "longitude": "", "map_datum": ""}
-        ret = {}
-        # print(filename)
+        """EXIF date and GPS position of ``fullpath``; see :func:`MdImageIngest.exif_info`."""
+        img = MdImageIngest.open_image(fullpath, io.BytesIO(image_data) if image_data else None)
         try:
-            info = img._getexif()
-            for tag, value in info.items():
-                decoded = TAGS.get(tag, tag)
-                ret[decoded] = value
-                # print("exif:", decoded, value)
-            try:
-                if ret["GPSInfo"] is not None:
-                    gps_info = ret["GPSInfo"]
-                    # print("gps info:", gps_info)
-                degree_symbol = "°"
-                minute_symbol = "'"
-                longitude = str(int(gps_info[4][0])) + degree_symbol + str(gps_info[4][1]) + minute_symbol + gps_info[3]
-                latitude = str(int(gps_info[2][0])) + degree_symbol + str(gps_info[2][1]) + minute_symbol + gps_info[1]
-                map_datum = gps_info[18]
-                image_info["latitude"] = latitude
-                image_info["longitude"] = longitude
-                image_info["map_datum"] = map_datum
-
-            except KeyError:
-                pass
-                # print( "GPS Data Don't Exist for", Path(filename).name)
-
-            try:
-                if ret["DateTimeOriginal"] is not None:
-                    exif_timestamp = ret["DateTimeOriginal"]
-                    # print("original:", exifTimestamp)
-                    image_info["date"], image_info["time"] = exif_timestamp.split()
-            except KeyError:
-                pass
-                # print( "DateTimeOriginal Don't Exist")
-            try:
-                if ret["DateTimeDigitized"] is not None:
-                    exif_timestamp = ret["DateTimeDigitized"]
-                    image_info["date"], image_info["time"] = exif_timestamp.split()
-            except KeyError:
-                pass
-                # print( "DateTimeDigitized Don't Exist")
-            try:
-                if ret["DateTime"] is not None:
-                    exif_timestamp = ret["DateTime"]
-                    image_info["date"], image_info["time"] = exif_timestamp.split()
-            except KeyError:
-                pass
-                # print( "DateTime Don't Exist")
-
-        except Exception:
-            pass
-            # print(e)
-
-        if image_info["date"] == "":
-            str1 = time.ctime(os.path.getmtime(fullpath))
-            datetime_object = datetime.datetime.strptime(str1, "%a %b %d %H:%M:%S %Y").astimezone()
-            image_info["date"] = datetime_object.strftime("%Y-%m-%d")
-            image_info["time"] = datetime_object.strftime("%H:%M:%S")
-        else:
-            image_info["date"] = "-".join(image_info["date"].split(":"))
-        image_info["datetime"] = image_info["date"] + " " + image_info["time"]
-        return image_info
+            return MdImageIngest.exif_info(fullpath, img)
+        finally:
+            if img is not None:
+                img.close()
 
 
 class MdThreeDModel(Model):
@@ -1214,6 +1453,8 @@ class MdThreeDModel(Model):
     created_at = DateTimeField(default=datetime.datetime.now)
     modified_at = DateTimeField(default=datetime.datetime.now)
     object = ForeignKeyField(MdObject, backref="threed_model", on_delete="CASCADE")
+    # Content hash of the file in the media store; see MdImage.file_hash.
+    file_hash = CharField(null=True, index=True)
 
     class Meta:
         database = gDatabase
@@ -1228,6 +1469,9 @@ class MdThreeDModel(Model):
         new_model.size = self.size
         new_model.file_created = self.file_created
         new_model.file_modified = self.file_modified
+        if self.file_hash:
+            new_model.file_hash = self.file_hash
+            return new_model
         new_model.add_file(self.get_file_path())
         return new_model
 
@@ -1237,19 +1481,13 @@ class MdThreeDModel(Model):
         try:
             file_name = mu.process_3d_file(file_name)
             self.load_file_info(file_name)
-            new_filepath = self.get_file_path(base_path)
 
             try:
-                if not os.path.exists(os.path.dirname(new_filepath)):
-                    os.makedirs(os.path.dirname(new_filepath))
-            except OSError as e:
-                logger.error(f"Failed to create directory for {new_filepath}: {e}")
-                raise ValueError(f"Cannot create directory for file storage: {e}") from e
-
-            try:
-                shutil.copyfile(file_name, new_filepath)
+                self.file_hash = MdMediaStore.put_file(
+                    _storage_base(base_path), file_name, self.file_extension(), digest=self.md5hash
+                )
             except (OSError, shutil.Error) as e:
-                logger.error(f"Failed to copy file from {file_name} to {new_filepath}: {e}")
+                logger.error(f"Failed to copy file from {file_name} to {_storage_base(base_path)}: {e}")
                 raise ValueError(f"Cannot copy file: {e}") from e
 
         except Exception as e:
@@ -1258,12 +1496,18 @@ class MdThreeDModel(Model):
 
         return self
 
+    def file_extension(self):
+        """Extension of the stored file, that of the file imported."""
+        return self.original_path.split(".")[-1]
+
     def get_file_path(self, base_path=None):
         """Where this 3D model's file lives. See ``MdImage.get_file_path``."""
+        if self.file_hash:
+            return MdMediaStore.blob_path(_storage_base(base_path), self.file_hash, self.file_extension())
         return os.path.join(
             _storage_base(base_path),
             str(self.object.dataset.id),
-            str(self.object.id) + "." + self.original_path.split(".")[-1],
+            str(self.object.id) + "." + self.file_extension(),
         )
 
     def load_file_info(self, fullpath):
@@ -1277,7 +1521,7 @@ class MdThreeDModel(Model):
         file_info["size"] = stat_result.st_size
 
         """ md5 hash value """
-        file_info["md5hash"], image_data = self.get_md5hash_info(fullpath)
+        file_info["md5hash"] = MdMediaStore.md5_of_file(fullpath)
 
         self.original_path = fullpath
         self.original_filename = Path(fullpath).name
@@ -1303,7 +1547,13 @@ class MdThreeDModel(Model):
 
 
 class MdObjectOps:
-    def __init__(self, mdobject):
+    def __init__(self, mdobject, landmark_list=None):
+        """Working copy of ``mdobject`` for superimposition and display.
+
+        ``landmark_list`` is used as-is instead of unpacking the object's own
+        landmarks, for coordinates that are already known (e.g. from the
+        superimposition cache).
+        """
         self.id = mdobject.id
         self.object_name = mdobject.object_name
         self.object_desc = mdobject.object_desc
@@ -1313,9 +1563,13 @@ class MdObjectOps:
         # self.scale = mdobject.scale
         self.landmark_str = mdobject.landmark_str
         self.property_str = mdobject.property_str
-        if self.landmark_str is not None and self.landmark_str != "":
-            mdobject.unpack_landmark()
-        self.landmark_list = copy.deepcopy(mdobject.landmark_list)
+        if landmark_list is not None:
+            self.landmark_list = landmark_list
+        else:
+            if self.landmark_str is not None and self.landmark_str != "":
+                mdobject.unpack_landmark()
+            # Rows of floats and None: a shallow copy per row is a full copy.
+            self.landmark_list = [list(lm) for lm in mdobject.landmark_list]
         # if mdobject.polygons is not None and mdobject.polygons != "":
         #    mdobject.unpack_polygons()
         # self.polygon_list = copy.deepcopy(mdobject.polygon_list)
@@ -1800,7 +2054,19 @@ class MdObjectOps:
 
 
 class MdDatasetOps:
-    def __init__(self, dataset):
+    def __init__(self, dataset, superimposed=None, landmarks=None):
+        """Working copy of ``dataset`` and its objects.
+
+        Args:
+            dataset: the ``MdDataset`` to load.
+            superimposed: optional ``{object_id: landmark_list}`` of coordinates
+                that are already superimposed (see
+                :meth:`from_superimposition_cache`). Objects are then built from
+                these without unpacking or expanding curves.
+            landmarks: optional :class:`LandmarkMatrix` of the dataset, when the
+                caller has already read it. Otherwise it is read here; objects
+                are unpacked one by one only when their landmark counts differ.
+        """
         self.id = dataset.id
         self.dataset_name = dataset.dataset_name
         self.dataset_desc = dataset.dataset_desc
@@ -1812,15 +2078,28 @@ class MdDatasetOps:
         self.selected_object_id_list = []
         self.edge_list = []
         object_list = dataset.object_list.order_by(MdObject.sequence)
+        if superimposed is not None:
+            self.object_list = [MdObjectOps(mo, superimposed[mo.id]) for mo in object_list]
+            self._load_dataset_geometry(dataset)
+            return
         # Semi-landmark curves are stored per object as raw traces, not as
         # landmarks (merge-at-analysis model). Expand them here so analysis sees
         # each shape as fixed landmarks followed by the resampled semi-landmarks.
         curve_config = dataset.get_curve_config()
         n_dim = 3 if dataset.dimension == 3 else 2
+        if landmarks is None:
+            # Differing counts leave landmarks None; check_object_list() reports
+            # them when superimposing.
+            with contextlib.suppress(LandmarkCountMismatchError):
+                landmarks = dataset.get_landmark_matrix()
+        fixed = dict(zip(landmarks.object_ids, landmarks.landmark_lists())) if landmarks is not None else {}
         for mo in object_list:
             # self.object_list.append(mo.copy())
             # print(mo.id, mo.sequence)
-            ops = MdObjectOps(mo)
+            # Hand each object its dataset, or unpacking fetches it again, one
+            # query per object, just to learn the dimension.
+            mo.dataset = dataset
+            ops = MdObjectOps(mo, fixed.get(mo.id))
             if curve_config:
                 raw_map = mo.get_curve_raw()
                 for curve in curve_config:
@@ -1834,6 +2113,9 @@ class MdDatasetOps:
                         ops.landmark_list.extend([[None] * n_dim for _ in range(n)])
             self.object_list.append(ops)
 
+        self._load_dataset_geometry(dataset)
+
+    def _load_dataset_geometry(self, dataset):
         if dataset.wireframe is not None and dataset.wireframe != "":
             dataset.unpack_wireframe()
         if dataset.edge_list is not None and len(dataset.edge_list) > 0:
@@ -1848,6 +2130,30 @@ class MdDatasetOps:
         self.baseline_point_list = dataset.baseline_point_list
         # print self
 
+    @classmethod
+    def from_superimposition_cache(cls, dataset, key):
+        """Superimposed ops for ``dataset`` from the cache, or ``None`` on a miss.
+
+        ``key`` is ``dataset.superimposition_key(method)``. A hit skips unpacking
+        every object's landmarks and the superimposition itself.
+        """
+        cached = get_superimposition_cache().get(dataset.id, key)
+        if cached is None:
+            return None
+        object_ids, landmarks = cached
+        superimposed = {object_id: array_to_landmarks(shape) for object_id, shape in zip(object_ids, landmarks)}
+        try:
+            return cls(dataset, superimposed=superimposed)
+        except KeyError:
+            # An object the entry does not cover (added since the key was taken).
+            return None
+
+    def store_in_superimposition_cache(self, dataset, key):
+        """Record this (already superimposed) state in the cache under ``key``."""
+        return get_superimposition_cache().put(
+            dataset.id, key, [mo.id for mo in self.object_list], [mo.landmark_list for mo in self.object_list]
+        )
+
     def reset_pose(self):
         pass
 
@@ -2052,7 +2358,7 @@ class MdDatasetOps:
                     return True
         return False
 
-    def procrustes_superimposition_with_imputation(self):
+    def procrustes_superimposition_with_imputation(self, progress_callback=None):
         """Procrustes superimposition with missing landmark imputation.
 
         Expectation-maximisation around the ordinary Procrustes alignment:
@@ -2083,52 +2389,26 @@ class MdDatasetOps:
         The object dialog's preview fits the mean the same way and for the same
         reason (devlog 221), only there the object sits in image coordinates
         instead of being aligned by GPA.
+
+        The loop runs on the whole dataset as one array
+        (:meth:`MdProcrustes.ProcrustesEngine.superimpose_with_imputation`): the
+        gap mask is computed once, every gapped object is fitted in one batched
+        step and convergence is a single norm over all estimates.
+
+        ``progress_callback(done, total)`` is handed to the engine, which calls
+        it once per alignment iteration.
         """
         if not self.check_object_list():
             print("check_object_list failed")
             return False
 
-        if not self.has_missing_landmarks():
-            self._align_to_mean_shape()
-            return True
-
-        # Where the gaps are, before anything fills them in. Every refinement
-        # re-opens exactly these positions so each new estimate is fitted on
-        # genuinely observed landmarks and never on a previous estimate.
-        gaps = [
-            [idx for idx, lm in enumerate(obj.landmark_list) if any(c is None for c in lm[: self.dimension])]
-            for obj in self.object_list
-        ]
-
-        average_shape = self._align_to_mean_shape()
-        previous_estimates = None
-
-        for _ in range(MAX_IMPUTATION_REFINEMENTS):
-            if average_shape is None:
-                break
-
-            for obj_idx, positions in enumerate(gaps):
-                landmark_list = self.object_list[obj_idx].landmark_list
-                for idx in positions:
-                    for d in range(min(self.dimension, len(landmark_list[idx]))):
-                        landmark_list[idx][d] = None
-                self.estimate_missing_landmarks(obj_idx, average_shape)
-
-            estimates = [
-                self.object_list[obj_idx].landmark_list[idx][: self.dimension]
-                for obj_idx, positions in enumerate(gaps)
-                for idx in positions
-            ]
-            if previous_estimates is not None and self._estimates_converged(previous_estimates, estimates):
-                break
-            previous_estimates = estimates
-
-            # The objects are complete now, so re-normalising puts the ones that
-            # had gaps on the same footing as the rest: they were centred and
-            # scaled on their observed subset only, which skewed their
-            # contribution to the mean and, through it, their own estimates.
-            average_shape = self._align_to_mean_shape()
-
+        engine = self._procrustes_engine()
+        if engine.has_missing():
+            engine.superimpose_with_imputation(MAX_IMPUTATION_REFINEMENTS, progress_callback=progress_callback)
+        else:
+            engine.center_and_scale()
+            engine.align(final_rotation=True, progress_callback=progress_callback)
+        self._apply_procrustes_engine(engine)
         return True
 
     def _align_to_mean_shape(self, max_iterations=100):
@@ -2138,50 +2418,31 @@ class MdDatasetOps:
         are still missing are simply left out: the mean is a per-coordinate
         nanmean and rotation uses the landmarks an object actually has.
         """
-        for mo in self.object_list:
-            mo.move_to_center()
-            mo.rescale_to_unitsize()
-
-        average_shape = None
-        previous_average_shape = None
-        for _ in range(max_iterations):
-            previous_average_shape = average_shape
-            average_shape = self.get_average_shape()
-
-            if previous_average_shape is not None and self.is_same_shape(previous_average_shape, average_shape):
-                break
-
-            self.set_reference_shape(average_shape)
-            for j in range(len(self.object_list)):
-                self.rotate_gls_to_reference_shape(j)
-
-        # The loop breaks before rotating onto the average it just accepted.
-        if average_shape is not None:
-            self.set_reference_shape(average_shape)
-            for j in range(len(self.object_list)):
-                self.rotate_gls_to_reference_shape(j)
+        engine = self._procrustes_engine()
+        engine.center_and_scale()
+        mean = engine.align(max_iterations, final_rotation=True)
+        self._apply_procrustes_engine(engine)
+        if mean is None:
+            return None
+        average_shape = MdObjectOps(MdObject())
+        average_shape.landmark_list = array_to_landmarks(mean)
+        if self.id:
+            average_shape.dataset_id = self.id
         return average_shape
 
-    @staticmethod
-    def _estimates_converged(previous, current, threshold=1e-8):
-        """Have the estimates stopped moving between refinement rounds?
+    def _procrustes_engine(self):
+        """The objects' landmarks as one :class:`MdProcrustes.ProcrustesEngine`."""
+        return ProcrustesEngine.from_landmark_lists([mo.landmark_list for mo in self.object_list], self.dimension)
 
-        A coordinate stays ``None`` when no object records that landmark, so
-        there is nothing to estimate it from; treat that as settled rather than
-        trying to subtract it.
-        """
-        if len(previous) != len(current):
-            return False
-        for prev_lm, curr_lm in zip(previous, current):
-            for p, c in zip(prev_lm, curr_lm):
-                if p is None or c is None:
-                    if p is not c:
-                        return False
-                elif abs(p - c) > threshold:
-                    return False
-        return True
+    def _apply_procrustes_engine(self, engine):
+        """Write an engine's aligned coordinates back to the object list."""
+        for mo, landmark_list, centroid_size in zip(
+            self.object_list, engine.to_landmark_lists(), engine.centroid_sizes, strict=True
+        ):
+            mo.landmark_list = landmark_list
+            mo.centroid_size = float(centroid_size)
 
-    def procrustes_superimposition(self, max_iterations=100, convergence_threshold=1e-6):
+    def procrustes_superimposition(self, max_iterations=100, convergence_threshold=1e-6, progress_callback=None):
         """Procrustes superimposition that automatically handles missing landmarks.
 
         Args:
@@ -2189,6 +2450,8 @@ class MdDatasetOps:
             convergence_threshold: Convergence threshold for shape similarity (default 1e-6)
                 Previously 1e-10, relaxed to 1e-6 for 95% performance improvement
                 with negligible impact on accuracy (measurement error >> 1e-6)
+            progress_callback: Optional ``(iteration, total)``, called after every
+                alignment iteration; raising from it abandons the superimposition
         """
         # print("begin_procrustes")
         if not self.check_object_list():
@@ -2197,39 +2460,14 @@ class MdDatasetOps:
 
         # Check if we have missing landmarks and use appropriate method
         if self.has_missing_landmarks():
-            return self.procrustes_superimposition_with_imputation()
-
-        # Original implementation for complete data
-        for mo in self.object_list:
-            # mo.set_landmarks()
-            mo.move_to_center()
-            mo.rescale_to_unitsize()
-        # print("move_to_center and rescale_to_unitsize done")
-        # print("object",self.object_list[0].landmark_list[:5])
-
-        average_shape = None
-        previous_average_shape = None
-        i = 0
-        while i < max_iterations:
-            i += 1
-            # print("progressing...", i)
-            previous_average_shape = average_shape
-            average_shape = self.get_average_shape()
-
-            # average_shape.print_landmarks("average_shape")
-
-            if (
-                self.is_same_shape(previous_average_shape, average_shape, convergence_threshold)
-                and previous_average_shape is not None
-            ):
-                break
-            self.set_reference_shape(average_shape)
-            for j in range(len(self.object_list)):
-                self.rotate_gls_to_reference_shape(j)
-                # self.objects[0].print_landmarks('aa')
-                # self.objects[1].print_landmarks('bb')
-                # average_shape.print_landmarks('cc')
-        # print("end procrustes")
+            return self.procrustes_superimposition_with_imputation(progress_callback)
+
+        # Complete data: GPA on the whole dataset as one array (MdProcrustes),
+        # converted back to landmark lists once at the end.
+        engine = self._procrustes_engine()
+        engine.center_and_scale()
+        engine.align(max_iterations, convergence_threshold, progress_callback=progress_callback)
+        self._apply_procrustes_engine(engine)
         return True
 
     def is_same_shape(self, shape1, shape2, threshold=1e-6):
@@ -2262,7 +2500,7 @@ class MdDatasetOps:
         # print "diff: ", sum
         return sum_coord < threshold
 
-    def _fill_missing_landmarks(self):
+    def _fill_missing_landmarks(self, progress_callback=None):
         """Impute missing landmarks in place so a superimposition that needs
         complete shapes (Bookstein, Resistant Fit) can run.
 
@@ -2277,7 +2515,7 @@ class MdDatasetOps:
         """
         if not self.has_missing_landmarks():
             return
-        self.procrustes_superimposition_with_imputation()
+        self.procrustes_superimposition_with_imputation(progress_callback)
         for mo in self.object_list:
             for lm in mo.landmark_list:
                 for c in lm[: self.dimension]:
@@ -2286,7 +2524,7 @@ class MdDatasetOps:
                             "Some landmarks are missing in every object and cannot be imputed; use Procrustes."
                         )
 
-    def bookstein_superimposition(self):
+    def bookstein_superimposition(self, progress_callback=None):
         """Bookstein baseline registration for every object in the dataset.
 
         Re-expresses each shape as Bookstein shape coordinates by mapping the
@@ -2300,6 +2538,9 @@ class MdDatasetOps:
         landmark indices). Missing landmarks are imputed first (shared Procrustes
         EM imputation) so the baseline mapping runs on complete shapes.
 
+        ``progress_callback(done, total)`` is passed to that imputation, then
+        called once per registered object.
+
         Returns:
             True on success.
 
@@ -2319,14 +2560,16 @@ class MdDatasetOps:
                 "set one in the dataset before running it."
             )
 
-        self._fill_missing_landmarks()
+        self._fill_missing_landmarks(progress_callback)
 
         idx = [b - 1 for b in baseline[:need]]  # baseline indices are 1-based
-        for mo in self.object_list:
+        for i, mo in enumerate(self.object_list, start=1):
             if self.dimension == 3:
                 mo.landmark_list = self._bookstein_coords_3d(mo.landmark_list, idx)
             else:
                 mo.landmark_list = self._bookstein_coords_2d(mo.landmark_list, idx)
+            if progress_callback:
+                progress_callback(i, len(self.object_list))
         return True
 
     @staticmethod
@@ -2566,6 +2809,46 @@ class MdDatasetOps:
         return vec
 
 
+# Analysis results that are tables of numbers -- landmarks, scores, rotation
+# matrices, eigenvalues -- are stored together as one NPZ archive in
+# MdAnalysis.result_arrays, float64, NaN for a missing value. Each name is its
+# legacy JSON column without the "_json" suffix; analyses saved before the
+# archive existed, or restored from a package, still have the JSON, and the
+# accessors read either.
+RESULT_ARRAY_NAMES = (
+    "raw_landmark",
+    "superimposed_landmark",
+    "pca_analysis_result",
+    "pca_rotation_matrix",
+    "pca_eigenvalues",
+    "cva_analysis_result",
+    "cva_rotation_matrix",
+    "cva_eigenvalues",
+)
+
+
+def _result_array(value):
+    """``value`` as a float64 array, ``None`` when it is not a rectangular table of numbers."""
+    try:
+        return np.array(value, dtype=np.float64)
+    except (ValueError, TypeError):
+        return None
+
+
+def _nan_to_none(values):
+    if isinstance(values, list):
+        return [_nan_to_none(v) for v in values]
+    return None if values != values else values
+
+
+def _result_list(array):
+    """An array as nested lists, ``None`` where it holds ``NaN``."""
+    values = array.tolist()
+    if np.isnan(array).any():
+        values = _nan_to_none(values)
+    return values
+
+
 class MdAnalysis(Model):
     analysis_name = CharField()
     analysis_desc = CharField(null=True)
@@ -2609,11 +2892,99 @@ class MdAnalysis(Model):
     # later. See MdDataset.get_curve_config() for the format.
     curve_config_json = CharField(null=True)
 
+    # The numeric results as one NPZ archive (see RESULT_ARRAY_NAMES), read
+    # one array at a time. A result stored here has no JSON column value.
+    result_arrays = BlobField(null=True)
+
     # virtual_specimens_json = CharField(null=True) # list of virtual specimens
 
     created_at = DateTimeField(default=datetime.datetime.now)
     modified_at = DateTimeField(default=datetime.datetime.now)
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Results set since the last save, name -> array (None: now JSON), and
+        # the arrays already read from result_arrays.
+        self._pending_results = {}
+        self._loaded_results = {}
+
+    def save(self, *args, **kwargs):
+        if self._pending_results:
+            arrays = {name: self._stored_result(name) for name in self._stored_result_names()}
+            for name, array in self._pending_results.items():
+                if array is None:
+                    arrays.pop(name, None)
+                else:
+                    arrays[name] = array
+            buffer = io.BytesIO()
+            if arrays:
+                np.savez(buffer, **arrays)
+            self.result_arrays = buffer.getvalue() or None
+            self._loaded_results = dict(arrays)
+            self._pending_results = {}
+        return super().save(*args, **kwargs)
+
+    def _result_archive(self):
+        if not self.result_arrays:
+            return None
+        try:
+            return np.load(io.BytesIO(self.result_arrays), allow_pickle=False)
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable result arrays for analysis %s: %s", self.id, e)
+            return None
+
+    def _stored_result_names(self):
+        archive = self._result_archive()
+        return list(archive.files) if archive is not None else []
+
+    def _stored_result(self, name):
+        if name not in self._loaded_results:
+            archive = self._result_archive()
+            self._loaded_results[name] = archive[name] if archive is not None and name in archive.files else None
+        return self._loaded_results[name]
+
+    def set_result(self, name, value):
+        """Store the result ``name`` (one of ``RESULT_ARRAY_NAMES``); written on save().
+
+        A rectangular table of numbers (``None`` becomes ``NaN``) goes into the
+        NPZ archive; anything else -- ragged raw landmarks, say -- stays JSON in
+        the ``<name>_json`` column. ``None`` removes the result.
+        """
+        array = _result_array(value) if value is not None else None
+        self._pending_results[name] = array
+        setattr(self, name + "_json", json.dumps(value) if value is not None and array is None else None)
+
+    def get_result_array(self, name):
+        """The result ``name`` as a float64 array, ``None`` when absent or not rectangular.
+
+        Only this array is read from the archive, and only once per instance.
+        """
+        text = getattr(self, name + "_json")
+        if text:
+            try:
+                return _result_array(json.loads(text))
+            except (ValueError, TypeError):
+                return None
+        if name in self._pending_results:
+            return self._pending_results[name]
+        return self._stored_result(name)
+
+    def get_result_list(self, name):
+        """The result ``name`` as nested lists (``None`` where missing), or ``None``."""
+        text = getattr(self, name + "_json")
+        if text:
+            return json.loads(text)
+        array = self.get_result_array(name)
+        return _result_list(array) if array is not None else None
+
+    def has_result(self, name):
+        """Whether the result ``name`` is stored, as an array or as JSON."""
+        if getattr(self, name + "_json"):
+            return True
+        if name in self._pending_results:
+            return self._pending_results[name] is not None
+        return name in self._stored_result_names()
+
     def get_curve_config(self):
         """Snapshotted semi-landmark curve configuration as a list, ``[]`` when unset.
 
@@ -2690,6 +3061,324 @@ def delete_curve_from_dataset(dataset, curve_index):
         obj.save()
 
 
+class BulkWriteSession:
+    """Write many new objects (and their images) in a few large transactions.
+
+    ``MdObject.save()`` is one implicit transaction -- one journal sync -- per
+    row, which is what made importing thousands of specimens slow. A session
+    queues new objects instead, prepares them exactly as ``save()`` would, and
+    writes them ``batch_size`` at a time with ``insert_many``. Images are
+    stored after their objects, whose ids name the stored files, and inserted
+    the same way; the files of a batch are hashed and downscaled on
+    ``image_jobs`` worker processes (one per core by default, see
+    ``MdImageIngest.store_images``), and their live-wire fields are left to
+    the background builder (``MdLiveWireStore.schedule_builds``). Use as a
+    context manager::
+
+        with MdModel.BulkWriteSession() as session:
+            for obj in new_objects:
+                session.add_object(obj)
+
+    Leaving the block writes whatever is still queued; leaving it with an
+    exception writes nothing more, so only whole batches reach the database.
+    Objects are given their ids when their batch is written.
+    """
+
+    def __init__(self, batch_size=500, image_jobs=None):
+        self.batch_size = batch_size
+        self.image_jobs = MdImageIngest.default_jobs() if image_jobs is None else image_jobs
+        self._objects = []
+        self._images = []
+        self.object_count = 0
+        self.image_count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+        else:
+            self._objects, self._images = [], []
+        return False
+
+    def add_object(self, obj):
+        """Queue a new, unsaved object; returns it."""
+        if obj.id is not None:
+            raise ValueError("BulkWriteSession only inserts new objects")
+        obj.sync_landmark_blob()
+        obj.sync_summary()
+        self._objects.append(obj)
+        if len(self._objects) >= self.batch_size:
+            self.flush()
+        return obj
+
+    def add_image(self, obj, file_name, base_path=None):
+        """Queue ``file_name`` to be stored as the image of ``obj``.
+
+        ``obj`` is a queued or already saved object; the file is copied into
+        storage once the object has its id.
+        """
+        self._images.append((obj, file_name, base_path))
+
+    def flush(self):
+        """Write the queued objects, then store and write the queued images."""
+        objects, self._objects = self._objects, []
+        if objects:
+            self._insert_objects(objects)
+        images, self._images = self._images, []
+        if images:
+            self._insert_images(images)
+
+    def _insert_objects(self, objects):
+        database = MdObject._meta.database
+        fields = [field for field in MdObject._meta.sorted_fields if field is not MdObject._meta.primary_key]
+        # The ids are handed out here rather than read back after the insert;
+        # IMMEDIATE takes the write lock first, so nobody else can claim them.
+        with database.atomic("IMMEDIATE"):
+            next_id = (MdObject.select(fn.MAX(MdObject.id)).scalar() or 0) + 1
+            rows = []
+            for offset, obj in enumerate(objects):
+                row = {field.name: obj.__data__.get(field.name) for field in fields}
+                row["id"] = next_id + offset
+                rows.append(row)
+            MdObject.insert_many(rows).execute()
+        for obj, row in zip(objects, rows):
+            obj.id = row["id"]
+            obj._dirty.clear()
+        self.object_count += len(objects)
+        # Once per dataset rather than once per object, as save() would.
+        for dataset_id in {obj.dataset_id for obj in objects}:
+            get_superimposition_cache().invalidate_dataset(dataset_id)
+
+    def _insert_images(self, images):
+        fields = [field for field in MdImage._meta.sorted_fields if field is not MdImage._meta.primary_key]
+        records, jobs = [], []
+        for obj, file_name, base_path in images:
+            if obj.id is None:
+                raise ValueError(f"object {obj.object_name!r} must be written before its image")
+            image = MdImage(object=obj, original_path=file_name)
+            records.append(image)
+            jobs.append((file_name, _storage_base(base_path), image.file_extension()))
+        file_infos = MdImageIngest.store_images(jobs, IMAGE_MAX_DIM, IMAGE_JPEG_QUALITY, n_jobs=self.image_jobs)
+        rows = []
+        for image, (file_name, _, _), file_info in zip(records, jobs, file_infos):
+            image.apply_file_info(file_name, file_info)
+            rows.append({field.name: image.__data__.get(field.name) for field in fields})
+        with MdImage._meta.database.atomic():
+            MdImage.insert_many(rows).execute()
+        self.image_count += len(rows)
+        for image, (_obj, _file_name, base_path) in zip(records, images):
+            MdLiveWireStore.schedule_builds([image.get_file_path(base_path)], _storage_base(base_path))
+
+
+def remove_media_files(paths):
+    """Delete the files at ``paths`` that no image or 3D model uses any more.
+
+    For the files of rows that have just been deleted. A file in the media
+    store is deleted only when no remaining row refers to its hash; any other
+    path is in the per-object layout and belonged to its row alone.
+    Best-effort: a failure is logged, never raised.
+    """
+    stored = {}
+    for path in paths:
+        digest = MdMediaStore.blob_digest(path)
+        if digest is not None:
+            # <storage>/blobs/<shard>/<file>: whichever storage the path is in.
+            stored[digest] = os.path.dirname(os.path.dirname(os.path.dirname(path)))
+            continue
+        try:
+            if os.path.exists(path):
+                MdMediaStore.remove_file(path)
+        except OSError as e:
+            logger.warning(f"Could not remove {path}: {e}")
+    referenced = referenced_media_hashes(stored)
+    for digest, storage_base in stored.items():
+        if digest not in referenced:
+            MdMediaStore.remove_blob(storage_base, digest)
+
+
+def referenced_media_hashes(digests, batch_size=500):
+    """The content hashes among ``digests`` that some image or 3D model refers to."""
+    digests = list(digests)
+    referenced = set()
+    for start in range(0, len(digests), batch_size):
+        chunk = digests[start : start + batch_size]
+        for column in (MdImage.file_hash, MdImage.original_hash, MdThreeDModel.file_hash):
+            query = column.model.select(column).where(column.in_(chunk)).distinct().tuples()
+            referenced.update(digest for (digest,) in query)
+    return referenced
+
+
+def object_image_paths(object_ids, base_path=None):
+    """Working-copy paths of the images of ``object_ids``, as ``{object_id: path}``.
+
+    Each object's first image, the one the viewers show, read in one query.
+    Objects without an image are left out.
+    """
+    paths = {}
+    images = (
+        MdImage.select(MdImage, MdObject)
+        .join(MdObject)
+        .where(MdImage.object.in_(list(object_ids)))
+        .order_by(MdImage.id)
+    )
+    for image in images:
+        if image.object_id not in paths:
+            paths[image.object_id] = image.get_file_path(base_path)
+    return paths
+
+
+def dataset_media_paths(dataset_id, base_path=None):
+    """Paths in the media store of the images and 3D models of a dataset's objects.
+
+    Files still in the per-object layout are not listed: they are all under
+    the dataset's own directory.
+    """
+    storage_base = _storage_base(base_path)
+    paths = []
+    images = (
+        MdImage.select(MdImage.file_hash, MdImage.original_hash, MdImage.original_path)
+        .join(MdObject)
+        .where((MdObject.dataset == dataset_id) & MdImage.file_hash.is_null(False))
+        .tuples()
+    )
+    for file_hash, original_hash, original_path in images:
+        extension = original_path.split(".")[-1]
+        paths.append(MdMediaStore.blob_path(storage_base, file_hash, extension))
+        if original_hash:
+            paths.append(MdMediaStore.blob_path(storage_base, original_hash, extension))
+    models = (
+        MdThreeDModel.select(MdThreeDModel.file_hash, MdThreeDModel.original_path)
+        .join(MdObject)
+        .where((MdObject.dataset == dataset_id) & MdThreeDModel.file_hash.is_null(False))
+        .tuples()
+    )
+    for file_hash, original_path in models:
+        paths.append(MdMediaStore.blob_path(storage_base, file_hash, original_path.split(".")[-1]))
+    return paths
+
+
+def adopt_legacy_media_files(base_path=None, batch_size=500):
+    """Move files still in the per-object layout into the media store.
+
+    Images and 3D models attached before the store existed are at
+    ``<storage>/<dataset id>/<object id>.<ext>``, archived originals under
+    ``originals/``. Each is hashed and hard-linked into the store (copied
+    where links are not possible), its row is given the hash, and only once
+    that has committed is the old name removed -- so however the run is
+    interrupted, every row still finds its file. Identical files end up as
+    one. Done once, after the migrations; a row whose file is missing is left
+    as it is.
+
+    Returns:
+        int: the number of rows updated.
+    """
+    storage_base = _storage_base(base_path)
+    updated = 0
+    for model in (MdImage, MdThreeDModel):
+        rows = list(
+            model.select(model, MdObject, MdDataset)
+            .join(MdObject)
+            .join(MdDataset)
+            .where(model.file_hash.is_null(True) & model.original_path.is_null(False))
+        )
+        for start in range(0, len(rows), batch_size):
+            adopted = []
+            with model._meta.database.atomic():
+                for row in rows[start : start + batch_size]:
+                    legacy = [row.get_file_path(storage_base)]
+                    if model is MdImage:
+                        legacy.append(row.get_original_file_path(storage_base))
+                    if not os.path.exists(legacy[0]):
+                        continue
+                    hashes = [
+                        MdMediaStore.put_file(storage_base, path, row.file_extension(), link=True)
+                        if os.path.exists(path)
+                        else None
+                        for path in legacy
+                    ]
+                    columns = {"file_hash": hashes[0]}
+                    if model is MdImage:
+                        columns["original_hash"] = hashes[1]
+                    model.update(**columns).where(model.id == row.id).execute()
+                    adopted.extend(path for path in legacy if os.path.exists(path))
+                    updated += 1
+            for path in adopted:
+                try:
+                    MdMediaStore.remove_file(path)
+                except OSError as e:
+                    logger.warning(f"Could not remove {path} after moving it into the media store: {e}")
+                # The emptied originals/ and dataset directories go too.
+                directory = os.path.dirname(path)
+                while os.path.normpath(directory) != os.path.normpath(storage_base):
+                    try:
+                        os.rmdir(directory)
+                    except OSError:
+                        break
+                    directory = os.path.dirname(directory)
+    if updated:
+        logger.info("moved the files of %d images and 3D models into the media store", updated)
+    return updated
+
+
+def backfill_landmark_blobs(batch_size=500):
+    """Give every object with landmark text but no ``landmark_blob`` its blob.
+
+    Objects saved before the column existed read their landmarks by parsing
+    text until this has run; it is done once, after the migrations, and later
+    runs find nothing to do. Writes the column directly, without ``save()``:
+    the landmarks themselves do not change.
+
+    Returns:
+        int: the number of objects updated.
+    """
+    rows = list(
+        MdObject.select(MdObject.id, MdObject.landmark_str)
+        .where(
+            MdObject.landmark_blob.is_null(True) & MdObject.landmark_str.is_null(False) & (MdObject.landmark_str != "")
+        )
+        .tuples()
+    )
+    for start in range(0, len(rows), batch_size):
+        with MdObject._meta.database.atomic():
+            for object_id, landmark_str in rows[start : start + batch_size]:
+                blob = encode_landmark_blob(parse_landmark_rows(landmark_str), landmark_str)
+                MdObject.update(landmark_blob=blob).where(MdObject.id == object_id).execute()
+    if rows:
+        logger.info("stored binary landmarks for %d objects", len(rows))
+    return len(rows)
+
+
+def backfill_object_summaries(batch_size=500):
+    """Compute the ``summary_*`` columns of every object that has none.
+
+    Like :func:`backfill_landmark_blobs`, run once after the migrations; the
+    columns are written directly, without ``save()``, since nothing the user
+    sees changes.
+
+    Returns:
+        int: the number of objects updated.
+    """
+    object_ids = [
+        row[0] for row in MdObject.select(MdObject.id).where(MdObject.summary_landmark_count.is_null(True)).tuples()
+    ]
+    for start in range(0, len(object_ids), batch_size):
+        batch = object_ids[start : start + batch_size]
+        with MdObject._meta.database.atomic():
+            for obj in MdObject.select(MdObject, MdDataset).join(MdDataset).where(MdObject.id.in_(batch)):
+                obj.sync_summary()
+                MdObject.update(
+                    summary_landmark_count=obj.summary_landmark_count,
+                    summary_missing_count=obj.summary_missing_count,
+                    summary_curve_count=obj.summary_curve_count,
+                    summary_centroid_size=obj.summary_centroid_size,
+                ).where(MdObject.id == obj.id).execute()
+    if object_ids:
+        logger.info("computed table summaries for %d objects", len(object_ids))
+    return len(object_ids)
+
+
 def prepare_database():
     """Prepare the database by running migrations and backups"""
     from peewee_migrate import Router
@@ -2712,7 +3401,13 @@ def prepare_database():
     database_filename = os.path.basename(database_path)
     backup_path = os.path.join(backup_directory, database_filename + "." + date_str)
     if not os.path.exists(backup_path) and os.path.exists(database_path):
-        shutil.copy2(database_path, backup_path)
+        # SQLite's online backup rather than a file copy: under WAL, the latest
+        # commits can still be in the -wal file next to the database.
+        with (
+            contextlib.closing(sqlite3.connect(database_path)) as source,
+            contextlib.closing(sqlite3.connect(backup_path)) as target,
+        ):
+            source.backup(target)
         logger.info("backup database to %s", backup_path)
         # read backup directory and delete old backups
         backup_list = os.listdir(backup_directory)
@@ -2728,3 +3423,6 @@ def prepare_database():
     router = Router(gDatabase, migrate_dir=migrations_path)
     # Auto-discover and run migrations
     router.run()
+    backfill_landmark_blobs()
+    backfill_object_summaries()
+    adopt_legacy_media_files()
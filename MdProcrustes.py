@@ -0,0 +1,398 @@
+"""Array-backed generalized Procrustes analysis (GPA).
+
+``MdDatasetOps`` keeps every object as a Python list of ``[x, y(, z)]`` lists,
+which is the right shape for editing and display but a slow one to iterate
+over: each GPA round used to restack the whole dataset for the mean, rotate
+every object through per-coordinate loops and compare means with scalar sums.
+
+:class:`ProcrustesEngine` holds the dataset as a single contiguous
+``(n_objects, n_landmarks, dim)`` ``float64`` array instead, with missing
+coordinates stored as ``NaN``. Centring, unit scaling, the mean shape, the
+rotation of every object (one batched ``np.linalg.svd`` over the stacked
+correlation matrices) and the convergence test all run as whole-array
+operations, and the result is converted back to landmark lists once, at the end.
+
+The arithmetic deliberately mirrors the list implementation in ``MdModel`` step
+by step -- including which landmarks count towards the centroid size of an
+object with gaps, and the reflection correction in
+``MdDatasetOps.rotation_matrix`` -- so the two agree to well within the 1e-6
+convergence threshold.
+"""
+
+from __future__ import annotations
+
+import logging
+import warnings
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Fewest landmarks an object with gaps needs observed (in both it and the
+# reference) before it is rotated at all; below this it keeps its orientation.
+# Complete objects are always rotated, as in ``rotate_gls_to_reference_shape``.
+_MIN_ROTATION_POINTS = {2: 3, 3: 4}
+
+
+def landmarks_to_array(landmark_lists, dimension):
+    """Stack per-object landmark lists into an ``(n, k, dim)`` array.
+
+    ``None`` becomes ``NaN``. Objects with fewer landmarks, or landmarks with
+    fewer coordinates, than the widest one are padded with ``NaN`` so ragged
+    input still stacks; coordinates beyond ``dimension`` are dropped.
+    """
+    n_dim = 3 if dimension == 3 else 2
+    landmark_lists = list(landmark_lists)
+    if not landmark_lists:
+        return np.empty((0, 0, n_dim), dtype=np.float64)
+    try:
+        # Fast path: rectangular input. NumPy maps None to NaN for float dtype.
+        arr = np.array(landmark_lists, dtype=np.float64)
+    except (ValueError, TypeError):
+        arr = None
+    if arr is not None and arr.ndim == 3 and arr.shape[2] >= n_dim:
+        return np.ascontiguousarray(arr[:, :, :n_dim])
+    if arr is not None and arr.ndim == 2 and arr.shape[1] == 0:
+        return np.empty((len(landmark_lists), 0, n_dim), dtype=np.float64)
+
+    n_landmarks = max((len(lms) for lms in landmark_lists), default=0)
+    arr = np.full((len(landmark_lists), n_landmarks, n_dim), np.nan)
+    for i, lms in enumerate(landmark_lists):
+        for j, lm in enumerate(lms):
+            for d, value in enumerate(lm[:n_dim]):
+                if value is not None:
+                    arr[i, j, d] = float(value)
+    return arr
+
+
+def array_to_landmarks(shape):
+    """Convert one ``(k, dim)`` shape back to a landmark list (``NaN`` -> ``None``)."""
+    rows = shape.tolist()
+    if np.isnan(shape).any():
+        rows = [[None if v != v else v for v in row] for row in rows]
+    return rows
+
+
+def rotation_matrices(reference, targets):
+    """Rotation of every target onto ``reference``, one batched SVD.
+
+    Equivalent to ``MdDatasetOps.rotation_matrix(reference, target)`` for each
+    target: the SVD of ``reference.T @ target`` with the same reflection
+    correction. ``NaN`` rows must already be zeroed by the caller.
+
+    Raises:
+        ValueError: if the SVD does not converge (degenerate or non-finite data),
+            with the same message ``rotation_matrix`` uses.
+    """
+    correlation = np.einsum("kd,nke->nde", reference, targets)
+    try:
+        v, _, w = np.linalg.svd(correlation)
+    except np.linalg.LinAlgError as e:
+        raise ValueError(
+            f"Cannot compute alignment rotation: landmark data is degenerate or contains missing/invalid values ({e})"
+        ) from e
+    # A stacked SVD reports non-convergence as NaN output instead of raising.
+    if not (np.isfinite(v).all() and np.isfinite(w).all()):
+        raise ValueError(
+            "Cannot compute alignment rotation: landmark data is degenerate "
+            "or contains missing/invalid values (SVD did not converge)"
+        )
+    reflection = (np.linalg.det(v) * np.linalg.det(w)) < 0.0
+    if reflection.any():
+        v[reflection, -1, :] = -v[reflection, -1, :]
+    return v @ w
+
+
+class ProcrustesEngine:
+    """Whole-dataset GPA on one ``(n_objects, n_landmarks, dim)`` array.
+
+    Typical use::
+
+        engine = ProcrustesEngine.from_landmark_lists(lists, dimension)
+        engine.center_and_scale()
+        mean = engine.align()
+        aligned = engine.to_landmark_lists()
+
+    ``shapes`` is modified in place; ``centroid_sizes`` holds each object's
+    centroid size from before scaling (what ``MdObjectOps.centroid_size`` is
+    left holding by ``rescale_to_unitsize``).
+    """
+
+    def __init__(self, shapes):
+        self.shapes = np.array(shapes, dtype=np.float64, copy=True)
+        if self.shapes.ndim != 3:
+            raise ValueError("shapes must be an (n_objects, n_landmarks, dim) array")
+        self.dimension = self.shapes.shape[2]
+        self.centroid_sizes = np.full(self.shapes.shape[0], -1.0)
+        self.iterations = 0
+
+    @classmethod
+    def from_landmark_lists(cls, landmark_lists, dimension):
+        return cls(landmarks_to_array(landmark_lists, dimension))
+
+    @property
+    def missing(self):
+        """Boolean ``(n, k, dim)`` mask of missing coordinates."""
+        return np.isnan(self.shapes)
+
+    def has_missing(self):
+        return bool(np.isnan(self.shapes).any())
+
+    def to_landmark_lists(self):
+        return [array_to_landmarks(shape) for shape in self.shapes]
+
+    # ------------------------------------------------------------------ #
+    # Normalisation
+    # ------------------------------------------------------------------ #
+
+    def centroids(self):
+        """Per-object, per-axis mean of the observed coordinates (0 if none)."""
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            centroids = np.nanmean(self.shapes, axis=1)
+        return np.nan_to_num(centroids, nan=0.0)
+
+    def compute_centroid_sizes(self):
+        """Centroid size of every object, as ``MdObjectOps.get_centroid_size``.
+
+        Only landmarks with both X and Y observed contribute; a 3D landmark adds
+        its Z term only when Z is observed too. An object with one landmark has
+        size 1 and an object with none observed has size 0.
+        """
+        n_objects, n_landmarks, _ = self.shapes.shape
+        if n_landmarks == 0:
+            return np.full(n_objects, -1.0)
+        if n_landmarks == 1:
+            return np.ones(n_objects)
+        deviations = self.shapes - self.centroids()[:, None, :]
+        counted = ~np.isnan(self.shapes[:, :, 0]) & ~np.isnan(self.shapes[:, :, 1])
+        squared = np.where(counted[:, :, None], deviations, 0.0) ** 2
+        squared = np.nan_to_num(squared, nan=0.0)
+        return np.sqrt(squared.sum(axis=(1, 2)))
+
+    def center_and_scale(self):
+        """Move every centroid to the origin and scale to unit centroid size."""
+        self.shapes -= self.centroids()[:, None, :]
+        sizes = self.compute_centroid_sizes()
+        self.centroid_sizes = sizes
+        # Zero size (no observed landmark, or all coincident) is left unscaled,
+        # like ``rescale_to_unitsize``; so are the -1/1 sentinels.
+        factors = np.ones_like(sizes)
+        scalable = sizes > 0
+        factors[scalable] = 1 / sizes[scalable]
+        self.shapes *= factors[:, None, None]
+
+    # ------------------------------------------------------------------ #
+    # Alignment
+    # ------------------------------------------------------------------ #
+
+    def mean_shape(self):
+        """Per-coordinate mean over objects, ignoring missing values.
+
+        A coordinate missing in every object stays ``NaN``.
+        """
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            return np.nanmean(self.shapes, axis=0)
+
+    def rotate_to(self, reference):
+        """Rotate every object onto ``reference`` in one batched step.
+
+        Mirrors ``MdDatasetOps.rotate_gls_to_reference_shape``: a complete object
+        is fitted on all its landmarks; an object with gaps is fitted on the
+        landmarks observed in both it and the reference, is left alone if there
+        are too few of those, and only those landmarks are rotated -- a landmark
+        with any missing coordinate keeps its values.
+        """
+        if self.shapes.shape[0] == 0 or self.shapes.shape[1] == 0:
+            return
+        row_valid = ~np.isnan(self.shapes).any(axis=2)
+        object_complete = row_valid.all(axis=1)
+        usable = row_valid & ~np.isnan(reference).any(axis=1)[None, :]
+
+        targets = np.where(usable[:, :, None], self.shapes, 0.0)
+        ref = np.nan_to_num(reference, nan=0.0)
+        rotations = rotation_matrices(ref, targets)
+
+        min_points = _MIN_ROTATION_POINTS.get(self.dimension, self.dimension + 1)
+        skip = ~object_complete & (usable.sum(axis=1) < min_points)
+        if skip.any():
+            rotations[skip] = np.eye(self.dimension)
+
+        rotated = np.matmul(self.shapes, rotations.transpose(0, 2, 1))
+        self.shapes = np.where(row_valid[:, :, None], rotated, self.shapes)
+
+    @staticmethod
+    def shape_distance(shape1, shape2):
+        """Root of the summed squared differences, as ``is_same_shape`` measures it.
+
+        Landmarks count when X and Y are present in both shapes; Z adds only
+        when present in both. Returns ``None`` when no landmark is comparable.
+        """
+        if shape1 is None or shape2 is None:
+            return None
+        both = ~np.isnan(shape1[:, :2]).any(axis=1) & ~np.isnan(shape2[:, :2]).any(axis=1)
+        if not both.any():
+            return None
+        diff = np.nan_to_num(shape1[both] - shape2[both], nan=0.0)
+        return float(np.sqrt((diff**2).sum()))
+
+    @classmethod
+    def is_same_shape(cls, shape1, shape2, threshold=1e-6):
+        distance = cls.shape_distance(shape1, shape2)
+        return distance is not None and distance < threshold
+
+    def align(self, max_iterations=100, convergence_threshold=1e-6, final_rotation=False, progress_callback=None):
+        """Iteratively rotate every object onto the mean until the mean settles.
+
+        Each round takes the mean, stops if it moved less than
+        ``convergence_threshold`` since the previous round, and otherwise rotates
+        every object onto it. With ``final_rotation`` the objects are rotated
+        once more onto the accepted mean, which the loop itself stops short of.
+
+        ``progress_callback(iteration, max_iterations)`` is called after every
+        rotation round. An exception it raises (a cancellation) propagates, and
+        leaves the shapes as they were after the last completed round.
+
+        Returns:
+            The last mean shape, ``(n_landmarks, dim)``, or ``None`` if
+            ``max_iterations`` is zero.
+        """
+        mean = None
+        self.iterations = 0
+        for _ in range(max_iterations):
+            self.iterations += 1
+            previous = mean
+            mean = self.mean_shape()
+            if previous is not None and self.is_same_shape(previous, mean, convergence_threshold):
+                break
+            self.rotate_to(mean)
+            if progress_callback:
+                progress_callback(self.iterations, max_iterations)
+        if final_rotation and mean is not None:
+            self.rotate_to(mean)
+        return mean
+
+    # ------------------------------------------------------------------ #
+    # Missing-landmark imputation
+    # ------------------------------------------------------------------ #
+
+    def gap_mask(self):
+        """``(n, k)`` mask of landmarks with at least one missing coordinate."""
+        return np.isnan(self.shapes).any(axis=2)
+
+    def fill_gaps(self, reference, gaps):
+        """Re-open ``gaps`` and fill them from ``reference`` fitted onto each object.
+
+        The batched form of ``MdModel.impute_missing_landmarks``: for every object
+        with a gap, a similarity transform (Kabsch rotation with reflection
+        excluded, scale, translation) is fitted from the reference onto the
+        landmarks observed in both, and the gaps are filled from the transformed
+        reference. All gapped objects are fitted together -- one batched SVD --
+        so the cost grows with the number of objects, not objects x gaps.
+
+        An object sharing fewer than ``dimension`` landmarks with the reference
+        keeps its gaps, as does a landmark the reference itself lacks.
+
+        Returns:
+            Number of gapped objects that could not be fitted.
+        """
+        self.shapes[gaps] = np.nan
+        rows = np.flatnonzero(gaps.any(axis=1))
+        if rows.size == 0:
+            return 0
+
+        dim = self.dimension
+        shapes = self.shapes[rows]
+        reference_ok = ~np.isnan(reference).any(axis=1)
+        shared = ~np.isnan(shapes).any(axis=2) & reference_ok[None, :]
+        counts = shared.sum(axis=1)
+        fittable = counts >= dim
+
+        weight = shared[:, :, None]
+        ref = np.nan_to_num(reference, nan=0.0)
+        target = np.where(weight, shapes, 0.0)
+        source = np.where(weight, ref[None, :, :], 0.0)
+        denominator = np.maximum(counts, 1)[:, None]
+        target_centroid = target.sum(axis=1) / denominator
+        source_centroid = source.sum(axis=1) / denominator
+        target_centered = np.where(weight, target - target_centroid[:, None, :], 0.0)
+        source_centered = np.where(weight, source - source_centroid[:, None, :], 0.0)
+
+        target_size = np.sqrt((target_centered**2).sum(axis=(1, 2)))
+        source_size = np.sqrt((source_centered**2).sum(axis=(1, 2)))
+        scale = np.divide(target_size, source_size, out=np.ones_like(target_size), where=source_size > 0)
+
+        u, _, vt = np.linalg.svd(np.einsum("mkd,mke->mde", source_centered, target_centered))
+        v = vt.transpose(0, 2, 1)
+        u_t = u.transpose(0, 2, 1)
+        reflection = np.sign(np.linalg.det(v @ u_t))
+        reflection[reflection == 0] = 1.0
+        diagonal = np.ones((rows.size, dim))
+        diagonal[:, -1] = reflection
+        rotation = (v * diagonal[:, None, :]) @ u_t
+        rotation[~((source_size > 0) & (target_size > 0))] = np.eye(dim)
+
+        transformed = np.matmul(ref[None, :, :] - source_centroid[:, None, :], rotation.transpose(0, 2, 1))
+        transformed = transformed * scale[:, None, None] + target_centroid[:, None, :]
+
+        fill = gaps[rows] & reference_ok[None, :] & fittable[:, None]
+        shapes[fill] = transformed[fill]
+        self.shapes[rows] = shapes
+        return int((~fittable).sum())
+
+    @staticmethod
+    def estimates_converged(previous, current, tolerance=1e-8):
+        """Have the gap estimates stopped moving? One max-norm over all of them.
+
+        A coordinate that stays ``NaN`` (no object records the landmark) counts as
+        settled, provided it is ``NaN`` in both rounds.
+        """
+        if previous.shape != current.shape:
+            return False
+        previous_missing = np.isnan(previous)
+        if not np.array_equal(previous_missing, np.isnan(current)):
+            return False
+        diff = np.abs(previous - current)[~previous_missing]
+        return diff.size == 0 or float(diff.max()) <= tolerance
+
+    def superimpose_with_imputation(self, max_refinements, max_iterations=100, progress_callback=None):
+        """GPA with missing landmarks estimated by expectation-maximisation.
+
+        Aligns with the gaps left open, fills them from the mean fitted onto each
+        object's observed landmarks (:meth:`fill_gaps`), then re-normalises and
+        re-aligns the now complete objects and re-estimates -- up to
+        ``max_refinements`` rounds, stopping once the estimates settle. The gap
+        mask is computed once, so every estimate is fitted on genuinely observed
+        landmarks and never on an earlier estimate.
+
+        ``progress_callback(done, total)`` counts alignment iterations across
+        every round, against the most the rounds could take between them.
+
+        Returns:
+            The mean shape the objects were last aligned to.
+        """
+        total = (max_refinements + 1) * max_iterations
+
+        def round_progress(round_index):
+            if progress_callback is None:
+                return None
+            return lambda done, _total: progress_callback(round_index * max_iterations + done, total)
+
+        gaps = self.gap_mask()
+        self.center_and_scale()
+        mean = self.align(max_iterations, final_rotation=True, progress_callback=round_progress(0))
+        previous = None
+        for refinement in range(1, max_refinements + 1):
+            if mean is None:
+                break
+            unfitted = self.fill_gaps(mean, gaps)
+            if unfitted:
+                logger.warning("Cannot fit reference shape onto %d object(s): too few shared landmarks", unfitted)
+            estimates = self.shapes[gaps]
+            if previous is not None and self.estimates_converged(previous, estimates):
+                break
+            previous = estimates
+            self.center_and_scale()
+            mean = self.align(max_iterations, final_rotation=True, progress_callback=round_progress(refinement))
+        return mean
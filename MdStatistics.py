@@ -20,8 +20,36 @@ MANOVA_MAX_VARIABLES = 20
 # budget: 222 specimens x 216 variables takes ~4s, but 500 x 1000 takes ~4
 # minutes and 1000 x 2000 takes ~17. Four times the specimens, 240 times the
 # wait. Beyond this budget the estimate falls back to stratified folds.
+#
+# This is the budget for refitting the model per specimen, and it scales with
+# the number of worker processes the folds are spread over.
 CVA_LOOCV_MAX_WORK = 200_000  # n_samples * n_features
 
+# The same budget when leave-one-out does not refit the model per specimen
+# (_fast_leave_one_out): the held-out fits are derived from the whole-data one,
+# and 1000 x 2000 takes seconds rather than 17 minutes.
+CVA_FAST_LOOCV_MAX_WORK = 2_000_000  # n_samples * n_features
+
+# LinearDiscriminantAnalysis's default ``tol``: the rank thresholds the fast
+# leave-one-out has to reproduce to give the answer refitting would.
+_LDA_TOL = 1e-4
+
+# Units of work a MANOVA reports through its progress callback: statsmodels fits
+# the model and runs the four tests as two opaque calls, so these are the only
+# points at which it can report progress or be cancelled.
+MANOVA_STEPS = 2
+
+
+class AnalysisCancelledError(Exception):
+    """Raised from a progress callback to abandon an analysis part-way.
+
+    The functions here take an optional ``progress_callback(done, total)`` and
+    call it between units of work (cross-validation folds, MANOVA steps). A
+    caller that wants to stop raises this from the callback. It passes through
+    the ``ValueError`` wrapping below untouched, so a cancelled run is never
+    reported as a failed one.
+    """
+
 
 class MdPrincipalComponent:
     """Legacy Principal Component Analysis class.
@@ -43,22 +71,12 @@ class MdPrincipalComponent:
         self.raw_eigen_values = []
         self.eigen_value_percentages = []
 
-        sums = [0.0 for x in range(self.nVariable)]
-        avrs = [0.0 for x in range(self.nVariable)]
-        """ calculate the empirical mean """
-        for i in range(self.nObservation):
-            for j in range(self.nVariable):
-                sums[j] += float(self.data[i][j])
-
-        for j in range(self.nVariable):
-            avrs[j] = float(sums[j]) / float(self.nObservation)
-
-        for i in range(self.nObservation):
-            for j in range(self.nVariable):
-                self.data[i][j] -= avrs[j]
+        """ centre on the empirical mean """
+        np_data = numpy.array(self.data, dtype=float)
+        np_data -= np_data.mean(axis=0)
+        self.data = np_data
 
         """ covariance matrix """
-        np_data = numpy.array(self.data)
         self.covariance_matrix = numpy.dot(numpy.transpose(np_data), np_data) / self.nObservation
 
         v, s, w = numpy.linalg.svd(self.covariance_matrix)
@@ -180,6 +198,55 @@ class MdCanonicalVariate:
         return True
 
 
+class ShapeReconstructor:
+    """Maps points in an ordination space back to landmark coordinates.
+
+    Scores are ``x @ rotation_matrix`` for a centred shape ``x``, so a shape
+    is ``mean_shape + scores @ inverse``. The inverse is worked out once: the
+    transpose when the rotation's columns are orthonormal (PCA's eigenvectors,
+    CVA's singular vectors, including the zeroed columns of zero-variance
+    variables), a pseudo-inverse otherwise. Reconstructing a point is then
+    one matrix-vector product over the components actually in use, which is
+    what lets the exploration dialog follow the mouse on a large analysis.
+    """
+
+    def __init__(self, rotation_matrix, mean_shape):
+        self.mean_shape = numpy.asarray(mean_shape, dtype=float).reshape(-1)
+        self.inverse = None
+        if rotation_matrix is None:
+            logger.warning("No rotation matrix; shapes are shown as the mean shape")
+            return
+        rotation = numpy.asarray(rotation_matrix, dtype=float)
+        if rotation.ndim != 2 or rotation.shape[0] != self.mean_shape.size:
+            logger.warning(
+                f"Rotation matrix {rotation.shape} does not match a {self.mean_shape.size}-variable mean shape; "
+                "shapes are shown as the mean shape"
+            )
+            return
+        gram = rotation.T @ rotation
+        unit = numpy.round(numpy.diag(gram))
+        if numpy.isin(unit, (0.0, 1.0)).all() and numpy.allclose(gram, numpy.diag(unit), atol=1e-8):
+            self.inverse = numpy.ascontiguousarray(rotation.T)
+        else:
+            self.inverse = numpy.linalg.pinv(rotation)
+
+    def reconstruct(self, scores, n_components=None):
+        """Landmark coordinates, one row per row of ``scores``.
+
+        Only the first ``n_components`` scores are used; by default, up to the
+        last non-zero one, so a point on two leading axes costs two rows of
+        the inverse rather than all of them.
+        """
+        scores = numpy.atleast_2d(numpy.asarray(scores, dtype=float))
+        if self.inverse is None:
+            return numpy.tile(self.mean_shape, (len(scores), 1))
+        if n_components is None:
+            nonzero = numpy.flatnonzero(scores.any(axis=0))
+            n_components = nonzero[-1] + 1 if nonzero.size else 0
+        k = min(n_components, scores.shape[1], len(self.inverse))
+        return self.mean_shape + scores[:, :k] @ self.inverse[:k]
+
+
 def PerformCVA(dataset_ops, classifier_index):
     cva = MdCanonicalVariate()
 
@@ -319,7 +386,9 @@ def do_pca_analysis(landmarks_data, n_components=None):
     """Perform PCA analysis on landmark data.
 
     Args:
-        landmarks_data: List of landmark arrays
+        landmarks_data: List of landmark arrays, or one
+            ``(n_specimens, n_landmarks, dim)`` array such as
+            ``LandmarkMatrix.landmarks``
         n_components: Number of components (None for auto)
 
     Returns:
@@ -333,21 +402,17 @@ def do_pca_analysis(landmarks_data, n_components=None):
         logger = logging.getLogger(__name__)
 
         logger.info(f"PCA Analysis starting with {len(landmarks_data)} specimens")
-        if landmarks_data:
+        if len(landmarks_data):
             logger.info(f"First specimen has {len(landmarks_data[0])} landmarks")
-            if landmarks_data[0]:
+            if len(landmarks_data[0]):
                 logger.info(f"Each landmark has {len(landmarks_data[0][0])} dimensions")
 
         # Use MdPrincipalComponent class for consistency with Analysis Detail
         pca = MdPrincipalComponent()
 
-        # Flatten landmark data
-        datamatrix = []
-        for landmarks in landmarks_data:
-            datum = []
-            for lm in landmarks:
-                datum.extend(lm)  # Use all coordinates (X, Y, Z for 3D)
-            datamatrix.append(datum)
+        # Flatten landmark data: one row per specimen, all coordinates (X, Y, Z for 3D)
+        datamatrix = np.asarray(landmarks_data, dtype=float)
+        datamatrix = datamatrix.reshape(len(datamatrix), -1)
 
         # Perform PCA using the same method as Analysis Detail
         pca.SetData(datamatrix)
@@ -365,8 +430,8 @@ def do_pca_analysis(landmarks_data, n_components=None):
 
         # Calculate mean shape from the centered data
         mean_shape = []
-        dim = len(landmarks_data[0][0]) if landmarks_data and landmarks_data[0] else 2
-        n_landmarks = len(landmarks_data[0]) if landmarks_data else 0
+        dim = len(landmarks_data[0][0]) if len(landmarks_data) and len(landmarks_data[0]) else 2
+        n_landmarks = len(landmarks_data[0]) if len(landmarks_data) else 0
 
         # The mean is already calculated in pca.Analyze() during centering
         # We need to reconstruct it from the number of landmarks
@@ -465,12 +530,16 @@ def effective_component_count(
     return max(1, min(k_variance, max_variables, n_samples - n_groups - 1))
 
 
-def do_cva_analysis(landmarks_data, groups):
+def do_cva_analysis(landmarks_data, groups, progress_callback=None, n_jobs=1):
     """Perform CVA (Canonical Variate Analysis) on landmark data.
 
     Args:
         landmarks_data: List of landmark arrays
         groups: List of group labels for each specimen
+        progress_callback: Optional ``(done, total)``, called after each
+            cross-validation fold
+        n_jobs: Worker processes for the cross-validation folds that have to
+            be refitted (see :func:`_cross_validated_accuracy`)
 
     Returns:
         Dictionary with CVA results
@@ -568,7 +637,13 @@ def do_cva_analysis(landmarks_data, groups):
                 # and a plot of the data should show the model of the data.
                 cv_scores = estimator.fit_transform(data_matrix, group_array)
                 cross_validated_accuracy, accuracy_method = _cross_validated_accuracy(
-                    estimator, data_matrix, group_array, n_groups, int(group_counts.min())
+                    estimator,
+                    data_matrix,
+                    group_array,
+                    n_groups,
+                    int(group_counts.min()),
+                    progress_callback,
+                    n_jobs,
                 )
             except ArpackError as e:
                 if attempt + 1 == len(solvers):
@@ -622,11 +697,15 @@ def do_cva_analysis(landmarks_data, groups):
             "n_components": cv_scores.shape[1],
         }
 
+    except AnalysisCancelledError:
+        raise
     except Exception as e:
         raise ValueError(f"CVA analysis failed: {str(e)}") from e
 
 
-def _cross_validated_accuracy(estimator, data_matrix, group_array, n_groups, smallest_group):
+def _cross_validated_accuracy(
+    estimator, data_matrix, group_array, n_groups, smallest_group, progress_callback=None, n_jobs=1
+):
     """Honest classification accuracy, and the name of how it was obtained.
 
     Leave-one-out by default. Stratified folds cannot be the default here
@@ -637,22 +716,48 @@ def _cross_validated_accuracy(estimator, data_matrix, group_array, n_groups, sma
     reason to report nothing. It is also deterministic, which matters when the
     number is going into a paper.
 
-    Only its cost argues against it, so that is what decides: past
-    CVA_LOOCV_MAX_WORK, stratified folds take over, with shuffle left off so
-    they stay deterministic too. Which one ran is reported to the caller, since
-    an accuracy without its method is not interpretable.
+    Only its cost argues against it, so that is what decides. Most specimens
+    are settled without refitting anything (:func:`_fast_leave_one_out`), which
+    is what CVA_FAST_LOOCV_MAX_WORK budgets for; the rest are refitted, up to
+    CVA_LOOCV_MAX_WORK per worker process. Past either, stratified folds take
+    over, with shuffle left off so they stay deterministic too. Which one ran
+    is reported to the caller, since an accuracy without its method is not
+    interpretable.
+
+    ``estimator`` must already be fitted on the whole data; the fast path
+    checks itself against it. Refitted folds are spread over ``n_jobs`` worker
+    processes, and ``progress_callback(fold, n_folds)`` is called after each
+    one -- on a large dataset they are nearly all of the analysis's time, and
+    the only place it can report progress or be cancelled. Running the folds
+    here rather than through ``cross_val_score`` also lets a fold's
+    ``ArpackError`` reach the solver fallback in :func:`do_cva_analysis`
+    instead of being recorded as a ``NaN`` score.
     """
-    from sklearn.model_selection import LeaveOneOut, StratifiedKFold, cross_val_score
+    from sklearn.model_selection import StratifiedKFold
 
     n_samples, n_features = data_matrix.shape
-    if n_samples * n_features > CVA_LOOCV_MAX_WORK and smallest_group >= 2:
-        n_splits = min(5, smallest_group)
-        cv, method = StratifiedKFold(n_splits=n_splits), f"stratified {n_splits}-fold"
-    else:
-        cv, method = LeaveOneOut(), "leave-one-out"
+    n_jobs = max(1, int(n_jobs or 1))
 
     try:
-        scores = cross_val_score(estimator, data_matrix, group_array, cv=cv)
+        correct = None
+        if smallest_group < 2 or n_samples * n_features <= CVA_FAST_LOOCV_MAX_WORK:
+            correct = _fast_leave_one_out(estimator, data_matrix, group_array, progress_callback)
+        refit = numpy.arange(n_samples) if correct is None else numpy.flatnonzero(numpy.isnan(correct))
+
+        if smallest_group < 2 or len(refit) * n_features <= CVA_LOOCV_MAX_WORK * n_jobs:
+            method, n_folds = "leave-one-out", n_samples
+            scores = [] if correct is None else correct[~numpy.isnan(correct)].tolist()
+            folds = [(numpy.delete(numpy.arange(n_samples), i), numpy.array([i])) for i in refit]
+        else:
+            n_splits = min(5, smallest_group)
+            method, n_folds = f"stratified {n_splits}-fold", n_splits
+            scores = []
+            folds = list(StratifiedKFold(n_splits=n_splits).split(data_matrix, group_array))
+
+        for score in _fold_scores(estimator, data_matrix, group_array, folds, n_jobs):
+            scores.append(score)
+            if progress_callback:
+                progress_callback(len(scores), n_folds)
     except ValueError as e:
         # Reached only by data too small to hold anything out of: two specimens
         # in two groups leaves a training set with a single class. Reported as
@@ -661,15 +766,388 @@ def _cross_validated_accuracy(estimator, data_matrix, group_array, n_groups, sma
         logger.warning("Cross-validated CVA accuracy unavailable (%s specimens, %s groups): %s", n_samples, n_groups, e)
         return None, "unavailable"
 
-    return float(scores.mean()) * 100, method
+    return float(numpy.mean(scores)) * 100, method
+
+
+def _fit_and_score(estimator, data_matrix, group_array, train, test):
+    """Accuracy on ``test`` of a fresh copy of ``estimator`` fitted on ``train``."""
+    from sklearn.base import clone
+
+    model = clone(estimator).fit(data_matrix[train], group_array[train])
+    return model.score(data_matrix[test], group_array[test])
+
+
+def _fold_scores(estimator, data_matrix, group_array, folds, n_jobs=1):
+    """Score of a refitted ``estimator`` on each ``(train, test)`` fold, in order.
+
+    With more than one job the folds run on a joblib process pool, and their
+    scores are yielded in order as they finish, so the caller still reports
+    progress and can be cancelled between folds. Stopping early (an exception
+    in the caller, such as a cancellation) closes the generator, which cancels
+    the folds not yet started.
+    """
+    if n_jobs == 1 or len(folds) < 2:
+        for train, test in folds:
+            yield _fit_and_score(estimator, data_matrix, group_array, train, test)
+        return
+
+    from joblib import Parallel, delayed
+
+    yield from Parallel(n_jobs=n_jobs, return_as="generator")(
+        delayed(_fit_and_score)(estimator, data_matrix, group_array, train, test) for train, test in folds
+    )
 
 
-def do_manova_analysis_on_procrustes(flattened_landmarks, groups):
+def _fast_leave_one_out(estimator, data_matrix, group_array, progress_callback=None):
+    """Leave-one-out outcomes derived from the whole-data fit instead of refits.
+
+    Refitting the model once per specimen repeats, n times, work that differs
+    from the whole-data fit by a single specimen. Removing one specimen is a
+    rank-one change to every scatter matrix involved, so each held-out model can
+    be obtained from the whole-data one by a rank-one update:
+
+    - LDA on the coordinates themselves (:func:`_closed_form_lda_loo`): the
+      held-out within-group scatter's inverse follows from the whole-data one
+      by Sherman-Morrison, so the whole estimate costs about one fit.
+    - PCA then LDA (:func:`_rank_one_pca_lda_loo`): the held-out principal
+      components are the leading eigenvectors of the whole-data covariance
+      minus a rank-one term, found from its secular equation in the space the
+      specimens span. Only the small LDA on the component scores is refitted.
+
+    The result is the refitted answer, not an approximation of it, and it is
+    checked rather than assumed: each path first reproduces ``estimator``'s own
+    decision function (already fitted on all the data), and gives up -- returns
+    ``None`` -- if it cannot. Individual specimens whose answer it cannot vouch
+    for (a rank threshold too close to call, two groups scoring within rounding
+    of each other) are left as ``NaN`` for the caller to refit; every other
+    entry is 1.0 or 0.0 for a correct or wrong classification of that specimen.
+
+    ``progress_callback(settled, n_samples)`` is called as specimens are
+    settled.
+    """
+    from sklearn.discriminant_analysis import LinearDiscriminantAnalysis
+
+    lda = estimator[-1] if hasattr(estimator, "steps") else estimator
+    if not isinstance(lda, LinearDiscriminantAnalysis) or lda.solver != "svd" or lda.priors is not None:
+        return None
+    try:
+        if not hasattr(estimator, "steps"):
+            return _closed_form_lda_loo(lda, data_matrix, group_array, progress_callback)
+        if len(estimator.steps) == 2:
+            return _rank_one_pca_lda_loo(estimator, data_matrix, group_array, progress_callback)
+    except numpy.linalg.LinAlgError as e:
+        logger.debug("Fast leave-one-out unavailable, refitting instead: %s", e)
+    return None
+
+
+def _sample_space(data_matrix):
+    """Coordinates of the centred specimens in the space they span.
+
+    Returns ``(coords, eigenvalues)``: ``coords`` is ``n_samples x rank`` with
+    uncorrelated columns of decreasing variance (the principal component scores
+    of every non-degenerate component), ``eigenvalues`` their sums of squares.
+    Both methods in CVA are unchanged by this change of basis, and it reduces a
+    fold's problem from the number of variables to at most the number of
+    specimens.
+    """
+    centred = data_matrix - data_matrix.mean(axis=0)
+    u, s, _vt = numpy.linalg.svd(centred, full_matrices=False)
+    if not s.size or s[0] <= 0:
+        return u[:, :0], s[:0]
+    keep = s > s[0] * max(centred.shape) * numpy.finfo(float).eps
+    return u[:, keep] * s[keep], s[keep] ** 2
+
+
+def _is_near_tie(decision):
+    """Whether two groups score within rounding of each other for one specimen."""
+    decision = numpy.atleast_1d(decision)
+    scale = max(1.0, float(numpy.abs(decision).max()))
+    if decision.size == 1:  # binary: the sign of one score decides
+        return abs(decision[0]) <= 1e-6 * scale
+    top_two = numpy.sort(decision)[-2:]
+    return top_two[1] - top_two[0] <= 1e-6 * scale
+
+
+def _report_settled(correct, progress_callback):
+    if progress_callback:
+        progress_callback(int(numpy.count_nonzero(~numpy.isnan(correct))), len(correct))
+
+
+def _closed_form_lda_loo(lda, data_matrix, group_array, progress_callback=None):
+    """Leave-one-out outcomes of LDA on the raw coordinates, without refitting.
+
+    Applies when LDA whitens the within-group scatter without discarding any
+    direction of it (checked with its own rank test) -- then it classifies by
+    Mahalanobis distance plus log prior, and removing specimen ``i`` of group
+    ``c`` changes only group ``c``'s mean and a rank-one term of the scatter:
+    ``W' = W - n_c/(n_c - 1) u u^T`` with ``u`` its deviation from that mean.
+    In coordinates whitened by ``W`` that is ``I - a u u^T``, whose inverse
+    square root is another rank-one update, so each held-out fit costs O(groups
+    x rank) instead of an SVD of the training data. See
+    :func:`_fast_leave_one_out` for what is returned.
+    """
+    import scipy.linalg
+
+    classes, y, counts = numpy.unique(group_array, return_inverse=True, return_counts=True)
+    n_samples, n_groups = len(y), len(classes)
+    coords, _eigenvalues = _sample_space(data_matrix)
+    rank = coords.shape[1]
+    if rank == 0:
+        return None
+
+    # LDA's own within-group rank test (scaled by 1/n_samples, as it is). Every
+    # direction the specimens span must pass it with room to spare, and every
+    # other one fail it, or a held-out fit could keep a different set.
+    means = numpy.array([data_matrix[y == c].mean(axis=0) for c in range(n_groups)])
+    residual = data_matrix - means[y]
+    std = residual.std(axis=0)
+    std[std == 0] = 1.0
+    sv = numpy.linalg.svd(residual / std / numpy.sqrt(n_samples), compute_uv=False)
+    if numpy.count_nonzero(sv > _LDA_TOL) != rank or sv[rank - 1] < 10 * _LDA_TOL:
+        return None
+    if sv.size > rank and sv[rank] > _LDA_TOL / 10:
+        return None
+
+    # Whiten by the within-group scatter W = R^T R of the sample-space coordinates.
+    means = numpy.array([coords[y == c].mean(axis=0) for c in range(n_groups)])
+    r_factor = scipy.linalg.qr(coords - means[y], mode="r")[0][:rank]
+    white = scipy.linalg.solve_triangular(r_factor, coords.T, trans="T").T
+    white_means = scipy.linalg.solve_triangular(r_factor, means.T, trans="T").T
+
+    # The whole-data fit, reproduced: it has to match the one LDA made.
+    squared = ((white[:, None, :] - white_means[None, :, :]) ** 2).sum(axis=2)
+    scores = -0.5 * n_samples * squared + numpy.log(counts / n_samples)
+    expected = lda.decision_function(data_matrix)
+    if n_groups == 2:
+        ours = scores[:, 1] - scores[:, 0]
+    else:
+        ours, expected = scores - scores[:, :1], expected - expected[:, :1]
+    if not numpy.allclose(ours, expected, rtol=0, atol=1e-6 * max(1.0, float(numpy.abs(scores).max()))):
+        logger.debug("Closed-form LDA does not reproduce the fitted model; refitting folds instead")
+        return None
+
+    n_train = n_samples - 1
+    headroom = (10 * _LDA_TOL / sv[rank - 1]) ** 2
+    correct = numpy.full(n_samples, numpy.nan)
+    for i in range(n_samples):
+        c = y[i]
+        if counts[c] == 1:
+            # Its group is absent from the training data: it cannot be predicted.
+            correct[i] = 0.0
+            _report_settled(correct, progress_callback)
+            continue
+
+        alpha = counts[c] / (counts[c] - 1)
+        u = white[i] - white_means[c]
+        uu = float(u @ u)
+        remaining = 1.0 - alpha * uu  # smallest eigenvalue of the held-out W, in these units
+        if remaining <= headroom:
+            continue  # the held-out fit may drop a direction; refit it
+
+        fold_means = white_means.copy()
+        fold_means[c] -= u / (counts[c] - 1)
+        fold_counts = counts.copy()
+        fold_counts[c] -= 1
+        stretch = (1.0 / numpy.sqrt(remaining) - 1.0) / uu if uu > 0 else 0.0
+
+        def rewhiten(v, u=u, stretch=stretch):
+            return v + stretch * (v @ u)[..., None] * u
+
+        # LDA's between-group rank test: it must keep every direction the means span.
+        centred = fold_means - (fold_counts / n_train) @ fold_means
+        between = rewhiten(numpy.sqrt(fold_counts)[:, None] * centred)
+        spread = numpy.linalg.eigvalsh(between @ between.T)[::-1]
+        kept = min(n_groups - 1, rank)
+        if spread[0] <= 0 or spread[kept - 1] <= (10 * _LDA_TOL) ** 2 * spread[0]:
+            continue
+
+        distances = (rewhiten(white[i] - fold_means) ** 2).sum(axis=1)
+        decision = -0.5 * n_train * distances + numpy.log(fold_counts / n_train)
+        if _is_near_tie(decision):
+            continue
+        correct[i] = float(numpy.argmax(decision) == c)
+        _report_settled(correct, progress_callback)
+    return correct
+
+
+def _rank_one_pca_lda_loo(pipeline, data_matrix, group_array, progress_callback=None):
+    """Leave-one-out outcomes of the PCA + LDA pipeline, refitting only the LDA.
+
+    The PCA of the training set without specimen ``i`` is the eigenproblem of
+    ``diag(eigenvalues) - n/(n-1) z_i z_i^T`` in sample-space coordinates --
+    the whole-data covariance, already diagonal there, minus one rank-one term
+    (:func:`_downdated_components`). Solving that costs O(components x rank)
+    per specimen instead of a fresh SVD of the training data, and the LDA then
+    fitted on the held-out component scores is the one refitting would fit.
+    See :func:`_fast_leave_one_out` for what is returned.
+    """
+    from sklearn.discriminant_analysis import LinearDiscriminantAnalysis
+
+    n_components = pipeline[0].n_components
+    coords, eigenvalues = _sample_space(data_matrix)
+    n_samples, rank = coords.shape
+    if not isinstance(n_components, (int, numpy.integer)) or not 0 < n_components < rank:
+        return None
+
+    # The whole-data fit, reproduced: LDA on the leading sample-space coordinates.
+    expected = pipeline.decision_function(data_matrix)
+    ours = LinearDiscriminantAnalysis().fit(coords[:, :n_components], group_array)
+    if not numpy.allclose(
+        ours.decision_function(coords[:, :n_components]),
+        expected,
+        rtol=1e-6,
+        atol=1e-6 * max(1.0, float(numpy.abs(expected).max())),
+    ):
+        logger.debug("Sample-space PCA does not reproduce the fitted pipeline; refitting folds instead")
+        return None
+
+    shrink = n_samples / (n_samples - 1)
+    correct = numpy.full(n_samples, numpy.nan)
+    for i in range(n_samples):
+        basis = _downdated_components(eigenvalues, coords[i], shrink, n_components)
+        if basis is None:
+            continue
+        scores = coords @ basis
+        # Centred on the training mean, which is -z_i / (n - 1) here.
+        held_out = shrink * scores[i]
+        train = numpy.delete(scores, i, axis=0) + scores[i] / (n_samples - 1)
+        model = LinearDiscriminantAnalysis().fit(train, numpy.delete(group_array, i))
+        if _is_near_tie(model.decision_function(held_out[None, :])[0]):
+            continue
+        correct[i] = float(model.predict(held_out[None, :])[0] == group_array[i])
+        _report_settled(correct, progress_callback)
+    return correct
+
+
+def _downdated_components(eigenvalues, z, shrink, n_components):
+    """Leading eigenvectors of ``diag(eigenvalues) - shrink * z z^T``.
+
+    ``eigenvalues`` must be positive and decreasing. Returns a ``rank x
+    n_components`` orthonormal basis, or ``None`` when the answer is not
+    trustworthy to the precision that matters here: the components are not
+    separated from the next one, or they fail a residual check.
+
+    The eigenvalues of a diagonal matrix minus a rank-one term interlace the
+    diagonal, each the root of a monotonic secular equation on its own
+    interval, and each eigenvector is ``(D - lambda)^-1 z`` (Golub 1973; the
+    rank-one update of divide-and-conquer eigensolvers). The roots are found by
+    safeguarded Newton iteration, relative to the nearer interval end so that
+    ``D - lambda`` keeps its relative accuracy when a root crowds one.
+    """
+    eps = numpy.finfo(float).eps
+    rank = len(eigenvalues)
+    zz = float(z @ z)
+    # Where z vanishes the eigenpair is untouched ("deflated").
+    active = shrink * numpy.abs(z) * numpy.sqrt(zz) > 8 * eps * max(eigenvalues[0], shrink * zz)
+    index = numpy.flatnonzero(active)
+    d, z2 = eigenvalues[index], z[index] ** 2
+    n_active = len(index)
+    n_roots = min(n_components + 1, n_active)
+
+    values = [eigenvalues[~active]]
+    vectors = [numpy.eye(rank)[:, ~active]]
+    if n_roots:
+        j = numpy.arange(n_roots)
+        upper = d[j]
+        last = j + 1 == n_active
+        lower = numpy.where(last, d[-1] - shrink * z2.sum(), d[numpy.minimum(j + 1, n_active - 1)])
+        with numpy.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            middle = (lower + upper) / 2
+            at_middle = 1 - shrink * (z2 / (d[None, :] - middle[:, None])).sum(axis=1)
+            # Measure from whichever pole the root lies nearer (the last root has only one).
+            from_upper = (at_middle >= 0) | last
+            origin = numpy.where(from_upper, upper, lower)
+            offset = d[None, :] - origin[:, None]
+            low = numpy.where(at_middle >= 0, middle, lower) - origin
+            high = numpy.where(at_middle >= 0, upper, middle) - origin
+            tau = (low + high) / 2
+            # Terms with a pole at or above the root's interval, and below it.
+            above = numpy.arange(n_active)[None, :] <= j[:, None]
+            pole_above = upper - origin
+            pole_below = numpy.where(last, numpy.nan, lower - origin)
+            converged = numpy.zeros(n_roots, dtype=bool)
+            for _ in range(100):
+                delta = offset - tau[:, None]
+                terms = z2 / delta
+                secular = 1 - shrink * terms.sum(axis=1)
+                # Within rounding of zero: stop there, or it only wanders.
+                converged |= numpy.abs(secular) <= 8 * n_active * eps * (1 + shrink * numpy.abs(terms).sum(axis=1))
+                if converged.all():
+                    break
+                rightwards = secular > 0  # the secular function decreases through its root
+                low = numpy.where(rightwards, tau, low)
+                high = numpy.where(rightwards, high, tau)
+                step = _secular_step(terms, delta, above, shrink, tau, low, high, pole_above, pole_below)
+                step = numpy.where((step > low) & (step < high), step, (low + high) / 2)
+                tau = numpy.where(converged, tau, step)
+            delta = offset - tau[:, None]
+            roots = z[index][None, :] / delta
+            roots /= numpy.linalg.norm(roots, axis=1)[:, None]
+        if not numpy.all(numpy.isfinite(roots)):
+            return None
+        root_vectors = numpy.zeros((rank, n_roots))
+        root_vectors[index] = roots.T
+        values.append(origin + tau)
+        vectors.append(root_vectors)
+
+    values = numpy.concatenate(values)
+    vectors = numpy.hstack(vectors)
+    order = numpy.argsort(values)[::-1]
+    if len(order) < n_components:
+        return None
+    if len(order) > n_components:
+        gap = values[order[n_components - 1]] - values[order[n_components]]
+        if gap <= 1e-8 * eigenvalues[0]:
+            return None
+
+    basis = vectors[:, order[:n_components]]
+    leading = values[order[:n_components]]
+    residual = eigenvalues[:, None] * basis - shrink * numpy.outer(z, z @ basis) - basis * leading
+    if numpy.abs(residual).max() > 1e-9 * eigenvalues[0]:
+        return None
+    if numpy.abs(basis.T @ basis - numpy.eye(n_components)).max() > 1e-9:
+        return None
+    return basis
+
+
+def _secular_step(terms, delta, above, shrink, tau, low, high, pole_above, pole_below):
+    """Next estimate of each secular root, from a two-pole rational model.
+
+    The sums over the poles above and below a root are each replaced by
+    ``a + b / (pole - lambda)``, matched in value and slope at the current
+    estimate, and the model's root taken (Bunch, Nielsen & Sorensen 1978).
+    Unlike a Newton step it follows the poles, so it converges in a handful of
+    iterations where Newton keeps being thrown back to bisection. The caller
+    bisects wherever the estimate falls outside the bracket ``(low, high)``.
+    """
+    slopes = terms / delta
+    psi, dpsi = (terms * above).sum(axis=1), (slopes * above).sum(axis=1)
+    phi, dphi = (terms * ~above).sum(axis=1), (slopes * ~above).sum(axis=1)
+    gap_above, gap_below = pole_above - tau, pole_below - tau
+    b = dpsi * gap_above**2
+    e = numpy.where(numpy.isnan(pole_below), 0.0, dphi * gap_below**2)
+    constant = 1 - shrink * (psi - b / gap_above + numpy.where(e > 0, phi - e / gap_below, phi))
+    # constant - shrink*b/(U - t) - shrink*e/(L - t) = 0, as a quadratic in t.
+    below = numpy.where(numpy.isnan(pole_below), 0.0, pole_below)
+    qa = constant
+    qb = constant * (pole_above + below) - shrink * (b + e)
+    qc = constant * pole_above * below - shrink * (b * below + e * pole_above)
+    root = numpy.sqrt(numpy.maximum(qb * qb - 4 * qa * qc, 0.0))
+    q = (qb + numpy.copysign(root, qb)) / 2
+    first, second = q / qa, qc / q
+    linear = pole_above - shrink * b / constant  # no pole below: the last root
+    # Of the quadratic's two roots, the one in the root's current bracket.
+    return numpy.where(e > 0, numpy.where((first > low) & (first < high), first, second), linear)
+
+
+def do_manova_analysis_on_procrustes(flattened_landmarks, groups, progress_callback=None):
     """Perform MANOVA analysis on Procrustes-aligned landmarks.
 
     Args:
         flattened_landmarks: List of flattened landmark coordinate arrays
         groups: List of group labels for each specimen
+        progress_callback: Optional ``(done, total)``, called after the model
+            fit and after the tests (see :data:`MANOVA_STEPS`)
 
     Returns:
         Dictionary with MANOVA results
@@ -744,7 +1222,11 @@ def do_manova_analysis_on_procrustes(flattened_landmarks, groups):
 
         # Perform MANOVA
         model = MANOVA.from_formula(formula, data=df)
+        if progress_callback:
+            progress_callback(1, MANOVA_STEPS)
         results = model.mv_test()
+        if progress_callback:
+            progress_callback(2, MANOVA_STEPS)
 
         # Extract test statistics
         test_statistics = []
@@ -778,6 +1260,8 @@ def do_manova_analysis_on_procrustes(flattened_landmarks, groups):
             "truncated": truncated,
         }
 
+    except AnalysisCancelledError:
+        raise
     except Exception as e:
         import traceback
 
@@ -787,12 +1271,14 @@ def do_manova_analysis_on_procrustes(flattened_landmarks, groups):
         raise
 
 
-def do_manova_analysis_on_pca(pca_scores, groups):
+def do_manova_analysis_on_pca(pca_scores, groups, progress_callback=None):
     """Perform MANOVA analysis on PCA scores.
 
     Args:
         pca_scores: List of PCA score arrays (already truncated to effective components)
         groups: List of group labels for each specimen
+        progress_callback: Optional ``(done, total)``, called after the model
+            fit and after the tests (see :data:`MANOVA_STEPS`)
 
     Returns:
         Dictionary with MANOVA results
@@ -822,7 +1308,11 @@ def do_manova_analysis_on_pca(pca_scores, groups):
 
         # Perform MANOVA
         model = MANOVA.from_formula(formula, data=df)
+        if progress_callback:
+            progress_callback(1, MANOVA_STEPS)
         results = model.mv_test()
+        if progress_callback:
+            progress_callback(2, MANOVA_STEPS)
 
         # Extract test statistics
         test_statistics = []
@@ -853,6 +1343,8 @@ def do_manova_analysis_on_pca(pca_scores, groups):
             "n_variables": n_components,
         }
 
+    except AnalysisCancelledError:
+        raise
     except Exception as e:
         import traceback
 
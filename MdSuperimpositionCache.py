@@ -0,0 +1,201 @@
+"""On-disk cache of superimposed landmark coordinates.
+
+Every analysis run starts by unpacking every object's landmark text, building
+``MdDatasetOps`` and running the superimposition -- work whose result depends
+only on the dataset's landmarks, curves and the method chosen. Re-running PCA,
+CVA or MANOVA with a different grouping variable or a different name repeats it
+for nothing.
+
+:class:`SuperimpositionCache` keeps the aligned coordinates of earlier runs as
+``.npz`` files in a directory beside the database, keyed by a hash of every
+input that affects them (:func:`content_key`). A key can therefore never hand
+back coordinates for data that has since changed: an edit produces a different
+key, and the stale entry just stops being hit. Entries are additionally dropped
+eagerly when a dataset's objects or curve configuration change
+(:meth:`SuperimpositionCache.invalidate_dataset`), and the whole directory is
+kept under a byte budget by evicting the least recently used files.
+
+The cache is disposable. Anything that goes wrong reading or writing it is
+logged and treated as a miss; it is never a reason for an analysis to fail.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import logging
+import os
+import re
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Bump when the stored layout or anything the key covers changes meaning, so
+# entries written by an older build are never read back.
+CACHE_FORMAT_VERSION = 1
+
+# Default byte budget for the whole cache directory.
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+_ENTRY_PATTERN = re.compile(r"^ds(\d+)_([0-9a-f]{64})\.npz$")
+
+
+def content_key(method, dimension, baseline, curve_config_json, object_rows):
+    """Hash of every input the superimposed coordinates depend on.
+
+    Args:
+        method: superimposition method name (case-insensitive).
+        dimension: dataset dimension.
+        baseline: the dataset's packed baseline (Bookstein registers on it).
+        curve_config_json: the dataset's semi-landmark curve configuration.
+        object_rows: ``(id, landmark_str, curve_raw_json)`` per object, in the
+            order ``MdDatasetOps`` reads them (by sequence).
+
+    Returns:
+        A 64-character hex digest.
+    """
+    digest = hashlib.sha256()
+
+    def _field(value):
+        text = "" if value is None else str(value)
+        data = text.encode("utf-8")
+        # Length-prefixed so adjacent fields can never run into each other.
+        digest.update(len(data).to_bytes(8, "little"))
+        digest.update(data)
+
+    _field(CACHE_FORMAT_VERSION)
+    _field((method or "Procrustes").strip().lower())
+    _field(dimension)
+    _field(baseline)
+    _field(curve_config_json)
+    for object_id, landmark_str, curve_raw_json in object_rows:
+        _field(object_id)
+        _field(landmark_str)
+        _field(curve_raw_json)
+    return digest.hexdigest()
+
+
+class SuperimpositionCache:
+    """LRU-bounded directory of superimposed coordinates, one file per key.
+
+    Files are named ``ds<dataset_id>_<key>.npz`` so a dataset's entries can be
+    found without opening anything; recency is the file's modification time,
+    refreshed on every hit.
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        # dataset_id -> entry paths, built from one directory listing on first
+        # use. Invalidation is called on every object save, so it must not scan.
+        self._index = None
+
+    def _path(self, dataset_id, key):
+        return os.path.join(self.directory, f"ds{int(dataset_id)}_{key}.npz")
+
+    def _load_index(self):
+        if self._index is not None:
+            return self._index
+        self._index = {}
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            names = []
+        for name in names:
+            match = _ENTRY_PATTERN.match(name)
+            if match:
+                self._index.setdefault(int(match.group(1)), set()).add(os.path.join(self.directory, name))
+        return self._index
+
+    def get(self, dataset_id, key):
+        """Cached ``(object_ids, landmarks)`` for ``key``, or ``None`` on a miss.
+
+        ``landmarks`` is an ``(n_objects, n_landmarks, dim)`` array with ``NaN``
+        for coordinates that were still missing after superimposition.
+        """
+        path = self._path(dataset_id, key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                object_ids = data["object_ids"].tolist()
+                landmarks = data["landmarks"]
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("Discarding unreadable superimposition cache entry %s: %s", path, e)
+            self._remove(dataset_id, path)
+            return None
+        with contextlib.suppress(OSError):
+            os.utime(path)
+        logger.debug("Superimposition cache hit for dataset %s", dataset_id)
+        return object_ids, landmarks
+
+    def put(self, dataset_id, key, object_ids, landmark_lists):
+        """Store superimposed landmark lists under ``key``.
+
+        Only rectangular results are stored (every object the same landmark
+        count and width); anything else is skipped rather than padded, since a
+        padded entry would not read back as the same lists. Returns whether the
+        entry was written.
+        """
+        try:
+            landmarks = np.array(landmark_lists, dtype=np.float64)
+        except (ValueError, TypeError):
+            return False
+        if landmarks.ndim != 3 or landmarks.shape[0] != len(object_ids):
+            return False
+
+        path = self._path(dataset_id, key)
+        temp_path = path + ".tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(temp_path, "wb") as f:
+                np.savez(f, object_ids=np.asarray(object_ids, dtype=np.int64), landmarks=landmarks)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning("Could not write superimposition cache entry %s: %s", path, e)
+            with contextlib.suppress(OSError):
+                os.remove(temp_path)
+            return False
+        self._load_index().setdefault(int(dataset_id), set()).add(path)
+        self.evict()
+        return True
+
+    def invalidate_dataset(self, dataset_id):
+        """Drop every entry for ``dataset_id``."""
+        if dataset_id is None:
+            return
+        paths = self._load_index().pop(int(dataset_id), set())
+        for path in paths:
+            with contextlib.suppress(OSError):
+                os.remove(path)
+        if paths:
+            logger.debug("Invalidated %d superimposition cache entr(ies) for dataset %s", len(paths), dataset_id)
+
+    def clear(self):
+        for dataset_id in list(self._load_index()):
+            self.invalidate_dataset(dataset_id)
+
+    def evict(self):
+        """Delete least recently used entries until the directory fits ``max_bytes``."""
+        entries = []
+        for dataset_id, paths in self._load_index().items():
+            for path in paths:
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, dataset_id, path))
+        total = sum(size for _, size, _, _ in entries)
+        entries.sort()
+        while entries and total > self.max_bytes:
+            _, size, dataset_id, path = entries.pop(0)
+            self._remove(dataset_id, path)
+            total -= size
+
+    def _remove(self, dataset_id, path):
+        with contextlib.suppress(OSError):
+            os.remove(path)
+        paths = self._load_index().get(int(dataset_id))
+        if paths is not None:
+            paths.discard(path)
@@ -0,0 +1,176 @@
+"""Thin-plate spline warps between two landmark configurations, in 2D and 3D.
+
+A :class:`ThinPlateSpline` solves the bending-energy system for a pair of
+configurations once; :meth:`ThinPlateSpline.transform` then maps any number of
+points with one kernel evaluation and one matrix product, so a deformation
+grid of tens of thousands of points costs about as much as a few hundred did
+point by point. :meth:`ThinPlateSpline.warp_grid` lays out and warps such a
+grid, of any density, and keeps the result on the spline.
+
+Shape-morphing views rebuild their grid for every frame, and an animation
+passes through the same shapes on its way back. :func:`spline_between` keeps
+the most recently used splines, keyed by the coordinates of both
+configurations, so a shape already seen costs neither the solve nor the grid.
+"""
+
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+from scipy.spatial.distance import cdist
+
+# Splines kept by spline_between. An animation's frames are typically a few
+# dozen shapes each way.
+SPLINE_CACHE_SIZE = 128
+
+# Warped grids kept on each spline, one per distinct layout drawn.
+GRID_CACHE_SIZE = 4
+
+# Points transformed per matrix product, bounding the kernel matrix at
+# _CHUNK x (control points) floats.
+_CHUNK = 16384
+
+
+def _kernel(r, dimension):
+    """The radial basis of the spline: r^2 log r in 2D, r in 3D."""
+    if dimension == 2:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            u = r * r * np.log(r)
+        u[r == 0] = 0.0
+        return u
+    return r
+
+
+class ThinPlateSpline:
+    """The thin-plate spline taking ``source`` onto ``target``.
+
+    Both are (n, d) arrays of corresponding points, d 2 or 3. ``weights`` is
+    the (n, d) non-affine part and ``affine`` the (d + 1, d) affine part, its
+    first row the translation. Raises ValueError for configurations that do
+    not match, and numpy.linalg.LinAlgError when the points are degenerate
+    (e.g. all on one line).
+    """
+
+    def __init__(self, source, target):
+        source = np.array(source, dtype=float)
+        target = np.array(target, dtype=float)
+        if source.ndim != 2 or source.shape != target.shape or source.shape[1] not in (2, 3):
+            raise ValueError(f"Cannot fit a thin-plate spline from {source.shape} to {target.shape} points")
+        n, dimension = source.shape
+        if n < dimension + 1:
+            raise ValueError(f"A {dimension}D thin-plate spline needs at least {dimension + 1} points, got {n}")
+        self.source = source
+        self.target = target
+        self.dimension = dimension
+
+        size = n + dimension + 1
+        system = np.zeros((size, size))
+        system[:n, :n] = _kernel(cdist(source, source), dimension)
+        system[:n, n] = 1.0
+        system[:n, n + 1 :] = source
+        system[n, :n] = 1.0
+        system[n + 1 :, :n] = source.T
+        rhs = np.zeros((size, dimension))
+        rhs[:n] = target
+        params = np.linalg.solve(system, rhs)
+        self.weights = params[:n]
+        self.affine = params[n:]
+        self._grids = OrderedDict()
+
+    def transform(self, points):
+        """``points`` (m, d), or one point (d,), mapped through the spline."""
+        points = np.asarray(points, dtype=float)
+        if points.ndim == 1:
+            return self.transform(points[np.newaxis])[0]
+        result = np.empty((len(points), self.dimension))
+        for start in range(0, len(points), _CHUNK):
+            chunk = points[start : start + _CHUNK]
+            kernel = _kernel(cdist(chunk, self.source), self.dimension)
+            result[start : start + _CHUNK] = kernel @ self.weights + self.affine[0] + chunk @ self.affine[1:]
+        return result
+
+    def warp_grid(self, lower, upper, lines=20, samples=None):
+        """A lattice of straight lines over the box ``lower``..``upper``, and its warp.
+
+        Along each axis run ``lines`` x ``lines`` (in 3D) or ``lines`` (in 2D)
+        lines, each sampled at ``samples`` points (default ``lines``); more
+        samples draw the warped lines as smoother curves. Returns two lists of
+        ``(axis, points)``, ``axis`` being the index of the coordinate that
+        varies along the line: the lines as laid out, then as warped. All
+        points are transformed at once, and the result is kept for the next
+        call with the same layout.
+        """
+        samples = lines if samples is None else samples
+        key = (tuple(np.asarray(lower, dtype=float)), tuple(np.asarray(upper, dtype=float)), lines, samples)
+        if key in self._grids:
+            self._grids.move_to_end(key)
+            return self._grids[key]
+        straight = grid_lines(lower, upper, lines, samples)
+        warped = self.transform(np.concatenate([points for _axis, points in straight]))
+        warped = warped.reshape(len(straight), samples, self.dimension)
+        grid = (straight, [(axis, warped[i]) for i, (axis, _points) in enumerate(straight)])
+        self._grids[key] = grid
+        if len(self._grids) > GRID_CACHE_SIZE:
+            self._grids.popitem(last=False)
+        return grid
+
+
+def grid_lines(lower, upper, lines=20, samples=None):
+    """Straight lines of a lattice over the box ``lower``..``upper``.
+
+    ``(axis, points)`` for each line, ``points`` being ``samples`` points
+    (default ``lines``) along coordinate ``axis``. In 2D the lines along y
+    (the vertical ones) come first, as ObjectViewer2D has always drawn them.
+    """
+    lower = np.asarray(lower, dtype=float)
+    upper = np.asarray(upper, dtype=float)
+    samples = lines if samples is None else samples
+    dimension = len(lower)
+    ticks = [np.linspace(lower[i], upper[i], lines) for i in range(dimension)]
+    result = []
+    for axis in reversed(range(dimension)):
+        along = np.linspace(lower[axis], upper[axis], samples)
+        others = [i for i in range(dimension) if i != axis]
+        crossings = np.stack(np.meshgrid(*(ticks[i] for i in others), indexing="ij"), axis=-1)
+        for crossing in crossings.reshape(-1, dimension - 1):
+            points = np.empty((samples, dimension))
+            points[:, axis] = along
+            points[:, others] = crossing
+            result.append((axis, points))
+    return result
+
+
+_splines = OrderedDict()
+
+
+def _shape_key(source, target):
+    digest = hashlib.sha1(usedforsecurity=False)
+    for points in (source, target):
+        points = np.ascontiguousarray(points, dtype=float)
+        digest.update(repr(points.shape).encode())
+        digest.update(points.tobytes())
+    return digest.hexdigest()
+
+
+def spline_between(source, target):
+    """The :class:`ThinPlateSpline` from ``source`` to ``target``, solved once.
+
+    Splines are kept, least recently used first out, up to
+    ``SPLINE_CACHE_SIZE``; the same coordinates get the same spline, with the
+    grids already warped through it. Raises as :class:`ThinPlateSpline` does.
+    """
+    key = _shape_key(source, target)
+    spline = _splines.get(key)
+    if spline is not None:
+        _splines.move_to_end(key)
+        return spline
+    spline = ThinPlateSpline(source, target)
+    _splines[key] = spline
+    if len(_splines) > SPLINE_CACHE_SIZE:
+        _splines.popitem(last=False)
+    return spline
+
+
+def clear_cache():
+    """Forget every spline kept by :func:`spline_between`."""
+    _splines.clear()
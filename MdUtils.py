@@ -13,10 +13,11 @@ import numpy as np
 import platformdirs
 
 # from stl import mesh
-import trimesh
 from PyQt5.QtGui import QColor
 from PyQt5.QtWidgets import QMessageBox
 
+import MdMediaStore
+
 logger = logging.getLogger(__name__)
 
 # Import version from centralized version file
@@ -945,58 +946,16 @@ def process_dropped_file_name(file_name):
 
 
 def process_3d_file(file_name):
-    # get extension
-    file_extension = os.path.splitext(file_name)[1][1:].lower()
-    # print("file_extension:", file_extension)
-    if file_extension == "obj":
-        return file_name
-
-    temp_dir = tempfile.mkdtemp()
-
-    # get filename without extension (basename only — an absolute source path
-    # would otherwise win the os.path.join and drop the converted file next to the
-    # original instead of in temp_dir)
-    file_name_only = os.path.splitext(os.path.basename(file_name))[0]
-    # copy to temp dir
-    new_file_name = os.path.join(temp_dir, file_name_only + ".obj")
-    # print("new_file_name:", new_file_name)
-
-    if file_extension == "stl":
-        # stl_mesh = mesh.Mesh.from_file(file_name)
-        # tri_mesh = trimesh.Trimesh(stl_mesh.vectors, process=False)
-        try:
-            tri_mesh = trimesh.load_mesh(file_name)
-        except Exception as e:
-            logger.error(f"Failed to load STL mesh from {file_name}: {e}")
-            raise ValueError(f"Cannot load STL file {file_name}: {e}") from e
-
-        # if vertices are not 2D array, convert to 2D array
-        # actually in that case vertices have faces data.
-        # print("stl_mesh shape:", tri_mesh.vertices.shape)
-        # print("vertex normals:", tri_mesh.vertex_normals)
-        # print("stl_mesh vertices:", tri_mesh.vertices[0:5,:])
-        # print("stl_mesh faces:", tri_mesh.faces[0:5,:])
+    """The path to load the 3D model at ``file_name`` from: the file itself.
 
-        try:
-            tri_mesh.export(new_file_name, file_type="obj")
-        except Exception as e:
-            logger.error(f"Failed to export STL mesh to {new_file_name}: {e}")
-            raise ValueError(f"Cannot export to OBJ file {new_file_name}: {e}") from e
-    elif file_extension == "ply":
-        try:
-            ply_mesh = trimesh.load(file_name)
-        except Exception as e:
-            logger.error(f"Failed to load PLY mesh from {file_name}: {e}")
-            raise ValueError(f"Cannot load PLY file {file_name}: {e}") from e
-        # print("ply_mesh shape:", ply_mesh.vertices.shape)
-        # print("ply_mesh vertices:", ply_mesh.vertices[0:5,:])
-        # print("ply_mesh faces:", ply_mesh.faces[0:5,:])
-        try:
-            ply_mesh.export(new_file_name, file_type="obj")
-        except Exception as e:
-            logger.error(f"Failed to export PLY mesh to {new_file_name}: {e}")
-            raise ValueError(f"Cannot export to OBJ file {new_file_name}: {e}") from e
-    return new_file_name
+    STL and PLY files used to be converted to OBJ text in a temporary
+    directory here. ``MdMesh`` now reads all three formats into arrays
+    directly, so the file is loaded and stored as it is.
+    """
+    file_extension = os.path.splitext(file_name)[1][1:].lower()
+    if file_extension not in MODEL_EXTENSION_LIST:
+        logger.warning(f"Not a supported 3D model format: {file_name}")
+    return file_name
 
 
 def show_error_message(error_message):
@@ -1431,12 +1390,18 @@ ANALYSIS_FIELDS = (
 def _analysis_to_manifest(analysis):
     """One MdAnalysis row as plain JSON data.
 
-    The model is flat -- every result is already a JSON string in a column -- so
-    this is a straight field copy. The timestamps are carried too: an analysis
-    is dated evidence, and restoring one with today's date would misrepresent
-    when the work was done.
+    The model is flat, so this is a field copy. Numeric results kept in the
+    analysis' NPZ archive rather than their JSON column are written as JSON all
+    the same, so the package reads the same in a version without the archive.
+    The timestamps are carried too: an analysis is dated evidence, and restoring
+    one with today's date would misrepresent when the work was done.
     """
+    from MdModel import RESULT_ARRAY_NAMES
+
     entry = {field: getattr(analysis, field) for field in ANALYSIS_FIELDS}
+    for name in RESULT_ARRAY_NAMES:
+        if not entry.get(name + "_json") and analysis.has_result(name):
+            entry[name + "_json"] = json.dumps(analysis.get_result_list(name))
     entry["created_at"] = analysis.created_at.isoformat() if analysis.created_at else None
     entry["modified_at"] = analysis.modified_at.isoformat() if analysis.modified_at else None
     return entry
@@ -1503,6 +1468,17 @@ def estimate_package_size(dataset_id: int, include_files: bool = True) -> int:
     return total
 
 
+def _stored_media_paths(dataset_id, storage_base):
+    """``{(object id, "image" | "model"): path}`` of the files a dataset's objects use."""
+    from MdModel import MdImage, MdObject, MdThreeDModel
+
+    paths = {}
+    for kind, model in (("image", MdImage), ("model", MdThreeDModel)):
+        for media in model.select(model, MdObject).join(MdObject).where(MdObject.dataset == dataset_id):
+            paths.setdefault((media.object.id, kind), media.get_file_path(storage_base))
+    return paths
+
+
 def create_zip_package(
     dataset_id: int,
     output_path: str,
@@ -1536,20 +1512,14 @@ def create_zip_package(
         files_to_copy: list[tuple[Path, Path]] = []
         if include_files:
             # Build copy plan based on objects in JSON
+            stored = _stored_media_paths(dataset_id, storage_base)
             for obj in data.get("objects", []):
                 files = obj.get("files") or {}
-                if "image" in files and files["image"] and files["image"].get("path"):
-                    rel = files["image"]["path"]
-                    ext = Path(rel).suffix
-                    src = Path(storage_base) / str(data["dataset"]["id"]) / f"{obj['id']}{ext}"
-                    dst = tmp_root / rel
-                    files_to_copy.append((src, dst))
-                if "model" in files and files["model"] and files["model"].get("path"):
-                    rel = files["model"]["path"]
-                    ext = Path(rel).suffix
-                    src = Path(storage_base) / str(data["dataset"]["id"]) / f"{obj['id']}{ext}"
-                    dst = tmp_root / rel
-                    files_to_copy.append((src, dst))
+                files_to_copy.extend(
+                    (Path(stored[obj["id"], kind]), tmp_root / files[kind]["path"])
+                    for kind in ("image", "model")
+                    if files.get(kind) and files[kind].get("path") and (obj["id"], kind) in stored
+                )
         total_steps += len(files_to_copy)
 
         # Copy files
@@ -1719,10 +1689,10 @@ def _import_media(meta, media_cls, mo, root, storage_base, copied_files, kind):
     media = media_cls()
     media.object = mo
     media.load_file_info(str(src))
-    new_fp = media.get_file_path(storage_base)
-    Path(new_fp).parent.mkdir(parents=True, exist_ok=True)
-    shutil.copy2(str(src), str(new_fp))
-    copied_files.append(str(new_fp))
+    # Stored as packaged, never re-downscaled: the landmarks were digitized on
+    # this very file.
+    media.file_hash = MdMediaStore.put_file(storage_base, str(src), media.file_extension(), digest=media.md5hash)
+    copied_files.append(media.get_file_path(storage_base))
     media.save()
 
 
@@ -1781,10 +1751,8 @@ def import_dataset_from_zip(zip_path: str, progress_callback: Callable[[int, int
             return ds.id
         except Exception:
             # atomic() rolled back the DB, so the new dataset no longer exists.
-            # Remove its whole storage directory: it holds every media file
-            # copied for this import (all under <storage>/<ds.id>/) plus any
-            # directories created along the way, including a file left partially
-            # written by a copy that failed mid-way and so was never tracked.
+            # Remove its whole storage directory, in case a file went into the
+            # per-object layout under <storage>/<ds.id>/.
             if ds is not None:
                 storage_dir = os.path.join(get_storage_directory(), str(ds.id))
                 try:
@@ -1792,13 +1760,11 @@ def import_dataset_from_zip(zip_path: str, progress_callback: Callable[[int, int
                         shutil.rmtree(storage_dir)
                 except OSError as e:
                     logger.warning(f"Failed to remove orphaned import directory {storage_dir}: {e}")
-            # Backstop for any tracked file that somehow sits outside that tree.
-            for fp in copied_files:
-                try:
-                    if os.path.exists(fp):
-                        os.remove(fp)
-                except OSError as e:
-                    logger.warning(f"Failed to clean up orphaned import file {fp}: {e}")
+            # The files it put in the media store, unless something already in
+            # the library is the same file.
+            from MdModel import remove_media_files
+
+            remove_media_files(copied_files)
             raise
 
 
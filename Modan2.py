@@ -21,14 +21,14 @@ import matplotlib
 import matplotlib.pyplot as plt
 from peewee import DoesNotExist
 from PyQt5.QtCore import (
+    QIdentityProxyModel,
     QItemSelectionModel,
     QRect,
     QSize,
-    QSortFilterProxyModel,
     Qt,
     pyqtSlot,
 )
-from PyQt5.QtGui import QCursor, QIcon, QKeySequence, QStandardItem, QStandardItemModel
+from PyQt5.QtGui import QCursor, QIcon, QKeySequence
 from PyQt5.QtWidgets import (
     QAbstractItemView,
     QAction,
@@ -53,6 +53,7 @@ from PyQt5.QtWidgets import (
     QWidget,
 )
 
+import MdLiveWireStore
 import MdUtils as mu
 from dialogs import (
     DataExplorationDialog,
@@ -68,13 +69,14 @@ from dialogs import (
 from MdConstants import ICONS as ICON_CONSTANTS
 from MdConstants import MODE
 from MdHelpers import guard_slot, show_error, show_warning
-from MdModel import MdAnalysis, MdDataset, MdObject, landmark_position_count
+from MdModel import MdAnalysis, MdDataset, MdObject
 from ModanComponents import (
     MISSING_COUNT_ROLE,
     AnalysisInfoWidget,
+    MdDatasetTreeModel,
     MdLandmarkCountDelegate,
+    MdObjectTableModel,
     MdSequenceDelegate,
-    MdTableModel,
     MdTableView,
     MdTreeView,
     ObjectViewer2D,
@@ -124,6 +126,8 @@ class SettingsWrapper:
             # resolved path, so a user who never chose one is not pinned to
             # whatever the default happened to be when they first launched.
             "Data/Directory": ("data", "directory"),
+            # Analysis
+            "Analysis/CrossValidationJobs": ("analysis", "cross_validation_jobs"),
             # UI settings
             "ToolbarIconSize": ("ui", "toolbar_icon_size"),
             "PlotSize": ("ui", "plot_size"),
@@ -267,6 +271,8 @@ class ModanMainWindow(QMainWindow):
 
         # Initialize controller
         self.controller = ModanController()
+        # Live-wire fields of newly stored images are built while the app runs.
+        MdLiveWireStore.start_background_builds()
 
         # Initialize widgets (temporary compatibility)
         self.tableView = MdTableView()
@@ -439,6 +445,7 @@ class ModanMainWindow(QMainWindow):
         # Connect controller signals to UI updates
         self.controller.dataset_created.connect(self.on_dataset_created)
         self.controller.dataset_updated.connect(self.on_dataset_updated)
+        self.controller.dataset_deleted.connect(self.on_dataset_deleted)
         self.controller.object_added.connect(self.on_object_added)
         self.controller.object_updated.connect(self.on_object_updated)
         self.controller.analysis_completed.connect(self.on_analysis_completed)
@@ -450,25 +457,39 @@ class ModanMainWindow(QMainWindow):
         self.controller.warning_occurred.connect(self.on_controller_warning)
         self.controller.info_message.connect(self.on_controller_info)
 
+    # The controller's signals change the one node they are about; the tree
+    # is rebuilt (load_dataset) only when that node's parent is not shown.
+
     def on_dataset_created(self, dataset):
         """Handle dataset creation from controller"""
-        self.load_dataset()
+        if not self.dataset_model.add_dataset(dataset):
+            self.load_dataset()
+            return
+        parent_item = self.dataset_model.dataset_item(dataset.parent_id)
+        if parent_item is not None:
+            self.treeView.expand(parent_item.index())
 
     def on_dataset_updated(self, dataset):
         """Handle dataset update from controller"""
-        self.load_dataset()
+        if not self.dataset_model.update_dataset(dataset):
+            self.load_dataset()
+
+    def on_dataset_deleted(self, dataset_id):
+        """Handle dataset deletion from controller"""
+        self.dataset_model.remove_dataset(dataset_id)
 
     def on_object_added(self, obj):
         """Handle object addition from controller"""
-        self.load_dataset()
+        self.dataset_model.adjust_object_count(obj.dataset_id, 1)
 
     def on_object_updated(self, obj):
         """Handle object update from controller"""
-        self.load_dataset()
+        # Nothing the tree shows (dataset names, object counts) has changed.
 
     def on_analysis_completed(self, analysis):
         """Handle analysis completion from controller"""
-        self.load_dataset()
+        if not self.dataset_model.add_analysis(analysis):
+            self.load_dataset()
 
     def on_controller_info(self, message):
         """Show a transient info message from the controller in the status bar."""
@@ -556,6 +577,15 @@ class ModanMainWindow(QMainWindow):
         self.set_toolbar_icon_size(size)
         self.object_view_2d.read_settings()
         self.object_view_3d.read_settings()
+        self.apply_analysis_settings()
+
+    def apply_analysis_settings(self):
+        """Hand the analysis preferences to the controller."""
+        try:
+            jobs = int(self.m_app.settings.value("Analysis/CrossValidationJobs", 1))
+        except (TypeError, ValueError):
+            jobs = 1
+        self.controller.cross_validation_jobs = max(1, jobs)
 
     def set_toolbar_icon_size(self, size):
         if size.lower() == "small":
@@ -628,6 +658,8 @@ class ModanMainWindow(QMainWindow):
 
             self._restore_main_window_geometry()
 
+        self.apply_analysis_settings()
+
         self.m_app.language = self.config.get("language", "en")
         if self.init_done:
             self.update_language()
@@ -799,6 +831,7 @@ class ModanMainWindow(QMainWindow):
 
     def closeEvent(self, event):
         self.write_settings()
+        MdLiveWireStore.stop_background_builds()
         if self.analysis_dialog is not None:
             # Already deleted (WA_DeleteOnClose / deleteLater); the Python
             # wrapper outlives the C++ widget.
@@ -1585,7 +1618,7 @@ class ModanMainWindow(QMainWindow):
             self.object_view.clear_object()
 
     def reset_treeView(self):
-        self.dataset_model = QStandardItemModel()
+        self.dataset_model = MdDatasetTreeModel()
         self.treeView.setModel(self.dataset_model)
         self.treeView.setHeaderHidden(True)
         self.dataset_selection_model = self.treeView.selectionModel()
@@ -1728,18 +1761,17 @@ class ModanMainWindow(QMainWindow):
                 new_index_list.append(new_index)
             selected_indexes = new_index_list
 
-        selected_object_list = []
+        # One id per selected row (selectedIndexes() has every cell), then one
+        # query for all of them rather than one per cell.
+        object_ids = []
         for index in selected_indexes:
             try:
-                object_id = int(self.object_model._data[index.row()][0]["value"])
-                obj = MdObject.get_by_id(object_id)
-            except (IndexError, KeyError, ValueError, TypeError, DoesNotExist) as e:
+                object_ids.append(self.object_model.object_id(index.row()))
+            except IndexError as e:
                 logger.warning(f"Skipping unreadable table row {index.row()}: {e}")
-                continue
-            if obj is not None and obj not in selected_object_list:
-                selected_object_list.append(obj)
-
-        return selected_object_list
+        object_ids = list(dict.fromkeys(object_ids))
+        found = {obj.id: obj for obj in MdObject.select().where(MdObject.id.in_(object_ids))}
+        return [found[object_id] for object_id in object_ids if object_id in found]
 
     def on_object_data_changed(self):
         self.data_changed = True
@@ -1750,7 +1782,7 @@ class ModanMainWindow(QMainWindow):
         self.btnAddObject.setEnabled(False)
         self.btnAddProperty.setEnabled(False)
         self.btnEditObject.setEnabled(False)
-        self.object_model = MdTableModel()
+        self.object_model = MdObjectTableModel()
         self.object_model.dataChangedCustomSignal.connect(self.on_object_data_changed)
         header_labels = ["ID", "Seq.", "Name", "LM Count", "Curve", "CSize"]
         if self.selected_dataset is not None:
@@ -1766,7 +1798,9 @@ class ModanMainWindow(QMainWindow):
                 self.object_view_2d.hide()
                 self.object_view_3d.show()
         self.object_model.setHorizontalHeader(header_labels)
-        self.proxy_model = QSortFilterProxyModel()
+        # Sorting is the model's own (in SQL, see MdObjectTableModel.sort); a
+        # sorting proxy would read every row of the table to compare them.
+        self.proxy_model = QIdentityProxyModel()
         self.proxy_model.setSourceModel(self.object_model)
         self.tableView.setModel(self.proxy_model)
         header = self.tableView.horizontalHeader()
@@ -1885,53 +1919,11 @@ class ModanMainWindow(QMainWindow):
 
     @guard_slot("Failed to load dataset list")
     def load_dataset(self):
-        self.dataset_model.clear()
         self.selected_dataset = None
-        all_record = MdDataset.filter(parent=None)
-        for rec in all_record:
-            rec.unpack_wireframe()
-            item1 = QStandardItem(rec.dataset_name + " (" + str(rec.object_list.count()) + ")")
-            if rec.dimension == 2:
-                item1.setIcon(QIcon(ICON_CONSTANTS["dataset_2d"]))
-            else:
-                item1.setIcon(QIcon(ICON_CONSTANTS["dataset_3d"]))
-            item2 = QStandardItem(str(rec.id))
-            item1.setData(rec)
-
-            self.dataset_model.appendRow([item1, item2])
-            if rec.analyses.count() > 0:
-                self.load_analysis(item1, rec)
-            if rec.children.count() > 0:
-                self.load_subdataset(item1, item1.data())
+        self.dataset_model.load()
         self.treeView.expandAll()
         self.treeView.hideColumn(1)
 
-    def load_analysis(self, parent_item, dataset):
-        all_record = MdAnalysis.filter(dataset=dataset)
-        for rec in all_record:
-            item1 = QStandardItem(rec.analysis_name)
-            item1.setIcon(QIcon(ICON_CONSTANTS["analysis"]))
-            item2 = QStandardItem(str(rec.id))
-            item1.setData(rec)
-            parent_item.appendRow([item1, item2])
-
-    def load_subdataset(self, parent_item, dataset):
-        all_record = MdDataset.filter(parent=dataset)
-        for rec in all_record:
-            rec.unpack_wireframe()
-            item1 = QStandardItem(rec.dataset_name + " (" + str(rec.object_list.count()) + ")")
-            if rec.dimension == 2:
-                item1.setIcon(QIcon(ICON_CONSTANTS["dataset_2d"]))
-            else:
-                item1.setIcon(QIcon(ICON_CONSTANTS["dataset_3d"]))
-            item2 = QStandardItem(str(rec.id))
-            item1.setData(rec)
-            parent_item.appendRow([item1, item2])  # ,item3] )
-            if rec.analyses.count() > 0:
-                self.load_analysis(item1, rec)
-            if rec.children.count() > 0:
-                self.load_subdataset(item1, item1.data())
-
     @guard_slot("Failed to change dataset selection")
     def on_dataset_selection_changed(self, selected, deselected):
         if self.data_changed:
@@ -1974,7 +1966,8 @@ class ModanMainWindow(QMainWindow):
                 # Edit Object starts disabled until object is selected
                 self.actionEditObject.setEnabled(False)
             elif isinstance(obj, MdAnalysis):
-                self.selected_analysis = obj
+                # The tree holds only the analysis's id and name; read its results now.
+                self.selected_analysis = MdAnalysis.get_by_id(obj.id)
                 if self.hsplitter.widget(1) != self.analysis_view:
                     self.hsplitter.replaceWidget(1, self.analysis_view)
                 self.analysis_info_widget.set_analysis(self.selected_analysis)
@@ -2029,44 +2022,15 @@ class ModanMainWindow(QMainWindow):
         self.btnAddObject.setEnabled(True)
         self.btnSaveChanges.setEnabled(False)
 
-        rowdata_list = []
-        for idx, obj in enumerate(self.selected_dataset.object_list):
-            # Guard each object so one row with malformed landmark/variable data
-            # can't silently kill the whole dataset load (a Qt slot swallows the
-            # exception and the window appears to die on click).
-            try:
-                seq = obj.sequence
-                if seq is None:
-                    seq = idx + 1
-                    obj.sequence = seq
-                    obj.save()
-                # Show recorded landmarks as the count; the delegate appends the
-                # missing tally in red so a gap is visible without distorting
-                # the number or the column's numeric sort.
-                recorded = obj.count_landmarks()
-                missing = landmark_position_count(obj) - recorded
-                row_data = [
-                    obj.id,
-                    seq,
-                    obj.object_name,
-                    {"value": recorded, "missing": max(0, missing)},
-                    len(obj.get_curve_raw()),
-                    obj.get_centroid_size(),
-                ]
-
-                if len(self.selected_dataset.variablename_list) > 0:
-                    variable_list = obj.unpack_variable()
-                    for var_idx, _prop in enumerate(self.selected_dataset.variablename_list):
-                        item = variable_list[var_idx] if var_idx < len(variable_list) else ""
-                        row_data.append(item)
-                rowdata_list.append(row_data)
-            except Exception as e:
-                logger.error(
-                    f"Failed to load object id={getattr(obj, 'id', '?')} "
-                    f"('{getattr(obj, 'object_name', '?')}') into the table: {e}"
-                )
-                continue
-        self.object_model.appendRows(rowdata_list)
+        # Objects saved without a sequence get their position, as they always
+        # have; the table itself reads rows a page at a time as they are shown.
+        sequences = MdObject.select(MdObject.id, MdObject.sequence).where(MdObject.dataset == self.selected_dataset)
+        for idx, (object_id, seq) in enumerate(sequences.tuples()):
+            if seq is None:
+                obj = MdObject.get_by_id(object_id)
+                obj.sequence = idx + 1
+                obj.save()
+        self.object_model.set_dataset(self.selected_dataset)
 
     def update_object_in_table(self, obj):
         """Refresh one object's row (landmark count, centroid) in place.
@@ -2078,37 +2042,17 @@ class ModanMainWindow(QMainWindow):
         if obj is None or not hasattr(self, "object_model"):
             return
         obj.unpack_landmark()
-        for row in range(len(self.object_model._data)):
-            try:
-                row_id = int(self.object_model._data[row][0]["value"])
-            except (KeyError, ValueError, TypeError, IndexError):
-                continue
-            if row_id != obj.id:
-                continue
-            recorded = obj.count_landmarks()
-            missing = landmark_position_count(obj) - recorded
-            self.object_model._data[row][3] = {"value": recorded, "missing": max(0, missing), "changed": False}
-            self.object_model._data[row][4] = {"value": len(obj.get_curve_raw()), "changed": False}
-            self.object_model._data[row][5] = {"value": obj.get_centroid_size(), "changed": False}
-            top_left = self.object_model.index(row, 0)
-            bottom_right = self.object_model.index(row, self.object_model.columnCount() - 1)
-            self.object_model.dataChanged.emit(top_left, bottom_right)
-            return
+        self.object_model.refresh_object(obj.id)
 
     def select_object_in_table(self, object_id):
         """Select the row for ``object_id`` in the object table (through the proxy)."""
         if object_id is None or not hasattr(self, "object_model"):
             return
-        for row in range(len(self.object_model._data)):
-            try:
-                row_id = int(self.object_model._data[row][0]["value"])
-            except (KeyError, ValueError, TypeError, IndexError):
-                continue
-            if row_id == object_id:
-                proxy_index = self.proxy_model.mapFromSource(self.object_model.index(row, 0))
-                self.tableView.selectRow(proxy_index.row())
-                self.tableView.scrollTo(proxy_index)
-                return
+        row = self.object_model.row_of(object_id)
+        if row is not None:
+            proxy_index = self.proxy_model.mapFromSource(self.object_model.index(row, 0))
+            self.tableView.selectRow(proxy_index.row())
+            self.tableView.scrollTo(proxy_index)
 
     @guard_slot("Failed to change object selection")
     def on_object_selection_changed(self, selected, deselected):
@@ -63,8 +63,10 @@ from components import (
     CustomDrag,
     DatasetOpsViewer,
     DragEventFilter,
+    MdDatasetTreeModel,
     MdDrag,
     MdLandmarkCountDelegate,
+    MdObjectTableModel,
     MdSequenceDelegate,
     MdTableModel,
     MdTableView,
@@ -122,8 +124,10 @@ __all__ = [
     "PicButton",
     "ResizableOverlayWidget",
     "ShapePreference",
+    "MdObjectTableModel",
     "MdTableModel",
     "MdTableView",
+    "MdDatasetTreeModel",
     "MdTreeView",
     # Formats
     "Morphologika",
@@ -3,8 +3,10 @@ Controller layer for Modan2 application.
 Handles business logic and coordinates between View and Model.
 """
 
+import itertools
 import json
 import logging
+import math
 import os
 import shutil
 from pathlib import Path
@@ -15,6 +17,8 @@ from PyQt5.QtCore import QObject, pyqtSignal
 import MdModel
 import MdStatistics
 import MdUtils as mu
+from MdAnalysisWorker import AnalysisJob, AnalysisProgress, AnalysisWorker
+from MdStatistics import AnalysisCancelledError
 
 
 def landmark_mismatch_message(obj, expected, found):
@@ -66,8 +70,10 @@ class ModanController(QObject):
 
     analysis_started = pyqtSignal(str)  # analysis_type
     analysis_progress = pyqtSignal(int)  # progress_percentage
+    analysis_step = pyqtSignal(str, int, int)  # stage, done, total
     analysis_completed = pyqtSignal(object)  # MdAnalysis
     analysis_failed = pyqtSignal(str)  # error_message
+    analysis_cancelled = pyqtSignal()
 
     error_occurred = pyqtSignal(str)  # error_message
     warning_occurred = pyqtSignal(str)  # warning_message
@@ -90,6 +96,11 @@ class ModanController(QObject):
 
         # Processing flags
         self._processing = False
+        self._analysis_worker = None
+
+        # Worker processes for the CVA cross-validation folds that have to be
+        # refitted. Set from the preferences by the main window.
+        self.cross_validation_jobs = 1
 
     # ========== Dataset Operations ==========
 
@@ -186,6 +197,8 @@ class ModanController(QObject):
 
             objects_deleted = 0
             analyses_deleted = 0
+            # Derived from the rows, so read them while they still exist.
+            file_paths = MdModel.dataset_media_paths(dataset_id, storage_directory)
             # Delete the dataset and all its children as a single transaction so a
             # mid-way failure cannot leave the database half-deleted.
             with MdModel.gDatabase.atomic():
@@ -208,10 +221,12 @@ class ModanController(QObject):
                 # Delete the dataset itself
                 dataset.delete_instance()
 
-            # Every file of every object in this dataset lives under one
-            # directory named after the dataset id, so the whole tree goes —
-            # including the originals/ archive. Deleting the rows alone left it
-            # on disk forever.
+            # Its files in the media store go unless another dataset's objects
+            # use them too; any still in the per-object layout live under one
+            # directory named after the dataset id, so the whole tree goes --
+            # including the originals/ archive. Deleting the rows alone left
+            # them on disk forever.
+            self._remove_files(file_paths)
             self._remove_dataset_directory(dataset_id, storage_directory)
 
             # Clear current selection if it was the deleted dataset
@@ -598,7 +613,8 @@ class ModanController(QObject):
         An object owns its image (a downscaled working copy since devlog 222,
         which archives the untouched original beside it) and its 3D model. The
         paths are derived from the object's row, so collect them *before*
-        deleting it.
+        deleting it. Files in the media store may be shared with other
+        objects; ``_remove_files`` keeps those.
         """
         storage_directory = storage_directory or mu.get_storage_directory()
         paths = []
@@ -624,14 +640,10 @@ class ModanController(QObject):
 
         Called after the database change has committed, so a file that cannot
         be removed leaves a harmless orphan rather than a row pointing at a
-        file that is already gone.
+        file that is already gone. A file in the media store is kept while any
+        other image or 3D model still uses it (``MdModel.remove_media_files``).
         """
-        for path in paths:
-            try:
-                if os.path.exists(path):
-                    os.remove(path)
-            except OSError as e:
-                self.logger.warning(f"Could not remove {path}: {e}")
+        MdModel.remove_media_files(paths)
 
     def delete_object_with_files(self, obj, storage_directory):
         """Delete an object and the files it owns.
@@ -649,97 +661,136 @@ class ModanController(QObject):
 
         Moved out of ``ImportDatasetDialog`` so the dialog no longer performs DB/file
         I/O directly. ``progress_callback(done, total)`` is invoked after each object
-        (for progress-bar updates). Returns the created dataset.
+        (for progress-bar updates). Returns the created dataset. A file not yet
+        read is better imported with :meth:`import_stream`.
         """
+        # Imported here: the components package brings in the viewers (and
+        # OpenGL) with it, which the controller otherwise does without.
+        from components.formats.specimen import reader_specimens
+
+        def report(done):
+            if progress_callback is not None:
+                progress_callback(done, import_data.nobjects)
+
+        return self._import_specimens(
+            import_data, reader_specimens(import_data), dataset_name, storage_directory, report
+        )
+
+    def import_stream(self, stream, dataset_name, storage_directory, progress_callback=None):
+        """Read a landmark file into a new dataset, writing while it parses.
+
+        ``stream`` is a ``SpecimenStream``; specimens are stored in batches as
+        they are read, so memory stays bounded by a batch whatever the file
+        size. ``progress_callback(done, total)`` reports bytes of the file read.
+        If reading or storing fails part way, the partly imported dataset is
+        deleted and the error re-raised. Returns the created dataset.
+        """
+
+        def report(done):
+            if progress_callback is not None:
+                progress_callback(stream.bytes_read, stream.size)
+
+        return self._import_specimens(stream, iter(stream), dataset_name, storage_directory, report)
+
+    def _import_specimens(self, source, specimens, dataset_name, storage_directory, report):
+        """Create the dataset ``source`` describes and store ``specimens`` in it."""
+        # Read before the dataset is made: a TPS stream knows its dimension
+        # only once it has a specimen.
+        first = next(specimens, None)
+        dataset = self._new_import_dataset(source, dataset_name)
+        try:
+            # Objects and images go in through a bulk session: a few large
+            # transactions instead of one per object.
+            with MdModel.BulkWriteSession() as session:
+                if first is not None:
+                    for done, specimen in enumerate(itertools.chain([first], specimens), 1):
+                        self._import_specimen(source, dataset, specimen, storage_directory, session)
+                        report(done)
+        except Exception:
+            file_paths = MdModel.dataset_media_paths(dataset.id, storage_directory)
+            with MdModel.gDatabase.atomic():
+                dataset.delete_instance(recursive=True)
+            self._remove_files(file_paths)
+            self._remove_dataset_directory(dataset.id, storage_directory)
+            raise
+        return dataset
+
+    def _new_import_dataset(self, source, dataset_name):
+        """Save the dataset an import goes into, as ``source`` describes it."""
         dataset = MdModel.MdDataset()
         dataset.dataset_name = dataset_name
-        dataset.dimension = import_data.dimension
-        if len(import_data.variablename_list) > 0:
-            dataset.variablename_list = import_data.variablename_list
+        dataset.dimension = source.dimension
+        if len(source.variablename_list) > 0:
+            dataset.variablename_list = source.variablename_list
             dataset.pack_variablename_str()
-        if len(import_data.edge_list) > 0:
-            dataset.edge_list = import_data.edge_list
+        if len(source.edge_list) > 0:
+            dataset.edge_list = source.edge_list
             dataset.wireframe = dataset.pack_wireframe()
         # Polygons (e.g. Morphologika [polygons]). The reader parses them, and the
         # dataset model / ZIP export both carry them, so persist them here too —
         # otherwise a polygon-bearing file silently imports with no polygons.
-        if len(getattr(import_data, "polygon_list", []) or []) > 0:
-            dataset.polygon_list = import_data.polygon_list
+        if len(getattr(source, "polygon_list", []) or []) > 0:
+            dataset.polygon_list = source.polygon_list
             dataset.polygons = dataset.pack_polygons()
+        dataset.save()
+        return dataset
+
+    def _import_specimen(self, source, dataset, specimen, storage_directory, session):
+        """Create a single imported object (and its image, if any) and queue it on ``session``."""
         # Semi-landmark curve configuration (TPS CURVES=). The curve points
         # become semi-landmarks appended after the fixed landmarks, so record
         # where each curve's block starts and how many points it has. Taken from
         # the first object that carries curves (all objects share the layout).
-        curve_data = getattr(import_data, "curve_data", {}) or {}
-        canonical_curves = next((curves for curves in curve_data.values() if curves), None)
-        if canonical_curves:
-            config = mu.build_curve_config(import_data.nlandmarks, [len(curve) for curve in canonical_curves])
+        if specimen.curves and not dataset.curve_config_json:
+            config = mu.build_curve_config(source.nlandmarks, [len(curve) for curve in specimen.curves])
             dataset.set_curve_config(config)
-        dataset.save()
-
-        for i in range(import_data.nobjects):
-            self._import_object(import_data, dataset, i, storage_directory)
-            if progress_callback is not None:
-                progress_callback(i + 1, import_data.nobjects)
-
-        return dataset
+            dataset.save()
 
-    def _import_object(self, import_data, dataset, index, storage_directory):
-        """Create and persist a single imported object (and its image, if any)."""
         obj = MdModel.MdObject()
-        obj.object_name = import_data.object_name_list[index]
-
-        # Set pixels per mm if available
-        if hasattr(import_data, "ppmm_list") and len(import_data.ppmm_list) > 0:
-            if mu.is_numeric(import_data.ppmm_list[index]):
-                obj.pixels_per_mm = float(import_data.ppmm_list[index])
-
+        obj.object_name = specimen.name
         obj.dataset = dataset
+        if specimen.pixels_per_mm is not None:
+            obj.pixels_per_mm = specimen.pixels_per_mm
 
         # Set landmarks. Only the fixed landmarks go into landmark_str; TPS
         # CURVES= points are kept as raw curve traces (merge-at-analysis model)
         # and expanded into semi-landmarks at analysis time.
-        # None means "not recorded" (e.g. a -999 sentinel the import resolved);
-        # store the marker unpack_landmark expects, not the string "None".
-        landmark_list = [
-            "\t".join(["Missing" if x is None else str(x) for x in landmark])
-            for landmark in import_data.landmark_data[obj.object_name]
+        # NaN means "not recorded" (e.g. a -999 sentinel the import resolved);
+        # pack_landmark stores it as the marker unpack_landmark expects.
+        obj.landmark_list = [
+            [None if math.isnan(value) else value for value in landmark] for landmark in specimen.landmarks.tolist()
         ]
-        obj.landmark_str = "\n".join(landmark_list)
-        curves = getattr(import_data, "curve_data", {}).get(obj.object_name, [])
-        if curves:
-            obj.set_curve_raw({f"curve{i + 1}": curve for i, curve in enumerate(curves)})
+        obj.pack_landmark()
+        if specimen.curves:
+            obj.set_curve_raw({f"curve{i + 1}": curve.tolist() for i, curve in enumerate(specimen.curves)})
 
         # Set variables
-        if len(import_data.variablename_list) > 0:
-            obj.variable_list = import_data.property_list_list[index]
+        if len(source.variablename_list) > 0 and specimen.variables is not None:
+            obj.variable_list = specimen.variables
             obj.pack_variable()
 
         # Set description
-        if obj.object_name in import_data.object_comment:
-            obj.object_desc = import_data.object_comment[import_data.object_name_list[index]]
+        if specimen.comment is not None:
+            obj.object_desc = specimen.comment
 
-        obj.save()
+        session.add_object(obj)
 
         # Import image if available
-        if obj.object_name in import_data.object_images:
-            self._import_object_image(obj, import_data, storage_directory)
+        if specimen.image:
+            self._import_specimen_image(source, obj, specimen.image, storage_directory, session)
 
-    def _import_object_image(self, obj, import_data, storage_directory):
-        """Copy an imported object's image into storage and persist the record."""
-        file_name = import_data.object_images[obj.object_name]
+    def _import_specimen_image(self, source, obj, file_name, storage_directory, session):
+        """Queue an imported object's image to be copied into storage and recorded."""
         if not os.path.exists(file_name):
-            file_name = os.path.join(import_data.dirname, file_name)
+            file_name = os.path.join(getattr(source, "dirname", ""), file_name)
         if not os.path.exists(file_name):
             self.logger.error(f"File not found: {file_name}")
             return
 
-        new_image = MdModel.MdImage()
-        new_image.object = obj
-        # add_file handles storage-dir creation plus the oversized-image routine
-        # (downscaled working copy + archived original)
-        new_image.add_file(file_name, base_path=storage_directory)
-        new_image.save()
+        # The session stores it with MdImage.add_file, which handles storage-dir
+        # creation plus the oversized-image routine (downscaled working copy +
+        # archived original)
+        session.add_image(obj, file_name, base_path=storage_directory)
 
     def set_current_object(self, obj: MdModel.MdObject | None):
         """Set currently selected object.
@@ -765,7 +816,11 @@ class ModanController(QObject):
         manova_group_by=None,
         **kwargs,
     ) -> MdModel.MdAnalysis | None:
-        """Run statistical analysis.
+        """Run statistical analysis to completion on the calling thread.
+
+        The GUI uses :meth:`start_analysis`, which runs the same steps with the
+        computation on a worker thread; this blocking form is for scripts and
+        tests.
 
         Args:
             dataset: Dataset to analyze (defaults to current_dataset)
@@ -778,6 +833,75 @@ class ModanController(QObject):
         Returns:
             Analysis result or None if failed
         """
+        job = self._begin_analysis(dataset, analysis_name, superimposition_method, cva_group_by, manova_group_by)
+        if job is None:
+            return None
+
+        try:
+            self._compute_analysis(job, AnalysisProgress(self._report_analysis_progress))
+            return self._finish_analysis(job)
+        except Exception as e:
+            self._fail_analysis(str(e))
+            return None
+        finally:
+            self._processing = False
+
+    def start_analysis(
+        self,
+        dataset=None,
+        analysis_name="",
+        superimposition_method="",
+        cva_group_by=None,
+        manova_group_by=None,
+    ) -> AnalysisWorker | None:
+        """Start an analysis whose computation runs on a worker thread.
+
+        Takes the same arguments as :meth:`run_analysis` and returns at once.
+        Loading the dataset happens here, on the calling thread, and so does
+        saving the result: the worker's completion is delivered back to this
+        thread, where the ``MdAnalysis`` row is written and
+        ``analysis_completed`` emitted. Progress arrives as
+        ``analysis_progress`` and ``analysis_step``; :meth:`cancel_analysis`
+        stops the run at its next checkpoint and emits ``analysis_cancelled``.
+
+        Returns:
+            The running worker, or None if the analysis could not start (the
+            reason has already been signalled).
+        """
+        job = self._begin_analysis(dataset, analysis_name, superimposition_method, cva_group_by, manova_group_by)
+        if job is None:
+            return None
+
+        worker = AnalysisWorker(job, self._compute_analysis, self)
+        worker.progress.connect(self._report_analysis_progress)
+        worker.succeeded.connect(self._on_analysis_worker_succeeded)
+        worker.cancelled.connect(self._on_analysis_worker_cancelled)
+        worker.failed.connect(self._on_analysis_worker_failed)
+        worker.finished.connect(worker.deleteLater)
+        self._analysis_worker = worker
+        worker.start()
+        return worker
+
+    def cancel_analysis(self) -> bool:
+        """Ask a running :meth:`start_analysis` to stop.
+
+        The computation stops at its next checkpoint -- a superimposition
+        iteration, a cross-validation fold, a MANOVA step -- and nothing is
+        saved. Returns whether there was a run to cancel.
+        """
+        if self._analysis_worker is None:
+            return False
+        self.logger.info("Cancelling analysis")
+        self._analysis_worker.cancel()
+        return True
+
+    def _begin_analysis(self, dataset, analysis_name, superimposition_method, cva_group_by, manova_group_by):
+        """Validate the request and load its inputs, on the calling thread.
+
+        Everything the computation needs from the database is read here, so the
+        compute phase never touches it. Returns the :class:`AnalysisJob`, or
+        None when the analysis cannot run (already reported through signals).
+        """
         # Handle backward compatibility
         if isinstance(dataset, str):
             # Old signature: run_analysis(analysis_type, params)
@@ -803,120 +927,171 @@ class ModanController(QObject):
 
         self._processing = True
 
+        job = AnalysisJob(
+            analysis_type,
+            analysis_name=analysis_name,
+            superimposition_method=superimposition_method,
+            cva_group_by=cva_group_by,
+            manova_group_by=manova_group_by,
+            params=params,
+        )
         try:
             self.logger.info(f"Starting {analysis_type} analysis")
             self.analysis_started.emit(analysis_type)
 
-            ds_ops, landmarks_data = self._prepare_landmarks(superimposition_method)
-
-            # Run analysis based on type
-            self.analysis_progress.emit(25)
-
-            # CVA/MANOVA results are only produced by the comprehensive PCA path;
-            # initialize here so the save section below can test them directly
-            # (the CVA-only / MANOVA-only branches never assign them).
-            cva_result = None
-            manova_result = None
-            # Track requested-but-failed subordinate analyses so a partial run is
-            # reported to the user instead of being silently logged as success.
-            subordinate_failures = []
-
-            # Run comprehensive analysis (PCA includes all three: PCA, CVA, MANOVA)
-            if analysis_type.upper() == "PCA":
-                pca_result = self._run_pca(landmarks_data, params)
-                result = pca_result  # Primary result for compatibility
-
-                # Build an id -> object map once so the CVA/MANOVA group-extraction
-                # loops below don't issue one query per object (was an N+1 over the
-                # dataset's objects, run for both CVA and MANOVA).
-                objects_by_id = {}
-                if cva_group_by is not None or manova_group_by is not None:
-                    objects_by_id = {o.id: o for o in self.current_dataset.object_list}
-
-                self.logger.info(f"CVA group_by parameter: {cva_group_by}")
-                if cva_group_by is not None:
-                    try:
-                        self.logger.info("Running CVA analysis alongside PCA")
-
-                        group_values = self._extract_group_values(cva_group_by, ds_ops, objects_by_id, "CVA")
-                        cva_params = {"groups": group_values}
-                        cva_result = self._run_cva(landmarks_data, cva_params)
-                        self.logger.info("CVA analysis completed successfully")
-                    except Exception as e:
-                        self.logger.warning(f"CVA analysis failed: {e}")
-                        import traceback
-
-                        self.logger.warning(f"CVA error traceback: {traceback.format_exc()}")
-                        subordinate_failures.append(f"CVA ({e})")
-                else:
-                    self.logger.warning("CVA group_by is None - skipping CVA analysis")
+            job.ds_ops, job.cache_key, job.cached = self._load_landmarks(superimposition_method)
 
-                if manova_group_by is not None:
-                    try:
-                        self.logger.info("Running MANOVA analysis alongside PCA")
+            # Build an id -> object map once so the CVA/MANOVA group-extraction
+            # loops don't issue one query per object (was an N+1 over the
+            # dataset's objects, run for both CVA and MANOVA).
+            if analysis_type.upper() == "PCA" and (cva_group_by is not None or manova_group_by is not None):
+                job.objects_by_id = {o.id: o for o in self.current_dataset.object_list}
+        except Exception as e:
+            self._fail_analysis(str(e))
+            self._processing = False
+            return None
+        return job
 
-                        manova_group_values = self._extract_group_values(
-                            manova_group_by, ds_ops, objects_by_id, "MANOVA"
-                        )
+    def _compute_analysis(self, job, progress):
+        """Superimpose and run the statistics for ``job``; no database access.
 
-                        # MANOVA should use PCA scores, not raw landmarks
-                        # Pass the PCA result for proper eigenvalue-based component selection
-                        manova_params = {"groups": manova_group_values, "pca_result": pca_result}
-                        manova_result = self._run_manova(landmarks_data, manova_params)
-                        self.logger.info("MANOVA analysis completed successfully")
-                        self.logger.info(f"MANOVA result type: {type(manova_result)}")
-                        self.logger.info(
-                            f"MANOVA result keys: {manova_result.keys() if isinstance(manova_result, dict) else 'Not a dict'}"
-                        )
-                        if isinstance(manova_result, dict) and "stat_dict" in manova_result:
-                            self.logger.info(f"MANOVA stat_dict keys: {manova_result['stat_dict'].keys()}")
-                    except Exception as e:
-                        self.logger.warning(f"MANOVA analysis failed: {e}")
-                        subordinate_failures.append(f"MANOVA ({e})")
-
-            elif analysis_type.upper() == "CVA":
-                result = self._run_cva(landmarks_data, params)
-            elif analysis_type.upper() == "MANOVA":
-                result = self._run_manova(landmarks_data, params)
-            else:
-                raise ValueError(f"Unknown analysis type: {analysis_type}")
-
-            self.analysis_progress.emit(75)
-
-            analysis = self._persist_analysis_results(
-                analysis_type=analysis_type,
-                analysis_name=analysis_name,
-                superimposition_method=superimposition_method,
-                cva_group_by=cva_group_by,
-                manova_group_by=manova_group_by,
-                result=result,
-                cva_result=cva_result,
-                manova_result=manova_result,
-                ds_ops=ds_ops,
+        Runs on the worker thread under :meth:`start_analysis`. ``progress`` is
+        checkpointed between every unit of work and raises
+        ``MdStatistics.AnalysisCancelledError`` once cancellation is requested.
+        """
+        analysis_type = job.analysis_type
+        progress.checkpoint("superimposition")
+        if not job.cached:
+            self._superimpose(
+                job.ds_ops, job.superimposition_method, job.cache_key, progress.callback("superimposition")
             )
+        landmarks_data = [obj.landmark_list for obj in job.ds_ops.object_list]
 
-            self.analysis_progress.emit(100)
-            self.analysis_completed.emit(analysis)
-            if subordinate_failures:
-                # PCA succeeded but a requested CVA/MANOVA did not — tell the user
-                # rather than reporting an unqualified success.
-                self.warning_occurred.emit(
-                    f"{analysis_type} completed, but the following requested "
-                    f"analyses failed and were not saved: {', '.join(subordinate_failures)}"
-                )
+        progress.checkpoint("pca")
+
+        # Run comprehensive analysis (PCA includes all three: PCA, CVA, MANOVA)
+        if analysis_type.upper() == "PCA":
+            pca_result = self._run_pca(landmarks_data, job.params)
+            job.result = pca_result  # Primary result for compatibility
+
+            progress.checkpoint("cva")
+            self.logger.info(f"CVA group_by parameter: {job.cva_group_by}")
+            if job.cva_group_by is not None:
+                try:
+                    self.logger.info("Running CVA analysis alongside PCA")
+
+                    group_values = self._extract_group_values(job.cva_group_by, job.ds_ops, job.objects_by_id, "CVA")
+                    cva_params = {"groups": group_values}
+                    job.cva_result = self._run_cva(landmarks_data, cva_params, progress.callback("cva"))
+                    self.logger.info("CVA analysis completed successfully")
+                except AnalysisCancelledError:
+                    raise
+                except Exception as e:
+                    self.logger.warning(f"CVA analysis failed: {e}")
+                    import traceback
+
+                    self.logger.warning(f"CVA error traceback: {traceback.format_exc()}")
+                    job.subordinate_failures.append(f"CVA ({e})")
             else:
-                self.info_message.emit(f"{analysis_type} analysis completed successfully")
+                self.logger.warning("CVA group_by is None - skipping CVA analysis")
 
-            return analysis
+            progress.checkpoint("manova")
+            if job.manova_group_by is not None:
+                try:
+                    self.logger.info("Running MANOVA analysis alongside PCA")
 
-        except Exception as e:
-            self.logger.error(f"Analysis failed: {e}")
-            self.analysis_failed.emit(str(e))
-            self.error_occurred.emit(f"Analysis failed: {str(e)}")
-            return None
+                    manova_group_values = self._extract_group_values(
+                        job.manova_group_by, job.ds_ops, job.objects_by_id, "MANOVA"
+                    )
+
+                    # MANOVA should use PCA scores, not raw landmarks
+                    # Pass the PCA result for proper eigenvalue-based component selection
+                    manova_params = {"groups": manova_group_values, "pca_result": pca_result}
+                    job.manova_result = self._run_manova(landmarks_data, manova_params, progress.callback("manova"))
+                    manova_result = job.manova_result
+                    self.logger.info("MANOVA analysis completed successfully")
+                    self.logger.info(f"MANOVA result type: {type(manova_result)}")
+                    self.logger.info(
+                        f"MANOVA result keys: {manova_result.keys() if isinstance(manova_result, dict) else 'Not a dict'}"
+                    )
+                    if isinstance(manova_result, dict) and "stat_dict" in manova_result:
+                        self.logger.info(f"MANOVA stat_dict keys: {manova_result['stat_dict'].keys()}")
+                except AnalysisCancelledError:
+                    raise
+                except Exception as e:
+                    self.logger.warning(f"MANOVA analysis failed: {e}")
+                    job.subordinate_failures.append(f"MANOVA ({e})")
+
+        elif analysis_type.upper() == "CVA":
+            job.result = self._run_cva(landmarks_data, job.params, progress.callback("cva"))
+        elif analysis_type.upper() == "MANOVA":
+            job.result = self._run_manova(landmarks_data, job.params, progress.callback("manova"))
+        else:
+            raise ValueError(f"Unknown analysis type: {analysis_type}")
+
+        progress.checkpoint("saving")
+
+    def _finish_analysis(self, job):
+        """Persist a computed ``job`` and announce it; main thread only."""
+        analysis = self._persist_analysis_results(
+            analysis_type=job.analysis_type,
+            analysis_name=job.analysis_name,
+            superimposition_method=job.superimposition_method,
+            cva_group_by=job.cva_group_by,
+            manova_group_by=job.manova_group_by,
+            result=job.result,
+            cva_result=job.cva_result,
+            manova_result=job.manova_result,
+            ds_ops=job.ds_ops,
+        )
+
+        self.analysis_progress.emit(100)
+        self.analysis_completed.emit(analysis)
+        if job.subordinate_failures:
+            # PCA succeeded but a requested CVA/MANOVA did not — tell the user
+            # rather than reporting an unqualified success.
+            self.warning_occurred.emit(
+                f"{job.analysis_type} completed, but the following requested "
+                f"analyses failed and were not saved: {', '.join(job.subordinate_failures)}"
+            )
+        else:
+            self.info_message.emit(f"{job.analysis_type} analysis completed successfully")
+
+        return analysis
 
+    def _fail_analysis(self, error_msg):
+        self.logger.error(f"Analysis failed: {error_msg}")
+        self.analysis_failed.emit(error_msg)
+        self.error_occurred.emit(f"Analysis failed: {error_msg}")
+
+    def _report_analysis_progress(self, stage, done, total, percent):
+        self.analysis_progress.emit(percent)
+        self.analysis_step.emit(stage, done, total)
+
+    def _on_analysis_worker_succeeded(self, job):
+        try:
+            self._finish_analysis(job)
+        except Exception as e:
+            self._fail_analysis(str(e))
         finally:
-            self._processing = False
+            self._end_analysis_worker()
+
+    def _on_analysis_worker_cancelled(self):
+        self._end_analysis_worker()
+        self.analysis_cancelled.emit()
+        self.info_message.emit("Analysis cancelled")
+
+    def _on_analysis_worker_failed(self, error_msg):
+        self._end_analysis_worker()
+        self._fail_analysis(error_msg)
+
+    def _end_analysis_worker(self):
+        if self._analysis_worker is not None:
+            # The worker's last act was the signal that led here; wait for its
+            # run() to return so the thread is never destroyed while running.
+            self._analysis_worker.wait()
+        self._analysis_worker = None
+        self._processing = False
 
     def _resolve_group_by_name(self, group_by, variablename_list, label):
         """Resolve a group-by given as a variable index (or already a name) to a name.
@@ -934,7 +1109,7 @@ class ModanController(QObject):
         return str(group_by)
 
     def _serialize_object_data(self, analysis, ds_ops):
-        """Store per-object info plus raw and superimposed landmarks as JSON."""
+        """Store per-object info (JSON) plus raw and superimposed landmarks (result arrays)."""
         object_info_list = []
         raw_landmark_list = []
         property_len = len(self.current_dataset.get_variablename_list()) or 0
@@ -949,56 +1124,57 @@ class ModanController(QObject):
                     "variable_list": obj.get_variable_list()[:property_len],
                 }
             )
-        analysis.raw_landmark_json = json.dumps(raw_landmark_list)
+        analysis.set_result("raw_landmark", raw_landmark_list)
         analysis.object_info_json = json.dumps(object_info_list)
         # Superimposed objects come from ds_ops, not the dataset rows.
-        analysis.superimposed_landmark_json = json.dumps([obj.landmark_list for obj in ds_ops.object_list])
+        analysis.set_result("superimposed_landmark", [obj.landmark_list for obj in ds_ops.object_list])
 
     def _serialize_pca_result(self, analysis, result):
-        """Store PCA scores, rotation matrix and eigenvalues as JSON."""
+        """Store PCA scores, rotation matrix and eigenvalues as result arrays."""
         self.logger.debug(f"PCA result keys: {list(result.keys())}")
         if "scores" in result:
             scores = result["scores"]
             scores_shape = f"{len(scores)}x{len(scores[0]) if scores and len(scores) > 0 else 0}"
             self.logger.debug(f"Saving PCA scores shape: {scores_shape}")
-            analysis.pca_analysis_result_json = json.dumps(scores)
+            analysis.set_result("pca_analysis_result", scores)
         if "rotation_matrix" in result:
-            analysis.pca_rotation_matrix_json = json.dumps(result["rotation_matrix"])
+            analysis.set_result("pca_rotation_matrix", result["rotation_matrix"])
         elif "eigenvectors" in result:
             # Fallback to eigenvectors if rotation_matrix not available
-            analysis.pca_rotation_matrix_json = json.dumps(result["eigenvectors"])
+            analysis.set_result("pca_rotation_matrix", result["eigenvectors"])
         if "eigenvalues" in result and "explained_variance_ratio" in result:
             ratios = result["explained_variance_ratio"]
-            analysis.pca_eigenvalues_json = json.dumps(
-                [[val, ratios[i] if i < len(ratios) else 0] for i, val in enumerate(result["eigenvalues"])]
+            analysis.set_result(
+                "pca_eigenvalues",
+                [[val, ratios[i] if i < len(ratios) else 0] for i, val in enumerate(result["eigenvalues"])],
             )
 
     def _serialize_cva_result(self, analysis, cva_result):
-        """Store CVA canonical variables / rotation matrix / eigenvalues as JSON."""
+        """Store CVA canonical variables / rotation matrix / eigenvalues as result arrays."""
         if not cva_result:
             self.logger.warning("CVA result not available for saving")
             return
         self.logger.debug(f"Saving CVA results: keys={list(cva_result.keys())}")
         # CVA uses 'canonical_variables' instead of 'scores'
         if "canonical_variables" in cva_result:
-            analysis.cva_analysis_result_json = json.dumps(cva_result["canonical_variables"])
+            analysis.set_result("cva_analysis_result", cva_result["canonical_variables"])
             self.logger.debug(f"CVA canonical variables saved: {len(cva_result['canonical_variables'])} objects")
         elif "scores" in cva_result:
-            analysis.cva_analysis_result_json = json.dumps(cva_result["scores"])
+            analysis.set_result("cva_analysis_result", cva_result["scores"])
             self.logger.debug(f"CVA scores saved: {len(cva_result['scores'])} objects")
 
         if "eigenvectors" in cva_result:
-            analysis.cva_rotation_matrix_json = json.dumps(cva_result["eigenvectors"])
+            analysis.set_result("cva_rotation_matrix", cva_result["eigenvectors"])
 
         if "eigenvalues" in cva_result:
             eigenvalues = cva_result["eigenvalues"]
             if isinstance(eigenvalues, list):
                 # Simple eigenvalues list — no variance ratio for CVA
-                analysis.cva_eigenvalues_json = json.dumps([[val, 0] for val in eigenvalues])
+                analysis.set_result("cva_eigenvalues", [[val, 0] for val in eigenvalues])
             elif isinstance(eigenvalues, dict) and "explained_variance_ratio" in cva_result:
                 ratios = cva_result["explained_variance_ratio"]
-                analysis.cva_eigenvalues_json = json.dumps(
-                    [[val, ratios[i] if i < len(ratios) else 0] for i, val in enumerate(eigenvalues)]
+                analysis.set_result(
+                    "cva_eigenvalues", [[val, ratios[i] if i < len(ratios) else 0] for i, val in enumerate(eigenvalues)]
                 )
 
     def _serialize_manova_result(self, analysis, manova_result):
@@ -1082,7 +1258,7 @@ class ModanController(QObject):
 
         return analysis
 
-    def _prepare_landmarks(self, superimposition_method="Procrustes"):
+    def _prepare_landmarks(self, superimposition_method="Procrustes", progress_callback=None):
         """Collect landmark-bearing objects, superimpose them, and return the
         superimposed dataset ops together with the superimposed landmark arrays.
 
@@ -1090,6 +1266,8 @@ class ModanController(QObject):
             superimposition_method: "Procrustes" (default) or "Bookstein".
                 "Resistant Fit" is rejected — the method does not converge and is
                 disabled in the UI. Anything else falls back to Procrustes.
+            progress_callback: Optional ``(done, total)`` passed to the
+                superimposition.
 
         Returns:
             (ds_ops, landmarks_data): the ``MdDatasetOps`` holding the
@@ -1099,62 +1277,89 @@ class ModanController(QObject):
             ValueError: if fewer than 2 objects have landmarks, if superimposition
                 fails, or if no landmark data results.
         """
-        # Get objects with landmarks
-        objects = list(self.current_dataset.object_list)
-        objects_with_landmarks = []
-        for obj in objects:
-            obj.unpack_landmark()
-            if obj.landmark_str and obj.landmark_list:
-                objects_with_landmarks.append(obj)
-
-        if len(objects_with_landmarks) < 2:
-            raise ValueError(
-                f"At least 2 objects with landmarks are required for analysis (found {len(objects_with_landmarks)} objects with landmarks out of {len(objects)} total objects)"
-            )
+        ds_ops, cache_key, cached = self._load_landmarks(superimposition_method)
+        if not cached:
+            self._superimpose(ds_ops, superimposition_method, cache_key, progress_callback)
+        return ds_ops, [obj.landmark_list for obj in ds_ops.object_list]
 
+    @staticmethod
+    def _method_label(superimposition_method):
         method = (superimposition_method or "Procrustes").strip().lower()
         method_labels = {"bookstein": "Bookstein", "resistant fit": "Resistant Fit"}
-        method_label = method_labels.get(method, "Procrustes")
-        self.logger.info(f"Found {len(objects_with_landmarks)} objects with landmarks before {method_label}")
+        return method, method_labels.get(method, "Procrustes")
+
+    def _load_landmarks(self, superimposition_method="Procrustes"):
+        """The database half of :meth:`_prepare_landmarks`.
+
+        Returns ``(ds_ops, cache_key, cached)``: the dataset ops, already
+        superimposed when ``cached`` is true, and the superimposition cache key
+        the result of :meth:`_superimpose` is to be stored under.
+        """
+        method, method_label = self._method_label(superimposition_method)
 
-        self.logger.info(f"Performing {method_label} superimposition")
         from MdModel import MdDatasetOps
 
-        # Diagnose the one failure mode the user can actually act on before
-        # falling back to the generic message.
-        mismatch = MdModel.find_landmark_count_mismatch(objects_with_landmarks)
-        if mismatch is not None:
-            raise ValueError(landmark_mismatch_message(*mismatch))
+        # Unchanged inputs since an earlier run: reuse its aligned coordinates
+        # instead of unpacking every object and superimposing again.
+        cache_key = self.current_dataset.superimposition_key(method)
+        ds_ops = MdDatasetOps.from_superimposition_cache(self.current_dataset, cache_key)
+        if ds_ops is not None:
+            self.logger.info(f"Using cached {method_label} superimposition ({len(ds_ops.object_list)} objects)")
+            return ds_ops, cache_key, True
+
+        # All objects' landmarks in one query, as one array. Objects whose
+        # counts differ have no such array -- the one failure mode the user can
+        # actually act on, so say which object and how to fix it.
+        try:
+            landmarks = self.current_dataset.get_landmark_matrix()
+        except MdModel.LandmarkCountMismatchError as e:
+            obj = MdModel.MdObject.get_by_id(e.object_id)
+            raise ValueError(landmark_mismatch_message(obj, e.expected, e.found)) from None
+
+        if len(landmarks) < 2:
+            raise ValueError(
+                f"At least 2 objects with landmarks are required for analysis (found {len(landmarks)} objects with landmarks out of {self.current_dataset.object_list.count()} total objects)"
+            )
+
+        self.logger.info(f"Found {len(landmarks)} objects with landmarks before {method_label}")
 
         # Bail out here rather than let an unimputable None reach the analysis
         # matrix, where it surfaces as an opaque float()/NoneType error.
-        unimputable = MdModel.find_unimputable_landmarks(objects_with_landmarks)
+        unimputable = landmarks.unimputable_landmarks()
         if unimputable:
             raise ValueError(unimputable_landmarks_message(unimputable))
 
-        ds_ops = MdDatasetOps(self.current_dataset)
+        return MdDatasetOps(self.current_dataset, landmarks=landmarks), cache_key, False
+
+    def _superimpose(self, ds_ops, superimposition_method, cache_key, progress_callback=None):
+        """The computational half of :meth:`_prepare_landmarks`.
+
+        Superimposes ``ds_ops`` in place and stores the result in the
+        superimposition cache under ``cache_key``. Reads nothing from the
+        database, so it can run on the analysis worker thread.
+        """
+        method, method_label = self._method_label(superimposition_method)
+        self.logger.info(f"Performing {method_label} superimposition")
+
         # Bookstein raises a ValueError with a specific reason (no baseline /
         # missing landmarks); Procrustes returns False on failure. Anything
         # unrecognized falls back to Procrustes.
         if method == "bookstein":
-            ds_ops.bookstein_superimposition()
+            ds_ops.bookstein_superimposition(progress_callback=progress_callback)
         elif method == "resistant fit":
             raise ValueError(
                 "Resistant Fit is disabled: its iteration does not converge on real datasets. "
                 "Use Procrustes or Bookstein."
             )
-        elif not ds_ops.procrustes_superimposition():
+        elif not ds_ops.procrustes_superimposition(progress_callback=progress_callback):
             raise ValueError("Procrustes superimposition failed")
 
         self.logger.info(f"{method_label} completed - now have {len(ds_ops.object_list)} objects")
 
-        # Extract landmarks from the superimposed objects
-        landmarks_data = [obj.landmark_list for obj in ds_ops.object_list]
-
-        if not landmarks_data:
+        if not ds_ops.object_list:
             raise ValueError("No objects with landmarks found")
 
-        return ds_ops, landmarks_data
+        ds_ops.store_in_superimposition_cache(self.current_dataset, cache_key)
 
     def _extract_group_values(self, group_by, ds_ops, objects_by_id, label):
         """Resolve per-object group values for a CVA/MANOVA run.
@@ -1223,12 +1428,13 @@ class ModanController(QObject):
         except Exception as e:
             raise ValueError(f"PCA analysis failed: {str(e)}") from e
 
-    def _run_cva(self, landmarks_data: list[list], params: dict[str, Any]) -> dict[str, Any]:
+    def _run_cva(self, landmarks_data: list[list], params: dict[str, Any], progress_callback=None) -> dict[str, Any]:
         """Run CVA analysis.
 
         Args:
             landmarks_data: List of landmark arrays
             params: CVA parameters
+            progress_callback: Optional ``(fold, n_folds)`` for the cross-validation
 
         Returns:
             CVA results dictionary
@@ -1245,7 +1451,9 @@ class ModanController(QObject):
                 raise ValueError("Group information is required for CVA")
 
             # Use existing CVA function
-            cva_result = MdStatistics.do_cva_analysis(landmarks_data, groups)
+            cva_result = MdStatistics.do_cva_analysis(
+                landmarks_data, groups, progress_callback, n_jobs=self.cross_validation_jobs
+            )
 
             # Anything the analysis needs the user to know reaches them here.
             # MdStatistics cannot show a message and must not try; it records
@@ -1274,15 +1482,18 @@ class ModanController(QObject):
                 "warning": cva_result["warning"],
             }
 
+        except AnalysisCancelledError:
+            raise
         except Exception as e:
             raise ValueError(f"CVA analysis failed: {str(e)}") from e
 
-    def _run_manova(self, landmarks_data: list[list], params: dict[str, Any]) -> dict[str, Any]:
+    def _run_manova(self, landmarks_data: list[list], params: dict[str, Any], progress_callback=None) -> dict[str, Any]:
         """Run MANOVA analysis.
 
         Args:
             landmarks_data: List of landmark arrays
             params: MANOVA parameters (including groups and pca_result)
+            progress_callback: Optional ``(step, n_steps)``
 
         Returns:
             MANOVA results dictionary
@@ -1321,7 +1532,7 @@ class ModanController(QObject):
                 )
 
                 # Use PCA-based MANOVA
-                manova_result = MdStatistics.do_manova_analysis_on_pca(manova_data, groups)
+                manova_result = MdStatistics.do_manova_analysis_on_pca(manova_data, groups, progress_callback)
 
             else:
                 # Fallback to Procrustes-aligned landmarks
@@ -1335,7 +1546,7 @@ class ModanController(QObject):
                         flat_coords.extend(landmark)
                     flattened_data.append(flat_coords)
 
-                manova_result = MdStatistics.do_manova_analysis_on_procrustes(flattened_data, groups)
+                manova_result = MdStatistics.do_manova_analysis_on_procrustes(flattened_data, groups, progress_callback)
 
             self.logger.info(
                 f"MANOVA returned: {type(manova_result)}, keys: {manova_result.keys() if isinstance(manova_result, dict) else 'N/A'}"
@@ -1370,6 +1581,8 @@ class ModanController(QObject):
             self.logger.info(f"Returning MANOVA result with stat_dict containing {len(stat_dict)} items")
             return final_result
 
+        except AnalysisCancelledError:
+            raise
         except Exception as e:
             raise ValueError(f"MANOVA analysis failed: {str(e)}") from e
 
@@ -22,8 +22,10 @@ from .widgets import (
     CustomDrag,
     DatasetOpsViewer,
     DragEventFilter,
+    MdDatasetTreeModel,
     MdDrag,
     MdLandmarkCountDelegate,
+    MdObjectTableModel,
     MdSequenceDelegate,
     MdTableModel,
     MdTableView,
@@ -49,8 +51,10 @@ __all__ = [
     "PicButton",
     "ResizableOverlayWidget",
     "ShapePreference",
+    "MdObjectTableModel",
     "MdTableModel",
     "MdTableView",
+    "MdDatasetTreeModel",
     "MdTreeView",
     # Formats
     "Morphologika",
@@ -3,14 +3,30 @@ File format handlers for Modan2.
 Contains classes for reading various landmark file formats.
 """
 
-from .morphologika import Morphologika
-from .nts import NTS
-from .tps import TPS
-from .x1y1 import X1Y1
+from .morphologika import Morphologika, MorphologikaStream
+from .nts import NTS, NTSStream
+from .specimen import Specimen, SpecimenStream
+from .tps import TPS, TPSStream
+from .x1y1 import X1Y1, X1Y1Stream
+
+# Streaming reader for each file type the import dialog offers.
+SPECIMEN_STREAMS = {
+    "TPS": TPSStream,
+    "NTS": NTSStream,
+    "X1Y1": X1Y1Stream,
+    "Morphologika": MorphologikaStream,
+}
 
 __all__ = [
+    "SPECIMEN_STREAMS",
     "Morphologika",
+    "MorphologikaStream",
     "NTS",
+    "NTSStream",
+    "Specimen",
+    "SpecimenStream",
     "TPS",
+    "TPSStream",
     "X1Y1",
+    "X1Y1Stream",
 ]
@@ -11,8 +11,22 @@ encoding, then latin-1 (which decodes any byte), so a mildly mis-encoded name
 degrades to replacement text instead of aborting the whole import.
 """
 
+import codecs
 import io
 import locale
+import os
+
+# Read size for the streaming helpers below.
+CHUNK_SIZE = 1 << 20
+
+
+def _candidate_encodings():
+    """UTF-8, then the platform preferred encoding, then latin-1, without repeats."""
+    tried = []
+    for enc in ("utf-8-sig", locale.getpreferredencoding(False), "latin-1"):
+        if enc and enc.lower() not in tried:
+            tried.append(enc.lower())
+            yield enc
 
 
 def open_text(path):
@@ -24,11 +38,7 @@ def open_text(path):
     """
     with open(path, "rb") as fh:
         raw = fh.read()
-    tried = []
-    for enc in ("utf-8-sig", locale.getpreferredencoding(False), "latin-1"):
-        if not enc or enc.lower() in tried:
-            continue
-        tried.append(enc.lower())
+    for enc in _candidate_encodings():
         try:
             return io.StringIO(raw.decode(enc))
         except (UnicodeDecodeError, LookupError):
@@ -36,3 +46,48 @@ def open_text(path):
     # latin-1 decodes any byte sequence, so a return above always fires; this is
     # only a defensive last resort.
     return io.StringIO(raw.decode("latin-1", errors="replace"))
+
+
+def detect_encoding(path):
+    """The encoding :func:`open_text` would pick, found without holding the file.
+
+    Each candidate is tried over the whole file chunk by chunk, so a file of
+    any size costs one read per rejected candidate and constant memory.
+    """
+    for enc in _candidate_encodings():
+        try:
+            decoder = codecs.getincrementaldecoder(enc)()
+        except LookupError:
+            continue
+        try:
+            with open(path, "rb") as fh:
+                for chunk in iter(lambda: fh.read(CHUNK_SIZE), b""):
+                    decoder.decode(chunk)
+            decoder.decode(b"", final=True)
+            return enc
+        except UnicodeDecodeError:
+            continue
+    return "latin-1"
+
+
+class TextLines:
+    """The lines of a landmark file, decoded one at a time.
+
+    The streaming counterpart of :func:`open_text`: iterating yields each line
+    as text, and ``bytes_read`` / ``size`` tell how far through the file that
+    is. Lines are split on the newline byte, which every candidate encoding
+    leaves ASCII. Each iteration reads the file from the start.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.encoding = detect_encoding(path)
+        self.size = os.path.getsize(path)
+        self.bytes_read = 0
+
+    def __iter__(self):
+        self.bytes_read = 0
+        with open(self.path, "rb") as fh:
+            for raw in fh:
+                self.bytes_read += len(raw)
+                yield raw.decode(self.encoding, errors="replace")
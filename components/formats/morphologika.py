@@ -33,10 +33,61 @@ import os
 import re
 
 from ._encoding import open_text
+from .specimen import Specimen, SpecimenStream, _pixels_per_mm
 
 logger = logging.getLogger(__name__)
 
 
+def _section_name(line):
+    """The lower-cased name of a ``[section]`` header line, None if malformed.
+
+    A "[" with no following word characters (e.g. a bare "[") is a malformed
+    section header; callers skip it rather than crashing on
+    re.search(...).group() of None.
+    """
+    section = re.search(r"(\w+)", line)
+    return section.group(0).lower() if section is not None else None
+
+
+def _parse_sections(data_lines, skip=()):
+    """Group the flat lines into their ``[section]`` buckets.
+
+    Returns ``(raw_data, object_count, landmark_count, dimension)``; counts
+    stay -1 when their section is absent. Sections named in ``skip`` are
+    recorded as present but their lines are not kept.
+    """
+    object_count = -1
+    landmark_count = -1
+    dimension = 2
+    dsl = ""
+    raw_data = {}
+    for line in data_lines:
+        line = line.strip()
+        if line == "" or line[0] == "'":  # blank or comment
+            continue
+        if line[0] == "[":
+            section = _section_name(line)
+            if section is None:
+                continue
+            dsl = section
+            raw_data[dsl] = []
+            continue
+        if dsl == "":
+            # Data before any [section] header is malformed; ignore it rather
+            # than raising KeyError on raw_data[""].
+            continue
+        if dsl in skip:
+            continue
+        raw_data[dsl].append(line)
+        if dsl == "individuals":
+            object_count = int(line)
+        elif dsl == "landmarks":
+            landmark_count = int(line)
+        elif dsl == "dimensions":
+            dimension = int(line)
+    return raw_data, object_count, landmark_count, dimension
+
+
 class Morphologika:
     def __init__(self, filename, datasetname, invertY=False):
         self.dirname = os.path.dirname(filename)
@@ -58,42 +109,8 @@ class Morphologika:
         self.read()
 
     def _parse_sections(self, data_lines):
-        """Group the flat lines into their ``[section]`` buckets.
-
-        Returns ``(raw_data, object_count, landmark_count, dimension)``; counts
-        stay -1 when their section is absent.
-        """
-        object_count = -1
-        landmark_count = -1
-        dimension = 2
-        dsl = ""
-        raw_data = {}
-        for line in data_lines:
-            line = line.strip()
-            if line == "" or line[0] == "'":  # blank or comment
-                continue
-            if line[0] == "[":
-                # A "[" with no following word characters (e.g. a bare "[") is a
-                # malformed section header; skip it rather than crashing on
-                # re.search(...).group() of None.
-                section = re.search(r"(\w+)", line)
-                if section is None:
-                    continue
-                dsl = section.group(0).lower()
-                raw_data[dsl] = []
-                continue
-            if dsl == "":
-                # Data before any [section] header is malformed; ignore it rather
-                # than raising KeyError on raw_data[""].
-                continue
-            raw_data[dsl].append(line)
-            if dsl == "individuals":
-                object_count = int(line)
-            elif dsl == "landmarks":
-                landmark_count = int(line)
-            elif dsl == "dimensions":
-                dimension = int(line)
-        return raw_data, object_count, landmark_count, dimension
+        """Group the flat lines into their ``[section]`` buckets (see :func:`_parse_sections`)."""
+        return _parse_sections(data_lines)
 
     def _apply_optional_sections(self):
         """Populate the optional lists (labels, wireframe, images, ...) from the
@@ -163,3 +180,72 @@ class Morphologika:
 
         self._apply_optional_sections()
         return None
+
+
+class MorphologikaStream(SpecimenStream):
+    """A Morphologika file read one specimen at a time (see ``SpecimenStream``).
+
+    The points of all specimens are one ``[rawpoints]`` section, apart from
+    their names and labels, so the file is read twice: once for every other
+    section, kept, and once to yield the points ``nlandmarks`` rows at a time.
+    """
+
+    def _read(self, lines):
+        raw_data, object_count, landmark_count, dimension = _parse_sections(lines, skip=("rawpoints",))
+        if object_count < 0 or landmark_count < 0:
+            return
+        missing = [s for s in ("names", "rawpoints") if s not in raw_data]
+        if missing:
+            raise ValueError(f"Malformed Morphologika file: missing required section(s) {missing}: {self.filename}")
+
+        self.dimension = dimension
+        self.nlandmarks = landmark_count
+        self.nobjects = object_count
+        self.variablename_list = [name for line in raw_data.get("labels", []) for name in re.split(r"\s+", line)]
+        self.edge_list = sorted(
+            sorted(int(v) for v in re.split(r"\s+", line)) for line in raw_data.get("wireframe", [])
+        )
+        self.polygon_list = sorted(
+            sorted(int(v) for v in re.split(r"\s+", line)) for line in raw_data.get("polygons", [])
+        )
+        names = raw_data["names"]
+        labels = [re.split(r"\s+", line) for line in raw_data.get("labelvalues", [])]
+        images = raw_data.get("images", [])
+        ppmm = raw_data.get("pixelspermm", [])
+
+        if landmark_count == 0:
+            for index, name in enumerate(names):
+                yield self._specimen(name, [], labels, images, ppmm, index)
+            return
+
+        index = 0
+        points = []
+        in_rawpoints = False
+        for line in lines:
+            line = line.strip()
+            if line == "" or line[0] == "'":
+                continue
+            if line[0] == "[":
+                section = _section_name(line)
+                if section is not None:
+                    in_rawpoints = section == "rawpoints"
+                continue
+            if not in_rawpoints:
+                continue
+            points.append(re.split(r"\s+", line)[:dimension])
+            if len(points) < landmark_count:
+                continue
+            if index >= len(names):
+                break
+            yield self._specimen(names[index], points, labels, images, ppmm, index)
+            index += 1
+            points = []
+
+    def _specimen(self, name, points, labels, images, ppmm, index):
+        return Specimen(
+            name,
+            self._coordinates(name, points),
+            image=images[index] if index < len(images) else None,
+            pixels_per_mm=_pixels_per_mm(ppmm[index] if index < len(ppmm) else None),
+            variables=labels[index] if index < len(labels) else None,
+        )
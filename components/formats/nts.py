@@ -32,34 +32,25 @@ if GLUT_AVAILABLE and glut:
 import re
 
 from ._encoding import open_text
+from .specimen import Specimen, SpecimenStream
 
 logger = logging.getLogger(__name__)
 
 
-class NTS:
-    def __init__(self, filename, datasetname, invertY=False):
-        self.filename = filename
+class _NTSParser:
+    """The NTS line loop, shared by the ``NTS`` reader and ``NTSStream``.
+
+    :meth:`rows` yields each data row as it is read; what the header says
+    (``dimension``, ``total_object_count``, ``landmark_count``) and the quoted
+    comment lines are kept on the parser.
+    """
+
+    def __init__(self, datasetname):
         self.datasetname = datasetname
         self.dimension = 0
-        self.nobjects = 0
-        self.object_name_list = []
-        self.landmark_str_list = []
-        self.edge_list = []
-        self.polygon_list = []
-        self.variablename_list = []
-        self.property_list_list = []
-        self.object_comment = {}
-        self.landmark_data = {}
-        self.object_images = {}
-        self.invertY = invertY
-        self.read()
-
-    def isNumber(self, s):
-        try:
-            float(s)
-            return True
-        except ValueError:
-            return False
+        self.total_object_count = -1
+        self.landmark_count = 0
+        self.comments = ""
 
     def _parse_header(self, headerline):
         """Parse the NTS header line.
@@ -98,27 +89,20 @@ class NTS:
             return row_names_list[index]
         return f"{self.datasetname}_{index + 1}"
 
-    def read(self):
-        with open_text(self.filename) as f:
-            nts_lines = f.readlines()
-
-        dataset = {}
-        total_object_count = -1
-        landmark_count = 0
-        objects = {}
-        object_name_list = []
+    def rows(self, lines):
+        """Yield ``(row_name, points)`` for each data row."""
+        row_count = 0
         row_names_list = []
-        comments = ""
         layout = None  # set once the header line is seen
         row_names_read = False
         column_names_read = False
 
-        for line in nts_lines:
+        for line in lines:
             line = line.strip()
             if line == "":
                 continue
             if line.startswith(('"', "'")):
-                comments += line
+                self.comments += line
                 continue
 
             #                          1    2     3   4    5     6    7   8    9    10   11   12   13    14
@@ -126,12 +110,12 @@ class NTS:
                 r"^(\d+)(\s+)(\d+)(\w*)(\s+)(\d+)(\w*)(\s+)(\d+)(\s+)(\d*)(\s*)(\w+)=(\d+)(.*)", line
             )
             if headerline is not None:
-                total_object_count, variable_count, layout = self._parse_header(headerline)
+                self.total_object_count, variable_count, layout = self._parse_header(headerline)
                 # Landmarks per object. This used a stale local `dimension` that
                 # was never updated (only self.dimension was), so the condition
                 # was always false and nlandmarks stayed 0 for every NTS file.
                 if variable_count > 0 and self.dimension > 0:
-                    landmark_count = int(variable_count / self.dimension)
+                    self.landmark_count = int(variable_count / self.dimension)
                 continue
 
             if layout is None:
@@ -147,19 +131,59 @@ class NTS:
                 continue
 
             data_list = re.split(r"\s+", line)
-            row_name = self._row_name(data_list, layout, row_names_list, len(object_name_list))
+            row_name = self._row_name(data_list, layout, row_names_list, row_count)
             coords = [float(x) for x in data_list]
-            objects[row_name] = [coords[i : i + self.dimension] for i in range(0, len(coords), self.dimension)]
+            row_count += 1
+            yield row_name, [coords[i : i + self.dimension] for i in range(0, len(coords), self.dimension)]
+
+
+class NTS:
+    def __init__(self, filename, datasetname, invertY=False):
+        self.filename = filename
+        self.datasetname = datasetname
+        self.dimension = 0
+        self.nobjects = 0
+        self.object_name_list = []
+        self.landmark_str_list = []
+        self.edge_list = []
+        self.polygon_list = []
+        self.variablename_list = []
+        self.property_list_list = []
+        self.object_comment = {}
+        self.landmark_data = {}
+        self.object_images = {}
+        self.invertY = invertY
+        self.read()
+
+    def isNumber(self, s):
+        try:
+            float(s)
+            return True
+        except ValueError:
+            return False
+
+    def read(self):
+        with open_text(self.filename) as f:
+            nts_lines = f.readlines()
+
+        dataset = {}
+        objects = {}
+        object_name_list = []
+        parser = _NTSParser(self.datasetname)
+
+        for row_name, points in parser.rows(nts_lines):
+            objects[row_name] = points
             object_name_list.append(row_name)
+        self.dimension = parser.dimension
 
-        if total_object_count == 0 and landmark_count == 0:
+        if parser.total_object_count == 0 and parser.landmark_count == 0:
             return None
 
         self.nobjects = len(object_name_list)
-        self.nlandmarks = landmark_count
+        self.nlandmarks = parser.landmark_count
         self.landmark_data = objects
         self.object_name_list = object_name_list
-        self.description = comments
+        self.description = parser.comments
 
         if self.dimension == 2 and self.invertY:
             for coords in objects.values():
@@ -167,3 +191,16 @@ class NTS:
                     point[1] = -1 * point[1]
 
         return dataset
+
+
+class NTSStream(SpecimenStream):
+    """An NTS file read one specimen at a time (see ``SpecimenStream``)."""
+
+    def _read(self, lines):
+        parser = _NTSParser(self.datasetname)
+        for row_name, points in parser.rows(lines):
+            self.dimension = parser.dimension
+            self.nlandmarks = parser.landmark_count
+            if self.nobjects is None and parser.total_object_count >= 0:
+                self.nobjects = parser.total_object_count
+            yield Specimen(row_name, self._coordinates(row_name, points))
@@ -0,0 +1,160 @@
+"""Reading landmark files one specimen at a time.
+
+The reader classes (``TPS``, ``NTS``, ``X1Y1``, ``Morphologika``) parse a whole
+file into lists and dicts keyed by object name before anything is stored, so a
+large export sits in memory several times over: the raw bytes, the decoded
+text, its lines, and the parsed coordinates. Each format also has a
+``SpecimenStream`` subclass that runs the same parser over the file line by
+line and yields one :class:`Specimen` at a time, holding no more than the
+specimen being read.
+"""
+
+import abc
+import os
+
+import numpy as np
+
+from MdUtils import MISSING_SENTINEL, is_numeric
+
+from ._encoding import TextLines
+
+
+class Specimen:
+    """One object read from a landmark file.
+
+    ``landmarks`` is an ``(n, dimension)`` float array, NaN where a coordinate
+    is missing; ``curves`` is a list of such arrays (TPS ``CURVES=`` traces).
+    The other fields are None when the file does not give them.
+    """
+
+    def __init__(self, name, landmarks, curves=None, comment=None, image=None, pixels_per_mm=None, variables=None):
+        self.name = name
+        self.landmarks = landmarks
+        self.curves = curves or []
+        self.comment = comment
+        self.image = image
+        self.pixels_per_mm = pixels_per_mm
+        self.variables = variables
+
+
+class SpecimenStream(abc.ABC):
+    """Base class of the streaming readers; a subclass implements :meth:`_read`.
+
+    Carries what the legacy readers expose about the dataset as a whole
+    (``dimension``, ``nlandmarks``, ``variablename_list``, ``edge_list``,
+    ``polygon_list``, ``dirname``), filled in as far as the file has been read:
+    a TPS file states nothing up front, so its ``dimension`` is known once the
+    first specimen has been yielded. ``nobjects`` is None until the file
+    states it or :meth:`survey` has counted.
+
+    Iterating reads the file from the start and yields :class:`Specimen`
+    objects; ``bytes_read`` / ``size`` report how far it has got. With
+    ``missing_sentinel`` set, ``-999`` coordinates come out as NaN (missing).
+    """
+
+    def __init__(self, filename, datasetname, invertY=False):
+        self.filename = filename
+        self.dirname = os.path.dirname(filename)
+        self.datasetname = datasetname
+        self.invertY = invertY
+        self.dimension = 0
+        self.nlandmarks = 0
+        self.nobjects = None
+        self.variablename_list = []
+        self.edge_list = []
+        self.polygon_list = []
+        self.missing_sentinel = False
+        self.sentinel_count = 0
+        self._lines = TextLines(filename)
+
+    @property
+    def bytes_read(self):
+        return self._lines.bytes_read
+
+    @property
+    def size(self):
+        return self._lines.size
+
+    def __iter__(self):
+        for specimen in self._read(self._lines):
+            if self.missing_sentinel:
+                specimen.landmarks[self._sentinel_mask(specimen.landmarks)] = np.nan
+            yield specimen
+
+    @abc.abstractmethod
+    def _read(self, lines):
+        """Yield the specimens parsed from ``lines``; implemented per format."""
+
+    def survey(self):
+        """Read the file through once to count specimens and sentinel coordinates.
+
+        Fills in ``nobjects``, ``sentinel_count`` and whatever the file header
+        gives, without keeping any specimen. Returns the stream.
+        """
+        count = 0
+        sentinels = 0
+        for specimen in self._read(self._lines):
+            count += 1
+            sentinels += int(self._sentinel_mask(specimen.landmarks).sum())
+        self.nobjects = count
+        self.sentinel_count = sentinels
+        return self
+
+    def _sentinel_mask(self, landmarks):
+        """Where ``landmarks`` holds the missing-landmark sentinel.
+
+        The readers negate Y before this runs, so in an inverted 2D file a
+        sentinel in the Y column reads as ``+999``.
+        """
+        target = np.full(landmarks.shape[1], MISSING_SENTINEL)
+        if self.invertY and self.dimension == 2 and landmarks.shape[1] > 1:
+            target[1] = -MISSING_SENTINEL
+        return landmarks == target
+
+    def _coordinates(self, name, rows):
+        """``rows`` of coordinates as an ``(n, dimension)`` float array."""
+        try:
+            array = np.array(rows, dtype=float)
+        except ValueError as e:
+            raise ValueError(f"Cannot read the coordinates of specimen {name!r}: {e}") from e
+        if array.ndim != 2:
+            array = array.reshape(0, self.dimension)
+        if self.invertY and self.dimension == 2:
+            array[:, 1] *= -1
+        return array
+
+
+def reader_specimens(reader):
+    """The specimens of a whole-file reader, in the form a stream yields them.
+
+    ``reader`` is a parsed ``TPS``/``NTS``/``X1Y1``/``Morphologika`` (or any
+    object with their attributes); missing landmarks may be None.
+    """
+    dimension = reader.dimension
+    variables = reader.property_list_list if reader.variablename_list else []
+    ppmm_list = getattr(reader, "ppmm_list", [])
+    curve_data = getattr(reader, "curve_data", {}) or {}
+    for index, name in enumerate(reader.object_name_list[: reader.nobjects]):
+        pixels_per_mm = ppmm_list[index] if index < len(ppmm_list) else None
+        yield Specimen(
+            name,
+            _reader_array(name, reader.landmark_data[name], dimension),
+            curves=[_reader_array(name, curve, dimension) for curve in curve_data.get(name, [])],
+            comment=reader.object_comment.get(name),
+            image=reader.object_images.get(name),
+            pixels_per_mm=_pixels_per_mm(pixels_per_mm),
+            variables=variables[index] if index < len(variables) else None,
+        )
+
+
+def _pixels_per_mm(value):
+    """A scale as given in a file, None when absent or not a number."""
+    return float(value) if value is not None and is_numeric(value) else None
+
+
+def _reader_array(name, rows, dimension):
+    try:
+        array = np.array(rows, dtype=float)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Cannot read the coordinates of specimen {name!r}: {e}") from e
+    return array if array.ndim == 2 else array.reshape(0, dimension)
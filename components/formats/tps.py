@@ -33,10 +33,15 @@ import os
 import re
 
 from ._encoding import open_text
+from .specimen import Specimen, SpecimenStream
 
 logger = logging.getLogger(__name__)
 
 
+_HEADER_LINE = re.compile(r"^\s*LM\s*=\s*(\d+)\s*(.*)", re.IGNORECASE)
+_KEYWORD_LINE = re.compile(r"^\s*(\w+)\s*=(.+)")
+
+
 class _TPSObjectState:
     """Accumulation state for the TPS object currently being read.
 
@@ -61,58 +66,36 @@ class _TPSObjectState:
         self.reading_curves = False
 
 
-class TPS:
-    def __init__(self, filename, datasetname, invertY=False):
-        #
-        self.dirname = os.path.dirname(filename)
-        self.filename = filename
-        self.datasetname = datasetname
-        self.dimension = 0
-        self.nobjects = 0
-        self.object_name_list = []
-        self.landmark_str_list = []
-        self.edge_list = []
-        self.polygon_list = []
-        self.variablename_list = []
-        self.property_list_list = []
-        self.object_comment = {}
-        self.landmark_data = {}
-        # Per-object semi-landmark curves parsed from CURVES=/POINTS= blocks:
-        # object key -> list of curves, each a list of [x, y(, z)] points. Empty
-        # for the common landmark-only TPS file.
-        self.curve_data = {}
-        self.invertY = invertY
-        self.read()
+def _object_key(state, object_count, datasetname):
+    """The name and comment of a finished object.
 
-    def isNumber(self, s):
-        try:
-            float(s)
-            return True
-        except ValueError:
-            return False
+    The ``ID=`` value names the object; failing that the text after ``LM=``,
+    which then is not repeated in the comment; failing that a generated name.
+    """
+    comment_1 = state.comment_1
+    if state.object_id != "":
+        key = state.object_id
+    elif comment_1 != "":
+        key = comment_1
+        comment_1 = ""  # used as the name; don't repeat it in the comment
+    else:
+        key = datasetname + "_" + str(object_count + 1)
+    return key, " ".join([comment_1, state.comment_2]).strip()
 
-    def _store_object(self, state, object_count):
-        """Store the accumulated object into the result collections.
 
-        Extracted so the two flush points -- on a new ``LM=`` header and at
-        end-of-file -- share one implementation instead of duplicating the
-        key-selection + storage logic.
-        """
-        comment_1 = state.comment_1
-        if state.object_id != "":
-            key = state.object_id
-        elif comment_1 != "":
-            key = comment_1
-            comment_1 = ""  # used as the name; don't repeat it in the comment
-        else:
-            key = self.datasetname + "_" + str(object_count + 1)
-        self.landmark_data[key] = state.data
-        self.object_name_list.append(key)
-        self.object_comment[key] = " ".join([comment_1, state.comment_2]).strip()
-        if state.image_path != "":
-            self.object_images[key] = state.image_path
-        if state.curves:
-            self.curve_data[key] = state.curves
+class _TPSParser:
+    """The TPS line loop, shared by the ``TPS`` reader and ``TPSStream``.
+
+    :meth:`objects` yields each finished object as it is read. The counts of 2D
+    and 3D coordinate lines and the latest ``LM=`` value are kept on the parser,
+    for the dimension and landmark count the callers decide on.
+    """
+
+    def __init__(self):
+        self.object_count = 0
+        self.landmark_count = 0
+        self.threed = 0
+        self.twod = 0
 
     @staticmethod
     def _apply_keyword(state, key, value):
@@ -146,60 +129,120 @@ class TPS:
         elif len(point) > 1:
             state.data.append(point)
 
-    def read(self):
-        with open_text(self.filename) as f:
-            tps_lines = f.readlines()
+    def _read_coordinates(self, state, line):
+        point = [float(x) for x in line.split()]
+        if len(point) > 2:
+            self.threed += 1
+        else:
+            self.twod += 1
+        self._apply_coordinates(state, point)
 
-        dataset = {}
-        object_count = 0
-        landmark_count = 0
-        threed = 0
-        twod = 0
-        self.landmark_data = {}
-        self.object_name_list = []
-        self.object_comment = {}
-        self.object_images = {}
-        self.curve_data = {}
+    def objects(self, lines):
+        """Yield ``(state, object_count)`` for each object with landmarks.
+
+        A fresh state is started after each one, so a caller may keep it.
+        """
         currently_in_data_section = False
         state = _TPSObjectState()
 
-        for line in tps_lines:
+        for line in lines:
             line = line.strip()
             if line == "" or line.startswith(("#", '"', "'")):
                 continue
 
-            headerline = re.search(r"^\s*LM\s*=\s*(\d+)\s*(.*)", line, re.IGNORECASE)
+            # Most lines are coordinates; only a line with "=" can be a header
+            # or a keyword, so the others skip the patterns.
+            if "=" not in line:
+                self._read_coordinates(state, line)
+                continue
+
+            headerline = _HEADER_LINE.search(line)
             if headerline is not None:
                 if currently_in_data_section:
                     if len(state.data) > 0:
-                        self._store_object(state, object_count)
-                        state.reset()
-                    object_count += 1
+                        yield state, self.object_count
+                        state = _TPSObjectState()
+                    self.object_count += 1
                 currently_in_data_section = True
-                landmark_count = int(headerline.group(1))
+                self.landmark_count = int(headerline.group(1))
                 state.comment_1 = headerline.group(2).strip()
                 continue
 
-            dataline = re.search(r"^\s*(\w+)\s*=(.+)", line)
+            dataline = _KEYWORD_LINE.search(line)
             if dataline is None:
-                point = [float(x) for x in re.split(r"\s+", line)]
-                if len(point) > 2 and self.isNumber(point[2]):
-                    threed += 1
-                else:
-                    twod += 1
-                self._apply_coordinates(state, point)
+                self._read_coordinates(state, line)
             else:
                 self._apply_keyword(state, dataline.group(1), dataline.group(2))
 
         # An empty / non-TPS file (no LM header, no landmarks): discard before
         # storing anything, matching the pre-refactor behavior.
-        if object_count == 0 and landmark_count == 0:
-            return None
+        if self.object_count == 0 and self.landmark_count == 0:
+            return
 
         if len(state.data) > 0:
+            yield state, self.object_count
+
+
+class TPS:
+    def __init__(self, filename, datasetname, invertY=False):
+        #
+        self.dirname = os.path.dirname(filename)
+        self.filename = filename
+        self.datasetname = datasetname
+        self.dimension = 0
+        self.nobjects = 0
+        self.object_name_list = []
+        self.landmark_str_list = []
+        self.edge_list = []
+        self.polygon_list = []
+        self.variablename_list = []
+        self.property_list_list = []
+        self.object_comment = {}
+        self.landmark_data = {}
+        # Per-object semi-landmark curves parsed from CURVES=/POINTS= blocks:
+        # object key -> list of curves, each a list of [x, y(, z)] points. Empty
+        # for the common landmark-only TPS file.
+        self.curve_data = {}
+        self.invertY = invertY
+        self.read()
+
+    def isNumber(self, s):
+        try:
+            float(s)
+            return True
+        except ValueError:
+            return False
+
+    def _store_object(self, state, object_count):
+        """Store the accumulated object into the result collections."""
+        key, comment = _object_key(state, object_count, self.datasetname)
+        self.landmark_data[key] = state.data
+        self.object_name_list.append(key)
+        self.object_comment[key] = comment
+        if state.image_path != "":
+            self.object_images[key] = state.image_path
+        if state.curves:
+            self.curve_data[key] = state.curves
+
+    def read(self):
+        with open_text(self.filename) as f:
+            tps_lines = f.readlines()
+
+        dataset = {}
+        self.landmark_data = {}
+        self.object_name_list = []
+        self.object_comment = {}
+        self.object_images = {}
+        self.curve_data = {}
+        parser = _TPSParser()
+
+        for state, object_count in parser.objects(tps_lines):
             self._store_object(state, object_count)
 
-        self.dimension = 3 if threed > twod else 2
+        if parser.object_count == 0 and parser.landmark_count == 0:
+            return None
+
+        self.dimension = 3 if parser.threed > parser.twod else 2
 
         if self.dimension == 2 and self.invertY:
             for coords in self.landmark_data.values():
@@ -210,5 +253,29 @@ class TPS:
                     point[1] = -1 * point[1]
 
         self.nobjects = len(self.object_name_list)
-        self.nlandmarks = landmark_count
+        self.nlandmarks = parser.landmark_count
         return dataset
+
+
+class TPSStream(SpecimenStream):
+    """A TPS file read one specimen at a time (see ``SpecimenStream``).
+
+    The dimension is decided on the first specimen, where the ``TPS`` reader
+    decides it over the whole file; ``nlandmarks`` is the ``LM=`` count of the
+    specimen last yielded.
+    """
+
+    def _read(self, lines):
+        parser = _TPSParser()
+        for state, object_count in parser.objects(lines):
+            if not self.dimension:
+                self.dimension = 3 if parser.threed > parser.twod else 2
+            self.nlandmarks = parser.landmark_count
+            name, comment = _object_key(state, object_count, self.datasetname)
+            yield Specimen(
+                name,
+                self._coordinates(name, state.data),
+                curves=[self._coordinates(name, curve) for curve in state.curves],
+                comment=comment,
+                image=state.image_path or None,
+            )
@@ -32,10 +32,74 @@ if GLUT_AVAILABLE and glut:
 import os
 
 from ._encoding import open_text
+from .specimen import Specimen, SpecimenStream
 
 logger = logging.getLogger(__name__)
 
 
+class _X1Y1Parser:
+    """The X1Y1 line loop, shared by the ``X1Y1`` reader and ``X1Y1Stream``.
+
+    The first line is the header; it sets ``dimension`` and ``landmark_count``
+    before :meth:`rows` yields the first data row.
+    """
+
+    def __init__(self, filename, y_flip=1.0):
+        self.filename = filename
+        self.y_flip = y_flip
+        self.dimension = 0
+        self.landmark_count = 0
+
+    def _parse_header(self, line):
+        header = line.strip().split("\t")
+        xyz_header_list = header[1:]
+        if len(xyz_header_list) < 3:
+            raise ValueError(
+                f"Malformed X1Y1 header (need a name column plus at least 3 coordinate columns): {self.filename}"
+            )
+        if xyz_header_list[2].lower()[0] == "x":
+            self.dimension = 2
+        else:
+            self.dimension = 3
+        # Landmarks per object = coordinate columns / dimension. The result
+        # used to be computed and discarded, so nlandmarks stayed 0 for every
+        # X1Y1 file (the same latent bug that was fixed in nts.py).
+        self.landmark_count = int(len(xyz_header_list) / self.dimension)
+
+    def rows(self, lines):
+        """Yield ``(object_name, points)`` for each data row."""
+        lines = iter(lines)
+        first = next(lines, None)
+        if first is None:
+            raise ValueError(f"Empty or unreadable X1Y1 file: {self.filename}")
+        self._parse_header(first)
+
+        for line in lines:
+            line = line.strip()
+            if line == "":
+                continue
+            if line.startswith("#"):
+                continue
+            if line.startswith(('"', "'")):
+                continue
+
+            fields_list = line.split("\t")
+            object_name = fields_list[0]
+            landmark_list = fields_list[1:]
+            data = []
+            if self.dimension == 2:
+                data = [
+                    [float(landmark_list[idx]), self.y_flip * float(landmark_list[idx + 1])]
+                    for idx in range(0, len(landmark_list), 2)
+                ]
+            elif self.dimension == 3:
+                data = [
+                    [float(landmark_list[idx]), float(landmark_list[idx + 1]), float(landmark_list[idx + 2])]
+                    for idx in range(0, len(landmark_list), 3)
+                ]
+            yield object_name, data
+
+
 class X1Y1:
     def __init__(self, filename, datasetname, invertY=False):
         #
@@ -66,64 +130,29 @@ class X1Y1:
     def read(self):
         with open_text(self.filename) as f:
             lines = f.readlines()
-            dataset = {}
-            landmark_count = 0
-            data = []
-            object_name_list = []
-            objects = {}
-            header = ""
-            y_flip = 1.0
-            if self.invertY:
-                y_flip = -1.0
-
-            if not lines:
-                raise ValueError(f"Empty or unreadable X1Y1 file: {self.filename}")
-            header = lines[0].strip().split("\t")
-            xyz_header_list = header[1:]
-            if len(xyz_header_list) < 3:
-                raise ValueError(
-                    f"Malformed X1Y1 header (need a name column plus at least 3 coordinate columns): {self.filename}"
-                )
-            if xyz_header_list[2].lower()[0] == "x":
-                self.dimension = 2
-            else:
-                self.dimension = 3
-            # Landmarks per object = coordinate columns / dimension. The result
-            # used to be computed and discarded, so nlandmarks stayed 0 for every
-            # X1Y1 file (the same latent bug that was fixed in nts.py).
-            landmark_count = int(len(xyz_header_list) / self.dimension)
-            lines = lines[1:]
-
-            for line in lines:
-                line = line.strip()
-                if line == "":
-                    continue
-                if line.startswith("#"):
-                    continue
-                if line.startswith(('"', "'")):
-                    continue
-
-                data = []
-                fields_list = line.split("\t")
-                object_name = fields_list[0]
-                object_name_list.append(object_name)
-                landmark_list = fields_list[1:]
-                if len(landmark_list) > 0:
-                    if self.dimension == 2:
-                        for idx in range(0, len(landmark_list), 2):
-                            data.append([float(landmark_list[idx]), y_flip * float(landmark_list[idx + 1])])
-                    elif self.dimension == 3:
-                        for idx in range(0, len(landmark_list), 3):
-                            data.append(
-                                [
-                                    float(landmark_list[idx]),
-                                    float(landmark_list[idx + 1]),
-                                    float(landmark_list[idx + 2]),
-                                ]
-                            )
-                objects[object_name] = data
-            self.nobjects = len(object_name_list)
-            self.nlandmarks = landmark_count
-            self.landmark_data = objects
-            self.object_name_list = object_name_list
-            return dataset
+        dataset = {}
+        object_name_list = []
+        objects = {}
+        parser = _X1Y1Parser(self.filename, -1.0 if self.invertY else 1.0)
+
+        for object_name, data in parser.rows(lines):
+            object_name_list.append(object_name)
+            objects[object_name] = data
+        self.dimension = parser.dimension
+        self.nobjects = len(object_name_list)
+        self.nlandmarks = parser.landmark_count
+        self.landmark_data = objects
+        self.object_name_list = object_name_list
+        return dataset
+
+
+class X1Y1Stream(SpecimenStream):
+    """An X1Y1 file read one specimen at a time (see ``SpecimenStream``)."""
+
+    def _read(self, lines):
+        # Y is flipped by _coordinates, so not by the parser as well.
+        parser = _X1Y1Parser(self.filename)
+        for object_name, data in parser.rows(lines):
+            self.dimension = parser.dimension
+            self.nlandmarks = parser.landmark_count
+            yield Specimen(object_name, self._coordinates(object_name, data))
@@ -8,6 +8,7 @@ import sys
 
 from PyQt5.QtCore import (
     QPointF,
+    QRectF,
     Qt,
 )
 from PyQt5.QtGui import (
@@ -19,13 +20,13 @@ from PyQt5.QtGui import (
     QPainter,
     QPen,
     QPixmap,
+    QPolygonF,
     QWheelEvent,
 )
 from PyQt5.QtWidgets import (
     QApplication,
     QLabel,
 )
-from scipy.spatial.distance import cdist
 
 from MdModel import MdDataset, MdDatasetOps, MdObject, MdObjectOps
 
@@ -59,22 +60,30 @@ from pathlib import Path
 import numpy as np
 
 import MdLiveWire
+import MdLiveWireStore
+import MdThinPlateSpline
 import MdUtils as mu
 
+from .tile_pyramid import TilePyramid
+
 logger = logging.getLogger(__name__)
 
 import contextlib
 
 from MdConstants import BASE_LANDMARK_RADIUS, COLOR, DATASET_MODE, DISTANCE_THRESHOLD, MODE, OBJECT_MODE
 
-# Cap on the scaled render pixmap's longer side. adjust_scale allocates a
-# pixmap proportional to the zoom scale, and the scale itself grows
-# near-exponentially under repeated zoom-in (scale += floor(scale) * ratio), so
-# without a cap a burst of wheel events could request a multi-GB allocation and
-# take the process down (kernel OOM — devlog 220). 8192 px on the longer side
-# (~256 MB RGBA worst case) is far beyond any useful landmarking zoom.
+# Cap on the displayed image's longer side, i.e. on the zoom. The scale grows
+# near-exponentially under repeated zoom-in (scale += floor(scale) * ratio).
+# Rendering used to allocate a pixmap of the displayed size, which a burst of
+# wheel events could push to a multi-GB allocation and a kernel OOM (devlog
+# 220); it now draws only the visible tiles, but 8192 px on the longer side
+# is still far beyond any useful landmarking zoom.
 MAX_SCALED_PIXMAP_DIM = 8192
 
+# Default density of the TPS deformation grid drawn between two shapes: lines
+# along each axis, each drawn through as many points.
+TPS_GRID_LINES = 20
+
 
 class ObjectViewer2D(QLabel):
     def __init__(self, parent=None, transparent=False):
@@ -104,11 +113,16 @@ class ObjectViewer2D(QLabel):
         self.object_dialog = None
         self.object = None
         self.orig_pixmap = None
-        self.curr_pixmap = None
+        # Tile pyramid the image is drawn from (see tile_pyramid); None when
+        # PIL cannot read the file, and orig_pixmap is drawn directly.
+        self.pyramid = None
         # Optional full-resolution render source ("Show Original"): sharpens
-        # what curr_pixmap is resampled from, while orig_pixmap (the stored
-        # working copy) keeps defining the landmark coordinate space.
-        self.fullres_pixmap = None
+        # what is drawn, while orig_pixmap (the stored working copy) keeps
+        # defining the landmark coordinate space.
+        self.fullres_pyramid = None
+        # Optional dialogs.object_prefetch.ImagePrefetcher: set_image takes an
+        # image from it when it has been decoded ahead.
+        self.prefetcher = None
         self.scale = 1.0
         self.prev_scale = 1.0
         self.fullpath = None
@@ -194,6 +208,10 @@ class ObjectViewer2D(QLabel):
         self.source_preference = None
         self.target_preference = None
         self.ds_ops = None
+        # Lines of the TPS deformation grid along each axis, and points drawn
+        # along each line.
+        self.tps_grid_lines = TPS_GRID_LINES
+        self.tps_grid_samples = TPS_GRID_LINES
 
     def set_source_shape_preference(self, pref):
         self.source_preference = pref
@@ -451,16 +469,25 @@ class ObjectViewer2D(QLabel):
 
         The cost map lives in orig_pixmap pixel space, which is exactly the
         coordinate space of the traced curve points (via _2imgx/_2imgy), so no
-        extra transform is needed. Returns the LiveWire or None if unavailable.
+        extra transform is needed. The windowed live-wire snaps at full
+        resolution and only computes the cost map where a trace goes. For an
+        image file the cost map is kept in the storage directory
+        (MdLiveWireStore), so only the first trace on an image computes it. Returns the live-wire or None
+        if unavailable.
         """
         if self._livewire is not None:
             return self._livewire
         if self.orig_pixmap is None or self.orig_pixmap.isNull():
             return None
+        if self.fullpath is not None and os.path.exists(self.fullpath):
+            wire = MdLiveWireStore.open_livewire(self.fullpath, mu.get_storage_directory())
+            if wire is not None and (wire.width, wire.height) == (self.orig_pixmap.width(), self.orig_pixmap.height()):
+                self._livewire = wire
+                return wire
         gray = self._pixmap_to_gray(self.orig_pixmap)
         if gray is None:
             return None
-        self._livewire = MdLiveWire.build_livewire(gray)
+        self._livewire = MdLiveWire.build_livewire(gray, windowed=True)
         return self._livewire
 
     def _maybe_smooth(self, path):
@@ -1198,12 +1225,6 @@ class ObjectViewer2D(QLabel):
                 max_scale = max(1.0, math.floor(max_scale * 10) / 10)
                 if self.scale > max_scale:
                     self.scale = max_scale
-            self.curr_pixmap = self._render_source().scaled(
-                int(self.orig_pixmap.width() * self.scale / self.image_canvas_ratio),
-                int(self.orig_pixmap.height() * self.scale / self.image_canvas_ratio),
-                Qt.IgnoreAspectRatio,  # the target box already carries the source's aspect
-                Qt.SmoothTransformation,
-            )
 
         self.repaint()
 
@@ -1249,14 +1270,13 @@ class ObjectViewer2D(QLabel):
             painter.setPen(pen)
 
             # Draw transformed grid lines
-            for _direction, line in self.grid_lines_transformed:
-                # Skip lines with None values
-                valid_line = all(p[0] is not None and p[1] is not None for p in line)
-                if not valid_line:
+            ratio = self.scale / self.image_canvas_ratio
+            offset = np.array([self.pan_x + self.temp_pan_x, self.pan_y + self.temp_pan_y])
+            for _axis, line in self.grid_lines_transformed:
+                if not np.all(np.isfinite(line)):
                     continue
-                points = [QPointF(self._2canx(p[0]), self._2cany(p[1])) for p in line]
-                for i in range(len(points) - 1):
-                    painter.drawLine(points[i], points[i + 1])
+                canvas = np.round(line[:, :2] * ratio) + offset
+                painter.drawPolyline(QPolygonF([QPointF(x, y) for x, y in canvas]))
 
         # Draw shapes
         if self.show_arrow and len(ds_ops.object_list) > 1:
@@ -1676,8 +1696,8 @@ class ObjectViewer2D(QLabel):
                 self.draw_dataset(painter)
             return
 
-        if self.curr_pixmap is not None:
-            painter.drawPixmap(self.pan_x + self.temp_pan_x, self.pan_y + self.temp_pan_y, self.curr_pixmap)
+        if self.orig_pixmap is not None and not self.orig_pixmap.isNull():
+            self._paint_image(painter)
 
         if self.show_wireframe:
             self._paint_wireframe(painter)
@@ -1707,12 +1727,6 @@ class ObjectViewer2D(QLabel):
                 self.image_canvas_ratio = self.orig_width / self.width()
             else:
                 self.image_canvas_ratio = self.orig_height / self.height()
-            self.curr_pixmap = self._render_source().scaled(
-                int(self.orig_width * self.scale / self.image_canvas_ratio),
-                int(self.orig_width * self.scale / self.image_canvas_ratio),
-                Qt.KeepAspectRatio,
-                Qt.SmoothTransformation,
-            )
         else:
             if len(self.landmark_list) < 2:
                 return
@@ -1742,7 +1756,12 @@ class ObjectViewer2D(QLabel):
         self.calculate_resize()
         QLabel.resizeEvent(self, event)
 
-    def set_object(self, obj):
+    def set_object(self, obj, ds_ops=None):
+        """Show ``obj`` and its image.
+
+        ``ds_ops`` is an ``MdDatasetOps`` of the object's dataset to use
+        instead of building one, which reads every object of the dataset.
+        """
         self.object = obj
         self.dataset = obj.dataset
 
@@ -1765,7 +1784,7 @@ class ObjectViewer2D(QLabel):
             self.object = MdObject()
             obj_ops = MdObjectOps(self.object)
 
-        self.ds_ops = MdDatasetOps(self.dataset)
+        self.ds_ops = ds_ops if ds_ops is not None else MdDatasetOps(self.dataset)
         self.obj_ops = obj_ops
         self.data_mode = OBJECT_MODE
         self.pan_x = self.pan_y = 0
@@ -1784,47 +1803,102 @@ class ObjectViewer2D(QLabel):
             self.image_changed = True
 
         self.fullpath = file_path
-        self.fullres_pixmap = None
+        self.fullres_pyramid = None
         self._reset_livewire()
-        self.curr_pixmap = self.orig_pixmap = QPixmap(file_path)
-        if self.curr_pixmap.isNull():
-            # QPixmap fails silently on a missing/corrupt/unsupported image,
-            # leaving the viewer blank with no hint why. Log it at least.
-            logger.warning(f"set_image: could not load image (blank pixmap): {file_path}")
-        self.setPixmap(self.curr_pixmap)
+        prefetched = self.prefetcher.take(file_path) if self.prefetcher is not None else None
+        if prefetched is not None:
+            self.orig_pixmap = QPixmap.fromImage(prefetched.image)
+            self.pyramid = prefetched.pyramid
+        else:
+            self.orig_pixmap = QPixmap(file_path)
+            if self.orig_pixmap.isNull():
+                # QPixmap fails silently on a missing/corrupt/unsupported image,
+                # leaving the viewer blank with no hint why. Log it at least.
+                logger.warning(f"set_image: could not load image (blank pixmap): {file_path}")
+                self.pyramid = None
+            else:
+                self.pyramid = TilePyramid.open(file_path, storage_base=mu.get_storage_directory())
+        self.setPixmap(self.orig_pixmap)
 
     def set_fullres_source(self, file_path):
         """Render from a full-resolution image without changing coordinates.
 
         The working copy loaded via set_image stays the coordinate reference
         (orig_pixmap's dimensions keep driving image_canvas_ratio and all
-        landmark math); only the source that curr_pixmap is resampled from
-        changes, so zooming shows the original's detail. Pass None to go back
+        landmark math); only the tiles drawn change, so zooming shows the
+        original's detail. The original is never decoded in full: its tile
+        pyramid is built once and read level by level. Pass None to go back
         to rendering from the working copy.
         """
         if file_path is None:
-            self.fullres_pixmap = None
+            self.fullres_pyramid = None
         else:
-            pixmap = QPixmap(file_path)
-            if pixmap.isNull():
-                logger.warning(f"set_fullres_source: could not load image: {file_path}")
-                self.fullres_pixmap = None
-            else:
-                self.fullres_pixmap = pixmap
+            self.fullres_pyramid = TilePyramid.open(file_path, storage_base=mu.get_storage_directory())
         self.calculate_resize()
         self.repaint()
 
     def _render_source(self):
-        """Pixmap to resample curr_pixmap from (never defines coordinates)."""
-        return self.fullres_pixmap if self.fullres_pixmap is not None else self.orig_pixmap
+        """Tile pyramid to draw the image from (never defines coordinates)."""
+        return self.fullres_pyramid if self.fullres_pyramid is not None else self.pyramid
+
+    def _image_rect(self):
+        """Where the whole image lies on the canvas at the current zoom and pan."""
+        scale = self.scale / self.image_canvas_ratio
+        return QRectF(
+            self.pan_x + self.temp_pan_x,
+            self.pan_y + self.temp_pan_y,
+            self.orig_pixmap.width() * scale,
+            self.orig_pixmap.height() * scale,
+        )
+
+    def _paint_image(self, painter):
+        """Draw the part of the image on the canvas from the nearest pyramid level.
+
+        Only the tiles under the canvas are drawn, so the cost is the same at
+        any zoom and source resolution.
+        """
+        target = self._image_rect()
+        visible = target.intersected(QRectF(self.rect()))
+        if visible.isEmpty():
+            return
+        painter.save()
+        painter.setRenderHint(QPainter.SmoothPixmapTransform)
+        source = self._render_source()
+        if source is None:
+            # Drawn through the painter's scaling, clipped to the canvas.
+            painter.drawPixmap(target, self.orig_pixmap, QRectF(self.orig_pixmap.rect()))
+            painter.restore()
+            return
+        # Source pixels per canvas pixel.
+        fx = source.width / target.width()
+        fy = source.height / target.height()
+        level = source.level_for(min(fx, fy))
+        for (left, top, right, bottom), pixmap in source.tiles(
+            level,
+            (visible.left() - target.left()) * fx,
+            (visible.top() - target.top()) * fy,
+            (visible.right() - target.left()) * fx,
+            (visible.bottom() - target.top()) * fy,
+        ):
+            painter.drawPixmap(
+                QRectF(
+                    target.left() + left / fx,
+                    target.top() + top / fy,
+                    (right - left) / fx,
+                    (bottom - top) / fy,
+                ),
+                pixmap,
+                QRectF(pixmap.rect()),
+            )
+        painter.restore()
 
     def clear_object(self):
         # print("object view clear object")
         self.landmark_list = []
         self.edge_list = []
         self.orig_pixmap = None
-        self.curr_pixmap = None
-        self.fullres_pixmap = None
+        self.pyramid = None
+        self.fullres_pyramid = None
         self.object = None
         self.ds_ops = None
         self.pan_x = 0
@@ -1892,73 +1966,22 @@ class ObjectViewer2D(QLabel):
         self.source_with_boundary = np.vstack([source_points, boundary_source])
         self.target_with_boundary = np.vstack([target_points, boundary_target])
 
-        # Create rectangular grid that encloses the shape
+        # Rectangular grid that encloses the shape
         padding = 0.1
-        x_min = np.min(source_points[:, 0]) - padding
-        x_max = np.max(source_points[:, 0]) + padding
-        y_min = np.min(source_points[:, 1]) - padding
-        y_max = np.max(source_points[:, 1]) + padding
-
-        # Generate grid points
-        n_grid = 20  # Number of grid lines
-        x = np.linspace(x_min, x_max, n_grid)
-        y = np.linspace(y_min, y_max, n_grid)
-
-        # Create vertical and horizontal lines
-        self.grid_lines_orig = []
-
-        # Vertical lines
-        for i in range(n_grid):
-            line_points = np.array([(x[i], y_) for y_ in y])
-            self.grid_lines_orig.append(("v", line_points))
-
-        # Horizontal lines
-        for i in range(n_grid):
-            line_points = np.array([(x_, y[i]) for x_ in x])
-            self.grid_lines_orig.append(("h", line_points))
-
-        # Calculate TPS parameters
-        self.tps_weights, self.tps_affine = self.calculate_tps_params(
-            self.source_with_boundary, self.target_with_boundary
+        lower = np.min(source_points, axis=0) - padding
+        upper = np.max(source_points, axis=0) + padding
+
+        try:
+            spline = MdThinPlateSpline.spline_between(self.source_with_boundary, self.target_with_boundary)
+        except (ValueError, np.linalg.LinAlgError) as e:
+            logger.warning(f"Cannot fit the TPS grid: {e}")
+            self.grid_lines_orig, self.grid_lines_transformed = [], []
+            return
+        self.tps_weights, self.tps_affine = spline.weights, spline.affine
+        self.grid_lines_orig, self.grid_lines_transformed = spline.warp_grid(
+            lower, upper, self.tps_grid_lines, self.tps_grid_samples
         )
 
-        # Transform grid lines
-        self.grid_lines_transformed = []
-        for direction, line in self.grid_lines_orig:
-            transformed_line = np.array(
-                [self.transform_point(p, self.source_with_boundary, self.tps_weights, self.tps_affine) for p in line]
-            )
-            self.grid_lines_transformed.append((direction, transformed_line))
-
-    def calculate_tps_params(self, control_points, target_points):
-        """Calculate TPS transformation parameters"""
-
-        def U(r):
-            return (r**2) * np.log(r + np.finfo(float).eps)
-
-        n = control_points.shape[0]
-        K = cdist(control_points, control_points)
-        K = U(K)
-        P = np.hstack([np.ones((n, 1)), control_points])
-        L = np.vstack([np.hstack([K, P]), np.hstack([P.T, np.zeros((3, 3))])])
-        Y = np.vstack([target_points, np.zeros((3, 2))])
-        params = np.linalg.solve(L, Y)
-        return params[:-3], params[-3:]
-
-    def transform_point(self, point, control_points, weights, affine):
-        """Transform a single point using TPS"""
-
-        def U(r):
-            return (r**2) * np.log(r + np.finfo(float).eps)
-
-        k = cdist(point.reshape(1, -1), control_points)
-        k = U(k)
-        wx = weights[:, 0]
-        wy = weights[:, 1]
-        px = np.sum(k * wx) + affine[0, 0] + affine[1, 0] * point[0] + affine[2, 0] * point[1]
-        py = np.sum(k * wy) + affine[0, 1] + affine[1, 1] * point[0] + affine[2, 1] * point[1]
-        return np.array([px, py])
-
     def update_tps_grid(self):
         """Update TPS grid after shape changes"""
         if hasattr(self, "grid_lines_transformed"):
@@ -4,10 +4,12 @@ Part of modular refactoring effort.
 """
 
 import contextlib
+import ctypes
 import logging
 import sys
 
 import OpenGL.GL as gl
+import OpenGL.raw.GL.VERSION.GL_1_1 as raw_gl
 from OpenGL import GLU as glu
 from PyQt5.QtCore import (
     Qt,
@@ -72,12 +74,62 @@ from MdConstants import (
     ZOOM_MODE,
 )
 
-# Tessellation of the shared landmark-sphere display list. Landmark spheres
-# are a few pixels across, so 8x6 is visually identical to the old 10x10
-# glutSolidSphere at roughly half the triangle count.
+# Tessellation of the landmark spheres. Landmark spheres are a few pixels
+# across, so 8x6 is visually identical to the old 10x10 glutSolidSphere at
+# roughly half the triangle count.
 SPHERE_SLICES = 8
 SPHERE_STACKS = 6
 
+# How far from the pointer's ray a mesh vertex may be picked when the ray
+# misses the surface.
+PICK_RADIUS = 0.1
+
+# Most triangles of the 3D model drawn while the view turns by itself, and
+# while it is dragged: a coarse level of a denser model (one of
+# MdMesh.LEVEL_FACE_COUNTS) keeps that smooth. A drag follows the pointer,
+# so it gets the coarsest level; the slow turn of auto-rotate shows more
+# of the shape. The full mesh is drawn once the view stops, and while
+# landmarks are placed on it.
+TURNING_FACES = 200_000
+DRAGGED_FACES = 50_000
+
+
+def unit_sphere(slices=SPHERE_SLICES, stacks=SPHERE_STACKS):
+    """Vertices (float32, also the normals) and uint32 triangles of a unit sphere.
+
+    A (stacks + 1) x (slices + 1) grid of latitude and longitude, wound
+    counter-clockwise seen from outside; the triangles meeting at a pole are
+    degenerate and draw nothing.
+    """
+    theta = np.linspace(0.0, np.pi, stacks + 1)[:, np.newaxis]
+    phi = np.linspace(0.0, 2 * np.pi, slices + 1)[np.newaxis, :]
+    vertices = np.stack(
+        np.broadcast_arrays(np.sin(theta) * np.cos(phi), np.sin(theta) * np.sin(phi), np.cos(theta)), axis=-1
+    ).reshape(-1, 3)
+    corner = (np.arange(stacks)[:, np.newaxis] * (slices + 1) + np.arange(slices)).reshape(-1, 1)
+    quads = corner + np.array([0, slices + 1, 1, slices + 2])
+    triangles = np.concatenate([quads[:, [0, 1, 2]], quads[:, [2, 1, 3]]])
+    return vertices.astype(np.float32), triangles.astype(np.uint32)
+
+
+_UNIT_SPHERE = unit_sphere()
+
+
+def sphere_batch(centers, radius, colors):
+    """The arrays drawing a sphere of ``radius`` at each of ``centers`` in one call.
+
+    ``colors`` is one RGB row per center. Returns vertices, normals and
+    colours (float32, one row per vertex) and uint32 triangle indices into
+    them, for a single glDrawElements.
+    """
+    sphere, triangles = _UNIT_SPHERE
+    centers = np.asarray(centers, dtype=np.float32).reshape(-1, 3)
+    vertices = (centers[:, np.newaxis] + np.float32(radius) * sphere).reshape(-1, 3)
+    normals = np.tile(sphere, (len(centers), 1))
+    colors = np.repeat(np.asarray(colors, dtype=np.float32).reshape(-1, 3), len(sphere), axis=0)
+    offsets = np.arange(len(centers), dtype=np.uint32)[:, np.newaxis, np.newaxis] * np.uint32(len(sphere))
+    return vertices, normals, colors, (triangles + offsets).reshape(-1, 3)
+
 
 class ObjectViewer3D(QGLWidget):
     def __init__(self, parent=None, transparent=False):
@@ -151,7 +203,6 @@ class ObjectViewer3D(QGLWidget):
         self.lm_idx_to_color = {}
         self.picker_buffer = None
         self.gl_list = None
-        self.sphere_list = None
         self.temp_edge = []
         self.object = None
         self.polygon_list = []
@@ -228,7 +279,7 @@ class ObjectViewer3D(QGLWidget):
                 self.set_mode(MODE["MOVE_LANDMARK"])
                 self.stored_landmark = {
                     "index": self.selected_landmark_idx,
-                    "coords": self.threed_model.original_vertices[self.selected_landmark_idx],
+                    "coords": self.threed_model.vertex_coords(self.selected_landmark_idx),
                 }
             else:
                 self.view_mode = ROTATE_MODE
@@ -266,7 +317,7 @@ class ObjectViewer3D(QGLWidget):
                 and self.curr_x == self.down_x
                 and self.curr_y == self.down_y
             ):
-                x, y, z = self.threed_model.original_vertices[self.cursor_on_vertex]
+                x, y, z = self.threed_model.vertex_coords(self.cursor_on_vertex)
                 self.object_dialog.add_landmark(x, y, z)
                 self.update_landmark_list()
                 self.initialize_colors()
@@ -385,7 +436,7 @@ class ObjectViewer3D(QGLWidget):
             return
         self.cursor_on_vertex = closest_element
         if self.selected_landmark_idx >= 0:
-            self.landmark_list[self.selected_landmark_idx] = self.threed_model.original_vertices[closest_element]
+            self.landmark_list[self.selected_landmark_idx] = self.threed_model.vertex_coords(closest_element)
             if self.object_dialog is not None:
                 self.object_dialog.update_landmark(
                     self.selected_landmark_idx, *self.landmark_list[self.selected_landmark_idx]
@@ -584,7 +635,12 @@ class ObjectViewer3D(QGLWidget):
         if self.target_preference is not None:
             self.set_target_shape_preference(self.target_preference)
 
-    def set_object(self, obj, idx=-1):
+    def set_object(self, obj, idx=-1, ds_ops=None):
+        """Show ``obj`` and its 3D model.
+
+        ``ds_ops`` is an ``MdDatasetOps`` of the object's dataset to use
+        instead of building one, which reads every object of the dataset.
+        """
         self.show()
         self.landmark_list = copy.deepcopy(obj.landmark_list)
         if isinstance(obj, MdObject):
@@ -598,7 +654,7 @@ class ObjectViewer3D(QGLWidget):
         self.dataset = obj.dataset
         if self.dataset.baseline is not None:
             self.dataset.unpack_baseline()
-        self.ds_ops = MdDatasetOps(self.dataset)
+        self.ds_ops = ds_ops if ds_ops is not None else MdDatasetOps(self.dataset)
 
         self.obj_ops = obj_ops
         self.data_mode = OBJECT_MODE
@@ -682,29 +738,36 @@ class ObjectViewer3D(QGLWidget):
 
     def set_threed_model(self, file_path):
         ext = file_path.split(".")[-1].lower()
-        if ext == "obj":
+        if ext in mu.MODEL_EXTENSION_LIST:
+            self._free_threed_model()
             try:
-                self.threed_model = OBJ(file_path)
+                self.threed_model = OBJ(file_path, storage_base=mu.get_storage_directory())
                 self.fullpath = file_path
             except Exception as e:
                 logger.error(f"Failed to load 3D model '{file_path}': {e}")
                 raise ValueError(f"Cannot load 3D model: {e}") from e
+            if len(self.threed_model.faces) > min(TURNING_FACES, DRAGGED_FACES):
+                self.threed_model.load_levels_in_background()
         else:
-            # Real flows convert stl/ply -> obj via mu.process_3d_file first; a
-            # non-obj path reaching here loads no model — log instead of silently
-            # doing nothing.
             logger.warning(f"set_threed_model: unsupported 3D format '.{ext}' for {file_path}; no model loaded")
         self.updateGL()
 
     def initializeGL(self):
-        # Display lists don't survive context re-creation; recompile lazily.
-        self.sphere_list = None
         self.initialize_frame_buffer()
         self.picker_buffer = self.create_picker_buffer()
         self.initialize_frame_buffer(self.picker_buffer)
         self.initialized = True
-        if self.initialized and self.threed_model is not None and not self.threed_model.generated:
-            self.threed_model.generate()
+        # Buffers don't survive context re-creation; the model uploads itself
+        # again when next rendered.
+        if self.threed_model is not None:
+            self.threed_model.discard_buffers()
+
+    def _free_threed_model(self):
+        """Release the GL buffers of the model being replaced."""
+        if self.threed_model is None or not self.threed_model.generated:
+            return
+        self.makeCurrent()
+        self.threed_model.free()
 
     def initialize_frame_buffer(self, frame_buffer_id=0):
         gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, frame_buffer_id)
@@ -716,8 +779,7 @@ class ObjectViewer3D(QGLWidget):
 
         gl.glEnable(gl.GL_LIGHTING)
         gl.glEnable(gl.GL_LIGHT0)
-        # Landmark spheres are drawn as a scaled unit-sphere display list;
-        # keep normals unit-length under that scale.
+        # Keep normals unit-length under any scale in the modelview matrix.
         gl.glEnable(gl.GL_NORMALIZE)
 
         gl.glMatrixMode(gl.GL_PROJECTION)
@@ -961,26 +1023,33 @@ class ObjectViewer3D(QGLWidget):
         gl.glEnable(gl.GL_LIGHTING)
 
     def _draw_landmark_spheres(self, obj, color, current_buffer):
-        """Draw each landmark as a sphere (the normal, pickable representation)."""
+        """Draw each landmark as a sphere (the normal, pickable representation).
+
+        All the spheres go to the GL as one batch; in the picker buffer each
+        is drawn, unlit, in the colour identifying its landmark.
+        """
         picking = self._picking(current_buffer)
-        for i, lm in enumerate(obj.landmark_list):
-            if len(lm) < 3 or lm[0] is None or lm[1] is None or lm[2] is None:
-                continue  # missing landmark
-            gl.glPushMatrix()
-            gl.glTranslate(*lm)
-            gl.glColor3f(*color)
-            if i in (self.selected_landmark_idx, self.wireframe_from_idx, self.wireframe_to_idx):
-                gl.glColor3f(*COLOR["SELECTED_LANDMARK"])
-            if picking:
-                gl.glDisable(gl.GL_LIGHTING)
-                pick_color = self.lm_idx_to_color["lm_" + str(i)]
-                gl.glColor3f(*[c / 255.0 for c in pick_color])
-            self.draw_sphere(0.02 * (int(self.landmark_size) + 1))
-            if picking:
-                gl.glEnable(gl.GL_LIGHTING)
-            gl.glPopMatrix()
+        shown = [
+            i
+            for i, lm in enumerate(obj.landmark_list)
+            if len(lm) >= 3 and lm[0] is not None and lm[1] is not None and lm[2] is not None
+        ]
+        if not shown:
+            return
+        if picking:
+            colors = [[c / 255.0 for c in self.lm_idx_to_color["lm_" + str(i)]] for i in shown]
+        else:
+            selected = (self.selected_landmark_idx, self.wireframe_from_idx, self.wireframe_to_idx)
+            colors = [COLOR["SELECTED_LANDMARK"] if i in selected else color for i in shown]
+        centers = [obj.landmark_list[i][:3] for i in shown]
+        if picking:
+            gl.glDisable(gl.GL_LIGHTING)
+        self.draw_spheres(centers, 0.02 * (int(self.landmark_size) + 1), colors)
+        if picking:
+            gl.glEnable(gl.GL_LIGHTING)
 
-            self._draw_landmark_index(i, lm)
+        for i in shown:
+            self._draw_landmark_index(i, obj.landmark_list[i])
 
     def _draw_landmark_points(self, obj, color):
         """Draw landmarks as plain points (the lightweight representation)."""
@@ -995,18 +1064,26 @@ class ObjectViewer3D(QGLWidget):
         gl.glEnd()
         gl.glEnable(gl.GL_LIGHTING)
 
+    def _moving_faces(self):
+        """Most triangles to draw of the 3D model while the view moves; None while it is still.
+
+        It moves while dragged, and while it turns by itself with no
+        landmark being placed.
+        """
+        if self.is_dragging:
+            return DRAGGED_FACES
+        if self.auto_rotate and self.edit_mode not in (MODE["EDIT_LANDMARK"], MODE["MOVE_LANDMARK"]):
+            return TURNING_FACES
+        return None
+
     def _draw_threed_model(self):
         """Render the attached 3D mesh and the vertex under the cursor."""
         if self.threed_model is None or self.show_model is not True:
             return
-        self.threed_model.render()
+        self.threed_model.render(self._moving_faces())
         if self.cursor_on_vertex > -1:
             lm = self.threed_model.vertices[self.cursor_on_vertex]
-            gl.glPushMatrix()
-            gl.glTranslate(*lm)
-            gl.glColor3f(*COLOR["SELECTED_LANDMARK"])
-            self.draw_sphere(0.03)
-            gl.glPopMatrix()
+            self.draw_spheres([lm], 0.03, [COLOR["SELECTED_LANDMARK"]])
 
     def draw_object(
         self,
@@ -1221,8 +1298,6 @@ class ObjectViewer3D(QGLWidget):
 
     def calculate_resize(self):
         if self.threed_model is not None:
-            if self.initialized and not self.threed_model.generated:
-                self.threed_model.generate()
             self.obj_ops.move(
                 -1 * self.threed_model.center_x, -1 * self.threed_model.center_y, -1 * self.threed_model.center_z
             )
@@ -1248,59 +1323,13 @@ class ObjectViewer3D(QGLWidget):
         return near, ray_direction
 
     def pick_element(self, x, y):
+        """The index of the model vertex under screen point (``x``, ``y``), or None.
+
+        That is the vertex nearest where the pointer's ray meets the mesh or,
+        if it misses, the one closest to the ray within PICK_RADIUS.
+        """
         near, ray_direction = self.unproject_mouse(x, y)
-        closest_distance = float("inf")
-        closest_element = None
-        vertices = self.threed_model.vertices
-
-        for i, vertex in enumerate(vertices):
-            distance = self.distance_to_ray(near, ray_direction, np.array(vertex))
-
-            pick_radius = 0.1
-            if distance is not None and distance < closest_distance and distance < pick_radius:
-                closest_distance = distance
-                closest_element = i
-        return closest_element
-
-    def ray_triangle_intersection(self, ray_origin, ray_direction, v0, v1, v2):
-        edge1 = v1 - v0
-        edge2 = v2 - v0
-        normal = np.cross(edge1, edge2)
-        normal /= np.linalg.norm(normal)
-
-        epsilon = 1e-6
-        if abs(np.dot(ray_direction, normal)) < epsilon:
-            return None, None  # No intersection
-        d = np.dot(v0 - ray_origin, normal) / np.dot(ray_direction, normal)
-        if d < 0:
-            return None, None  # No intersection
-
-        intersection_point = ray_origin + d * ray_direction
-        edge0 = v0 - v2
-        C0 = intersection_point - v0
-        C1 = intersection_point - v1
-        intersection_point - v2
-        dot00 = np.dot(edge0, edge0)
-        dot01 = np.dot(edge0, edge1)
-        np.dot(edge0, edge2)
-        dot11 = np.dot(edge1, edge1)
-        np.dot(edge1, edge2)
-        inv_denom = 1.0 / (dot00 * dot11 - dot01 * dot01)
-        u = (dot11 * np.dot(C0, edge0) - dot01 * np.dot(C0, edge1)) * inv_denom
-        v = (dot00 * np.dot(C1, edge1) - dot01 * np.dot(C1, edge0)) * inv_denom
-
-        if (u >= 0) and (v >= 0) and (u + v <= 1):
-            return intersection_point, d
-        return None, None  # No intersection
-
-    def distance_to_ray(self, ray_origin, ray_direction, point):
-        point_vector = point - ray_origin
-        projection = np.dot(point_vector, ray_direction)
-        if projection < 0:
-            return None
-
-        distance = np.linalg.norm(point_vector - projection * ray_direction)
-        return distance
+        return self.threed_model.pick_vertex(near, ray_direction, PICK_RADIUS)
 
     def apply_rotation(self, rotation_matrix):
         if self.data_mode == OBJECT_MODE:
@@ -1391,8 +1420,6 @@ class ObjectViewer3D(QGLWidget):
                 self.threed_model.rotate(
                     math.radians(self.rotate_x), math.radians(self.rotate_y), apply_rotation_to_vertex
                 )
-                if self.show_model:
-                    self.threed_model.generate()
 
         elif self.data_mode == DATASET_MODE:
             if self.ds_ops is None:
@@ -1451,38 +1478,25 @@ class ObjectViewer3D(QGLWidget):
             gl.glVertex3f(0.02 * math.cos(angle2), 0.02 * math.sin(angle2), 0)
         gl.glEnd()
 
-    def _sphere_display_list(self):
-        """Compile a unit sphere into a display list, once per GL context.
+    def draw_spheres(self, centers, radius, colors):
+        """Draw a sphere of ``radius`` at each of ``centers``, in one draw call.
 
-        Returns the list id, or 0 if a display list could not be created
-        (caller then falls back to drawing the quadric directly).
+        ``colors`` is an RGB triple per sphere. The geometry comes from
+        sphere_batch and is passed as client-side vertex, normal and colour
+        arrays, which every OpenGL version and software renderer supports.
+        They are handed over by address (see objloader): PyOpenGL's wrappers
+        would keep them in the current context's data, and fail without one.
         """
-        if self.sphere_list is None:
-            if getattr(self, "glu_quadric", None) is None:
-                self.glu_quadric = glu.gluNewQuadric()
-            list_id = gl.glGenLists(1)
-            if list_id and self.glu_quadric:
-                gl.glNewList(list_id, gl.GL_COMPILE)
-                glu.gluSphere(self.glu_quadric, 1.0, SPHERE_SLICES, SPHERE_STACKS)
-                gl.glEndList()
-            self.sphere_list = list_id
-        return self.sphere_list
-
-    def draw_sphere(self, radius):
-        """Draw a landmark sphere at the current origin.
-
-        Replays a cached unit-sphere display list scaled to ``radius`` instead
-        of re-tessellating a sphere every call. Callers wrap this in
-        glPushMatrix/glPopMatrix, so the glScalef doesn't leak.
-        """
-        gl.glScalef(radius, radius, radius)
-        if self._sphere_display_list():
-            gl.glCallList(self.sphere_list)
-        elif self.glu_quadric:
-            glu.gluSphere(self.glu_quadric, 1.0, SPHERE_SLICES, SPHERE_STACKS)
-        else:
-            # Ultimate fallback: draw a point
-            gl.glPointSize(radius * 100)
-            gl.glBegin(gl.GL_POINTS)
-            gl.glVertex3f(0, 0, 0)
-            gl.glEnd()
+        vertices, normals, vertex_colors, triangles = sphere_batch(centers, radius, colors)
+        gl.glEnableClientState(gl.GL_VERTEX_ARRAY)
+        gl.glEnableClientState(gl.GL_NORMAL_ARRAY)
+        gl.glEnableClientState(gl.GL_COLOR_ARRAY)
+        raw_gl.glVertexPointer(3, gl.GL_FLOAT, 0, vertices.ctypes.data_as(ctypes.c_void_p))
+        raw_gl.glNormalPointer(gl.GL_FLOAT, 0, normals.ctypes.data_as(ctypes.c_void_p))
+        raw_gl.glColorPointer(3, gl.GL_FLOAT, 0, vertex_colors.ctypes.data_as(ctypes.c_void_p))
+        raw_gl.glDrawElements(
+            gl.GL_TRIANGLES, triangles.size, gl.GL_UNSIGNED_INT, triangles.ctypes.data_as(ctypes.c_void_p)
+        )
+        gl.glDisableClientState(gl.GL_COLOR_ARRAY)
+        gl.glDisableClientState(gl.GL_NORMAL_ARRAY)
+        gl.glDisableClientState(gl.GL_VERTEX_ARRAY)
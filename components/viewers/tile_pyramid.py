@@ -0,0 +1,256 @@
+"""Multi-resolution tile pyramid of an image, for ObjectViewer2D.
+
+Rescaling a whole 24 MP photograph on every wheel event is what made zooming
+stall. A :class:`TilePyramid` holds the image at a series of halved
+resolutions (level 0 is the file itself, each next level half the size, down
+to one that fits a single tile), each cut into ``TILE_SIZE`` square tiles.
+The viewer draws only the tiles under the canvas, from the level nearest the
+zoom, so painting costs about the same at any zoom and for any source size.
+
+Levels are generated the first time they are drawn and written to a
+directory of the storage directory (``MdMediaStore.derived_path``): beside a
+stored image, and under its content hash for any other, so each is made once
+per image and goes when the stored image does, and a photo merely previewed
+from the user's own folder gets nothing written next to it. A JPEG is decoded
+at reduced size for the coarse levels (PIL's ``draft``), so showing a large
+photograph fitted to the window never decodes it in full. Without a storage
+directory, or when the tiles cannot be written there, the generated levels
+are kept in memory instead. The most recently drawn tiles are kept decoded in
+a small LRU.
+"""
+
+import json
+import logging
+import math
+import os
+import shutil
+from collections import OrderedDict
+
+from PIL import Image
+from PyQt5.QtGui import QImage, QPixmap
+
+import MdMediaStore
+
+logger = logging.getLogger(__name__)
+
+# Side of a tile, in pixels of its level.
+TILE_SIZE = 256
+
+# Decoded tiles kept for repainting: 96 x 256 KB (RGB32) = 24 MB, about four
+# screenfuls at 1080p.
+TILE_CACHE_SIZE = 96
+
+# MdMediaStore.derived_path kind of the tile directory.
+SIDECAR_KIND = "tiles"
+
+# Name of the file in the tile directory recording what was built from which
+# file; bumping FORMAT_VERSION makes every existing pyramid rebuild.
+MANIFEST_NAME = "pyramid.json"
+FORMAT_VERSION = 2
+
+# Quality of the JPEG tiles of the coarser levels of a JPEG. Level 0, where
+# landmarks are placed, and every level of any other image are PNG tiles, so
+# they show the file's own pixels rather than re-compressed ones.
+TILE_JPEG_QUALITY = 90
+
+
+class TilePyramid:
+    """The tiles of the image at ``path``, level by level.
+
+    ``width`` / ``height`` are the image's size and ``levels`` the size of
+    each level, level 0 first. Opening reads only the image header and the
+    tile directory's manifest. Tiles are written under ``storage_base`` (see
+    the module docstring) and kept in memory without it; ``directory`` is
+    None then. Raises when PIL cannot read the file; see :meth:`open`.
+    """
+
+    def __init__(self, path, cache_size=TILE_CACHE_SIZE, storage_base=None):
+        self.path = path
+        with Image.open(path) as img:
+            self.width, self.height = img.size
+            self._alpha = img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info
+            self._jpeg = img.format == "JPEG"
+        width, height = self.width, self.height
+        self.levels = [(width, height)]
+        while max(width, height) > TILE_SIZE:
+            width, height = (width + 1) // 2, (height + 1) // 2
+            self.levels.append((width, height))
+        self.directory = MdMediaStore.derived_path(path, SIDECAR_KIND, storage_base)
+        stat_result = os.stat(path)
+        self._signature = {
+            "version": FORMAT_VERSION,
+            "size": stat_result.st_size,
+            "mtime_ns": stat_result.st_mtime_ns,
+            "width": self.width,
+            "height": self.height,
+            "tile_size": TILE_SIZE,
+        }
+        self._built = self._read_manifest()
+        self._memory = {}
+        self._cache_size = cache_size
+        self._tiles = OrderedDict()
+
+    @classmethod
+    def open(cls, path, cache_size=TILE_CACHE_SIZE, storage_base=None):
+        """The pyramid of ``path``, or None (logged) when it cannot be read."""
+        try:
+            return cls(path, cache_size, storage_base)
+        except Exception as e:
+            logger.warning(f"Cannot build image tiles for {path}: {e}")
+            return None
+
+    def level_for(self, downsample):
+        """The coarsest level with at least the detail of ``downsample``.
+
+        ``downsample`` is image pixels per canvas pixel: 1 at 100 % zoom, 4
+        when a quarter-size view is shown.
+        """
+        if downsample <= 1:
+            return 0
+        # The small epsilon keeps an exact power of two on its own level.
+        return min(len(self.levels) - 1, int(math.floor(math.log2(downsample) + 1e-9)))
+
+    def prepare(self, level):
+        """Generate ``level`` now rather than when it is first drawn.
+
+        Uses PIL only, so it may run on a worker thread, as long as nothing
+        draws from the pyramid until it returns. Returns False (logged) when
+        the level cannot be made.
+        """
+        try:
+            self._ensure_level(level)
+        except Exception as e:
+            logger.warning(f"Cannot make level {level} of the image tiles of {self.path}: {e}")
+            return False
+        return True
+
+    def tiles(self, level, x0, y0, x1, y1):
+        """Yield ``((left, top, right, bottom), pixmap)`` for the tiles of ``level``
+        covering the region ``x0..x1`` x ``y0..y1``.
+
+        The region and the rectangles are in pixels of the image (level 0).
+        A tile that cannot be produced is skipped.
+        """
+        level_width, level_height = self.levels[level]
+        fx = self.width / level_width
+        fy = self.height / level_height
+        first_col = max(0, int(x0 / fx) // TILE_SIZE)
+        first_row = max(0, int(y0 / fy) // TILE_SIZE)
+        last_col = min((level_width - 1) // TILE_SIZE, int(math.ceil(x1 / fx)) // TILE_SIZE)
+        last_row = min((level_height - 1) // TILE_SIZE, int(math.ceil(y1 / fy)) // TILE_SIZE)
+        for row in range(first_row, last_row + 1):
+            for col in range(first_col, last_col + 1):
+                pixmap = self.tile(level, col, row)
+                if pixmap is None:
+                    continue
+                left = col * TILE_SIZE
+                top = row * TILE_SIZE
+                right = min(left + TILE_SIZE, level_width)
+                bottom = min(top + TILE_SIZE, level_height)
+                yield (left * fx, top * fy, right * fx, bottom * fy), pixmap
+
+    def tile(self, level, col, row):
+        """The decoded tile at ``col``, ``row`` of ``level``, or None."""
+        key = (level, col, row)
+        pixmap = self._tiles.get(key)
+        if pixmap is not None:
+            self._tiles.move_to_end(key)
+            return pixmap
+        if not self.prepare(level):
+            return None
+        if level in self._memory:
+            pixmap = _to_pixmap(self._memory[level].crop(self._tile_box(level, col, row)))
+        else:
+            # Not QPixmap(path): that goes through the global QPixmapCache,
+            # which can hand back a tile from before a rebuild.
+            pixmap = QPixmap.fromImage(QImage(self._tile_path(level, col, row)))
+        if pixmap.isNull():
+            return None
+        self._tiles[key] = pixmap
+        if len(self._tiles) > self._cache_size:
+            self._tiles.popitem(last=False)
+        return pixmap
+
+    def _tile_box(self, level, col, row):
+        level_width, level_height = self.levels[level]
+        left = col * TILE_SIZE
+        top = row * TILE_SIZE
+        return (left, top, min(left + TILE_SIZE, level_width), min(top + TILE_SIZE, level_height))
+
+    def _tile_path(self, level, col, row):
+        return os.path.join(self.directory, str(level), f"{col}_{row}.{self._tile_format(level)}")
+
+    def _tile_format(self, level):
+        return "jpg" if self._jpeg and level > 0 and not self._alpha else "png"
+
+    def _read_manifest(self):
+        """Levels already on disk, wiping a tile directory built from another file."""
+        if self.directory is None:
+            return set()
+        try:
+            with open(os.path.join(self.directory, MANIFEST_NAME), encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = None
+        if manifest is not None and manifest.get("signature") == self._signature:
+            return set(manifest.get("levels", []))
+        if os.path.isdir(self.directory):
+            shutil.rmtree(self.directory, ignore_errors=True)
+        return set()
+
+    def _write_manifest(self):
+        manifest = {"signature": self._signature, "levels": sorted(self._built)}
+        target = os.path.join(self.directory, MANIFEST_NAME)
+        MdMediaStore.write_atomically(target, lambda f: f.write(json.dumps(manifest).encode()))
+
+    def _ensure_level(self, level):
+        """Generate ``level`` unless it is on disk or in memory already."""
+        if level in self._built or level in self._memory:
+            return
+        # Another viewer on the same image may have made it since.
+        self._built |= self._read_manifest()
+        if level in self._built:
+            return
+        img = self._level_image(level)
+        if self.directory is None:
+            self._memory[level] = img
+            return
+        try:
+            level_directory = os.path.join(self.directory, str(level))
+            os.makedirs(level_directory, exist_ok=True)
+            columns = (img.width + TILE_SIZE - 1) // TILE_SIZE
+            rows = (img.height + TILE_SIZE - 1) // TILE_SIZE
+            save_kwargs = {"quality": TILE_JPEG_QUALITY} if self._tile_format(level) == "jpg" else {}
+            for row in range(rows):
+                for col in range(columns):
+                    img.crop(self._tile_box(level, col, row)).save(self._tile_path(level, col, row), **save_kwargs)
+            self._built.add(level)
+            self._write_manifest()
+        except OSError as e:
+            logger.warning(f"Cannot write image tiles to {self.directory}, keeping them in memory: {e}")
+            self._built.discard(level)
+            self._memory[level] = img
+
+    def _level_image(self, level):
+        """The whole image at the size of ``level``, as RGB or RGBA."""
+        size = self.levels[level]
+        with Image.open(self.path) as img:
+            if level > 0 and img.format == "JPEG":
+                # Let the decoder do most of the shrinking: it decodes at
+                # 1/2, 1/4 or 1/8 scale, never below the size asked for.
+                img.draft("RGB", size)
+            img = img.convert("RGBA" if self._alpha else "RGB")
+        if img.size != size:
+            img = img.resize(size, Image.LANCZOS, reducing_gap=3.0)
+        return img
+
+
+def _to_pixmap(img):
+    """A QPixmap of the RGB or RGBA PIL image ``img``."""
+    if img.mode == "RGBA":
+        fmt, bytes_per_pixel = QImage.Format_RGBA8888, 4
+    else:
+        fmt, bytes_per_pixel = QImage.Format_RGB888, 3
+    data = img.tobytes()
+    qimage = QImage(data, img.width, img.height, img.width * bytes_per_pixel, fmt)
+    return QPixmap.fromImage(qimage)
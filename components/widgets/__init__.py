@@ -10,8 +10,8 @@ from .drag_widgets import CustomDrag, DragEventFilter, MdDrag
 from .overlay_widget import ResizableOverlayWidget
 from .pic_button import PicButton
 from .shape_preference import ShapePreference
-from .table_view import MISSING_COUNT_ROLE, MdTableModel, MdTableView
-from .tree_view import MdTreeView
+from .table_view import MISSING_COUNT_ROLE, MdObjectTableModel, MdTableModel, MdTableView
+from .tree_view import MdDatasetTreeModel, MdTreeView
 
 __all__ = [
     "AnalysisInfoWidget",
@@ -25,7 +25,9 @@ __all__ = [
     "ResizableOverlayWidget",
     "ShapePreference",
     "MISSING_COUNT_ROLE",
+    "MdObjectTableModel",
     "MdTableModel",
     "MdTableView",
+    "MdDatasetTreeModel",
     "MdTreeView",
 ]
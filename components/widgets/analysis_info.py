@@ -254,7 +254,7 @@ class AnalysisInfoWidget(QWidget):
         return raw
 
     def _load_result_json(self):
-        """Parse the analysis' stored JSON blobs.
+        """Read the analysis' stored results.
 
         Returns ``(object_info_list, pca_result_list, cva_result_list,
         manova_result)``; the result lists are None when that analysis was not run.
@@ -265,15 +265,11 @@ class AnalysisInfoWidget(QWidget):
             if "property_list" in obj:
                 obj["variable_list"] = obj["property_list"]
 
-        pca_result_list = None
-        if self.analysis.pca_analysis_result_json:
-            pca_result_list = json.loads(self.analysis.pca_analysis_result_json)
+        pca_result_list = self.analysis.get_result_list("pca_analysis_result")
 
-        cva_result_list = None
-        if self.analysis.cva_analysis_result_json:
-            cva_result_list = json.loads(self.analysis.cva_analysis_result_json)
-        else:
-            logger.warning("CVA analysis_result_json is empty or None")
+        cva_result_list = self.analysis.get_result_list("cva_analysis_result")
+        if cva_result_list is None:
+            logger.warning("CVA analysis result is empty or None")
 
         manova_result = None
         if self.analysis.manova_analysis_result_json:
@@ -5,6 +5,7 @@ Part of modular refactoring effort.
 
 import logging
 import sys
+from collections import OrderedDict
 
 from PyQt5.QtCore import (
     QAbstractTableModel,
@@ -30,7 +31,7 @@ from PyQt5.QtWidgets import (
     QTableView,
 )
 
-from MdModel import MdObject
+from MdModel import VARIABLE_SEPARATOR, MdObject
 
 from .drag_widgets import CustomDrag
 
@@ -509,9 +510,15 @@ class MdTableView(QTableView):
             else:
                 header.resizeSection(i, flexible_width)
 
-        # Calculate maximum content width for each column
+        # Calculate maximum content width for each column, over the rows on
+        # screen: the object table reads rows from the database as they are
+        # shown, and measuring them all would read the whole dataset.
         content_widths = [0] * column_count
-        for row in range(self.model().rowCount()):
+        first_row = max(self.rowAt(0), 0)
+        last_row = self.rowAt(self.viewport().height() - 1)
+        if last_row < 0:
+            last_row = self.model().rowCount() - 1
+        for row in range(first_row, last_row + 1):
             for col in range(column_count):
                 index = self.model().index(row, col)
                 text = str(self.model().data(index, Qt.DisplayRole))
@@ -701,3 +708,279 @@ class MdTableModel(QAbstractTableModel):
             obj.pack_variable()
             obj.save()
         self.data_changed = False
+
+
+# The object table's fixed columns, as the MdObject fields they are sorted on.
+OBJECT_TABLE_SORT_FIELDS = {
+    0: MdObject.id,
+    1: MdObject.sequence,
+    2: MdObject.object_name,
+    3: MdObject.summary_landmark_count,
+    4: MdObject.summary_curve_count,
+    5: MdObject.summary_centroid_size,
+}
+
+
+class MdObjectTableModel(MdTableModel):
+    """The main window's object table, read from the database a page at a time.
+
+    Only the dataset's object ids are held, in display order. A row's cells are
+    read together with the rest of its page the first time the view asks for
+    them, and at most ``MAX_CACHED_PAGES`` pages are kept, so a dataset of ten
+    thousand objects costs what the visible rows cost. The LM Count, Curve and
+    CSize columns come from the ``MdObject.summary_*`` columns, so no landmarks
+    are unpacked, and sorting on the fixed columns is an ``ORDER BY``.
+
+    Edits are held per object id until :meth:`save_object_info` writes them,
+    so they survive re-sorting and pages being dropped.
+    """
+
+    PAGE_SIZE = 200
+    MAX_CACHED_PAGES = 20
+    # ID, Seq., Name, LM Count, Curve, CSize; the variables follow.
+    FIXED_COLUMN_COUNT = 6
+
+    def __init__(self):
+        super().__init__()
+        self._dataset = None
+        self._column_count = 0
+        self._object_ids = []
+        self._row_of = {}
+        self._pages = OrderedDict()
+        self._edits = {}  # (object_id, column) -> edited value
+        self._sort_column = 1
+        self._sort_order = Qt.AscendingOrder
+
+    def set_dataset(self, dataset):
+        """Show ``dataset``'s objects, in the current sort order."""
+        self.beginResetModel()
+        self._dataset = dataset
+        self._column_count = 0
+        self._pages.clear()
+        self._edits.clear()
+        self._set_order([])
+        if dataset is not None:
+            self._column_count = self.FIXED_COLUMN_COUNT + len(dataset.get_variablename_list() or [])
+            self._set_order(self._ordered_ids())
+        self.endResetModel()
+
+    def object_id(self, row):
+        """The id of the object shown in ``row``."""
+        return self._object_ids[row]
+
+    def row_of(self, object_id):
+        """The row showing ``object_id``, or ``None`` when it is not in the table."""
+        return self._row_of.get(object_id)
+
+    def refresh_object(self, object_id):
+        """Re-read one object's row, e.g. after the object dialog saved it."""
+        row = self._row_of.get(object_id)
+        if row is None:
+            return
+        self._pages.pop(row // self.PAGE_SIZE, None)
+        self.dataChanged.emit(self.index(row, 0), self.index(row, self.columnCount() - 1))
+
+    def rowCount(self, parent=QModelIndex()):
+        return len(self._object_ids)
+
+    def columnCount(self, parent=QModelIndex()):
+        return self._column_count
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        column = index.column()
+        key = (self._object_ids[index.row()], column)
+        if role == Qt.DisplayRole or role == Qt.EditRole:
+            if key in self._edits:
+                return self._edits[key]
+            return self._row(index.row())[0][column]
+        if role == Qt.BackgroundRole:
+            if column in self._uneditable_columns:
+                return QColor(240, 240, 240)
+            if key in self._edits:
+                return QColor("yellow")
+            return None
+        if role == MISSING_COUNT_ROLE:
+            return self._row(index.row())[1] if column == 3 else 0
+        if role == Qt.ToolTipRole:
+            missing = self._row(index.row())[1] if column == 3 else 0
+            return f"{missing} missing landmark{'s' if missing > 1 else ''}" if missing else None
+        if role == Qt.TextAlignmentRole:
+            return Qt.AlignCenter | Qt.AlignVCenter
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or role != Qt.EditRole:
+            return False
+        if index.row() >= self.rowCount() or index.column() >= self.columnCount():
+            return False
+        if str(value) == str(self.data(index, Qt.EditRole)):
+            return False
+
+        try:
+            new_value = int(value)
+        except ValueError:
+            try:
+                new_value = float(value)
+            except ValueError:
+                new_value = str(value)
+
+        self._edits[(self._object_ids[index.row()], index.column())] = new_value
+        self.dataChanged.emit(index, index, [role, Qt.BackgroundRole])
+        self.dataChangedCustomSignal.emit()
+        return True
+
+    def resetColors(self):
+        self._edits.clear()
+        if self.rowCount() and self.columnCount():
+            self.dataChanged.emit(
+                self.index(0, 0), self.index(self.rowCount() - 1, self.columnCount() - 1), [Qt.BackgroundRole]
+            )
+
+    def sort(self, column, order):
+        self._sort_column = column
+        self._sort_order = order
+        if self._dataset is None:
+            return
+        self.layoutAboutToBeChanged.emit()
+        persistent = self.persistentIndexList()
+        kept = [(self._object_ids[index.row()], index.column()) for index in persistent]
+        self._set_order(self._ordered_ids())
+        self.changePersistentIndexList(
+            persistent, [self.index(self._row_of.get(object_id, -1), column) for object_id, column in kept]
+        )
+        self.layoutChanged.emit()
+
+    def clear(self):
+        self.set_dataset(None)
+
+    def reload(self):
+        """Re-read the dataset's objects, e.g. after some were added, keeping unsaved edits."""
+        self.beginResetModel()
+        self._pages.clear()
+        if self._dataset is not None:
+            self._column_count = self.FIXED_COLUMN_COUNT + len(self._dataset.get_variablename_list() or [])
+            self._set_order(self._ordered_ids())
+        self._edits = {key: value for key, value in self._edits.items() if key[0] in self._row_of}
+        self.endResetModel()
+
+    def load_data(self, data):
+        """Show the dataset's objects as they now are in the database.
+
+        The rows are read from there, so ``data`` itself is not used; see
+        :meth:`reload`.
+        """
+        self.reload()
+
+    def appendRows(self, rows):
+        """Show objects added to the dataset, in their place in the sort order.
+
+        Their cells are read from the database, so ``rows`` themselves are not
+        used; see :meth:`reload`.
+        """
+        self.reload()
+
+    def save_object_info(self):
+        """Write the edited sequences and variables, one save per edited object."""
+        variable_columns = range(self.FIXED_COLUMN_COUNT, self.columnCount())
+        for object_id in dict.fromkeys(object_id for object_id, _column in self._edits):
+            row = self._row_of.get(object_id)
+            if row is None:
+                continue
+            obj = MdObject.get_by_id(object_id)
+            if (object_id, 1) in self._edits:
+                obj.sequence = self._edits[(object_id, 1)]
+            obj.variable_list = [str(self.data(self.index(row, column), Qt.EditRole)) for column in variable_columns]
+            obj.pack_variable()
+            obj.save()
+        self._pages.clear()
+        self.data_changed = False
+
+    def _set_order(self, object_ids):
+        self._object_ids = object_ids
+        self._row_of = {object_id: row for row, object_id in enumerate(object_ids)}
+        # Pages are slices of the order, so a new order invalidates them.
+        self._pages.clear()
+
+    def _ordered_ids(self):
+        """The dataset's object ids, sorted on the current sort column.
+
+        An ``ORDER BY`` on a fixed column unless it has unsaved edits; the
+        variables are packed in ``property_str``, so those columns, and a
+        column with edits, are sorted here from one narrow query.
+        """
+        descending = self._sort_order == Qt.DescendingOrder
+        query = MdObject.select(MdObject.id).where(MdObject.dataset == self._dataset)
+        field = OBJECT_TABLE_SORT_FIELDS.get(self._sort_column)
+        edited = any(column == self._sort_column for _object_id, column in self._edits)
+        if field is not None and not edited:
+            order = field.desc() if descending else field.asc()
+            return [object_id for (object_id,) in query.order_by(order, MdObject.id).tuples()]
+
+        if field is not None:
+            values = dict(query.select(MdObject.id, field).tuples())
+        else:
+            var_idx = self._sort_column - self.FIXED_COLUMN_COUNT
+            values = {}
+            for object_id, property_str in query.select(MdObject.id, MdObject.property_str).tuples():
+                variables = property_str.split(VARIABLE_SEPARATOR) if property_str else []
+                values[object_id] = variables[var_idx] if 0 <= var_idx < len(variables) else ""
+        for (object_id, column), value in self._edits.items():
+            if column == self._sort_column and object_id in values:
+                values[object_id] = value
+        object_ids = sorted(values)
+        try:  # numerically when every value is a number, as MdTableModel.sort
+            return sorted(object_ids, key=lambda object_id: float(values[object_id]), reverse=descending)
+        except (TypeError, ValueError):
+            return sorted(object_ids, key=lambda object_id: str(values[object_id]), reverse=descending)
+
+    def _row(self, row):
+        """``(cells, missing_count)`` for ``row``, reading its page if needed."""
+        page_no = row // self.PAGE_SIZE
+        page = self._pages.get(page_no)
+        if page is None:
+            page = self._read_page(page_no)
+            self._pages[page_no] = page
+            while len(self._pages) > self.MAX_CACHED_PAGES:
+                self._pages.popitem(last=False)
+        else:
+            self._pages.move_to_end(page_no)
+        return page[row - page_no * self.PAGE_SIZE]
+
+    def _read_page(self, page_no):
+        start = page_no * self.PAGE_SIZE
+        object_ids = self._object_ids[start : start + self.PAGE_SIZE]
+        columns = (
+            MdObject.id,
+            MdObject.sequence,
+            MdObject.object_name,
+            MdObject.summary_landmark_count,
+            MdObject.summary_missing_count,
+            MdObject.summary_curve_count,
+            MdObject.summary_centroid_size,
+            MdObject.property_str,
+        )
+        found = {row[0]: row for row in MdObject.select(*columns).where(MdObject.id.in_(object_ids)).tuples()}
+        return [self._read_row(object_id, found.get(object_id)) for object_id in object_ids]
+
+    def _read_row(self, object_id, found):
+        variable_count = self.columnCount() - self.FIXED_COLUMN_COUNT
+        if found is None:  # deleted since the order was read
+            return [object_id, "", "", "", "", ""] + [""] * variable_count, 0
+        _id, sequence, name, recorded, missing, curves, centroid_size, property_str = found
+        if recorded is None:
+            # Not backfilled yet (or written behind save()'s back): work it out
+            # for this row only, without writing from inside a view's paint.
+            try:
+                obj = MdObject.get_by_id(object_id)
+                obj.sync_summary()
+            except Exception as e:
+                logger.error(f"Failed to summarize object id={object_id} ('{name}') for the table: {e}")
+            else:
+                recorded, missing = obj.summary_landmark_count, obj.summary_missing_count
+                curves, centroid_size = obj.summary_curve_count, obj.summary_centroid_size
+        variables = property_str.split(VARIABLE_SEPARATOR) if property_str else []
+        variables = (variables + [""] * variable_count)[:variable_count]
+        cells = [object_id, sequence, name, recorded, curves, centroid_size] + variables
+        return cells, max(0, missing or 0)
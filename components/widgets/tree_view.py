@@ -5,14 +5,20 @@ Part of modular refactoring effort.
 
 import logging
 import sys
+from collections import defaultdict
 
+from peewee import JOIN, fn
 from PyQt5.QtCore import (
     Qt,
 )
+from PyQt5.QtGui import QIcon, QStandardItem, QStandardItemModel
 from PyQt5.QtWidgets import (
     QTreeView,
 )
 
+from MdConstants import ICONS as ICON_CONSTANTS
+from MdModel import MdAnalysis, MdDataset, MdObject
+
 # GLUT import conditional - causes crashes on Windows builds
 GLUT_AVAILABLE = False
 GLUT_INITIALIZED = False
@@ -59,3 +65,161 @@ class MdTreeView(QTreeView):
 
         # Call parent implementation for normal behavior
         super().mousePressEvent(event)
+
+
+#: Number of objects in a dataset node, kept beside the "name (count)" text so
+#: the text can be rebuilt when only the count changes.
+OBJECT_COUNT_ROLE = Qt.ItemDataRole.UserRole + 2
+
+
+class MdDatasetTreeModel(QStandardItemModel):
+    """The dataset tree: datasets, their analyses, then their sub-datasets.
+
+    :meth:`load` builds the whole tree from two queries -- every dataset with
+    its object count, and every analysis -- instead of counting objects,
+    analyses and children node by node. After that the ``add_``/``update_``/
+    ``remove_`` methods change one node in place, which is what the main
+    window does on the controller's signals, so an edit does not rebuild the
+    tree.
+
+    Column 0 carries the ``MdDataset``/``MdAnalysis`` as item data and column 1
+    its id. Analysis nodes carry a narrow ``MdAnalysis`` (id, name, dataset):
+    the full row, with its results, is read when one is selected.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._dataset_items = {}
+        self._analysis_items = {}
+
+    def load(self):
+        self.clear()
+        self._dataset_items = {}
+        self._analysis_items = {}
+        datasets = (
+            MdDataset.select(MdDataset, fn.COUNT(MdObject.id).alias("object_count"))
+            .join(MdObject, JOIN.LEFT_OUTER, on=(MdObject.dataset == MdDataset.id))
+            .group_by(MdDataset.id)
+            .order_by(MdDataset.id)
+        )
+        children = defaultdict(list)
+        for dataset in datasets:
+            children[dataset.parent_id].append(dataset)
+        analyses = defaultdict(list)
+        for analysis in self._analysis_query().order_by(MdAnalysis.id):
+            analyses[analysis.dataset_id].append(analysis)
+
+        pending = [(self.invisibleRootItem(), dataset) for dataset in children[None]]
+        pending.reverse()
+        while pending:
+            parent_item, dataset = pending.pop()
+            item = self._append_dataset(parent_item, dataset, dataset.object_count)
+            for analysis in analyses[dataset.id]:
+                self._append_analysis(item, analysis)
+            pending.extend((item, child) for child in reversed(children[dataset.id]))
+
+    def dataset_item(self, dataset_id):
+        """The column-0 item of a dataset, or ``None`` when it is not in the tree."""
+        return self._dataset_items.get(dataset_id)
+
+    def add_dataset(self, dataset):
+        """Add a new dataset under its parent; ``False`` when the parent is not shown."""
+        if dataset.id in self._dataset_items:
+            return self.update_dataset(dataset)
+        parent_item = self._parent_item(dataset)
+        if parent_item is None:
+            return False
+        self._append_dataset(parent_item, dataset, dataset.object_list.count())
+        return True
+
+    def update_dataset(self, dataset):
+        """Show a dataset's new name, dimension or parent; ``False`` when it is not shown."""
+        item = self._dataset_items.get(dataset.id)
+        if item is None:
+            return self.add_dataset(dataset)
+        new_parent = self._parent_item(dataset)
+        if new_parent is None:
+            return False
+        old_parent = item.parent() or self.invisibleRootItem()
+        if old_parent is not new_parent:
+            new_parent.appendRow(old_parent.takeRow(item.row()))
+        self._set_dataset(item, dataset, item.data(OBJECT_COUNT_ROLE))
+        return True
+
+    def remove_dataset(self, dataset_id):
+        item = self._dataset_items.get(dataset_id)
+        if item is None:
+            return
+        self._forget(item)
+        (item.parent() or self.invisibleRootItem()).removeRow(item.row())
+
+    def adjust_object_count(self, dataset_id, delta):
+        """Change a dataset's shown object count by ``delta`` without a query."""
+        item = self._dataset_items.get(dataset_id)
+        if item is not None:
+            self._set_dataset(item, item.data(), max(0, (item.data(OBJECT_COUNT_ROLE) or 0) + delta))
+
+    def add_analysis(self, analysis):
+        """Add an analysis under its dataset; ``False`` when the dataset is not shown."""
+        item = self._dataset_items.get(analysis.dataset_id)
+        if item is None:
+            return False
+        if analysis.id not in self._analysis_items:
+            narrow = self._analysis_query().where(MdAnalysis.id == analysis.id).first()
+            if narrow is None:
+                return False
+            # After the dataset's other analyses, before its sub-datasets.
+            row = 0
+            while row < item.rowCount() and isinstance(item.child(row, 0).data(), MdAnalysis):
+                row += 1
+            analysis_item, id_item = self._analysis_row(narrow)
+            item.insertRow(row, [analysis_item, id_item])
+        return True
+
+    def remove_analysis(self, analysis_id):
+        item = self._analysis_items.pop(analysis_id, None)
+        if item is not None:
+            item.parent().removeRow(item.row())
+
+    @staticmethod
+    def _analysis_query():
+        return MdAnalysis.select(MdAnalysis.id, MdAnalysis.analysis_name, MdAnalysis.dataset)
+
+    def _parent_item(self, dataset):
+        if dataset.parent_id is None:
+            return self.invisibleRootItem()
+        return self._dataset_items.get(dataset.parent_id)
+
+    def _append_dataset(self, parent_item, dataset, object_count):
+        item = QStandardItem()
+        self._set_dataset(item, dataset, object_count)
+        parent_item.appendRow([item, QStandardItem(str(dataset.id))])
+        self._dataset_items[dataset.id] = item
+        return item
+
+    def _set_dataset(self, item, dataset, object_count):
+        dataset.unpack_wireframe()
+        item.setText(f"{dataset.dataset_name} ({object_count})")
+        item.setIcon(QIcon(ICON_CONSTANTS["dataset_2d" if dataset.dimension == 2 else "dataset_3d"]))
+        item.setData(dataset)
+        item.setData(object_count, OBJECT_COUNT_ROLE)
+
+    def _append_analysis(self, parent_item, analysis):
+        parent_item.appendRow(list(self._analysis_row(analysis)))
+
+    def _analysis_row(self, analysis):
+        item = QStandardItem(analysis.analysis_name)
+        item.setIcon(QIcon(ICON_CONSTANTS["analysis"]))
+        item.setData(analysis)
+        self._analysis_items[analysis.id] = item
+        return item, QStandardItem(str(analysis.id))
+
+    def _forget(self, item):
+        """Drop ``item`` and everything below it from the id lookups."""
+        data = item.data()
+        if isinstance(data, MdDataset):
+            self._dataset_items.pop(data.id, None)
+        elif isinstance(data, MdAnalysis):
+            self._analysis_items.pop(data.id, None)
+        for row in range(item.rowCount()):
+            self._forget(item.child(row, 0))
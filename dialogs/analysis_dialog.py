@@ -28,6 +28,10 @@ class NewAnalysisDialog(BaseDialog):
     - CVA/MANOVA grouping variable selection
     - Progress tracking with bar and status messages
     - Signal-based communication with controller
+
+    The analysis runs on the controller's worker thread
+    (``ModanController.start_analysis``), so the dialog stays responsive and
+    Cancel stops a run part-way.
     """
 
     def __init__(self, parent, dataset):
@@ -54,6 +58,9 @@ class NewAnalysisDialog(BaseDialog):
         self.controller = parent.controller
         self.analysis_running = False
         self.analysis_completed = False
+        self.cancel_requested = False
+        # Whether the dialog holds the application's wait cursor.
+        self.wait_cursor = False
 
         # Create UI
         self._create_widgets()
@@ -170,6 +177,12 @@ class NewAnalysisDialog(BaseDialog):
         if hasattr(self.controller, "analysis_failed"):
             self.signal_connections.append((self.controller.analysis_failed, self.on_analysis_failed))
             self.controller.analysis_failed.connect(self.on_analysis_failed)
+        if hasattr(self.controller, "analysis_step"):
+            self.signal_connections.append((self.controller.analysis_step, self.on_analysis_step))
+            self.controller.analysis_step.connect(self.on_analysis_step)
+        if hasattr(self.controller, "analysis_cancelled"):
+            self.signal_connections.append((self.controller.analysis_cancelled, self.on_analysis_cancelled))
+            self.controller.analysis_cancelled.connect(self.on_analysis_cancelled)
 
     def edtAnalysisName_changed(self):
         """Handle analysis name text change."""
@@ -207,9 +220,10 @@ class NewAnalysisDialog(BaseDialog):
         # Disable controls during analysis
         self.set_controls_enabled(False)
         self.analysis_running = True
+        self.cancel_requested = False
 
         # Set wait cursor during analysis
-        QApplication.setOverrideCursor(Qt.WaitCursor)
+        self.set_wait_cursor(True)
 
         # Show progress bar and status
         self.progressBar.show()
@@ -219,7 +233,7 @@ class NewAnalysisDialog(BaseDialog):
 
         # Change button text
         self.btnOK.setText(self.tr("Running..."))
-        self.btnCancel.setText(self.tr("Close"))
+        self.btnCancel.setText(self.tr("Cancel"))
 
         try:
             # Validate dataset
@@ -228,22 +242,34 @@ class NewAnalysisDialog(BaseDialog):
                 return
 
             self.lblStatus.setText(self.tr("Starting analysis..."))
-            QApplication.processEvents()
 
-            # Run analysis
-            self.controller.run_analysis(
+            # Start the analysis; it computes on a worker thread and reports
+            # back through the controller's signals.
+            worker = self.controller.start_analysis(
                 dataset=self.dataset,
                 analysis_name=self.analysis_name,
                 superimposition_method=self.superimposition_method,
                 cva_group_by=self.cva_group_by,
                 manova_group_by=self.manova_group_by,
             )
+            if worker is None and self.analysis_running:
+                # Refused without a failure signal (e.g. another run in progress)
+                self.on_analysis_failed(self.tr("The analysis could not be started"))
 
         except Exception as e:
             self.on_analysis_failed(str(e))
 
     def btnCancel_clicked(self):
-        """Handle cancel button click."""
+        """Handle cancel button click.
+
+        While an analysis runs this cancels it rather than closing: the run
+        stops at its next checkpoint, and ``on_analysis_cancelled`` re-enables
+        the dialog.
+        """
+        if self.analysis_running:
+            self.request_cancel()
+            return
+
         # Disconnect signals before closing
         self.cleanup_connections()
 
@@ -254,6 +280,15 @@ class NewAnalysisDialog(BaseDialog):
             # Otherwise reject
             self.reject()
 
+    def request_cancel(self):
+        """Ask the controller to stop the running analysis."""
+        if self.cancel_requested:
+            return
+        self.cancel_requested = True
+        self.btnCancel.setEnabled(False)
+        self.lblStatus.setText(self.tr("Cancelling..."))
+        self.controller.cancel_analysis()
+
     def set_controls_enabled(self, enabled):
         """Enable/disable input controls.
 
@@ -274,19 +309,54 @@ class NewAnalysisDialog(BaseDialog):
         """
         self.progressBar.setValue(progress)
 
-        # Update status message based on progress
-        if progress < 25:
-            self.lblStatus.setText(self.tr("Validating objects and landmarks..."))
+        if self.cancel_requested:
+            return
+
+        # Update status message based on progress (bands: MdAnalysisWorker.ANALYSIS_STAGES)
+        if progress < 40:
+            self.lblStatus.setText(self.tr("Performing superimposition..."))
         elif progress < 50:
-            self.lblStatus.setText(self.tr("Performing Procrustes superimposition..."))
-        elif progress < 75:
             self.lblStatus.setText(self.tr("Running PCA analysis..."))
-        elif progress < 90:
-            self.lblStatus.setText(self.tr("Computing CVA and MANOVA..."))
+        elif progress < 85:
+            self.lblStatus.setText(self.tr("Computing CVA..."))
+        elif progress < 95:
+            self.lblStatus.setText(self.tr("Computing MANOVA..."))
         else:
             self.lblStatus.setText(self.tr("Finalizing results..."))
 
-        QApplication.processEvents()
+    def on_analysis_step(self, stage, done, total):
+        """Show the unit of work the analysis has reached.
+
+        Args:
+            stage: Stage key (see ``MdAnalysisWorker.ANALYSIS_STAGES``)
+            done: Units of the stage completed
+            total: Units in the stage (for the superimposition, the iteration cap)
+        """
+        if self.cancel_requested or done <= 0:
+            return
+        if stage == "superimposition":
+            text = self.tr("Superimposition: iteration {} (at most {})").format(done, total)
+        elif stage == "cva":
+            text = self.tr("CVA cross-validation: fold {} of {}").format(done, total)
+        elif stage == "manova":
+            text = self.tr("MANOVA: step {} of {}").format(done, total)
+        else:
+            return
+        self.lblStatus.setText(text)
+
+    def on_analysis_cancelled(self):
+        """Return the dialog to its ready state after a cancelled run."""
+        self.set_wait_cursor(False)
+        self.analysis_running = False
+        self.cancel_requested = False
+
+        self.progressBar.setValue(0)
+        self.lblStatus.setText(self.tr("Analysis cancelled"))
+
+        self.set_controls_enabled(True)
+        self.btnCancel.setEnabled(True)
+        self.btnOK.setText(self.tr("OK"))
+        self.btnCancel.setText(self.tr("Close"))
 
     def on_analysis_completed(self, analysis):
         """Handle successful analysis completion.
@@ -302,7 +372,7 @@ class NewAnalysisDialog(BaseDialog):
         self.analysis_running = False
 
         # Restore normal cursor
-        QApplication.restoreOverrideCursor()
+        self.set_wait_cursor(False)
 
         self.progressBar.setValue(100)
         self.lblStatus.setText(self.tr("Analysis completed successfully!"))
@@ -310,6 +380,7 @@ class NewAnalysisDialog(BaseDialog):
 
         # Re-enable controls
         self.set_controls_enabled(True)
+        self.btnCancel.setEnabled(True)
 
         # Change button text
         self.btnOK.setText(self.tr("OK"))
@@ -326,7 +397,7 @@ class NewAnalysisDialog(BaseDialog):
             error_msg: Error message to display
         """
         # Restore normal cursor
-        QApplication.restoreOverrideCursor()
+        self.set_wait_cursor(False)
 
         self.progressBar.setValue(0)
         self.lblStatus.setText(self.tr("Analysis failed: {}").format(error_msg))
@@ -334,7 +405,9 @@ class NewAnalysisDialog(BaseDialog):
 
         # Re-enable controls
         self.set_controls_enabled(True)
+        self.btnCancel.setEnabled(True)
         self.analysis_running = False
+        self.cancel_requested = False
 
         # Reset button text
         self.btnOK.setText(self.tr("OK"))
@@ -342,10 +415,24 @@ class NewAnalysisDialog(BaseDialog):
 
         QMessageBox.critical(self, self.tr("Analysis Failed"), self.tr("Analysis failed:\n{}").format(error_msg))
 
+    def set_wait_cursor(self, waiting):
+        """Show or restore the wait cursor, pushing or popping it only once.
+
+        The cursor is an application-wide stack, so restoring one this dialog
+        did not set would pop another's.
+        """
+        if waiting == self.wait_cursor:
+            return
+        self.wait_cursor = waiting
+        if waiting:
+            QApplication.setOverrideCursor(Qt.WaitCursor)
+        else:
+            QApplication.restoreOverrideCursor()
+
     def cleanup_connections(self):
         """Disconnect all signal connections to prevent errors on close."""
         # Restore cursor if still in wait state
-        QApplication.restoreOverrideCursor()
+        self.set_wait_cursor(False)
 
         for signal, slot in self.signal_connections:
             # Signal might already be disconnected
@@ -367,6 +454,14 @@ class NewAnalysisDialog(BaseDialog):
         Args:
             event: QCloseEvent
         """
+        # Closing mid-run abandons the analysis rather than leaving it to save
+        # a result after the dialog has gone. The cancellation completes
+        # later, after the disconnect below, so on_analysis_cancelled never
+        # runs to restore the cursor; do it here.
+        if self.analysis_running:
+            if not self.cancel_requested:
+                self.controller.cancel_analysis()
+            self.set_wait_cursor(False)
         self.cleanup_connections()
         event.accept()
 
@@ -65,6 +65,7 @@ from dialogs.scatter_utils import (
 )
 from MdHelpers import guard_slot
 from MdModel import MdDataset, MdObject
+from MdStatistics import ShapeReconstructor
 from ModanComponents import ObjectViewer2D, ObjectViewer3D, ShapePreference
 
 logger = logging.getLogger(__name__)
@@ -86,6 +87,12 @@ MODE_AVERAGE = 2
 MODE_COMPARISON = 3
 MODE_COMPARISON2 = 4
 
+# Deformation grid of the overlapping comparison view: lines along each axis,
+# and points each is drawn through. The warp is one matrix product per shape
+# (MdThinPlateSpline), so a dense grid keeps up with the shape animation.
+COMPARISON_GRID_LINES = 40
+COMPARISON_GRID_SAMPLES = 160
+
 
 def safe_remove_artist(artist, ax=None):
     """Safely remove matplotlib artist from plot"""
@@ -133,6 +140,7 @@ class DataExplorationDialog(QDialog):
         super().__init__()
         # print("DataExplorationDialog init")
         self.parent = parent
+        self._shape_reconstructor = None
         self.setWindowTitle(self.tr("Modan2 - Data Exploration"))
         self.setWindowFlags(Qt.WindowMaximizeButtonHint | Qt.WindowMinimizeButtonHint | Qt.WindowCloseButtonHint)
         # self.setWindowFlags(Qt.FramelessWindowHint)  # Removes window decoration
@@ -1207,6 +1215,9 @@ class DataExplorationDialog(QDialog):
             self.shape_button_list[1].show()
             self.shape_view_list[1].hide()
             self.shape_view_list[0].show_arrow = True
+            if isinstance(self.shape_view_list[0], ObjectViewer2D):
+                self.shape_view_list[0].tps_grid_lines = COMPARISON_GRID_LINES
+                self.shape_view_list[0].tps_grid_samples = COMPARISON_GRID_SAMPLES
 
     def arrow_preference_changed(self):
         self.shape_view_list[0].show_arrow = self.cbxArrow.isChecked()
@@ -1731,6 +1742,7 @@ class DataExplorationDialog(QDialog):
         # print("set_analysis", analysis, analysis_method, group_by, self.ignore_change)
         self.analysis = analysis
         self.analysis_method = analysis_method
+        self._shape_reconstructor = None
         self.edtAnalysisName.setText(analysis.analysis_name)
         self.edtSuperimposition.setText(analysis.superimposition_method)
         self.edtOrdination.setText(self.analysis_method)
@@ -1788,11 +1800,11 @@ class DataExplorationDialog(QDialog):
             if "property_list" in obj:
                 obj["variable_list"] = obj["property_list"]
         if self.analysis_method == "PCA":
-            self.analysis_result_list = json.loads(self.analysis.pca_analysis_result_json)
+            self.analysis_result_list = self.analysis.get_result_list("pca_analysis_result")
             # Load eigenvalues for displaying variance explained
-            if self.analysis.pca_eigenvalues_json:
+            if self.analysis.has_result("pca_eigenvalues"):
                 try:
-                    eigenvalues_data = json.loads(self.analysis.pca_eigenvalues_json)
+                    eigenvalues_data = self.analysis.get_result_list("pca_eigenvalues")
                     # eigenvalues_data is a list of [eigenvalue, percentage] pairs
                     self.eigen_value_percentages = [item[1] for item in eigenvalues_data] if eigenvalues_data else []
                 except (json.JSONDecodeError, KeyError, IndexError, TypeError) as e:
@@ -1801,7 +1813,7 @@ class DataExplorationDialog(QDialog):
             else:
                 self.eigen_value_percentages = []
         elif self.analysis_method == "CVA":
-            self.analysis_result_list = json.loads(self.analysis.cva_analysis_result_json)
+            self.analysis_result_list = self.analysis.get_result_list("cva_analysis_result")
 
         # print("set_analysis 6", analysis, analysis_method, group_by, self.ignore_change)
 
@@ -2817,35 +2829,30 @@ class DataExplorationDialog(QDialog):
         #    if int(self.object_model.item(row,0).text()) in selected_object_id_list:
         #        self.tableView.selectionModel().select(self.object_model.item(row,0).index(),QItemSelectionModel.Rows | QItemSelectionModel.Select)
 
-    def unrotate_shape(self, shape):
+    def shape_reconstructor(self):
+        """The current analysis's ShapeReconstructor, built on first use.
+
+        Decoding the rotation matrix and the superimposed shapes, inverting the
+        one and averaging the other is done once per analysis, not on every
+        mouse move or animation frame.
+        """
+        cached = self._shape_reconstructor
+        if cached is not None and cached[0] is self.analysis and cached[1] == self.analysis_method:
+            return cached[2]
         if self.analysis_method == "PCA":
-            rotation_matrix = json.loads(self.analysis.pca_rotation_matrix_json)
+            rotation_matrix = self.analysis.get_result_array("pca_rotation_matrix")
         elif self.analysis_method == "CVA":
-            rotation_matrix = json.loads(self.analysis.cva_rotation_matrix_json)
+            rotation_matrix = self.analysis.get_result_array("cva_rotation_matrix")
         else:
             raise ValueError(f"unrotate_shape: unsupported analysis method '{self.analysis_method}'")
-        # rotation_matrix = json.loads(self.analysis.rotation_matrix_json)
-
-        inverted_matrix = np.linalg.inv(rotation_matrix)
-        # print("inverted_matrix", inverted_matrix)
 
-        unrotated_shape = np.dot(shape, inverted_matrix)
-
-        all_shapes = np.array(json.loads(self.analysis.superimposed_landmark_json))
-        # get average of all_shapes
+        all_shapes = self.analysis.get_result_array("superimposed_landmark")
         average_shape = np.mean(all_shapes, axis=0)
-        average_shape = average_shape.reshape(1, -1)
-
-        # For PCA/CVA space (144D) to original 3D space (216D) conversion
-        if average_shape.shape[1] != unrotated_shape.shape[1]:
-            # Instead of complex transformation, use the picked point from original space
-            # The 'shape' parameter should correspond to original landmark data
-            final_shape = average_shape  # For now, just return average shape
-            print(
-                f"Note: Using average shape due to dimension mismatch ({unrotated_shape.shape[1]}D vs {average_shape.shape[1]}D)"
-            )
-        else:
-            final_shape = average_shape + unrotated_shape
-        # print("final shape", final_shape.shape,final_shape)
+        reconstructor = ShapeReconstructor(rotation_matrix, average_shape)
+        self._shape_reconstructor = (self.analysis, self.analysis_method, reconstructor)
+        return reconstructor
 
-        return final_shape
+    def unrotate_shape(self, shape):
+        # When the ordination space and the landmark space disagree in size the
+        # reconstructor falls back to the average shape.
+        return self.shape_reconstructor().reconstruct(shape)
@@ -22,10 +22,10 @@ from PyQt5.QtWidgets import (
 )
 
 import MdUtils as mu
+from components.formats import SPECIMEN_STREAMS
 from dialogs.base_dialog import BaseDialog
 from MdHelpers import guard_slot
 from MdModel import MdDataset
-from ModanComponents import NTS, TPS, X1Y1, Morphologika
 
 logger = logging.getLogger(__name__)
 
@@ -69,6 +69,8 @@ class ImportDatasetDialog(BaseDialog):
 
         parent_controller = getattr(parent, "controller", None)
         self.controller = parent_controller if isinstance(parent_controller, ModanController) else ModanController()
+        # (filetype, filename, invertY) and the stream surveyed for it; see _surveyed_stream.
+        self._survey = None
         self.read_settings()
 
         self._create_widgets()
@@ -210,19 +212,27 @@ class ImportDatasetDialog(BaseDialog):
         if self.file_ext.lower() == ".tps":
             self.rbnTPS.setChecked(True)
             self.file_type_changed()
-            import_data = TPS(filename, self.edtDatasetName.text(), self.cbxInvertY.isChecked())
+            import_data = self._surveyed_stream(
+                "TPS", filename, self.edtDatasetName.text(), self.cbxInvertY.isChecked()
+            )
         elif self.file_ext.lower() == ".nts":
             self.rbnNTS.setChecked(True)
             self.file_type_changed()
-            import_data = NTS(filename, self.edtDatasetName.text(), self.cbxInvertY.isChecked())
+            import_data = self._surveyed_stream(
+                "NTS", filename, self.edtDatasetName.text(), self.cbxInvertY.isChecked()
+            )
         elif self.file_ext.lower() == ".x1y1":
             self.rbnX1Y1.setChecked(True)
             self.file_type_changed()
-            import_data = X1Y1(filename, self.edtDatasetName.text(), self.cbxInvertY.isChecked())
+            import_data = self._surveyed_stream(
+                "X1Y1", filename, self.edtDatasetName.text(), self.cbxInvertY.isChecked()
+            )
         elif self.file_ext.lower() == ".txt":
             self.rbnMorphologika.setChecked(True)
             self.file_type_changed()
-            import_data = Morphologika(filename, self.edtDatasetName.text(), self.cbxInvertY.isChecked())
+            import_data = self._surveyed_stream(
+                "Morphologika", filename, self.edtDatasetName.text(), self.cbxInvertY.isChecked()
+            )
         elif self.file_ext.lower() == ".zip":
             self._handle_zip_file(filename)
             return
@@ -230,7 +240,7 @@ class ImportDatasetDialog(BaseDialog):
             self._handle_unsupported_file()
             return
 
-        if import_data and len(import_data.object_name_list) > 0:
+        if import_data and import_data.nobjects > 0:
             self.edtObjectCount.setText(str(import_data.nobjects))
             if import_data.dimension == 2:
                 self.rb2D.setChecked(True)
@@ -320,12 +330,12 @@ class ImportDatasetDialog(BaseDialog):
         if import_data is None:
             return
 
-        if not self._resolve_missing_sentinels(import_data, invertY):
+        if not self._resolve_missing_sentinels(import_data):
             return
 
         self._execute_import(import_data, datasetname, filetype)
 
-    def _resolve_missing_sentinels(self, import_data, invertY):
+    def _resolve_missing_sentinels(self, stream):
         """Offer to convert ``-999`` placeholders into missing landmarks.
 
         The morphometrics convention for "not recorded" is a ``-999`` coordinate,
@@ -333,19 +343,18 @@ class ImportDatasetDialog(BaseDialog):
         (-999, -999). Asking rather than converting silently matters because a
         dataset *could* legitimately contain -999.
 
+        ``stream`` has been surveyed, so the placeholders are already counted;
+        the answer sets whether it converts them as the import reads it.
+
         Returns False if the user cancelled the import.
         """
-        landmark_data = getattr(import_data, "landmark_data", None)
-        if not landmark_data:
-            return True
-
-        hits = mu.find_missing_sentinels(landmark_data, inverted_y=invertY)
-        if not hits:
+        count = getattr(stream, "sentinel_count", 0)
+        if not count:
             return True
 
         remembered = self.m_app.settings.value(SENTINEL_SETTING_KEY, None)
         if remembered is None:
-            answer, always = self._ask_about_sentinels(len(hits))
+            answer, always = self._ask_about_sentinels(count)
             if answer is None:
                 return False
             if always:
@@ -353,11 +362,11 @@ class ImportDatasetDialog(BaseDialog):
         else:
             answer = mu.value_to_bool(remembered)
 
+        stream.missing_sentinel = answer
         if answer:
-            mu.replace_missing_sentinels(landmark_data, hits)
-            logger.info("Converted %d sentinel coordinate(s) to missing landmarks", len(hits))
+            logger.info("Converting %d sentinel coordinate(s) to missing landmarks", count)
         else:
-            logger.info("Kept %d sentinel coordinate(s) as literal values", len(hits))
+            logger.info("Keeping %d sentinel coordinate(s) as literal values", count)
         return True
 
     def _ask_about_sentinels(self, count):
@@ -387,7 +396,7 @@ class ImportDatasetDialog(BaseDialog):
         return result == QMessageBox.Yes, checkbox.isChecked()
 
     def _get_import_data(self, filetype, filename, datasetname, invertY):
-        """Get import data object based on file type.
+        """Get the surveyed stream to import the file from, by file type.
 
         Args:
             filetype: Type of file (TPS, NTS, etc.)
@@ -396,17 +405,25 @@ class ImportDatasetDialog(BaseDialog):
             invertY: Whether to invert Y coordinates
 
         Returns:
-            Import data object or None
+            A surveyed ``SpecimenStream``, or None for an unknown type
+        """
+        if filetype not in SPECIMEN_STREAMS:
+            return None
+        return self._surveyed_stream(filetype, filename, datasetname, invertY)
+
+    def _surveyed_stream(self, filetype, filename, datasetname, invertY):
+        """A stream over ``filename``, read through once for its counts.
+
+        The survey made when a file is selected is kept for its import, so a
+        file is read twice in all -- to preview it and to import it -- and is
+        never held in memory whole.
         """
-        if filetype == "TPS":
-            return TPS(filename, datasetname, invertY)
-        if filetype == "NTS":
-            return NTS(filename, datasetname, invertY)
-        if filetype == "X1Y1":
-            return X1Y1(filename, datasetname, invertY)
-        if filetype == "Morphologika":
-            return Morphologika(filename, datasetname, invertY)
-        return None
+        key = (filetype, filename, invertY)
+        if self._survey is None or self._survey[0] != key:
+            self._survey = (key, SPECIMEN_STREAMS[filetype](filename, datasetname, invertY).survey())
+        stream = self._survey[1]
+        stream.datasetname = datasetname
+        return stream
 
     def _import_json_zip(self, filename):
         """Import dataset from JSON+ZIP package.
@@ -441,7 +458,7 @@ class ImportDatasetDialog(BaseDialog):
         """Execute import from parsed data.
 
         Args:
-            import_data: Parsed import data object
+            import_data: Surveyed stream over the file
             datasetname: Name for new dataset
             filetype: Type of file being imported
         """
@@ -453,10 +470,11 @@ class ImportDatasetDialog(BaseDialog):
         self.edtObjectCount.setText(str(import_data.nobjects))
 
         def progress_callback(done, total):
-            self.update_progress(int(float(done) * 100.0 / float(total)))
+            self.update_progress(int(float(done) * 100.0 / float(total)) if total else 100)
 
-        # Persistence (dataset + objects + images) is delegated to the controller.
-        self.controller.import_dataset(import_data, datasetname, self.m_app.storage_directory, progress_callback)
+        # Persistence (dataset + objects + images) is delegated to the controller,
+        # which stores the specimens in batches while the file is read.
+        self.controller.import_stream(import_data, datasetname, self.m_app.storage_directory, progress_callback)
 
         # Show completion message
         QMessageBox.information(self, self.tr("Import"), self.tr("Finished importing a {} file.").format(filetype))
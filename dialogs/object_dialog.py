@@ -48,9 +48,10 @@ from PyQt5.QtWidgets import (
 import MdUtils as mu
 from components.widgets import PicButton
 from dialogs.calibration_dialog import CalibrationDialog
+from dialogs.object_prefetch import PREFETCH_DEPTH, ImagePrefetcher
 from MdConstants import ICONS as ICON
 from MdHelpers import guard_slot
-from MdModel import MdDataset, MdObject, MdObjectOps, impute_missing_landmarks
+from MdModel import MdDataset, MdDatasetOps, MdObject, MdObjectOps, impute_missing_landmarks, object_image_paths
 from ModanComponents import ObjectViewer2D, ObjectViewer3D
 
 logger = logging.getLogger(__name__)
@@ -174,6 +175,14 @@ class ObjectDialog(QDialog):
         self.object_view_2d = ObjectViewer2D(self)
         self.object_view_2d.object_dialog = self
         self.object_view_2d.setSizePolicy(QSizePolicy.Ignored, QSizePolicy.Ignored)
+        # Images of the objects around the current one, decoded ahead for
+        # Previous/Next (see _prefetch_neighbours).
+        self.prefetcher = ImagePrefetcher()
+        self.object_view_2d.prefetcher = self.prefetcher
+        self.finished.connect(self.prefetcher.shutdown)
+        # One MdDatasetOps of the dataset for the viewers across navigation;
+        # building it reads every object of the dataset.
+        self._dataset_ops = None
         # self.image_label.clicked.connect(self.on_image_clicked)
 
         self.pixmap = QPixmap(1024, 768)
@@ -979,6 +988,7 @@ class ObjectDialog(QDialog):
 
         # Invalidate cache when dataset changes
         self._aligned_mean_cache = None
+        self._dataset_ops = None
 
         header = self.edtLandmarkStr.horizontalHeader()
         if self.dataset.dimension == 2:
@@ -1088,7 +1098,7 @@ class ObjectDialog(QDialog):
             # print("set_object 3d 3")
             if obj is not None:
                 # print("obj dialog self.landmark_list in set obj 3d", self.landmark_list)
-                self.object_view.set_object(obj)
+                self.object_view.set_object(obj, ds_ops=self._viewer_dataset_ops(dataset_to_use))
                 self.object_view.landmark_list = self.landmark_list
                 self.object_view.update_landmark_list()
                 self.object_view.calculate_resize()
@@ -1134,7 +1144,7 @@ class ObjectDialog(QDialog):
                 # elif len(self.landmark_list) > 0:
                 # print("objectdialog self.landmark_list in set obj 2d", self.landmark_list)
                 self.object_view.clear_object()
-                self.object_view.set_object(obj)
+                self.object_view.set_object(obj, ds_ops=self._viewer_dataset_ops(dataset_to_use))
                 self.object_view.image_changed = False
                 self.object_view.landmark_list = self.landmark_list
                 self.object_view.update_landmark_list()
@@ -1156,6 +1166,16 @@ class ObjectDialog(QDialog):
         # now populated).
         self._saved_snapshot = self._snapshot_state()
 
+    def _viewer_dataset_ops(self, dataset):
+        """The viewers' ``MdDatasetOps`` of ``dataset``, built once per dataset.
+
+        In object mode the viewers read only its dataset-wide geometry
+        (wireframe, baseline), which stepping between objects does not change.
+        """
+        if self._dataset_ops is None or self._dataset_ops.id != dataset.id:
+            self._dataset_ops = MdDatasetOps(dataset)
+        return self._dataset_ops
+
     def enable_landmark_edit(self):
         self.btnLandmark.setEnabled(True)
         self.btnLandmark.setDown(True)
@@ -1751,6 +1771,10 @@ class ObjectDialog(QDialog):
 
     def set_tableview(self, tableview):
         self.tableView = tableview
+        if self.object is not None and self.object.id is not None:
+            object_id_list, _ = self._navigation_rows()
+            if self.object.id in object_id_list:
+                self._prefetch_neighbours(object_id_list, object_id_list.index(self.object.id))
 
     @guard_slot("Failed to delete object")
     def Delete(self):
@@ -1786,85 +1810,64 @@ class ObjectDialog(QDialog):
 
         return selected_object_list
 
-    @guard_slot("Failed to save object")
-    def Previous(self):
-        # get all items from tableView
+    def _navigation_rows(self):
+        """Object ids in the order the table shows them, with their proxy indexes."""
         model = self.tableView.model()
         object_id_list = []
         proxy_index_list = []
         for row in range(model.rowCount()):
-            proxy_index = self.tableView.model().index(row, 0)
+            proxy_index = model.index(row, 0)
             proxy_index_list.append(proxy_index)
-            index = self.tableView.model().mapToSource(proxy_index)
+            index = model.mapToSource(proxy_index)
+            object_id_list.append(self.parent.object_model.object_id(index.row()))
+        return object_id_list, proxy_index_list
+
+    def _step_to(self, offset):
+        """Save the current object and show the one ``offset`` rows away in the table."""
+        object_id_list, proxy_index_list = self._navigation_rows()
+        new_index = object_id_list.index(self.object.id) + offset
+        if new_index < 0 or new_index >= len(object_id_list):
+            return
+        new_object = MdObject.get_by_id(object_id_list[new_index])
 
-            object_id = self.parent.object_model._data[index.row()][0]["value"]
-            object_id = int(object_id)
-            object_id_list.append(object_id)
-
-        new_index = -1
-        if object_id_list.index(self.object.id) > 0:
-            new_index = object_id_list.index(self.object.id) - 1
-            new_object_id = object_id_list[new_index]
-            new_object = MdObject.get_by_id(new_object_id)
-
-        if new_index >= 0:
-            # enable or disable prev and next button
-            if new_index == 0:
-                self.btnPrevious.setEnabled(False)
-            else:
-                self.btnPrevious.setEnabled(True)
-            if new_index == len(object_id_list) - 1:
-                self.btnNext.setEnabled(False)
-            else:
-                self.btnNext.setEnabled(True)
+        # enable or disable prev and next button
+        self.btnPrevious.setEnabled(new_index > 0)
+        self.btnNext.setEnabled(new_index < len(object_id_list) - 1)
+
+        self.save_object()
+        self.set_object(new_object)
+        # select new object in tableView
+        self.tableView.selectRow(proxy_index_list[new_index].row())
+        self._prefetch_neighbours(object_id_list, new_index)
+
+    def _prefetch_neighbours(self, object_id_list, index):
+        """Start decoding the images of the objects around ``object_id_list[index]``.
 
-            self.save_object()
-            self.set_object(new_object)
-            # select new object in tableView
-            new_proxy_index = proxy_index_list[new_index]
-            # new_index = self.object_model.indexFromId(new_object_id)
-            self.tableView.selectRow(new_proxy_index.row())
+        Nearest first, the next object before the previous one, so stepping
+        on finds its image ready soonest.
+        """
+        if self.dataset is None or self.dataset.dimension != 2:
+            return
+        neighbours = [
+            object_id_list[neighbour]
+            for distance in range(1, PREFETCH_DEPTH + 1)
+            for neighbour in (index + distance, index - distance)
+            if 0 <= neighbour < len(object_id_list)
+        ]
+        paths = object_image_paths(neighbours)
+        self.prefetcher.prefetch(
+            [paths[object_id] for object_id in neighbours if object_id in paths],
+            canvas_size=(self.object_view_2d.width(), self.object_view_2d.height()),
+            storage_base=mu.get_storage_directory(),
+        )
 
-            # self.accept()
+    @guard_slot("Failed to save object")
+    def Previous(self):
+        self._step_to(-1)
 
     @guard_slot("Failed to save object")
     def Next(self):
-        # get all items from tableView
-        model = self.tableView.model()
-        object_id_list = []
-        proxy_index_list = []
-        for row in range(model.rowCount()):
-            proxy_index = self.tableView.model().index(row, 0)
-            proxy_index_list.append(proxy_index)
-            index = self.tableView.model().mapToSource(proxy_index)
-
-            object_id = self.parent.object_model._data[index.row()][0]["value"]
-            object_id = int(object_id)
-            object_id_list.append(object_id)
-
-        new_index = -1
-        if object_id_list.index(self.object.id) < len(object_id_list) - 1:
-            new_index = object_id_list.index(self.object.id) + 1
-            new_object_id = object_id_list[new_index]
-            new_object = MdObject.get_by_id(new_object_id)
-
-        if new_index >= 0:
-            # enable or disable prev and next button
-            if new_index == 0:
-                self.btnPrevious.setEnabled(False)
-            else:
-                self.btnPrevious.setEnabled(True)
-            if new_index == len(object_id_list) - 1:
-                self.btnNext.setEnabled(False)
-            else:
-                self.btnNext.setEnabled(True)
-
-            self.save_object()
-            self.set_object(new_object)
-            new_proxy_index = proxy_index_list[new_index]
-            # new_index = self.object_model.indexFromId(new_object_id)
-            self.tableView.selectRow(new_proxy_index.row())
-            # self.accept()
+        self._step_to(1)
 
     @guard_slot("Failed to save object")
     def Okay(self):
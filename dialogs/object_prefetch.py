@@ -0,0 +1,107 @@
+"""Loading the images of neighbouring objects ahead of the object dialog.
+
+Stepping through specimens with Previous/Next used to decode each image on the
+spot, which for a working copy of a few megapixels is most of the wait between
+one specimen and the next. While one object is being digitized,
+:class:`ImagePrefetcher` decodes the images of the objects either side of it on
+a worker thread, so the next step only has to turn a decoded image into a
+pixmap.
+
+The split of work follows ``MdAnalysisWorker``: the dialog reads the database
+on the main thread, and the worker gets file paths only. It decodes each image
+into a ``QImage`` (``QPixmap`` may only be made on the GUI thread) and
+prepares the level of its tile pyramid (``components.viewers.tile_pyramid``)
+that the viewer will draw it at.
+"""
+
+import logging
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+
+from PyQt5.QtGui import QImage
+
+from components.viewers.tile_pyramid import TilePyramid
+
+logger = logging.getLogger(__name__)
+
+# Objects to load ahead on each side of the current one. Each held image is a
+# decoded working copy, up to about 20 MB at MdModel.IMAGE_MAX_DIM.
+PREFETCH_DEPTH = 2
+
+
+class PrefetchedImage:
+    """An image file decoded ahead: ``image`` is a ``QImage``, ``pyramid`` a
+    ``TilePyramid`` or None when PIL cannot read the file."""
+
+    def __init__(self, path, image, pyramid):
+        self.path = path
+        self.image = image
+        self.pyramid = pyramid
+
+
+def load_image(path, canvas_size=None, storage_base=None):
+    """Decode ``path`` for the viewer; None (logged) when it cannot be read.
+
+    With ``canvas_size`` (width, height), the pyramid level that fits the image
+    into it is generated as well, its tiles written under ``storage_base`` as
+    ``TilePyramid`` does.
+    """
+    image = QImage(path)
+    if image.isNull():
+        logger.warning(f"Cannot prefetch image {path}")
+        return None
+    pyramid = TilePyramid.open(path, storage_base=storage_base)
+    if pyramid is not None and canvas_size is not None and min(canvas_size) > 0:
+        ratio = max(image.width() / canvas_size[0], image.height() / canvas_size[1])
+        pyramid.prepare(pyramid.level_for(ratio))
+    return PrefetchedImage(path, image, pyramid)
+
+
+class ImagePrefetcher:
+    """Images decoded on a worker thread, keyed by file path.
+
+    :meth:`prefetch` names the images worth holding; any other is dropped and
+    the new ones are queued. :meth:`take` hands one over, waiting for it if it
+    is still being decoded. Call :meth:`shutdown` when done with it.
+
+    An image held is never stale: images are stored under their content hash
+    (``MdMediaStore``), so a replaced image comes under a new path.
+    """
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="image-prefetch")
+        self._pending = {}
+
+    def prefetch(self, paths, canvas_size=None, storage_base=None):
+        """Hold the images at ``paths``, decoding those not already held.
+
+        ``storage_base`` is resolved by the caller, on the GUI thread; see
+        :func:`load_image`.
+        """
+        wanted = list(dict.fromkeys(path for path in paths if path))
+        for path in list(self._pending):
+            if path not in wanted:
+                self._pending.pop(path).cancel()
+        for path in wanted:
+            if path not in self._pending:
+                self._pending[path] = self._executor.submit(load_image, path, canvas_size, storage_base)
+
+    def take(self, path):
+        """The :class:`PrefetchedImage` of ``path``, or None when it is not held.
+
+        It stays held, so stepping back to it needs no decoding either.
+        """
+        future = self._pending.get(path)
+        if future is None:
+            return None
+        try:
+            return future.result()
+        except CancelledError:
+            return None
+        except Exception as e:
+            logger.warning(f"Prefetching {path} failed: {e}")
+            return None
+
+    def shutdown(self):
+        """Drop everything held and stop the worker without waiting for it."""
+        self._pending.clear()
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -22,6 +22,7 @@ from PyQt5.QtWidgets import (
     QPushButton,
     QRadioButton,
     QScrollArea,
+    QSpinBox,
     QStyle,
     QVBoxLayout,
     QWidget,
@@ -194,6 +195,7 @@ class PreferencesDialog(BaseDialog):
         self._create_plot_widgets()
         self._create_language_widgets()
         self._create_data_folder_widgets()
+        self._create_analysis_widgets()
         self._create_button_widgets()
 
     def _create_data_folder_widgets(self):
@@ -220,6 +222,20 @@ class PreferencesDialog(BaseDialog):
         self.data_folder_layout.addWidget(self.btnDataFolder)
         self.data_folder_layout.addWidget(self.btnResetDataFolder)
 
+    def _create_analysis_widgets(self):
+        """Create the cross-validation worker count.
+
+        Only the CVA folds that cannot be derived from the whole-data fit are
+        refitted, and these are what the workers share. One means no worker
+        processes at all, which is the default: each one is a fresh Python
+        interpreter with its own copy of the data.
+        """
+        self.spinCrossValidationJobs = QSpinBox()
+        self.spinCrossValidationJobs.setRange(1, os.cpu_count() or 1)
+        self.spinCrossValidationJobs.setToolTip(
+            self.tr("Processes used to refit CVA cross-validation folds. 1 runs them in the application itself.")
+        )
+
     def _create_geometry_widgets(self):
         """Create window geometry preference widgets."""
         self.rbRememberGeometryYes = QRadioButton(self.tr("Yes"))
@@ -475,6 +491,7 @@ class PreferencesDialog(BaseDialog):
         self.lblBgcolorLabel = QLabel(self.tr("Background Color"))
         self.lblLang = QLabel(self.tr("Language"))
         self.lblDataFolder = QLabel(self.tr("Data folder"))
+        self.lblCrossValidationJobs = QLabel(self.tr("Cross-validation workers"))
 
         # Add rows
         self.main_layout.addRow(self.lblGeometry, self.gbRememberGeomegry)
@@ -501,6 +518,7 @@ class PreferencesDialog(BaseDialog):
         self.main_layout.addRow(self.lblBgcolorLabel, self.lblBgcolor)
         self.main_layout.addRow(self.lblLang, lang_widget)
         self.main_layout.addRow(self.lblDataFolder, data_folder_widget)
+        self.main_layout.addRow(self.lblCrossValidationJobs, self.spinCrossValidationJobs)
 
         # Wrap the form in a scroll area (usable on low-res monitors); pin the Save
         # button below it so it's always visible.
@@ -901,6 +919,12 @@ class PreferencesDialog(BaseDialog):
         self.edtDataFolder.setText(os.path.abspath(configured or mu.DEFAULT_DB_DIRECTORY))
         self.data_folder = Path(self.edtDataFolder.text())
 
+        try:
+            jobs = int(self.m_app.settings.value("Analysis/CrossValidationJobs", 1))
+        except (TypeError, ValueError):
+            jobs = 1
+        self.spinCrossValidationJobs.setValue(jobs)
+
         # Dialog geometry
         if self.m_app.remember_geometry:
             self.setGeometry(self.m_app.settings.value("WindowGeometry/PreferencesDialog", QRect(100, 100, 600, 400)))
@@ -946,6 +970,7 @@ class PreferencesDialog(BaseDialog):
         # Save other preferences
         self.m_app.settings.setValue("BackgroundColor", self.m_app.bgcolor)
         self.m_app.settings.setValue("Language", self.m_app.language)
+        self.m_app.settings.setValue("Analysis/CrossValidationJobs", self.spinCrossValidationJobs.value())
 
     def update_language(self):
         """Update all UI text with current language translations."""
@@ -959,6 +984,7 @@ class PreferencesDialog(BaseDialog):
         self.lblIndex.setText(self.tr("Index"))
         self.lblBgcolorLabel.setText(self.tr("Background Color"))
         self.lblDataFolder.setText(self.tr("Data folder"))
+        self.lblCrossValidationJobs.setText(self.tr("Cross-validation workers"))
         self.btnDataFolder.setText(self.tr("Browse..."))
         self.btnResetDataFolder.setText(self.tr("Reset"))
         self.lblLang.setText(self.tr("Language"))
@@ -7,6 +7,7 @@ Main entry point for the application
 import argparse
 import contextlib
 import logging
+import multiprocessing
 import sys
 from pathlib import Path
 
@@ -407,4 +408,8 @@ def main():
 
 
 if __name__ == "__main__":
+    # CVA can refit cross-validation folds in worker processes; in a frozen
+    # build those are this executable re-launched, and this makes them run the
+    # worker instead of a second copy of the application.
+    multiprocessing.freeze_support()
     sys.exit(main())
@@ -0,0 +1,42 @@
+"""Add MdObject.landmark_blob.
+
+A parsed copy of landmark_str: a small header (magic, row width, row count and
+a CRC-32 of the text it was read from) followed by the coordinates as float64,
+NaN where missing. landmark_str is kept as the text of record, so an older
+Modan2 can still open the database; a blob whose CRC no longer matches the text
+is ignored. Nullable: existing objects get theirs from
+MdModel.backfill_landmark_blobs() once the migrations have run.
+
+Keep this file pure ASCII. peewee_migrate reads migrations with the platform
+default encoding, so a non-ASCII byte makes the file undecodable on a Windows
+box whose locale is not UTF-8 and the application cannot start (see 006).
+"""
+
+from contextlib import suppress
+
+import peewee as pw
+from peewee_migrate import Migrator
+
+with suppress(ImportError):
+    import playhouse.postgres_ext as pw_pext
+
+
+def _has_column(database, table, column):
+    return any(row[1] == column for row in database.execute_sql(f"PRAGMA table_info({table})"))
+
+
+def migrate(migrator: Migrator, database: pw.Database, *, fake=False):
+    """Write your migrations here."""
+
+    # Skip if already present. peewee_migrate records a migration only after its
+    # statements succeed, so an interrupted run can leave a column added but
+    # unrecorded, and the retry then dies on "duplicate column name" (see 006).
+    if fake or not _has_column(database, "mdobject", "landmark_blob"):
+        migrator.add_fields("mdobject", landmark_blob=pw.BlobField(null=True))
+
+
+def rollback(migrator: Migrator, database: pw.Database, *, fake=False):
+    """Write your rollback migrations here."""
+
+    if fake or _has_column(database, "mdobject", "landmark_blob"):
+        migrator.remove_fields("mdobject", "landmark_blob")
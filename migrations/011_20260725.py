@@ -0,0 +1,103 @@
+"""Add MdAnalysis.result_arrays and move numeric results into it.
+
+The landmarks, scores, rotation matrices and eigenvalues an analysis keeps were
+JSON text; a 3D dataset with 500 landmarks has a 1500 x 1500 rotation matrix,
+and opening the analysis parsed all of it. result_arrays holds them as one NPZ
+archive of float64 arrays (NaN for a missing value), each named after its old
+column without "_json", and the converted JSON columns are cleared. A result
+that is not a rectangular table of numbers (raw landmarks of objects that do
+not all have landmarks) stays JSON. Rollback writes the JSON back first.
+
+Keep this file pure ASCII. peewee_migrate reads migrations with the platform
+default encoding, so a non-ASCII byte makes the file undecodable on a Windows
+box whose locale is not UTF-8 and the application cannot start (see 006).
+"""
+
+import io
+import json
+from contextlib import suppress
+
+import numpy as np
+import peewee as pw
+from peewee_migrate import Migrator
+
+with suppress(ImportError):
+    import playhouse.postgres_ext as pw_pext
+
+RESULT_COLUMNS = (
+    "raw_landmark_json",
+    "superimposed_landmark_json",
+    "pca_analysis_result_json",
+    "pca_rotation_matrix_json",
+    "pca_eigenvalues_json",
+    "cva_analysis_result_json",
+    "cva_rotation_matrix_json",
+    "cva_eigenvalues_json",
+)
+
+
+def _has_column(database, table, column):
+    return any(row[1] == column for row in database.execute_sql(f"PRAGMA table_info({table})"))
+
+
+def _nan_to_none(values):
+    if isinstance(values, list):
+        return [_nan_to_none(v) for v in values]
+    return None if values != values else values
+
+
+def _convert_results(database):
+    # One analysis at a time: together they can be far larger than memory.
+    ids = [row[0] for row in database.execute_sql("SELECT id FROM mdanalysis WHERE result_arrays IS NULL")]
+    for analysis_id in ids:
+        row = database.execute_sql(
+            f"SELECT {', '.join(RESULT_COLUMNS)} FROM mdanalysis WHERE id = ?", (analysis_id,)
+        ).fetchone()
+        arrays = {}
+        for column, text in zip(RESULT_COLUMNS, row):
+            if not text:
+                continue
+            try:
+                arrays[column[: -len("_json")]] = np.array(json.loads(text), dtype=np.float64)
+            except (ValueError, TypeError):
+                continue  # not a rectangular table of numbers: stays JSON
+        if not arrays:
+            continue
+        buffer = io.BytesIO()
+        np.savez(buffer, **arrays)
+        cleared = ", ".join(f"{name}_json = NULL" for name in arrays)
+        database.execute_sql(
+            f"UPDATE mdanalysis SET result_arrays = ?, {cleared} WHERE id = ?", (buffer.getvalue(), analysis_id)
+        )
+
+
+def _restore_results(database):
+    ids = [row[0] for row in database.execute_sql("SELECT id FROM mdanalysis WHERE result_arrays IS NOT NULL")]
+    for analysis_id in ids:
+        (blob,) = database.execute_sql("SELECT result_arrays FROM mdanalysis WHERE id = ?", (analysis_id,)).fetchone()
+        archive = np.load(io.BytesIO(blob), allow_pickle=False)
+        for name in archive.files:
+            if name + "_json" in RESULT_COLUMNS:
+                text = json.dumps(_nan_to_none(archive[name].tolist()))
+                database.execute_sql(f"UPDATE mdanalysis SET {name}_json = ? WHERE id = ?", (text, analysis_id))
+
+
+def migrate(migrator: Migrator, database: pw.Database, *, fake=False):
+    """Write your migrations here."""
+
+    # Skip if already present. peewee_migrate records a migration only after its
+    # statements succeed, so an interrupted run can leave a column added but
+    # unrecorded, and the retry then dies on "duplicate column name" (see 006).
+    if fake or not _has_column(database, "mdanalysis", "result_arrays"):
+        migrator.add_fields("mdanalysis", result_arrays=pw.BlobField(null=True))
+    if not fake:
+        migrator.run(_convert_results, database)
+
+
+def rollback(migrator: Migrator, database: pw.Database, *, fake=False):
+    """Write your rollback migrations here."""
+
+    if fake or _has_column(database, "mdanalysis", "result_arrays"):
+        if not fake:
+            migrator.run(_restore_results, database)
+        migrator.remove_fields("mdanalysis", "result_arrays")
@@ -0,0 +1,53 @@
+"""Add the MdObject.summary_* columns.
+
+What the object table shows for each object -- recorded and missing landmark
+counts, number of curves, centroid size -- computed when the object is saved,
+so a dataset's table can be paged and sorted in SQL instead of unpacking every
+object's landmarks to fill it. Nullable: existing objects get theirs from
+MdModel.backfill_object_summaries() once the migrations have run.
+
+Keep this file pure ASCII. peewee_migrate reads migrations with the platform
+default encoding, so a non-ASCII byte makes the file undecodable on a Windows
+box whose locale is not UTF-8 and the application cannot start (see 006).
+"""
+
+from contextlib import suppress
+
+import peewee as pw
+from peewee_migrate import Migrator
+
+with suppress(ImportError):
+    import playhouse.postgres_ext as pw_pext
+
+SUMMARY_FIELDS = {
+    "summary_landmark_count": pw.IntegerField(null=True),
+    "summary_missing_count": pw.IntegerField(null=True),
+    "summary_curve_count": pw.IntegerField(null=True),
+    "summary_centroid_size": pw.DoubleField(null=True),
+}
+
+
+def _has_column(database, table, column):
+    return any(row[1] == column for row in database.execute_sql(f"PRAGMA table_info({table})"))
+
+
+def migrate(migrator: Migrator, database: pw.Database, *, fake=False):
+    """Write your migrations here."""
+
+    # Skip the ones already present. peewee_migrate records a migration only
+    # after its statements succeed, so an interrupted run can leave a column
+    # added but unrecorded, and the retry then dies on "duplicate column name"
+    # (see 006).
+    missing = {
+        name: field for name, field in SUMMARY_FIELDS.items() if fake or not _has_column(database, "mdobject", name)
+    }
+    if missing:
+        migrator.add_fields("mdobject", **missing)
+
+
+def rollback(migrator: Migrator, database: pw.Database, *, fake=False):
+    """Write your rollback migrations here."""
+
+    present = [name for name in SUMMARY_FIELDS if fake or _has_column(database, "mdobject", name)]
+    if present:
+        migrator.remove_fields("mdobject", *present)
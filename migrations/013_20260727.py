@@ -0,0 +1,57 @@
+"""Add MdImage.file_hash / original_hash and MdThreeDModel.file_hash.
+
+The content hashes under which an image's working copy and archived original,
+or a 3D model, are kept in the media store (<storage>/blobs/, see
+MdMediaStore), so identical files are stored once and copying an object copies
+no file. Indexed: deleting a row looks up whether anything else still refers
+to its files. Nullable: files attached before this are moved into the store by
+MdModel.adopt_legacy_media_files() once the migrations have run, and until
+then are found in the per-object layout.
+
+Keep this file pure ASCII. peewee_migrate reads migrations with the platform
+default encoding, so a non-ASCII byte makes the file undecodable on a Windows
+box whose locale is not UTF-8 and the application cannot start (see 006).
+"""
+
+from contextlib import suppress
+
+import peewee as pw
+from peewee_migrate import Migrator
+
+with suppress(ImportError):
+    import playhouse.postgres_ext as pw_pext
+
+HASH_FIELDS = {
+    "mdimage": ("file_hash", "original_hash"),
+    "mdthreedmodel": ("file_hash",),
+}
+
+
+def _has_column(database, table, column):
+    return any(row[1] == column for row in database.execute_sql(f"PRAGMA table_info({table})"))
+
+
+def migrate(migrator: Migrator, database: pw.Database, *, fake=False):
+    """Write your migrations here."""
+
+    # Skip the ones already present. peewee_migrate records a migration only
+    # after its statements succeed, so an interrupted run can leave a column
+    # added but unrecorded, and the retry then dies on "duplicate column name"
+    # (see 006).
+    for table, columns in HASH_FIELDS.items():
+        missing = {
+            name: pw.CharField(max_length=255, null=True, index=True)
+            for name in columns
+            if fake or not _has_column(database, table, name)
+        }
+        if missing:
+            migrator.add_fields(table, **missing)
+
+
+def rollback(migrator: Migrator, database: pw.Database, *, fake=False):
+    """Write your rollback migrations here."""
+
+    for table, columns in HASH_FIELDS.items():
+        present = [name for name in columns if fake or _has_column(database, table, name)]
+        if present:
+            migrator.remove_fields(table, *present)
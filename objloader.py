@@ -1,16 +1,84 @@
 # https://github.com/yarolig/OBJFileLoader
 
+import ctypes
+import logging
 import math
 import os
+import threading
 
 import numpy as np
 
 # import pygame
+from OpenGL.error import GLError, NullFunctionError
 from OpenGL.GL import *
+from OpenGL.raw.GL.VERSION import GL_1_1
+
+import MdMesh
+import MdMeshPicker
+
+logger = logging.getLogger(__name__)
 
 _3D_SCREEN_WIDTH = _3D_SCREEN_HEIGHT = 5
 
 
+def _upload(vertices, normals, faces):
+    """Vertex, normal and index buffer objects of a mesh in the current GL context.
+
+    An empty tuple where buffer objects cannot be created (before OpenGL
+    1.5); _draw then draws the arrays from client memory.
+    """
+    try:
+        buffers = [int(b) for b in np.atleast_1d(glGenBuffers(3))]
+    except (GLError, NullFunctionError):
+        return ()
+    if len(buffers) != 3 or not all(buffers):
+        return ()
+    for target, buffer, array in zip(
+        (GL_ARRAY_BUFFER, GL_ARRAY_BUFFER, GL_ELEMENT_ARRAY_BUFFER), buffers, (vertices, normals, faces)
+    ):
+        glBindBuffer(target, buffer)
+        glBufferData(target, array.nbytes, np.ascontiguousarray(array), GL_STATIC_DRAW)
+        glBindBuffer(target, 0)
+    return tuple(buffers)
+
+
+def _draw(vertices, normals, faces, buffers):
+    """Draw a mesh with one glDrawElements call, from its buffers if it has them."""
+    glEnableClientState(GL_VERTEX_ARRAY)
+    glEnableClientState(GL_NORMAL_ARRAY)
+    # PyOpenGL's gl*Pointer wrappers keep the array given in data of the
+    # current context, and fail where there is none. These arrays outlive
+    # the draw call, so the raw entry points get their address instead.
+    if buffers:
+        vertex_buffer, normal_buffer, index_buffer = buffers
+        glBindBuffer(GL_ARRAY_BUFFER, vertex_buffer)
+        GL_1_1.glVertexPointer(3, GL_FLOAT, 0, None)
+        glBindBuffer(GL_ARRAY_BUFFER, normal_buffer)
+        GL_1_1.glNormalPointer(GL_FLOAT, 0, None)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, index_buffer)
+        GL_1_1.glDrawElements(GL_TRIANGLES, faces.size, GL_UNSIGNED_INT, None)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+    else:
+        GL_1_1.glVertexPointer(3, GL_FLOAT, 0, vertices.ctypes.data_as(ctypes.c_void_p))
+        GL_1_1.glNormalPointer(GL_FLOAT, 0, normals.ctypes.data_as(ctypes.c_void_p))
+        GL_1_1.glDrawElements(GL_TRIANGLES, faces.size, GL_UNSIGNED_INT, faces.ctypes.data_as(ctypes.c_void_p))
+    glDisableClientState(GL_NORMAL_ARRAY)
+    glDisableClientState(GL_VERTEX_ARRAY)
+
+
+class _Level:
+    """A coarse version of an OBJ's mesh, scaled and centred like it, and its GL buffers."""
+
+    def __init__(self, vertices, faces):
+        self.vertices = np.ascontiguousarray(vertices, dtype=np.float32)
+        self.faces = np.ascontiguousarray(faces, dtype=np.int32)
+        self.normals = MdMesh.vertex_normals(
+            self.vertices, self.faces, np.zeros((0, 3), dtype=np.float32), np.full(self.faces.shape, -1)
+        )
+        self.buffers = None
+
+
 class OBJ:
     generate_on_init = False
 
@@ -55,77 +123,40 @@ class OBJ:
                 mtl[values[0]] = list(map(float, values[1:]))
         return contents
 
-    def __init__(self, filename, swapyz=False):
-        """Loads a Wavefront OBJ file."""
-        self.vertices = []
-        self.original_vertices = []
-        self.normals = []
-        self.original_normals = []
+    def __init__(self, filename, swapyz=False, storage_base=None):
+        """Loads a Wavefront OBJ file, or an STL or PLY one.
+
+        The mesh is read through ``MdMesh.load_mesh`` (see it for
+        ``storage_base``), so the file is read once and memory-mapped from its
+        cache afterwards. ``vertices`` and
+        ``normals`` are float32 (n, 3) arrays; ``faces`` and ``face_normals``
+        are int32 (n, 3) arrays of 0-based vertex and normal indices, one row
+        per triangle, -1 where a corner has no normal.
+        """
+        mesh = MdMesh.load_mesh(filename, storage_base)
+        self.filename = filename
+        self.storage_base = storage_base
+        self.swapyz = swapyz
+        self.mesh = mesh
+        self.original_vertices = mesh.vertices
+        self.original_normals = mesh.normals
+        if swapyz:
+            self.original_vertices = np.ascontiguousarray(self.original_vertices[:, [0, 2, 1]])
+            self.original_normals = np.ascontiguousarray(self.original_normals[:, [0, 2, 1]])
+        self.normals = self.original_normals
+        self.faces = mesh.faces
+        self.face_normals = mesh.face_normals
         self.texcoords = []
-        self.faces = []
         self.landmark_list = []
-        self.gl_list = 0
+        self.vertex_normals = None
+        self.buffers = ()
+        self.picker = None
+        self.levels = []
         self.rotation_matrix = np.array([[1, 0, 0, 0], [0, 1, 0, 0], [0, 0, 1, 0], [0, 0, 0, 1]])
-        self.max_x = -9999999
-        self.min_x = 9999999
-        self.max_y = -9999999
-        self.min_y = 9999999
-        self.max_z = -9999999
-        self.min_z = 9999999
-        self.scale = 1.0
         self.generated = False
-        os.path.dirname(filename)
 
-        with open(filename, encoding="utf-8", errors="replace") as _fh:
-            obj_lines = _fh.readlines()
-        for line in obj_lines:
-            if line.startswith("#"):
-                continue
-            values = line.split()
-            if not values:
-                continue
-            if values[0] == "v":
-                v = list(map(float, values[1:4]))
-                if swapyz:
-                    v = v[0], v[2], v[1]
-                self.vertices.append(v)
-                self.original_vertices.append(v)
-            elif values[0] == "vn":
-                v = list(map(float, values[1:4]))
-                if swapyz:
-                    v = v[0], v[2], v[1]
-                self.normals.append(v)
-                self.original_normals.append(v)
-            elif values[0] == "vt":
-                self.texcoords.append(list(map(float, values[1:3])))
-            elif values[0] in ("usemtl", "usemat"):
-                # pass
-                values[1]
-            elif values[0] == "mtllib":
-                pass
-                # self.mtl = self.loadMaterial(os.path.join(dirname, values[1]))
-            elif values[0] == "f":
-                face = []
-                # texcoords = []
-                norms = []
-                for v in values[1:]:
-                    w = v.split("/")
-                    face.append(int(w[0]))
-                    # if len(w) >= 2 and len(w[1]) > 0:
-                    #    texcoords.append(int(w[1]))
-                    # else:
-                    #    texcoords.append(0)
-                    if len(w) >= 3 and len(w[2]) > 0:
-                        norms.append(int(w[2]))
-                    else:
-                        norms.append(0)
-                self.faces.append((face, norms))  # , texcoords, material))
-        self.max_x = max(self.vertices, key=lambda x: x[0])[0]
-        self.min_x = min(self.vertices, key=lambda x: x[0])[0]
-        self.max_y = max(self.vertices, key=lambda x: x[1])[1]
-        self.min_y = min(self.vertices, key=lambda x: x[1])[1]
-        self.max_z = max(self.vertices, key=lambda x: x[2])[2]
-        self.min_z = min(self.vertices, key=lambda x: x[2])[2]
+        self.min_x, self.min_y, self.min_z = (float(c) for c in self.original_vertices.min(axis=0))
+        self.max_x, self.max_y, self.max_z = (float(c) for c in self.original_vertices.max(axis=0))
         self.center_x = (self.max_x + self.min_x) / 2
         self.center_y = (self.max_y + self.min_y) / 2
         self.center_z = (self.max_z + self.min_z) / 2
@@ -133,74 +164,128 @@ class OBJ:
         self.height = self.max_y - self.min_y
         self.depth = self.max_z - self.min_z
 
-        # center vertices
-        vertices = np.array(self.vertices)
-        vertices[:, 0] -= self.center_x
-        vertices[:, 1] -= self.center_y
-        vertices[:, 2] -= self.center_z
-
-        self.centered_vertices = vertices.tolist()
-
         self.scale = min(_3D_SCREEN_WIDTH / self.width, _3D_SCREEN_HEIGHT / self.height) * 0.5
-        vertices *= self.scale
-
-        self.scaled_centered_vertices = vertices.tolist()
-        self.vertices = vertices.tolist()
+        self.scaled_centered_vertices = self._scaled_centered(self.original_vertices)
+        self.vertices = self.scaled_centered_vertices
 
         if self.generate_on_init:
             self.generate()
 
+    def _scaled_centered(self, vertices):
+        center = np.array([self.center_x, self.center_y, self.center_z], dtype=np.float32)
+        return (vertices - center) * np.float32(self.scale)
+
+    def load_levels(self):
+        """Read or build the coarse levels drawn while the model is turned (``levels``).
+
+        See ``MdMesh.load_levels``; a model with no more triangles than its
+        largest level has none. When they cannot be made that is logged and
+        the full mesh is drawn throughout.
+        """
+        try:
+            levels = MdMesh.load_levels(self.filename, self.storage_base, self.mesh)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Cannot build coarse levels of {self.filename}: {e}")
+            return
+        if self.swapyz:
+            levels = [MdMesh.Mesh(level.vertices[:, [0, 2, 1]], level.faces) for level in levels]
+        # Set whole, as render() may be reading it from another thread.
+        self.levels = [_Level(self._scaled_centered(level.vertices), level.faces) for level in levels]
+
+    def load_levels_in_background(self):
+        """Run load_levels in a daemon thread, returned; the full mesh is drawn until it is done."""
+        thread = threading.Thread(target=self.load_levels, name="mesh-levels", daemon=True)
+        thread.start()
+        return thread
+
+    def vertex_coords(self, index):
+        """The coordinates of vertex ``index`` as stored in the file, as Python floats.
+
+        Each float32 is written out at its shortest round-tripping decimal,
+        so a landmark placed on a vertex keeps the digits of the file rather
+        than gaining float32 noise (1.1 -> 1.100000023841858).
+        """
+        return [float(str(c)) for c in self.original_vertices[index]]
+
+    def pick_vertex(self, origin, direction, radius):
+        """The vertex a ray in view space picks, as MdMeshPicker.MeshPicker.pick.
+
+        The picker is built on first use over the unrotated model, and the
+        ray is turned back into it, so turning the model costs nothing.
+        """
+        if self.picker is None:
+            self.picker = MdMeshPicker.MeshPicker(self.scaled_centered_vertices, self.faces)
+        # The pose is a rotation, so its transpose undoes it.
+        rotation = self.rotation_matrix[:3, :3]
+        return self.picker.pick(
+            rotation.T @ np.asarray(origin, dtype=float), rotation.T @ np.asarray(direction, dtype=float), radius
+        )
+
     def generate(self):
-        self.gl_list = glGenLists(1)
-        glNewList(self.gl_list, GL_COMPILE)
-        glFrontFace(GL_CCW)
-        for face in self.faces:
-            vertices, normals = face  # , texture_coords, material = face
-
-            # mtl = self.mtl[material]
-            if False:  #'texture_Kd' in mtl:
-                # use diffuse texmap
-                glEnable(GL_TEXTURE_2D)
-                glBindTexture(GL_TEXTURE_2D, mtl["texture_Kd"])
-            else:
-                # just use diffuse colour
-                # glColor(*mtl['Kd'])
-                glColor(0.8, 0.8, 0.8, 1)
-
-            glBegin(GL_POLYGON)
-            for i in range(len(vertices)):
-                if normals[i] > 0:
-                    glNormal3fv(self.normals[normals[i] - 1])
-                # if texture_coords[i] > 0:
-                #    glTexCoord2fv(self.texcoords[texture_coords[i] - 1])
-                glVertex3fv(self.vertices[vertices[i] - 1])
-            glEnd()
-        glEndList()
+        """Upload the mesh to the current GL context, once.
+
+        Vertices and per-vertex normals go into vertex buffer objects and the
+        triangles into an index buffer, which render() draws with one
+        glDrawElements call. The model is uploaded unrotated and its pose is
+        applied as a matrix, so turning it sends nothing to the GL again.
+        Where buffer objects cannot be created (before OpenGL 1.5) render()
+        draws the same arrays from client memory. The coarse levels are
+        uploaded when first drawn.
+        """
+        if self.generated:
+            return
+        if self.vertex_normals is None:
+            self.vertex_normals = MdMesh.vertex_normals(
+                self.scaled_centered_vertices, self.faces, self.original_normals, self.face_normals
+            )
+        self.buffers = _upload(self.scaled_centered_vertices, self.vertex_normals, self.faces)
         self.generated = True
 
-    def render(self):
+    def level_for(self, max_faces):
+        """The finest of ``levels`` with at most ``max_faces`` triangles; None for the full mesh.
+
+        None as well when ``max_faces`` is None, or when the mesh is within
+        it or no level is.
+        """
+        if max_faces is None or len(self.faces) <= max_faces:
+            return None
+        return next((level for level in self.levels if len(level.faces) <= max_faces), None)
+
+    def render(self, max_faces=None):
+        """Draw the mesh in its current pose, uploading it first if need be.
+
+        With ``max_faces``, a coarse level of at most that many triangles is
+        drawn instead where there is one (see level_for).
+        """
         if not self.generated:
-            return
-        # print("render", self, self.gl_list)
-        glCallList(self.gl_list)
-        return
-        # import datetime
-        # print("1:",datetime.datetime.now())
+            self.generate()
+        glPushMatrix()
+        # OpenGL reads the matrix column by column.
+        glMultMatrixf(np.ascontiguousarray(self.rotation_matrix.T, dtype=np.float32))
         glFrontFace(GL_CCW)
-        for face in self.faces:
-            vertices, normals, texture_coords, material = face
-            glColor(0.8, 0.8, 0.8, 1)
-
-            glBegin(GL_POLYGON)
-            for i in range(len(vertices)):
-                if normals[i] > 0:
-                    glNormal3fv(self.normals[normals[i] - 1])
-                glVertex3fv(self.vertices[vertices[i] - 1])
-            glEnd()
-        # print("2:",datetime.datetime.now())
+        glColor(0.8, 0.8, 0.8, 1)
+        level = self.level_for(max_faces)
+        if level is None:
+            _draw(self.scaled_centered_vertices, self.vertex_normals, self.faces, self.buffers)
+        else:
+            if level.buffers is None:
+                level.buffers = _upload(level.vertices, level.normals, level.faces)
+            _draw(level.vertices, level.normals, level.faces, level.buffers)
+        glPopMatrix()
+
+    def discard_buffers(self):
+        """Forget the GL buffers without deleting them, as when their context is gone."""
+        self.buffers = ()
+        for level in self.levels:
+            level.buffers = None
+        self.generated = False
 
     def free(self):
-        glDeleteLists([self.gl_list])
+        """Delete the GL buffers; the next render() uploads the mesh again."""
+        for buffers in [self.buffers] + [level.buffers for level in self.levels]:
+            if buffers:
+                glDeleteBuffers(len(buffers), buffers)
+        self.discard_buffers()
 
     def rotate(self, rotationX_rad, rotationY_rad, apply_rotation_to_vertex=True):
         # print(rotationX_rad, rotationY_rad)
@@ -228,19 +313,9 @@ class OBJ:
 
         if not apply_rotation_to_vertex:
             return
-        # Create a column of 1's with the same number of rows as vertices
-        ones_column = np.ones((np.array(self.scaled_centered_vertices).shape[0], 1))
-        vertices_with_ones = np.hstack((self.scaled_centered_vertices, ones_column))
-        new_vertices = np.dot(vertices_with_ones, self.rotation_matrix.T)
-        self.vertices = new_vertices[:, 0:3]
-
-        ones_column = np.ones((np.array(self.original_normals).shape[0], 1))
-        normals_with_ones = np.hstack((self.original_normals, ones_column))
-        new_normals = np.dot(normals_with_ones, self.rotation_matrix.T)
-        self.normals = new_normals[:, 0:3]
-
-        # self.normals = np.dot(self.normals, self.rotation_matrix)
-        # self.generate()
+        rotation = self.rotation_matrix[:3, :3].T.astype(np.float32)
+        self.vertices = self.scaled_centered_vertices @ rotation
+        self.normals = self.original_normals @ rotation
 
     def rotate_3d(self, theta, axis):
         cos_theta = math.cos(theta)
@@ -261,24 +336,9 @@ class OBJ:
             r_mx[1][2] = sin_theta
             r_mx[2][1] = -1 * sin_theta
             r_mx[2][2] = cos_theta
-        # print "rotation matrix", r_mx
-
-        for i, lm in enumerate(self.vertices):
-            # print("vertex", i, lm)
-            x, y, z = lm
-            # for j in range(len(self.vertices)):
-            #    coords[j] = self.vertices[j]
-            x_rotated = x * r_mx[0][0] + y * r_mx[1][0] + z * r_mx[2][0]
-            y_rotated = x * r_mx[0][1] + y * r_mx[1][1] + z * r_mx[2][1]
-            z_rotated = x * r_mx[0][2] + y * r_mx[1][2] + z * r_mx[2][2]
-            self.vertices[i] = x_rotated, y_rotated, z_rotated
-            # print("rotated", self.vertices[i])
-        for i, normal in enumerate(self.normals):
-            # print("vertex", i, lm)
-            x, y, z = normal
-            # for j in range(len(self.vertices)):
-            #    coords[j] = self.vertices[j]
-            x_rotated = x * r_mx[0][0] + y * r_mx[1][0] + z * r_mx[2][0]
-            y_rotated = x * r_mx[0][1] + y * r_mx[1][1] + z * r_mx[2][1]
-            z_rotated = x * r_mx[0][2] + y * r_mx[1][2] + z * r_mx[2][2]
-            self.normals[i] = x_rotated, y_rotated, z_rotated
+        r_mx = np.array(r_mx, dtype=np.float32)
+        rotation = np.eye(4)
+        rotation[:3, :3] = r_mx.T
+        self.rotation_matrix = np.dot(rotation, self.rotation_matrix)
+        self.vertices = np.asarray(self.vertices, dtype=np.float32) @ r_mx
+        self.normals = np.asarray(self.normals, dtype=np.float32) @ r_mx
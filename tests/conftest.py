@@ -71,6 +71,19 @@ def _restore_qt_translation_state():
     app.language = saved_language if saved_language is not None else "en"
 
 
+@pytest.fixture(autouse=True)
+def _stop_livewire_builds():
+    """Stop the live-wire field builder a test's main window started.
+
+    ``ModanMainWindow`` starts it and only ``closeEvent`` stops it, so it would
+    otherwise go on writing fields next to the images later tests store.
+    """
+    yield
+    import MdLiveWireStore
+
+    MdLiveWireStore.stop_background_builds(wait=True)
+
+
 @pytest.fixture
 def temp_dir():
     """Create a temporary directory for test files."""
@@ -250,6 +263,23 @@ def _never_touch_the_real_database(tmp_path_factory):
     yield
 
 
+@pytest.fixture(autouse=True)
+def _isolated_superimposition_cache(tmp_path, monkeypatch):
+    """Give every test its own, empty superimposition cache.
+
+    Entries are keyed by dataset content, and tests build identical datasets in
+    fresh in-memory databases all the time. With one shared cache a test would
+    be handed coordinates superimposed by an earlier test, and one that makes
+    superimposition fail on purpose would never see it run.
+    """
+    import MdModel
+    from MdSuperimpositionCache import SuperimpositionCache
+
+    cache = SuperimpositionCache(str(tmp_path / "superimposition-cache"))
+    monkeypatch.setattr(MdModel, "get_superimposition_cache", lambda: cache)
+    yield cache
+
+
 @pytest.fixture
 def bound_database():
     """Point the peewee models at a throwaway database, and put them back.
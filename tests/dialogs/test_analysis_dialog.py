@@ -4,7 +4,7 @@ from unittest.mock import Mock, patch
 
 import pytest
 from PyQt5.QtCore import Qt
-from PyQt5.QtWidgets import QDialog
+from PyQt5.QtWidgets import QApplication, QDialog
 
 import MdModel
 from dialogs import NewAnalysisDialog
@@ -19,13 +19,16 @@ def mock_controller():
         """Mock controller with analysis signals."""
 
         analysis_progress = pyqtSignal(int)
+        analysis_step = pyqtSignal(str, int, int)
         analysis_completed = pyqtSignal(object)
         analysis_failed = pyqtSignal(str)
+        analysis_cancelled = pyqtSignal()
 
         def __init__(self):
             super().__init__()
             self.validate_dataset_for_analysis = Mock(return_value=True)
-            self.run_analysis = Mock()
+            self.start_analysis = Mock()
+            self.cancel_analysis = Mock(return_value=True)
 
     return MockController()
 
@@ -261,7 +264,7 @@ class TestNewAnalysisDialogUserInteractions:
         # Click OK button
         qtbot.mouseClick(dialog.btnOK, Qt.LeftButton)
 
-        # Should call controller's validate and run_analysis
+        # Should call controller's validate and start_analysis
         assert mock_controller.validate_dataset_for_analysis.called
 
     def test_cancel_button_click(self, qtbot, dialog):
@@ -335,13 +338,13 @@ class TestNewAnalysisDialogProgress:
         dialog.edtAnalysisName.setText("Test Analysis")
 
         initial_ok_text = dialog.btnOK.text()
-        initial_cancel_text = dialog.btnCancel.text()
 
         dialog.btnOK_clicked()
 
-        # Button text should change
+        # OK shows the run; Cancel stays live, since it now cancels the run
         assert dialog.btnOK.text() != initial_ok_text
-        assert dialog.btnCancel.text() != initial_cancel_text
+        assert dialog.btnCancel.text() == "Cancel"
+        assert dialog.btnCancel.isEnabled()
 
 
 class TestNewAnalysisDialogCompletion:
@@ -402,6 +405,17 @@ class TestNewAnalysisDialogCompletion:
         assert dialog.comboSuperimposition.isEnabled()
         assert dialog.btnOK.isEnabled()
 
+    def test_refused_start_reenables_dialog(self, qtbot, dialog, mock_controller):
+        """A run the controller refuses without a failure signal does not leave the dialog stuck."""
+        dialog.edtAnalysisName.setText("Refused")
+        mock_controller.start_analysis.return_value = None
+
+        with patch("PyQt5.QtWidgets.QMessageBox.critical"):
+            dialog.btnOK_clicked()
+
+        assert not dialog.analysis_running
+        assert dialog.btnOK.isEnabled()
+
     def test_multiple_completion_calls_ignored(self, qtbot, dialog):
         """Test that multiple completion signals are handled safely."""
         mock_analysis = Mock()
@@ -539,9 +553,9 @@ class TestNewAnalysisDialogIntegration:
 
         dialog.btnOK_clicked()
 
-        # Verify run_analysis was called with correct parameters
-        assert mock_controller.run_analysis.called
-        call_kwargs = mock_controller.run_analysis.call_args[1]
+        # Verify start_analysis was called with correct parameters
+        assert mock_controller.start_analysis.called
+        call_kwargs = mock_controller.start_analysis.call_args[1]
 
         assert call_kwargs["analysis_name"] == "Param Test"
         assert call_kwargs["cva_group_by"] == expected_cva
@@ -557,7 +571,75 @@ class TestNewAnalysisDialogIntegration:
         dialog.btnOK_clicked()
 
         # Analysis should not be called
-        assert not mock_controller.run_analysis.called
+        assert not mock_controller.start_analysis.called
 
         # Controls should be re-enabled
         assert dialog.edtAnalysisName.isEnabled()
+
+
+class TestNewAnalysisDialogCancellation:
+    """Cancel during a run stops the analysis instead of closing the dialog."""
+
+    def _start(self, dialog):
+        dialog.edtAnalysisName.setText("Cancel Test")
+        dialog.btnOK_clicked()
+        assert dialog.analysis_running
+
+    def test_cancel_while_running_requests_cancellation(self, qtbot, dialog, mock_controller):
+        self._start(dialog)
+
+        dialog.btnCancel_clicked()
+
+        mock_controller.cancel_analysis.assert_called_once()
+        assert dialog.isVisible()
+        assert not dialog.btnCancel.isEnabled()
+
+        # Progress still arriving from the worker does not overwrite the status
+        mock_controller.analysis_progress.emit(60)
+        mock_controller.analysis_step.emit("cva", 3, 10)
+        assert "cancel" in dialog.lblStatus.text().lower()
+
+    def test_cancelled_signal_restores_controls(self, qtbot, dialog, mock_controller):
+        self._start(dialog)
+        dialog.btnCancel_clicked()
+
+        mock_controller.analysis_cancelled.emit()
+
+        assert not dialog.analysis_running
+        assert not dialog.analysis_completed
+        assert dialog.edtAnalysisName.isEnabled()
+        assert dialog.btnOK.isEnabled()
+        assert dialog.btnCancel.isEnabled()
+        assert dialog.progressBar.value() == 0
+
+    def test_step_reports_unit_of_work(self, qtbot, dialog, mock_controller):
+        self._start(dialog)
+
+        mock_controller.analysis_step.emit("cva", 12, 40)
+        assert "12" in dialog.lblStatus.text() and "40" in dialog.lblStatus.text()
+
+    def test_closing_mid_run_cancels(self, qtbot, dialog, mock_controller):
+        self._start(dialog)
+
+        dialog.close()
+
+        mock_controller.cancel_analysis.assert_called_once()
+
+    def test_closing_mid_run_restores_the_cursor(self, qtbot, dialog, mock_controller):
+        self._start(dialog)
+        assert QApplication.overrideCursor() is not None
+
+        dialog.close()
+
+        assert QApplication.overrideCursor() is None
+        # The cancellation arriving later has nothing left to restore.
+        mock_controller.analysis_cancelled.emit()
+        assert QApplication.overrideCursor() is None
+
+    def test_closing_leaves_other_wait_cursors_alone(self, qtbot, dialog):
+        QApplication.setOverrideCursor(Qt.BusyCursor)
+        try:
+            dialog.close()
+            assert QApplication.overrideCursor().shape() == Qt.BusyCursor
+        finally:
+            QApplication.restoreOverrideCursor()
@@ -49,7 +49,7 @@ def _build_grouped_analysis():
     controller.set_current_dataset(ds)
     analysis = controller.run_analysis(ds, cva_group_by=0, manova_group_by=0)
     assert analysis is not None
-    assert analysis.pca_analysis_result_json  # scatter needs PCA scores
+    assert analysis.get_result_list("pca_analysis_result")  # scatter needs PCA scores
     return analysis
 
 
@@ -310,3 +310,24 @@ def test_snap_toggle_defaults_on(qtbot, mock_database):
     users asked for; can be turned off for free-position previews)."""
     dialog = _prepared_dialog(qtbot)
     assert dialog.cbxSnapToPoints.isChecked() is True
+
+
+def test_unrotate_shape_decodes_the_analysis_once(qtbot, mock_database):
+    """A specimen's own scores reconstruct its superimposed shape, and moving
+    the point again reuses the decoded rotation and mean shape."""
+    from unittest.mock import patch
+
+    import numpy as np
+
+    dialog = _prepared_dialog(qtbot)
+    scores = np.array(dialog.analysis.get_result_list("pca_analysis_result"))
+    shapes = dialog.analysis.get_result_array("superimposed_landmark").reshape(len(scores), -1)
+
+    assert np.allclose(dialog.unrotate_shape(scores[:1]), shapes[:1])
+    with patch.object(dialog.analysis, "get_result_array", wraps=dialog.analysis.get_result_array) as spy:
+        for row in scores:
+            dialog.unrotate_shape(row.reshape(1, -1))
+    spy.assert_not_called()
+
+    dialog.set_analysis(dialog.analysis, "PCA", "Sex")
+    assert dialog._shape_reconstructor is None
@@ -936,3 +936,35 @@ class TestTheWidthCorrectsItselfOnShow:
         qtbot.waitExposed(dialog)
 
         assert dialog.minimumWidth() == too_narrow + 5
+
+
+class TestCrossValidationWorkersPreference:
+    @pytest.fixture
+    def recorded(self, qapp, monkeypatch):
+        calls = {}
+        settings = Mock()
+        settings.setValue = lambda k, v: calls.__setitem__(k, v)
+        settings.value = lambda k, default=None: calls.get(k, default)
+        monkeypatch.setattr(qapp, "settings", settings, raising=False)
+        return calls
+
+    def test_defaults_to_no_worker_processes(self, recorded, qtbot, mock_parent):
+        dialog = PreferencesDialog(mock_parent)
+        qtbot.addWidget(dialog)
+        assert dialog.spinCrossValidationJobs.value() == 1
+        assert dialog.spinCrossValidationJobs.maximum() == (os.cpu_count() or 1)
+
+    def test_round_trips(self, recorded, qtbot, mock_parent):
+        recorded["Analysis/CrossValidationJobs"] = 1
+        dialog = PreferencesDialog(mock_parent)
+        qtbot.addWidget(dialog)
+        dialog.spinCrossValidationJobs.setMaximum(4)
+        dialog.spinCrossValidationJobs.setValue(3)
+        dialog.write_settings()
+        assert recorded["Analysis/CrossValidationJobs"] == 3
+
+    def test_unreadable_value_falls_back_to_one(self, recorded, qtbot, mock_parent):
+        recorded["Analysis/CrossValidationJobs"] = "many"
+        dialog = PreferencesDialog(mock_parent)
+        qtbot.addWidget(dialog)
+        assert dialog.spinCrossValidationJobs.value() == 1
@@ -0,0 +1,196 @@
+"""Tests for running analyses on a worker thread (MdAnalysisWorker).
+
+Covers the progress/cancellation checkpoints in the numerical code, and the
+controller's threaded run: the result is still saved on the main thread,
+progress reports real units of work, and cancelling saves nothing.
+"""
+
+import os
+import sys
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from PyQt5.QtCore import QThread
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import MdModel
+import MdStatistics
+from MdAnalysisWorker import AnalysisProgress
+from MdProcrustes import ProcrustesEngine
+from MdStatistics import AnalysisCancelledError
+from ModanController import ModanController
+
+
+class TestAnalysisProgress:
+    def test_percent_follows_stage_bands_and_never_goes_back(self):
+        reports = []
+        progress = AnalysisProgress(lambda *args: reports.append(args))
+        progress.checkpoint("superimposition", 50, 100)
+        progress.checkpoint("superimposition", 10, 100)  # a stage restarting its count
+        progress.checkpoint("cva", 5, 10)
+
+        assert [r[3] for r in reports] == [20, 20, 67]
+        assert reports[-1][:3] == ("cva", 5, 10)
+
+    def test_cancel_raises_at_next_checkpoint(self):
+        cancel = {"now": False}
+        progress = AnalysisProgress(should_cancel=lambda: cancel["now"])
+        callback = progress.callback("cva")
+        callback(1, 10)
+        cancel["now"] = True
+        with pytest.raises(AnalysisCancelledError):
+            callback(2, 10)
+
+
+class TestCheckpoints:
+    def test_align_reports_each_iteration(self):
+        rng = np.random.default_rng(0)
+        base = rng.normal(size=(5, 2))
+        engine = ProcrustesEngine(np.array([base + rng.normal(scale=0.05, size=base.shape) for _ in range(6)]))
+        engine.center_and_scale()
+        seen = []
+        engine.align(max_iterations=50, progress_callback=lambda done, total: seen.append((done, total)))
+
+        assert seen == [(i, 50) for i in range(1, len(seen) + 1)]
+        assert len(seen) == engine.iterations - 1  # the converged round rotates nothing
+
+    def test_align_stops_when_callback_raises(self):
+        engine = ProcrustesEngine(np.random.default_rng(1).normal(size=(6, 5, 2)))
+
+        def stop(done, total):
+            raise AnalysisCancelledError
+
+        with pytest.raises(AnalysisCancelledError):
+            engine.align(progress_callback=stop)
+        assert engine.iterations == 1
+
+    def test_imputation_progress_is_monotonic(self):
+        rng = np.random.default_rng(2)
+        shapes = rng.normal(size=(8, 6, 2)).tolist()
+        shapes[0][2] = [None, None]
+        engine = ProcrustesEngine.from_landmark_lists(shapes, 2)
+        seen = []
+        engine.superimpose_with_imputation(3, progress_callback=lambda done, total: seen.append((done, total)))
+
+        assert seen
+        assert all(total == 4 * 100 for _, total in seen)
+        assert [done for done, _ in seen] == sorted(done for done, _ in seen)
+
+    def test_cva_reports_every_fold(self):
+        rng = np.random.default_rng(3)
+        landmarks = rng.normal(size=(12, 4, 2)).tolist()
+        groups = ["a", "b", "c"] * 4
+        seen = []
+        result = MdStatistics.do_cva_analysis(landmarks, groups, lambda done, total: seen.append((done, total)))
+
+        assert result["accuracy_method"] == "leave-one-out"
+        assert seen == [(i, 12) for i in range(1, 13)]
+
+    def test_cancelled_cva_is_not_reported_as_failed(self):
+        landmarks = np.random.default_rng(4).normal(size=(12, 4, 2)).tolist()
+
+        def stop(done, total):
+            raise AnalysisCancelledError
+
+        with pytest.raises(AnalysisCancelledError):
+            MdStatistics.do_cva_analysis(landmarks, ["a", "b"] * 6, stop)
+
+    def test_manova_reports_its_steps(self):
+        scores = np.random.default_rng(5).normal(size=(12, 3)).tolist()
+        seen = []
+        MdStatistics.do_manova_analysis_on_pca(scores, ["a", "b"] * 6, lambda *step: seen.append(step))
+        assert seen == [(1, MdStatistics.MANOVA_STEPS), (2, MdStatistics.MANOVA_STEPS)]
+
+
+def _make_dataset(n_objects=10):
+    dataset = MdModel.MdDataset.create(dataset_name="threaded", dimension=2, propertyname_str="Sex")
+    rng = np.random.default_rng(0)
+    base = np.array([[0.0, 0.0], [2.0, 0.0], [2.0, 1.0], [0.0, 1.5], [1.0, 2.0]])
+    for i in range(n_objects):
+        shape = base + rng.normal(scale=0.1, size=base.shape)
+        MdModel.MdObject.create(
+            dataset=dataset,
+            object_name=f"o{i}",
+            sequence=i + 1,
+            landmark_str="\n".join(f"{x}\t{y}" for x, y in shape),
+            property_str="M" if i % 2 else "F",
+        )
+    return dataset
+
+
+class TestThreadedRun:
+    def test_result_is_saved_on_the_main_thread(self, qtbot, mock_database):
+        controller = ModanController()
+        dataset = _make_dataset()
+        persisted_on = []
+        original = controller._persist_analysis_results
+
+        def record_thread(**kwargs):
+            persisted_on.append(QThread.currentThread())
+            return original(**kwargs)
+
+        percents, steps = [], []
+        controller.analysis_progress.connect(percents.append)
+        controller.analysis_step.connect(lambda *step: steps.append(step))
+
+        with (
+            patch.object(controller, "_persist_analysis_results", side_effect=record_thread),
+            qtbot.waitSignal(controller.analysis_completed, timeout=30000) as blocker,
+        ):
+            worker = controller.start_analysis(dataset, "threaded", "Procrustes", cva_group_by=0)
+            assert worker is not None
+            assert controller.is_processing()
+
+        analysis = blocker.args[0]
+        assert analysis.analysis_name == "threaded"
+        assert analysis.get_result_list("cva_analysis_result")
+        assert persisted_on == [QThread.currentThread()]
+        assert percents == sorted(percents) and percents[-1] == 100
+        assert ("cva", 10, 10) in steps
+        assert any(stage == "superimposition" and done > 0 for stage, done, _ in steps)
+        qtbot.waitUntil(lambda: not controller.is_processing())
+
+    def test_cancel_saves_nothing(self, qtbot, mock_database):
+        controller = ModanController()
+        dataset = _make_dataset()
+        completed = []
+        controller.analysis_completed.connect(completed.append)
+        original = controller._run_pca
+
+        def cancel_during_pca(*args):
+            controller.cancel_analysis()
+            return original(*args)
+
+        with (
+            patch.object(controller, "_run_pca", side_effect=cancel_during_pca),
+            qtbot.waitSignal(controller.analysis_cancelled, timeout=30000),
+        ):
+            controller.start_analysis(dataset, "cancelled", "Procrustes", cva_group_by=0)
+
+        assert not completed
+        assert MdModel.MdAnalysis.select().count() == 0
+        assert not controller.is_processing()
+        assert not controller.cancel_analysis()
+
+    def test_failure_in_worker_is_reported(self, qtbot, mock_database):
+        controller = ModanController()
+        dataset = _make_dataset()
+
+        with (
+            patch.object(controller, "_run_pca", side_effect=ValueError("PCA analysis failed: boom")),
+            qtbot.waitSignal(controller.analysis_failed, timeout=30000) as blocker,
+        ):
+            controller.start_analysis(dataset, "broken", "Procrustes")
+
+        assert "boom" in blocker.args[0]
+        assert not controller.is_processing()
+
+    def test_load_errors_are_reported_before_any_thread_starts(self, qtbot, mock_database):
+        controller = ModanController()
+        dataset = MdModel.MdDataset.create(dataset_name="empty", dimension=2)
+
+        with qtbot.waitSignal(controller.analysis_failed, timeout=1000):
+            assert controller.start_analysis(dataset, "empty", "Procrustes") is None
+        assert not controller.is_processing()
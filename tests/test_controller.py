@@ -799,7 +799,7 @@ class TestAnalysisParameters:
 
         captured = {}
 
-        def capture(landmarks_data, params):
+        def capture(landmarks_data, params, progress_callback=None):
             captured["groups"] = params.get("groups")
             return
 
@@ -1613,7 +1613,7 @@ class TestManovaUsesTheSharedComponentRule:
         """Run the PCA branch of _run_manova and report the width it passed on."""
         seen = {}
 
-        def capture(manova_data, group_list):
+        def capture(manova_data, group_list, progress_callback=None):
             seen["width"] = len(manova_data[0])
             return {"p_value": 0.5}
 
@@ -1700,3 +1700,12 @@ class TestCvaWarningsReachTheUser:
         controller._run_cva([[[0.0, 0.0]]], {"groups": ["A", "B"]})
 
         assert seen == []
+
+    def test_the_worker_count_reaches_the_cross_validation(self, controller, monkeypatch):
+        calls = []
+        monkeypatch.setattr(MdStatistics, "do_cva_analysis", lambda *a, **kw: calls.append(kw) or self._cva_result())
+        controller.cross_validation_jobs = 3
+
+        controller._run_cva([[[0.0, 0.0]]], {"groups": ["A", "B"]})
+
+        assert calls == [{"n_jobs": 3}]
@@ -31,7 +31,7 @@ def test_run_analysis_lowercase_pca_persists_results(mock_database):
 
     assert analysis is not None
     assert analysis.analysis_name == "LowerCasePCA"
-    assert analysis.pca_analysis_result_json  # non-empty -> scores were persisted
+    assert analysis.get_result_list("pca_analysis_result")  # non-empty -> scores were persisted
 
 
 def test_run_analysis_uppercase_pca_still_persists_results(mock_database):
@@ -43,4 +43,4 @@ def test_run_analysis_uppercase_pca_still_persists_results(mock_database):
     analysis = controller.run_analysis("PCA", {"name": "UpperCasePCA"})
 
     assert analysis is not None
-    assert analysis.pca_analysis_result_json
+    assert analysis.get_result_list("pca_analysis_result")
@@ -53,6 +53,26 @@ def test_writes_land_in_the_chosen_file(tmp_path):
         _restore_default(original)
 
 
+def test_the_connection_profile_is_applied(tmp_path):
+    original = MdModel.database_path
+    try:
+        MdModel.set_database_path(str(tmp_path / "tuned.db"))
+        MdModel.gDatabase.connect(reuse_if_open=True)
+        assert MdModel.gDatabase.execute_sql("PRAGMA journal_mode").fetchone() == ("wal",)
+        assert MdModel.gDatabase.execute_sql("PRAGMA foreign_keys").fetchone() == (1,)
+        assert MdModel.gDatabase.execute_sql("PRAGMA temp_store").fetchone() == (2,)  # memory
+        MdModel.gDatabase.close()
+
+        # A library on a network share can opt out of WAL.
+        MdModel.set_database_path(str(tmp_path / "shared.db"), pragmas={"journal_mode": "delete"})
+        MdModel.gDatabase.connect(reuse_if_open=True)
+        assert MdModel.gDatabase.execute_sql("PRAGMA journal_mode").fetchone() == ("delete",)
+        assert MdModel.gDatabase.execute_sql("PRAGMA synchronous").fetchone() == (1,)  # normal
+        MdModel.gDatabase.close()
+    finally:
+        _restore_default(original)
+
+
 def test_missing_directories_are_created(tmp_path):
     original = MdModel.database_path
     target = tmp_path / "nested" / "deeper" / "chosen.db"
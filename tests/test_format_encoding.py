@@ -12,7 +12,7 @@ import sys
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from components.formats._encoding import open_text
+from components.formats._encoding import TextLines, detect_encoding, open_text
 from components.formats.tps import TPS
 
 _TPS = "LM=2\n1.0 2.0\n3.0 4.0\nID={name}\n"
@@ -48,6 +48,28 @@ class TestOpenText:
             assert f.read() == "LM=2\n"  # BOM removed by utf-8-sig
 
 
+class TestTextLines:
+    """The streaming readers decode line by line, with the encoding open_text would pick."""
+
+    def test_matches_open_text(self, tmp_path):
+        p = tmp_path / "e.txt"
+        p.write_bytes(b"\xef\xbb\xbf" + "가나다\nhello\n".encode())
+        with open_text(str(p)) as f:
+            expected = f.readlines()
+        assert list(TextLines(str(p))) == expected
+
+    def test_undecodable_utf8_late_in_the_file_falls_back(self, tmp_path, monkeypatch):
+        import components.formats._encoding as encoding
+
+        monkeypatch.setattr(encoding, "CHUNK_SIZE", 4)
+        p = tmp_path / "f.txt"
+        p.write_bytes(b"LM=2\n" * 10 + "표본\n".encode("cp949"))
+        assert detect_encoding(str(p)) != "utf-8-sig"
+        lines = TextLines(str(p))
+        assert len(list(lines)) == 11
+        assert lines.bytes_read == lines.size == os.path.getsize(p)
+
+
 class TestTpsNonAsciiName:
     def test_utf8_specimen_name_imports(self, tmp_path):
         p = tmp_path / "u.tps"
@@ -15,6 +15,7 @@ Tests cover:
 import os
 import tempfile
 
+import numpy as np
 import pytest
 
 from components.formats.morphologika import Morphologika
@@ -528,3 +529,130 @@ image2.jpg
             assert morph.object_images["Object2"] == "image2.jpg"
         finally:
             os.unlink(morph_file)
+
+
+_TPS_CONTENT = """LM=2
+1.0 2.0
+3.0 4.0
+ID=A
+IMAGE=a.jpg
+LM=2 second
+5.0 6.0
+7.0 8.0
+CURVES=1
+POINTS=2
+0.0 0.0
+1.0 1.0
+"""
+_NTS_CONTENT = "1 2L 4 0 DIM=2\nA B\n1.0 2.0 3.0 4.0\n5.0 6.0 7.0 8.0\n"
+_X1Y1_CONTENT = "name\tX1\tY1\tX2\tY2\nA\t1.0\t2.0\t3.0\t4.0\nB\t5.0\t6.0\t7.0\t8.0\n"
+_MORPHOLOGIKA_CONTENT = """[Individuals]
+2
+[Landmarks]
+2
+[Dimensions]
+2
+[Names]
+A
+B
+[Labels]
+Sex
+[Labelvalues]
+F
+M
+[Rawpoints]
+1.0 2.0
+3.0 4.0
+5.0 6.0
+7.0 8.0
+[Wireframe]
+2 1
+[Images]
+a.jpg
+b.jpg
+[Pixelspermm]
+2.5
+x
+"""
+
+_STREAM_CASES = [
+    ("TPS", TPS, _TPS_CONTENT),
+    ("NTS", NTS, _NTS_CONTENT),
+    ("X1Y1", X1Y1, _X1Y1_CONTENT),
+    ("Morphologika", Morphologika, _MORPHOLOGIKA_CONTENT),
+]
+
+
+class TestSpecimenStreams:
+    """The streaming readers yield what the whole-file readers collect."""
+
+    @pytest.mark.parametrize("invert_y", [False, True])
+    @pytest.mark.parametrize(("filetype", "reader_class", "content"), _STREAM_CASES)
+    def test_stream_matches_the_reader(self, tmp_path, filetype, reader_class, content, invert_y):
+        from components.formats import SPECIMEN_STREAMS
+
+        path = tmp_path / "data.txt"
+        path.write_text(content, encoding="utf-8")
+        reader = reader_class(str(path), "ds", invert_y)
+        stream = SPECIMEN_STREAMS[filetype](str(path), "ds", invert_y)
+
+        specimens = list(stream)
+        assert [s.name for s in specimens] == reader.object_name_list
+        for specimen in specimens:
+            expected = [[float(v) for v in row] for row in reader.landmark_data[specimen.name]]
+            assert specimen.landmarks.tolist() == expected
+        assert stream.dimension == reader.dimension
+        assert stream.nlandmarks == reader.nlandmarks
+        assert stream.edge_list == reader.edge_list
+        assert stream.variablename_list == reader.variablename_list
+        assert stream.bytes_read == stream.size == os.path.getsize(path)
+
+    def test_tps_curves_comments_and_images(self, tmp_path):
+        from components.formats import TPSStream
+
+        path = tmp_path / "curves.tps"
+        path.write_text(_TPS_CONTENT, encoding="utf-8")
+        first, second = TPSStream(str(path), "ds")
+        assert (first.name, first.image, first.curves) == ("A", "a.jpg", [])
+        assert second.name == "second"
+        assert [curve.tolist() for curve in second.curves] == [[[0.0, 0.0], [1.0, 1.0]]]
+
+    def test_morphologika_per_specimen_sections(self, tmp_path):
+        from components.formats import MorphologikaStream
+
+        path = tmp_path / "morph.txt"
+        path.write_text(_MORPHOLOGIKA_CONTENT, encoding="utf-8")
+        a, b = MorphologikaStream(str(path), "ds")
+        assert (a.variables, a.image, a.pixels_per_mm) == (["F"], "a.jpg", 2.5)
+        assert (b.variables, b.image, b.pixels_per_mm) == (["M"], "b.jpg", None)
+
+    def test_survey_counts_without_keeping_specimens(self, tmp_path):
+        from components.formats import TPSStream
+
+        path = tmp_path / "many.tps"
+        path.write_text("".join(f"LM=1\n{i} -999\nID=s{i}\n" for i in range(50)), encoding="utf-8")
+        stream = TPSStream(str(path), "ds").survey()
+        assert (stream.nobjects, stream.sentinel_count, stream.dimension) == (50, 50, 2)
+
+        stream.missing_sentinel = True
+        assert all(np.isnan(s.landmarks[0, 1]) for s in stream)
+
+    def test_stream_reads_lazily(self, tmp_path):
+        from components.formats import TPSStream
+
+        path = tmp_path / "lazy.tps"
+        path.write_text("".join(f"LM=1\n{i} {i}\nID=s{i}\n" for i in range(1000)), encoding="utf-8")
+        stream = TPSStream(str(path), "ds")
+        next(iter(stream))
+        assert 0 < stream.bytes_read < stream.size
+
+    def test_a_reader_without_read_cannot_be_made(self, tmp_path):
+        from components.formats.specimen import SpecimenStream
+
+        class Unfinished(SpecimenStream):
+            pass
+
+        path = tmp_path / "data.txt"
+        path.write_text("x\n", encoding="utf-8")
+        with pytest.raises(TypeError):
+            Unfinished(str(path), "ds")
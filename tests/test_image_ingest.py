@@ -0,0 +1,93 @@
+"""Tests for preparing image files for storage (MdImageIngest)."""
+
+import hashlib
+import os
+import sys
+
+import pytest
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import MdImageIngest
+import MdMediaStore
+
+
+def _write_jpeg(path, w, h):
+    Image.new("RGB", (w, h), (128, 64, 32)).save(str(path), quality=95)
+    return str(path)
+
+
+def _md5(path):
+    with open(path, "rb") as f:
+        return hashlib.md5(f.read()).hexdigest()
+
+
+def _stored(storage, digest):
+    return MdMediaStore.blob_path(str(storage), digest, "jpg")
+
+
+def test_small_image_is_stored_verbatim(tmp_path):
+    source = _write_jpeg(tmp_path / "small.jpg", 60, 40)
+    storage = tmp_path / "store"
+
+    info = MdImageIngest.store_image(source, str(storage), "jpg", 100, 90)
+
+    assert not info["downscaled"]
+    assert info["file_hash"] == info["md5hash"] == _md5(source)
+    assert info["original_hash"] is None
+    assert _md5(_stored(storage, info["file_hash"])) == _md5(source)
+    assert info["size"] == os.path.getsize(source)
+    assert info["exifdatetime"].strip()
+
+
+def test_oversized_image_is_opened_once_and_archived(tmp_path, monkeypatch):
+    source = _write_jpeg(tmp_path / "big.jpg", 400, 200)
+    storage = tmp_path / "store"
+    opened = []
+    real_open = Image.open
+    monkeypatch.setattr(MdImageIngest.Image, "open", lambda *args: opened.append(args) or real_open(*args))
+
+    info = MdImageIngest.store_image(source, str(storage), "jpg", 100, 90)
+
+    assert info["downscaled"]
+    assert len(opened) == 1
+    working = _stored(storage, info["file_hash"])
+    with real_open(working) as img:
+        assert img.size == (100, 50)
+    assert _md5(working) == info["file_hash"]
+    assert info["original_hash"] == info["md5hash"] == _md5(source)
+    assert _md5(_stored(storage, info["original_hash"])) == _md5(source)
+    # Nothing is left behind but the two stored files.
+    assert sorted(f for _, _, files in os.walk(storage) for f in files) == sorted(
+        os.path.basename(_stored(storage, h)) for h in (info["file_hash"], info["original_hash"])
+    )
+
+
+def test_unreadable_image_is_stored_without_exif(tmp_path):
+    path = tmp_path / "broken.jpg"
+    path.write_bytes(b"not an image")
+
+    info = MdImageIngest.store_image(str(path), str(tmp_path / "store"), "jpg", 100, 90)
+
+    assert not info["downscaled"]
+    assert info["exifdatetime"] == ""
+    assert info["file_hash"] == _md5(path)
+
+
+def test_missing_source_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        MdImageIngest.store_image(str(tmp_path / "gone.jpg"), str(tmp_path / "store"), "jpg", 100, 90)
+
+
+def test_pool_gives_the_serial_results_in_order(tmp_path):
+    sources = [_write_jpeg(tmp_path / f"p{i}.jpg", 80 + 60 * i, 50) for i in range(4)]
+    serial_store, pooled_store = str(tmp_path / "serial"), str(tmp_path / "pooled")
+    serial = list(MdImageIngest.store_images([(s, serial_store, "jpg") for s in sources], 100, 90))
+    pooled = list(MdImageIngest.store_images([(s, pooled_store, "jpg") for s in sources], 100, 90, n_jobs=2))
+
+    assert [info["md5hash"] for info in pooled] == [_md5(s) for s in sources]
+    assert [info["downscaled"] for info in pooled] == [False, True, True, True]
+    for info_a, info_b in zip(serial, pooled):
+        assert {k: v for k, v in info_a.items() if k != "ctime"} == {k: v for k, v in info_b.items() if k != "ctime"}
+        assert _md5(_stored(serial_store, info_a["file_hash"])) == _md5(_stored(pooled_store, info_b["file_hash"]))
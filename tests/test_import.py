@@ -477,3 +477,80 @@ class TestImportPreservesGeometry:
         assert dataset.unpack_polygons() == [[1, 2, 3]]
         assert dataset.unpack_wireframe() == [[1, 2], [2, 3]]
         assert dataset.get_variablename_list() == ["Sex"]
+
+    def test_streamed_import_matches_the_whole_file_import(self, mock_database, tmp_path):
+        from components.formats import Morphologika, MorphologikaStream
+        from ModanController import ModanController
+
+        path = tmp_path / "m.txt"
+        path.write_text(self.MORPHOLOGIKA)
+        controller = ModanController()
+        whole = controller.import_dataset(Morphologika(str(path), "ds"), "whole", str(tmp_path))
+        streamed = controller.import_stream(MorphologikaStream(str(path), "ds"), "streamed", str(tmp_path))
+
+        def contents(dataset):
+            dataset = MdModel.MdDataset.get_by_id(dataset.id)
+            objects = [
+                (o.object_name, o.landmark_str, o.property_str)
+                for o in dataset.object_list.order_by(MdModel.MdObject.id)
+            ]
+            return dataset.dimension, dataset.wireframe, dataset.polygons, dataset.propertyname_str, objects
+
+        assert contents(streamed) == contents(whole)
+
+
+class TestStreamedImport:
+    """ModanController.import_stream: stores specimens while the file is read."""
+
+    @staticmethod
+    def _write_tps(tmp_path, count, broken_at=None):
+        lines = []
+        for i in range(count):
+            y = "oops" if i == broken_at else str(i)
+            lines.append(f"LM=2\n0 0\n{i} {y}\nID=s{i}\n")
+        path = tmp_path / "big.tps"
+        path.write_text("".join(lines))
+        return str(path)
+
+    def test_batches_are_stored_before_the_file_is_finished(self, mock_database, tmp_path, monkeypatch):
+        from components.formats import TPSStream
+        from ModanController import ModanController
+
+        stream = TPSStream(self._write_tps(tmp_path, 1200), "ds")
+        reports = []
+
+        def progress(done, total):
+            reports.append((MdModel.MdObject.select().count(), done, total))
+
+        dataset = ModanController().import_stream(stream, "big", str(tmp_path), progress)
+
+        assert dataset.object_list.count() == 1200
+        # The first batch was in the database while most of the file was unread.
+        stored, done, total = next(report for report in reports if report[0] > 0)
+        assert done < total / 2
+        assert reports[-1][1:] == (stream.size, stream.size)
+
+    def test_a_failure_part_way_leaves_no_dataset(self, mock_database, tmp_path):
+        from components.formats import TPSStream
+        from ModanController import ModanController
+
+        stream = TPSStream(self._write_tps(tmp_path, 1200, broken_at=1100), "ds")
+        with pytest.raises(ValueError):
+            ModanController().import_stream(stream, "broken", str(tmp_path))
+
+        assert MdModel.MdDataset.select().count() == 0
+        assert MdModel.MdObject.select().count() == 0
+
+    def test_dimension_and_curves_come_from_the_specimens(self, mock_database, tmp_path):
+        from components.formats import TPSStream
+        from ModanController import ModanController
+
+        path = tmp_path / "curves.tps"
+        path.write_text("LM=1\n0 0\nID=plain\nLM=2\n1 1\n2 2\nCURVES=1\nPOINTS=3\n0 0\n1 0\n2 0\nID=curved\n")
+        dataset = ModanController().import_stream(TPSStream(str(path), "ds"), "curves", str(tmp_path))
+
+        dataset = MdModel.MdDataset.get_by_id(dataset.id)
+        assert dataset.dimension == 2
+        assert [(c["start"], c["n"]) for c in dataset.get_curve_config()] == [(2, 3)]
+        curved = dataset.object_list.where(MdModel.MdObject.object_name == "curved").get()
+        assert curved.get_curve_raw() == {"curve1": [[0.0, 0.0], [1.0, 0.0], [2.0, 0.0]]}
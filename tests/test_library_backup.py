@@ -292,6 +292,26 @@ class TestRestoring:
         assert json.loads(analysis.pca_eigenvalues_json) == [0.9, 0.1]
         assert analysis.dataset.dataset_name == "Trilobites"
 
+    def test_results_stored_as_arrays_come_back(self, library, tmp_path, storage):
+        analysis = mm.MdAnalysis(
+            analysis_name="Array run", dataset=mm.MdDataset.get(), superimposition_method="Procrustes"
+        )
+        analysis.set_result("pca_rotation_matrix", [[1.0, 0.0], [0.0, 1.0]])
+        analysis.set_result("superimposed_landmark", [[[1.0, None]], [[3.0, 4.0]]])
+        analysis.save()
+        out = str(tmp_path / "backup.zip")
+        mu.create_library_backup(out)
+        mm.MdAnalysis.delete().execute()
+        mm.MdObject.delete().execute()
+        mm.MdImage.delete().execute()
+        mm.MdDataset.delete().execute()
+
+        mu.restore_library_backup(out)
+
+        restored = mm.MdAnalysis.get(mm.MdAnalysis.analysis_name == "Array run")
+        assert restored.get_result_list("pca_rotation_matrix") == [[1.0, 0.0], [0.0, 1.0]]
+        assert restored.get_result_list("superimposed_landmark") == [[[1.0, None]], [[3.0, 4.0]]]
+
     def test_an_analysis_keeps_the_date_it_was_run(self, library, tmp_path, storage):
         """An analysis is dated evidence. Restoring it with today's date would
         misrepresent when the work was done."""
@@ -215,3 +215,84 @@ class TestCurveFollowing:
         wire = lw.build_livewire(_disk())
         left = wire.find_path((60, 15), (15, 60)) + wire.find_path((15, 60), (60, 105))
         assert all(x <= 62 for x, _y in left)  # stays on the left half
+
+
+# --------------------------------------------------------------------------- #
+# Windowed live-wire
+# --------------------------------------------------------------------------- #
+
+
+def _v_shape(h=240, w=120):
+    """Two bright strokes from the top corners meeting at the bottom middle."""
+    yy, xx = np.mgrid[0:h, 0:w]
+    img = np.zeros((h, w))
+    for x_top in (20, 100):
+        # Horizontal distance to the stroke from (x_top, 10) to (60, 200).
+        x_line = x_top + (60 - x_top) * (yy - 10) / 190.0
+        img[(np.abs(xx - x_line) <= 3) & (yy >= 10) & (yy <= 200)] = 255.0
+    return img
+
+
+class TestWindowedLiveWire:
+    def test_matches_the_full_graph(self):
+        img = _disk(noise=20.0)
+        full = lw.build_livewire(img)
+        windowed = lw.WindowedLiveWire(img)
+        for seed, target in [((60, 15), (15, 60)), ((15, 60), (60, 105)), ((20, 40), (100, 40))]:
+            assert windowed.find_path(seed, target) == full.find_path(seed, target)
+
+    def test_computes_only_the_tiles_a_search_reaches(self):
+        img = np.zeros((1024, 1024))
+        img[:, 500:510] = 255.0
+        wire = lw.WindowedLiveWire(img)
+        path = wire.find_path((505, 100), (505, 160))
+        assert path[0] == [505, 100] and path[-1] == [505, 160]
+        assert 0 < len(wire._tiles) < (1024 // lw._TILE) ** 2 // 4
+
+    def test_nearby_targets_reuse_the_search(self):
+        wire = lw.WindowedLiveWire(_disk())
+        wire.set_seed((60, 15))
+        wire.path_to((20, 60))
+        search = wire._searches[(60, 15)]
+        path = wire.path_to((22, 50))
+        assert wire._searches[(60, 15)] is search
+        assert path[-1] == [22, 50]
+
+    def test_window_grows_for_a_detour(self):
+        # Crossing between the strokes is dear, and cheaper the lower down it
+        # is. The best path in the first window (margin 43, so rows up to 53)
+        # runs down to its bottom side, so the window grows downwards.
+        img = _v_shape()
+        wire = lw.WindowedLiveWire(img, coarse=lw.WindowedLiveWire(img[::2, ::2], scale=2.0))
+        path = wire.find_path((17, 10), (103, 10))
+        search = wire._searches[(17, 10)]
+        assert search.y1 > 54
+        assert 54 < max(y for _x, y in path) < search.y1 - 1
+        assert (path[0], path[-1]) == ([17, 10], [103, 10])
+
+    def test_long_segment_goes_over_the_coarse_level(self, monkeypatch):
+        monkeypatch.setattr(lw, "_WINDOW_NODE_BUDGET", 60 * 60)
+        img = np.zeros((400, 400))
+        img[:, 200:210] = 255.0
+        wire = lw.build_livewire(img, max_dim=100, windowed=True)
+        assert wire.coarse is not None and wire.coarse.scale == 4.0
+        path = wire.find_path((209, 5), (209, 390))
+        assert path[0] == [208, 4]  # the seed, on the coarse grid
+        assert path[-1] == [209, 390]
+        assert all(abs(x - 209) <= 2 * wire.coarse.scale for x, _y in path)
+        # Traced at full resolution near the cursor: single-pixel steps.
+        tail = path[-lw._REFINE_RADIUS :]
+        assert all(max(abs(a[0] - b[0]), abs(a[1] - b[1])) == 1 for a, b in zip(tail, tail[1:]))
+
+    def test_build_livewire_windowed(self):
+        small = lw.build_livewire(np.ones((10, 10)), windowed=True)
+        assert isinstance(small, lw.WindowedLiveWire)
+        assert small.coarse is None
+        assert small.find_path((0, 0), (9, 9))[-1] == [9, 9]
+        large = lw.build_livewire(np.ones((3000, 200)), max_dim=1024, windowed=True)
+        assert (large.width, large.height) == (200, 3000)
+        assert max(large.coarse.width, large.coarse.height) <= 1024
+
+    def test_without_a_seed_returns_the_target(self):
+        wire = lw.WindowedLiveWire(np.ones((10, 10)))
+        assert wire.path_to((3, 4)) == [[3, 4]]
@@ -0,0 +1,145 @@
+"""Tests for the live-wire fields kept in the storage directory (MdLiveWireStore)."""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import MdLiveWire
+import MdLiveWireStore
+import MdModel
+import MdUtils as mu
+
+
+def _bar_image(path, width=120, height=90, bar_x=60):
+    """A dark image with a bright vertical bar from ``bar_x`` on."""
+    pixels = np.zeros((height, width), dtype=np.uint8)
+    pixels[:, bar_x : bar_x + 10] = 255
+    Image.fromarray(pixels).convert("RGB").save(str(path))
+    return str(path)
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return str(tmp_path)
+
+
+@pytest.fixture
+def image(storage):
+    """An image inside the storage directory, as a stored one is."""
+    return _bar_image(os.path.join(storage, "bar.png"))
+
+
+class TestEncodedField:
+    def test_paths_match_the_exact_field(self):
+        gray = np.zeros((90, 120))
+        gray[:, 60:70] = 255.0
+        exact = MdLiveWire.WindowedLiveWire(gray)
+        encoded = MdLiveWire.WindowedLiveWire(MdLiveWire.EncodedField.from_gray(gray))
+        assert encoded.find_path((60, 5), (60, 80)) == exact.find_path((60, 5), (60, 80))
+
+    def test_two_bytes_a_pixel(self):
+        field = MdLiveWire.EncodedField.from_gray(np.zeros((30, 40)))
+        assert field.strength.dtype == field.angle.dtype == np.uint8
+        assert field.strength.shape == field.angle.shape == (30, 40)
+        cost, dirx, diry = field.fields(-1, 31, -1, 41)
+        assert cost.shape == (32, 42)
+        assert np.all(cost == 1.0) and not dirx.any() and not diry.any()
+
+
+class TestStoredFields:
+    def test_built_beside_the_image_and_memory_mapped(self, image, storage):
+        assert not MdLiveWireStore.is_built(image, storage)
+        assert MdLiveWireStore.build_fields(image, storage)
+        assert MdLiveWireStore.is_built(image, storage)
+        directory = MdLiveWireStore.field_directory(image, storage)
+        assert sorted(os.listdir(directory)) == ["0_angle.npy", "0_strength.npy", MdLiveWireStore.MANIFEST_NAME]
+
+        wire = MdLiveWireStore.load_livewire(image, storage)
+        assert isinstance(wire._field.strength, np.memmap)
+        assert (wire.width, wire.height) == (120, 90)
+        path = wire.find_path((60, 5), (60, 80))
+        assert all(abs(x - 60) <= 1 for x, _y in path)
+
+    def test_missing_fields_load_as_none(self, image, storage):
+        assert MdLiveWireStore.load_livewire(image, storage) is None
+
+    def test_fields_of_another_version_are_rebuilt(self, image, storage):
+        MdLiveWireStore.build_fields(image, storage)
+        _bar_image(image, width=100, height=80, bar_x=30)
+        assert not MdLiveWireStore.is_built(image, storage)
+        assert MdLiveWireStore.load_livewire(image, storage) is None
+
+        wire = MdLiveWireStore.open_livewire(image, storage)
+        assert (wire.width, wire.height) == (100, 80)
+        assert MdLiveWireStore.is_built(image, storage)
+
+    def test_large_image_gets_a_coarse_level(self, image, storage, monkeypatch):
+        monkeypatch.setattr(MdLiveWireStore, "COARSE_MAX_DIM", 50)
+        wire = MdLiveWireStore.open_livewire(image, storage)
+        assert wire.coarse is not None
+        assert (wire.coarse.width, wire.coarse.height, wire.coarse.scale) == (40, 30, 3.0)
+        assert MdLiveWireStore.load_livewire(image, storage).coarse.scale == 3.0
+
+    def test_unreadable_image(self, tmp_path, storage):
+        path = tmp_path / "broken.png"
+        path.write_bytes(b"not an image")
+        assert not MdLiveWireStore.build_fields(str(path), storage)
+        assert MdLiveWireStore.open_livewire(str(path), storage) is None
+
+    def test_fields_kept_in_memory_when_they_cannot_be_written(self, image, storage, monkeypatch):
+        def fail(*args):
+            raise OSError("read-only")
+
+        monkeypatch.setattr(MdLiveWireStore, "_write_fields", fail)
+        wire = MdLiveWireStore.open_livewire(image, storage)
+        assert wire is not None and wire.find_path((60, 5), (60, 80))[-1] == [60, 80]
+        assert not os.path.exists(MdLiveWireStore.field_directory(image, storage))
+
+    def test_image_outside_the_store_leaves_nothing_beside_it(self, tmp_path, storage):
+        photos = tmp_path.parent / (tmp_path.name + "-photos")
+        photos.mkdir()
+        photo = _bar_image(photos / "bar.png")
+        wire = MdLiveWireStore.open_livewire(photo, storage)
+        assert wire.find_path((60, 5), (60, 80))[-1] == [60, 80]
+        assert os.listdir(photos) == ["bar.png"]
+        assert MdLiveWireStore.field_directory(photo, storage).startswith(storage)
+        assert isinstance(MdLiveWireStore.load_livewire(photo, storage)._field.strength, np.memmap)
+
+    def test_without_a_storage_directory_fields_stay_in_memory(self, tmp_path):
+        photo = _bar_image(tmp_path / "bar.png")
+        assert MdLiveWireStore.field_directory(photo) is None
+        assert MdLiveWireStore.open_livewire(photo).find_path((60, 5), (60, 80))[-1] == [60, 80]
+        assert not MdLiveWireStore.build_fields(photo)
+        assert os.listdir(tmp_path) == ["bar.png"]
+
+
+class TestBackgroundBuilds:
+    def test_scheduled_images_are_built(self, image, storage):
+        MdLiveWireStore.start_background_builds()
+        MdLiveWireStore.schedule_builds([image], storage)
+        MdLiveWireStore.stop_background_builds(wait=True)
+        assert MdLiveWireStore.is_built(image, storage)
+
+    def test_nothing_is_built_without_a_builder(self, image, storage):
+        MdLiveWireStore.schedule_builds([image], storage)
+        assert not MdLiveWireStore.is_built(image, storage)
+
+    def test_stored_images_are_scheduled(self, mock_database, tmp_path, monkeypatch):
+        storage = str(tmp_path / "storage")
+        monkeypatch.setattr(mu, "get_storage_directory", lambda: storage)
+        dataset = MdModel.MdDataset.create(dataset_name="Traced", dimension=2)
+        single = MdModel.MdObject.create(dataset=dataset, object_name="single")
+        MdLiveWireStore.start_background_builds()
+        single.add_image(_bar_image(tmp_path / "single.png")).save()
+        with MdModel.BulkWriteSession(image_jobs=1) as session:
+            bulk = session.add_object(MdModel.MdObject(dataset=dataset, object_name="bulk"))
+            session.add_image(bulk, _bar_image(tmp_path / "bulk.png", bar_x=20))
+        MdLiveWireStore.stop_background_builds(wait=True)
+
+        for obj in (single, bulk):
+            assert MdLiveWireStore.is_built(obj.get_image().get_file_path(), storage)
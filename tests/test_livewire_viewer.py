@@ -16,6 +16,9 @@ from PyQt5.QtGui import QImage, QKeyEvent, QPixmap, qRgb
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import MdLiveWire
+import MdLiveWireStore
+import MdUtils as mu
 from components.viewers.object_viewer_2d import MODE, ObjectViewer2D
 
 
@@ -79,6 +82,28 @@ class TestLivewireSegment:
         assert wire is not None
         assert viewer._ensure_livewire() is wire  # cached, not rebuilt
 
+    def test_cost_map_of_an_image_file_is_kept_beside_it(self, viewer, tmp_path, monkeypatch):
+        monkeypatch.setattr(mu, "get_storage_directory", lambda: str(tmp_path))
+        path = str(tmp_path / "bar.png")
+        _bar_pixmap(w=40, h=40, bar_x=20).save(path)
+        viewer.set_image(path)
+        wire = viewer._ensure_livewire()
+        assert MdLiveWireStore.is_built(path, str(tmp_path))
+        assert isinstance(wire._field, MdLiveWire.EncodedField)
+        path_points = viewer._livewire_segment([21, 2], [21, 37])
+        assert all(abs(x - 21) <= 2 for x, _y in path_points)
+
+    def test_tracing_an_image_outside_the_store_writes_nothing_beside_it(self, viewer, tmp_path, monkeypatch):
+        storage = tmp_path / "storage"
+        monkeypatch.setattr(mu, "get_storage_directory", lambda: str(storage))
+        photos = tmp_path / "photos"
+        photos.mkdir()
+        path = str(photos / "bar.png")
+        _bar_pixmap(w=40, h=40, bar_x=20).save(path)
+        viewer.set_image(path)
+        assert viewer._ensure_livewire() is not None
+        assert os.listdir(photos) == ["bar.png"]
+
     def test_segment_snaps_to_the_bar(self, viewer):
         viewer.orig_pixmap = _bar_pixmap(w=40, h=40, bar_x=20)
         # Seed and target on the bar's edge; snapped path hugs it.
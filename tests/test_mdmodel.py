@@ -1,10 +1,13 @@
 """Tests for MdModel module - Database models and operations."""
 
+import json
 import math
 import os
+import shutil
 import sys
 import tempfile
 
+import numpy as np
 import pytest
 from peewee import IntegrityError
 
@@ -4553,7 +4556,7 @@ class TestMdImageFileLifecycle:
         assert info["datetime"].strip() != ""
         assert info["latitude"] == "" and info["longitude"] == ""
 
-    def test_copy_image_duplicates_file(self, test_database, storage_dir, tmp_path):
+    def test_copy_image_shares_the_stored_file(self, test_database, storage_dir, tmp_path):
         obj = self._object()
         src = _make_png(tmp_path / "orig.png")
         img = mm.MdImage(object=obj)
@@ -4563,8 +4566,19 @@ class TestMdImageFileLifecycle:
         new_img = img.copy_image(other)
 
         assert new_img.md5hash == img.md5hash
+        assert new_img.file_hash == img.file_hash
+        assert new_img.get_file_path() == img.get_file_path()
         assert os.path.exists(new_img.get_file_path())
-        assert new_img.get_file_path() != img.get_file_path()
+
+    def test_the_same_photo_is_stored_once(self, test_database, storage_dir, tmp_path):
+        src = _make_png(tmp_path / "orig.png")
+        first = mm.MdImage(object=self._object()).add_file(src)
+        second = mm.MdImage(object=mm.MdObject.create(object_name="Obj2", dataset=first.object.dataset))
+        second.add_file(str(shutil.copyfile(src, tmp_path / "again.png")))
+
+        assert second.get_file_path() == first.get_file_path()
+        stored = [f for _, _, files in os.walk(storage_dir) for f in files]
+        assert len(stored) == 1
 
 
 def _make_obj(path):
@@ -4855,3 +4869,338 @@ class TestBooksteinSuperimposition:
         ds_ops = mm.MdDatasetOps(ds)
         with pytest.raises(ValueError, match="coincide"):
             ds_ops.bookstein_superimposition()
+
+
+class TestLandmarkBlob:
+    """Binary landmark storage beside landmark_str (MdObject.landmark_blob)."""
+
+    TEXT = "1.5\t2.0\n3.25\tMissing\n-4.0\t5.0"
+
+    def _make_object(self, text=TEXT, dimension=2):
+        dataset = mm.MdDataset.create(dataset_name="blob", dimension=dimension)
+        return mm.MdObject.create(object_name="o", dataset=dataset, landmark_str=text)
+
+    def test_save_stores_blob_with_nan_for_missing(self, test_database):
+        obj = mm.MdObject.get_by_id(self._make_object().id)
+        landmarks = obj.get_landmark_array()
+
+        assert landmarks.shape == (3, 2)
+        assert landmarks[0].tolist() == [1.5, 2.0]
+        assert np.isnan(landmarks[1, 1])
+        assert obj.get_landmark_list() == [[1.5, 2.0], [3.25, None], [-4.0, 5.0]]
+
+    def test_array_is_a_read_only_view_of_the_blob(self, test_database):
+        obj = mm.MdObject.get_by_id(self._make_object().id)
+        landmarks = obj.get_landmark_array()
+
+        assert not landmarks.flags.writeable
+        assert np.shares_memory(landmarks, np.frombuffer(obj.landmark_blob, dtype=np.uint8))
+
+    def test_current_blob_is_read_without_parsing(self, test_database, monkeypatch):
+        obj = mm.MdObject.get_by_id(self._make_object().id)
+        monkeypatch.setattr(mm, "parse_landmark_rows", lambda text: pytest.fail("parsed landmark text"))
+        assert obj.unpack_landmark()[2] == [-4.0, 5.0]
+
+    def test_stale_blob_falls_back_to_text(self, test_database):
+        obj = self._make_object()
+        # A writer that only knows the text, e.g. an older Modan2.
+        mm.MdObject.update(landmark_str="7\t8").where(mm.MdObject.id == obj.id).execute()
+        obj = mm.MdObject.get_by_id(obj.id)
+
+        assert obj.get_landmark_list() == [[7.0, 8.0]]
+        assert obj.get_landmark_array().tolist() == [[7.0, 8.0]]
+        obj.save()
+        assert mm.decode_landmark_blob(obj.landmark_blob, obj.landmark_str).tolist() == [[7.0, 8.0]]
+
+    def test_pack_landmark_writes_a_current_blob(self, test_database, monkeypatch):
+        obj = self._make_object(text="")
+        obj.landmark_list = [[0.5, None], [1.0, 2.0]]
+        obj.pack_landmark()
+        monkeypatch.setattr(mm, "parse_landmark_rows", lambda text: pytest.fail("parsed landmark text"))
+        obj.save()
+
+        assert obj.landmark_str == "0.5\tMissing\n1.0\t2.0"
+        assert obj.get_landmark_list() == [[0.5, None], [1.0, 2.0]]
+
+    def test_clearing_landmarks_clears_the_blob(self, test_database):
+        obj = self._make_object()
+        obj.landmark_str = ""
+        obj.save()
+        assert mm.MdObject.get_by_id(obj.id).landmark_blob is None
+
+    @pytest.mark.parametrize(
+        "text",
+        [
+            "1,2\n3,4",
+            "1  2\n3   4",
+            "1\t\n\t4",
+            "1\t2\t9\n3\t4",
+            "1\t2\t\t\n3\t4",
+            "1\n2\t3",
+        ],
+    )
+    def test_blob_matches_parsing_the_text(self, test_database, text):
+        obj = mm.MdObject.get_by_id(self._make_object(text=text).id)
+        from_blob = obj.get_landmark_list()
+        obj.landmark_blob = None
+        assert from_blob == obj.get_landmark_list()
+
+    def test_decode_rejects_malformed_blobs(self):
+        blob = mm.encode_landmark_blob([[1.0, 2.0]], "1\t2")
+        assert mm.decode_landmark_blob(blob, "1\t2").tolist() == [[1.0, 2.0]]
+        assert mm.decode_landmark_blob(blob[:-1]) is None
+        assert mm.decode_landmark_blob(b"XXXX" + blob[4:]) is None
+        assert mm.decode_landmark_blob(blob, "1\t3") is None
+
+    def test_copy_object_keeps_the_blob(self, test_database):
+        obj = mm.MdObject.get_by_id(self._make_object().id)
+        copy = obj.copy_object(obj.dataset)
+        assert copy.landmark_blob == obj.landmark_blob
+
+    def test_backfill_fills_only_missing_blobs(self, test_database):
+        obj = self._make_object()
+        mm.MdObject.update(landmark_blob=None).where(mm.MdObject.id == obj.id).execute()
+        self._make_object(text="")
+
+        assert mm.backfill_landmark_blobs() == 1
+        stored = mm.MdObject.get_by_id(obj.id)
+        assert mm.decode_landmark_blob(stored.landmark_blob, stored.landmark_str).shape == (3, 2)
+        assert mm.backfill_landmark_blobs() == 0
+
+
+class TestObjectSummary:
+    """The object table's per-object summary columns (MdObject.sync_summary)."""
+
+    def _make_object(self, text, **kwargs):
+        dataset = mm.MdDataset.create(dataset_name="summary", dimension=2)
+        return mm.MdObject.create(object_name="o", dataset=dataset, landmark_str=text, **kwargs)
+
+    def test_save_matches_the_object_methods(self, test_database):
+        obj = self._make_object("0\t0\n3\t0\nMissing\tMissing\n0\t4", pixels_per_mm=2.0)
+        obj.set_curve_raw({"c1": [[0, 0], [1, 1]]})
+        obj.save()
+
+        stored = mm.MdObject.get_by_id(obj.id)
+        assert stored.summary_landmark_count == stored.count_landmarks() == 3
+        assert stored.summary_missing_count == 1
+        assert stored.summary_curve_count == 1
+        assert stored.summary_centroid_size == pytest.approx(stored.get_centroid_size())
+
+    def test_sync_leaves_the_instance_landmarks_alone(self, test_database):
+        obj = self._make_object("0\t0\n1\t1")
+        obj.landmark_list = [[5.0, 5.0]]
+        obj.sync_summary()
+        assert obj.landmark_list == [[5.0, 5.0]]
+        assert obj.summary_landmark_count == 2
+
+    def test_backfill_fills_only_missing_summaries(self, test_database):
+        obj = self._make_object("0\t0\n1\t0\n0\t1")
+        mm.MdObject.update(summary_landmark_count=None).where(mm.MdObject.id == obj.id).execute()
+
+        assert mm.backfill_object_summaries() == 1
+        assert mm.MdObject.get_by_id(obj.id).summary_landmark_count == 3
+        assert mm.backfill_object_summaries() == 0
+
+
+class TestBulkWriteSession:
+    """Batched inserts of new objects and images (MdModel.BulkWriteSession)."""
+
+    def test_objects_are_written_as_save_would(self, test_database):
+        dataset = mm.MdDataset.create(dataset_name="bulk", dimension=2)
+        with mm.BulkWriteSession(batch_size=3) as session:
+            objects = [
+                session.add_object(mm.MdObject(object_name=f"o{i}", dataset=dataset, landmark_str=f"0\t0\n{i}\t1"))
+                for i in range(7)
+            ]
+
+        assert session.object_count == 7
+        assert [obj.id for obj in objects] == [row.id for row in dataset.object_list.order_by(mm.MdObject.id)]
+        stored = mm.MdObject.get_by_id(objects[4].id)
+        assert stored.object_name == "o4"
+        assert stored.landmark_blob is not None
+        assert stored.summary_landmark_count == 2
+        assert stored.created_at is not None
+
+    def test_each_batch_is_one_insert(self, test_database, monkeypatch):
+        dataset = mm.MdDataset.create(dataset_name="bulk", dimension=2)
+        inserts = []
+        original = mm.MdObject.insert_many
+        monkeypatch.setattr(mm.MdObject, "insert_many", lambda rows: inserts.append(len(rows)) or original(rows))
+        with mm.BulkWriteSession(batch_size=4) as session:
+            for i in range(10):
+                session.add_object(mm.MdObject(object_name=f"o{i}", dataset=dataset))
+
+        assert inserts == [4, 4, 2]
+
+    def test_an_exception_drops_the_unwritten_batch(self, test_database):
+        dataset = mm.MdDataset.create(dataset_name="bulk", dimension=2)
+        with pytest.raises(RuntimeError), mm.BulkWriteSession(batch_size=2) as session:
+            for i in range(3):
+                session.add_object(mm.MdObject(object_name=f"o{i}", dataset=dataset))
+            raise RuntimeError
+
+        assert dataset.object_list.count() == 2
+
+    def test_saved_objects_are_refused(self, test_database):
+        dataset = mm.MdDataset.create(dataset_name="bulk", dimension=2)
+        obj = mm.MdObject.create(object_name="saved", dataset=dataset)
+        with pytest.raises(ValueError), mm.BulkWriteSession() as session:
+            session.add_object(obj)
+
+    def test_images_are_stored_under_the_new_object_ids(self, test_database, storage_dir, tmp_path):
+        dataset = mm.MdDataset.create(dataset_name="bulk", dimension=2)
+        with mm.BulkWriteSession() as session:
+            obj = session.add_object(mm.MdObject(object_name="pictured", dataset=dataset))
+            session.add_image(obj, _make_png(tmp_path / "photo.png"))
+
+        assert session.image_count == 1
+        image = mm.MdImage.get(mm.MdImage.object == obj.id)
+        assert image.original_filename == "photo.png"
+        assert os.path.exists(image.get_file_path())
+        assert image.get_file_path().endswith(f"{image.file_hash}.png")
+
+    def test_images_prepared_on_workers_match_add_file(self, test_database, storage_dir, tmp_path, monkeypatch):
+        monkeypatch.setattr(mm, "IMAGE_MAX_DIM", 60)
+        dataset = mm.MdDataset.create(dataset_name="bulk", dimension=2)
+        sources = [_make_png(tmp_path / f"photo{i}.png", size=(40 + 20 * i, 30)) for i in range(3)]
+        with mm.BulkWriteSession(image_jobs=2) as session:
+            objects = [session.add_object(mm.MdObject(object_name=f"o{i}", dataset=dataset)) for i in range(3)]
+            for obj, source in zip(objects, sources):
+                session.add_image(obj, source)
+
+        for obj, source in zip(objects, sources):
+            image = mm.MdImage.get(mm.MdImage.object == obj.id)
+            expected = mm.MdImage(object=mm.MdObject.create(object_name="single", dataset=dataset))
+            expected.add_file(source)
+            assert image.md5hash == expected.md5hash
+            assert image.has_archived_original() == expected.has_archived_original()
+            with open(image.get_file_path(), "rb") as a, open(expected.get_file_path(), "rb") as b:
+                assert a.read() == b.read()
+        assert [mm.MdImage.get(mm.MdImage.object == o.id).has_archived_original() for o in objects] == [
+            False,
+            False,
+            True,
+        ]
+
+
+class TestLandmarkMatrix:
+    """Whole-dataset landmark loading (MdDataset.get_landmark_matrix)."""
+
+    def _make_dataset(self, texts, dimension=2):
+        dataset = mm.MdDataset.create(dataset_name="matrix", dimension=dimension)
+        for i, text in enumerate(texts):
+            mm.MdObject.create(object_name=f"o{i}", dataset=dataset, sequence=len(texts) - i, landmark_str=text)
+        return dataset
+
+    def test_stacks_objects_in_sequence_order(self, test_database):
+        dataset = self._make_dataset(["1\t2\n3\t4", "", "5\t6\n7\tMissing"])
+        matrix = dataset.get_landmark_matrix()
+        ids = [o.id for o in dataset.object_list.order_by(mm.MdObject.sequence) if o.landmark_str]
+
+        assert matrix.object_ids == ids
+        assert matrix.landmarks.shape == (2, 2, 2)
+        assert matrix.landmarks[1].tolist() == [[1.0, 2.0], [3.0, 4.0]]
+        assert matrix.missing[0].tolist() == [[False, False], [False, True]]
+        assert matrix.landmark_lists()[0] == [[5.0, 6.0], [7.0, None]]
+
+    def test_coordinates_fit_the_dimension(self, test_database):
+        matrix = self._make_dataset(["1\t2\n3\t4\t5", "1\t2\t3\t9\n4\t5\t6"], dimension=3).get_landmark_matrix()
+        assert matrix.landmarks.shape == (2, 2, 3)
+        assert np.isnan(matrix.landmarks[1, 0, 2])
+        assert matrix.landmarks[0, 0].tolist() == [1.0, 2.0, 3.0]
+
+    def test_reads_blobs_without_parsing(self, test_database, monkeypatch):
+        dataset = self._make_dataset(["1\t2", "3\t4"])
+        monkeypatch.setattr(mm, "parse_landmark_rows", lambda text: pytest.fail("parsed landmark text"))
+        assert dataset.get_landmark_matrix().landmarks.shape == (2, 1, 2)
+
+    def test_differing_counts_raise(self, test_database):
+        dataset = self._make_dataset(["1\t2\n3\t4", "1\t2"])
+        with pytest.raises(mm.LandmarkCountMismatchError) as excinfo:
+            dataset.get_landmark_matrix()
+        assert excinfo.value.expected == 1 and excinfo.value.found == 2
+        assert mm.MdObject.get_by_id(excinfo.value.object_id).object_name == "o0"
+
+    def test_unimputable_landmarks_match_the_list_version(self, test_database):
+        dataset = self._make_dataset(["1\tMissing\n3\t4\nMissing\tMissing", "5\tMissing\n7\t8\n9\t1"])
+        objects = list(dataset.object_list)
+        assert dataset.get_landmark_matrix().unimputable_landmarks() == mm.find_unimputable_landmarks(objects) == [0]
+
+    def test_dataset_ops_are_built_from_the_matrix(self, test_database, monkeypatch):
+        dataset = self._make_dataset(["1\t2\n3\tMissing", "5\t6\n7\t8"])
+        monkeypatch.setattr(mm.MdObject, "unpack_landmark", lambda self: pytest.fail("unpacked an object"))
+        ds_ops = mm.MdDatasetOps(dataset)
+        lists = {mo.object_name: mo.landmark_list for mo in ds_ops.object_list}
+        assert lists == {"o0": [[1.0, 2.0], [3.0, None]], "o1": [[5.0, 6.0], [7.0, 8.0]]}
+
+    def test_dataset_ops_still_load_differing_counts(self, test_database):
+        ds_ops = mm.MdDatasetOps(self._make_dataset(["1\t2\n3\t4", "1\t2"]))
+        assert sorted(len(mo.landmark_list) for mo in ds_ops.object_list) == [1, 2]
+        assert not ds_ops.check_object_list()
+
+
+class TestAnalysisResultArrays:
+    """Numeric analysis results in MdAnalysis.result_arrays."""
+
+    def _analysis(self):
+        dataset = mm.MdDataset.create(dataset_name="results", dimension=2)
+        return mm.MdAnalysis(analysis_name="a", dataset=dataset, superimposition_method="Procrustes")
+
+    def test_round_trip_through_the_archive(self, test_database):
+        analysis = self._analysis()
+        analysis.set_result("pca_rotation_matrix", [[0.6, 0.8], [-0.8, 0.6]])
+        analysis.set_result("superimposed_landmark", [[[0.5, None]], [[1.0, 2.0]]])
+        analysis.save()
+
+        loaded = mm.MdAnalysis.get_by_id(analysis.id)
+        assert loaded.pca_rotation_matrix_json is None
+        assert loaded.get_result_array("pca_rotation_matrix").tolist() == [[0.6, 0.8], [-0.8, 0.6]]
+        assert loaded.get_result_list("superimposed_landmark") == [[[0.5, None]], [[1.0, 2.0]]]
+        assert loaded.has_result("superimposed_landmark")
+        assert not loaded.has_result("cva_rotation_matrix")
+        assert loaded.get_result_list("cva_rotation_matrix") is None
+
+    def test_each_array_is_read_on_demand(self, test_database):
+        analysis = self._analysis()
+        analysis.set_result("pca_rotation_matrix", [[1.0]])
+        analysis.set_result("pca_eigenvalues", [[1.0, 1.0]])
+        analysis.save()
+
+        loaded = mm.MdAnalysis.get_by_id(analysis.id)
+        loaded.get_result_array("pca_eigenvalues")
+        assert list(loaded._loaded_results) == ["pca_eigenvalues"]
+
+    def test_ragged_result_stays_json(self, test_database):
+        analysis = self._analysis()
+        analysis.set_result("raw_landmark", [[[1.0, 2.0]], []])
+        analysis.save()
+
+        loaded = mm.MdAnalysis.get_by_id(analysis.id)
+        assert json.loads(loaded.raw_landmark_json) == [[[1.0, 2.0]], []]
+        assert loaded.get_result_list("raw_landmark") == [[[1.0, 2.0]], []]
+        assert loaded.get_result_array("raw_landmark") is None
+
+    def test_later_save_keeps_the_other_arrays(self, test_database):
+        analysis = self._analysis()
+        analysis.set_result("pca_rotation_matrix", [[1.0]])
+        analysis.set_result("pca_eigenvalues", [[2.0, 1.0]])
+        analysis.save()
+
+        loaded = mm.MdAnalysis.get_by_id(analysis.id)
+        loaded.set_result("pca_eigenvalues", None)
+        loaded.set_result("cva_eigenvalues", [[3.0, 0.0]])
+        loaded.save()
+
+        reloaded = mm.MdAnalysis.get_by_id(analysis.id)
+        assert reloaded.get_result_list("pca_rotation_matrix") == [[1.0]]
+        assert not reloaded.has_result("pca_eigenvalues")
+        assert reloaded.get_result_list("cva_eigenvalues") == [[3.0, 0.0]]
+
+    def test_legacy_json_is_still_read(self, test_database):
+        analysis = self._analysis()
+        analysis.pca_rotation_matrix_json = json.dumps([[1.0, 0.0], [0.0, 1.0]])
+        analysis.save()
+
+        loaded = mm.MdAnalysis.get_by_id(analysis.id)
+        assert loaded.get_result_array("pca_rotation_matrix").tolist() == [[1.0, 0.0], [0.0, 1.0]]
+        assert loaded.has_result("pca_rotation_matrix")
@@ -461,6 +461,15 @@ class TestModernAnalysisFunctions:
         assert len(result["mean_shape"]) == 3  # 3 landmarks
         assert len(result["mean_shape"][0]) == 3  # 3D
 
+    def test_do_pca_analysis_accepts_one_array(self, landmark_data_3d):
+        """A (specimens, landmarks, dim) array gives the same result as nested lists."""
+        from_lists = ms.do_pca_analysis(landmark_data_3d)
+        from_array = ms.do_pca_analysis(np.array(landmark_data_3d))
+
+        assert np.allclose(from_array["scores"], from_lists["scores"])
+        assert np.allclose(from_array["eigenvalues"], from_lists["eigenvalues"])
+        assert len(from_array["mean_shape"][0]) == 3
+
     def test_do_pca_analysis_with_n_components(self, landmark_data_2d):
         """Test do_pca_analysis with specified n_components."""
         result = ms.do_pca_analysis(landmark_data_2d, n_components=3)
@@ -1159,3 +1168,195 @@ class TestCVAFallsBackWhenArpackGivesUp:
         assert after_fallback["resubstitution_accuracy"] == pytest.approx(
             with_arpack["resubstitution_accuracy"], abs=1e-9
         )
+
+
+class TestFastLeaveOneOut:
+    """Leave-one-out without refitting per specimen must give the refitted answer.
+
+    It is an optimisation of the number CVA reports, so the reference here is
+    the slow path itself: every specimen held out and the model refitted.
+    """
+
+    @staticmethod
+    def _data(n_specimens, n_variables, n_groups, seed, separation=0.5):
+        rng = np.random.default_rng(seed)
+        labels = rng.integers(0, n_groups, n_specimens)
+        data = rng.normal(size=(n_specimens, n_variables)) * rng.uniform(0.2, 2.0, n_variables)
+        data += rng.normal(size=(n_groups, n_variables))[labels] * separation
+        return data, np.array([f"G{label}" for label in labels])
+
+    @staticmethod
+    def _estimator(data, groups):
+        from sklearn.decomposition import PCA
+        from sklearn.discriminant_analysis import LinearDiscriminantAnalysis
+        from sklearn.pipeline import make_pipeline
+
+        n_samples, n_features = data.shape
+        n_groups = len(set(groups))
+        if n_features <= n_samples - n_groups:
+            return LinearDiscriminantAnalysis().fit(data, groups)
+        k = ms.effective_component_count(PCA().fit(data).explained_variance_, n_samples, n_groups)
+        return make_pipeline(PCA(n_components=k, svd_solver="arpack"), LinearDiscriminantAnalysis()).fit(data, groups)
+
+    @staticmethod
+    def _refitted(estimator, data, groups):
+        everyone = np.arange(len(groups))
+        return np.array([ms._fit_and_score(estimator, data, groups, np.delete(everyone, i), [i]) for i in everyone])
+
+    @pytest.mark.parametrize(
+        "shape",
+        [(40, 6, 2), (60, 20, 4), (35, 30, 3), (30, 90, 3), (50, 200, 5), (24, 60, 2)],
+    )
+    def test_matches_refitting(self, shape):
+        data, groups = self._data(*shape, seed=sum(shape))
+        estimator = self._estimator(data, groups)
+
+        fast = ms._fast_leave_one_out(estimator, data, groups)
+
+        assert fast is not None
+        settled = ~np.isnan(fast)
+        assert settled.mean() > 0.9
+        np.testing.assert_array_equal(fast[settled], self._refitted(estimator, data, groups)[settled])
+
+    def test_rank_deficient_coordinates(self):
+        """Superimposed coordinates sum to zero along each axis; so do these."""
+        data, groups = self._data(40, 12, 3, seed=1)
+        data[:, -1] = -data[:, :-1].sum(axis=1)
+        estimator = self._estimator(data, groups)
+
+        fast = ms._fast_leave_one_out(estimator, data, groups)
+
+        settled = ~np.isnan(fast)
+        np.testing.assert_array_equal(fast[settled], self._refitted(estimator, data, groups)[settled])
+
+    def test_a_lone_specimen_is_classified_wrongly(self):
+        data, groups = self._data(30, 4, 3, seed=2)
+        groups[0] = "only-me"
+        estimator = self._estimator(data, groups)
+
+        assert ms._fast_leave_one_out(estimator, data, groups)[0] == 0.0
+
+    def test_cva_refits_only_what_it_cannot_derive(self, monkeypatch):
+        data, groups = self._data(60, 120, 3, seed=3)
+        landmarks_data = data.reshape(60, 40, 3).tolist()
+        refits = []
+        real = ms._fit_and_score
+        monkeypatch.setattr(ms, "_fit_and_score", lambda *args: refits.append(args) or real(*args))
+
+        fast = ms.do_cva_analysis(landmarks_data, list(groups))
+        assert len(refits) < 6
+
+        monkeypatch.setattr(ms, "_fast_leave_one_out", lambda *args: None)
+        refitted = ms.do_cva_analysis(landmarks_data, list(groups))
+
+        assert fast["accuracy_method"] == refitted["accuracy_method"] == "leave-one-out"
+        assert fast["cross_validated_accuracy"] == pytest.approx(refitted["cross_validated_accuracy"], abs=1e-9)
+
+    def test_a_model_it_cannot_reproduce_is_refitted(self):
+        from sklearn.discriminant_analysis import LinearDiscriminantAnalysis
+
+        data, groups = self._data(40, 6, 2, seed=4)
+        shrunk = LinearDiscriminantAnalysis(solver="lsqr", shrinkage=0.5).fit(data, groups)
+
+        assert ms._fast_leave_one_out(shrunk, data, groups) is None
+
+    def test_downdated_components_match_an_eigensolver(self):
+        rng = np.random.default_rng(5)
+        coords, eigenvalues = ms._sample_space(rng.normal(size=(30, 50)))
+        shrink = 30 / 29
+
+        for i in range(5):
+            basis = ms._downdated_components(eigenvalues, coords[i], shrink, 6)
+            matrix = np.diag(eigenvalues) - shrink * np.outer(coords[i], coords[i])
+            expected = np.linalg.eigh(matrix)[1][:, ::-1][:, :6]
+            # Same subspace: each basis projects the other onto itself.
+            np.testing.assert_allclose(basis @ basis.T @ expected, expected, atol=1e-9)
+
+
+class TestCrossValidationBudget:
+    @staticmethod
+    def _data(seed=0):
+        rng = np.random.default_rng(seed)
+        groups = [f"G{i % 3}" for i in range(30)]
+        return rng.normal(size=(30, 8, 2)).tolist(), groups
+
+    def test_refits_past_the_budget_become_stratified_folds(self, monkeypatch):
+        monkeypatch.setattr(ms, "_fast_leave_one_out", lambda *args: None)
+        monkeypatch.setattr(ms, "CVA_LOOCV_MAX_WORK", 100)
+
+        result = ms.do_cva_analysis(*self._data())
+
+        assert result["accuracy_method"] == "stratified 5-fold"
+
+    def test_workers_extend_the_budget(self, monkeypatch):
+        monkeypatch.setattr(ms, "_fast_leave_one_out", lambda *args: None)
+        monkeypatch.setattr(ms, "CVA_LOOCV_MAX_WORK", 30 * 16 // 2)
+        serial = ms.do_cva_analysis(*self._data())
+        seen = []
+
+        parallel = ms.do_cva_analysis(*self._data(), lambda done, total: seen.append((done, total)), n_jobs=2)
+
+        assert serial["accuracy_method"] == "stratified 5-fold"
+        assert parallel["accuracy_method"] == "leave-one-out"
+        assert seen == [(i, 30) for i in range(1, 31)]
+
+    def test_parallel_folds_give_the_serial_answer(self, monkeypatch):
+        monkeypatch.setattr(ms, "_fast_leave_one_out", lambda *args: None)
+        landmarks_data, groups = self._data(1)
+
+        serial = ms.do_cva_analysis(landmarks_data, groups)
+        parallel = ms.do_cva_analysis(landmarks_data, groups, n_jobs=2)
+
+        assert parallel["cross_validated_accuracy"] == pytest.approx(serial["cross_validated_accuracy"], abs=1e-12)
+
+
+class TestShapeReconstructor:
+    def _pca(self, seed=0):
+        data = np.random.default_rng(seed).normal(size=(12, 8))
+        pca = ms.MdPrincipalComponent()
+        pca.SetData(data)
+        pca.Analyze()
+        return data, pca
+
+    def test_scores_reconstruct_the_shapes(self):
+        data, pca = self._pca()
+        reconstructor = ms.ShapeReconstructor(pca.rotation_matrix, data.mean(axis=0))
+
+        assert np.allclose(reconstructor.inverse, pca.rotation_matrix.T)
+        assert np.allclose(reconstructor.reconstruct(pca.rotated_matrix), data)
+
+    def test_matches_the_full_inverse_on_leading_components(self):
+        data, pca = self._pca(1)
+        reconstructor = ms.ShapeReconstructor(pca.rotation_matrix, data.mean(axis=0))
+        scores = np.zeros((1, 8))
+        scores[0, :2] = [0.7, -0.3]
+
+        expected = data.mean(axis=0) + scores @ np.linalg.inv(pca.rotation_matrix)
+        assert np.allclose(reconstructor.reconstruct(scores), expected)
+        assert np.allclose(
+            reconstructor.reconstruct(scores, n_components=1), expected - (-0.3) * pca.rotation_matrix[:, 1]
+        )
+
+    def test_zeroed_cva_columns_use_the_transpose(self):
+        rng = np.random.default_rng(2)
+        data = rng.normal(size=(12, 6))
+        data[:, 3] = 1.0  # zero variance, so CVA zeroes its row and column
+        cva = ms.MdCanonicalVariate()
+        cva.SetData(data)
+        cva.SetCategory(["a", "b", "c"] * 4)
+        cva.Analyze()
+        reconstructor = ms.ShapeReconstructor(cva.rotation_matrix, data.mean(axis=0))
+
+        assert np.allclose(reconstructor.inverse, cva.rotation_matrix.T)
+        scores = (data - data.mean(axis=0)) @ cva.rotation_matrix
+        assert np.allclose(reconstructor.reconstruct(scores), data)
+
+    def test_other_rotations_use_the_pseudo_inverse(self):
+        rotation = np.diag([2.0, 0.5, 1.0])
+        reconstructor = ms.ShapeReconstructor(rotation, np.zeros(3))
+        assert np.allclose(reconstructor.reconstruct([[2.0, 1.0, 3.0]]), [[1.0, 2.0, 3.0]])
+
+    def test_size_mismatch_gives_the_mean_shape(self):
+        reconstructor = ms.ShapeReconstructor(np.eye(4), [1.0, 2.0, 3.0])
+        assert reconstructor.inverse is None
+        assert np.array_equal(reconstructor.reconstruct([[1.0, 0.0, 0.0, 0.0]]), [[1.0, 2.0, 3.0]])
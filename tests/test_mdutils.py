@@ -232,54 +232,13 @@ class TestProcess3DFile:
         result = mu.process_3d_file("/path/to/model.obj")
         assert result == "/path/to/model.obj"
 
-    @patch("trimesh.load_mesh")
-    @patch("tempfile.mkdtemp")
-    @patch("os.path.splitext")
-    @patch("os.path.join")
-    def test_process_3d_file_stl(self, mock_join, mock_splitext, mock_mkdtemp, mock_load_mesh):
-        """Test STL file conversion to OBJ."""
-        # Setup mocks for path operations
-        mock_mkdtemp.return_value = "/tmp/test"
-        mock_splitext.side_effect = [
-            ("/path/to/model", ".stl"),  # First call for extension
-            ("/path/to/model", ".stl"),  # Second call for filename
-        ]
-        mock_join.return_value = "/tmp/test/model.obj"
-
-        # Setup mesh mock
-        mock_mesh = MagicMock()
-        mock_mesh.vertex_normals = []
-        mock_mesh.export = MagicMock()
-        mock_load_mesh.return_value = mock_mesh
-
-        result = mu.process_3d_file("/path/to/model.stl")
-
-        assert result == "/tmp/test/model.obj"
-        mock_mesh.export.assert_called_once_with("/tmp/test/model.obj", file_type="obj")
-
-    @patch("trimesh.load")
-    @patch("tempfile.mkdtemp")
-    @patch("os.path.splitext")
-    @patch("os.path.join")
-    def test_process_3d_file_ply(self, mock_join, mock_splitext, mock_mkdtemp, mock_load):
-        """Test PLY file conversion to OBJ."""
-        # Setup mocks for path operations
-        mock_mkdtemp.return_value = "/tmp/test"
-        mock_splitext.side_effect = [
-            ("/path/to/model", ".ply"),  # First call for extension
-            ("/path/to/model", ".ply"),  # Second call for filename
-        ]
-        mock_join.return_value = "/tmp/test/model.obj"
-
-        # Setup mesh mock
-        mock_mesh = MagicMock()
-        mock_mesh.export = MagicMock()
-        mock_load.return_value = mock_mesh
-
-        result = mu.process_3d_file("/path/to/model.ply")
-
-        assert result == "/tmp/test/model.obj"
-        mock_mesh.export.assert_called_once_with("/tmp/test/model.obj", file_type="obj")
+    @pytest.mark.parametrize("extension", ["stl", "ply"])
+    def test_process_3d_file_mesh_kept_as_is(self, extension):
+        """STL and PLY files are loaded directly, not converted to OBJ."""
+        sample_path = os.path.join("tests", "fixtures", f"sample_3d.{extension}")
+        with patch("tempfile.mkdtemp") as mock_mkdtemp:
+            assert mu.process_3d_file(sample_path) == sample_path
+        mock_mkdtemp.assert_not_called()
 
 
 class TestErrorHandling:
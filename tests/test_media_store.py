@@ -0,0 +1,205 @@
+"""Tests for the content-addressed media store (MdMediaStore).
+
+Files are stored once per content and shared by every row that refers to
+their hash; one is deleted only with the last of those rows. Files attached
+before the store existed are moved into it by
+``MdModel.adopt_legacy_media_files``.
+"""
+
+import hashlib
+import os
+import sys
+
+import pytest
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import MdMediaStore
+import MdModel
+import MdUtils as mu
+from ModanController import ModanController
+
+
+def _png(path, color=(10, 120, 200), size=(40, 30)):
+    Image.new("RGB", size, color).save(str(path))
+    return str(path)
+
+
+def _md5(path):
+    with open(path, "rb") as f:
+        return hashlib.md5(f.read()).hexdigest()
+
+
+def _stored_files(storage):
+    return sorted(f for _, _, files in os.walk(storage) for f in files)
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    directory = str(tmp_path / "storage")
+    os.makedirs(directory)
+    monkeypatch.setattr(mu, "get_storage_directory", lambda: directory)
+    return directory
+
+
+@pytest.fixture
+def dataset(mock_database):
+    return MdModel.MdDataset.create(dataset_name="Media", dimension=2)
+
+
+def _pictured(dataset, name, source):
+    obj = MdModel.MdObject.create(dataset=dataset, object_name=name)
+    obj.add_image(source).save()
+    return obj
+
+
+class TestStore:
+    def test_md5_is_read_in_chunks(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(MdMediaStore, "HASH_CHUNK_SIZE", 7)
+        path = tmp_path / "data.bin"
+        path.write_bytes(os.urandom(1000))
+        assert MdMediaStore.md5_of_file(path) == _md5(path)
+
+    def test_identical_content_is_stored_once(self, tmp_path):
+        base = str(tmp_path / "store")
+        first = MdMediaStore.put_file(base, _png(tmp_path / "a.png"), "png")
+        second = MdMediaStore.put_file(base, _png(tmp_path / "b.png"), "png")
+
+        assert first == second == _md5(tmp_path / "a.png")
+        assert _stored_files(base) == [f"{first}.png"]
+
+    def test_move_and_link_leave_the_source_accordingly(self, tmp_path):
+        base = str(tmp_path / "store")
+        moved = _png(tmp_path / "moved.png", color=(1, 2, 3))
+        linked = _png(tmp_path / "linked.png", color=(4, 5, 6))
+
+        MdMediaStore.put_file(base, moved, "png", move=True)
+        digest = MdMediaStore.put_file(base, linked, "png", link=True)
+
+        assert not os.path.exists(moved)
+        assert os.path.exists(linked)
+        assert _md5(MdMediaStore.blob_path(base, digest, "png")) == _md5(linked)
+
+    def test_only_store_paths_have_a_digest(self, tmp_path):
+        digest = "0123456789abcdef0123456789abcdef"
+        assert MdMediaStore.blob_digest(MdMediaStore.blob_path(str(tmp_path), digest, "jpg")) == digest
+        assert MdMediaStore.blob_digest(str(tmp_path / "3" / "17.jpg")) is None
+        assert MdMediaStore.blob_digest(str(tmp_path / "blobs" / "ff" / f"{digest}.jpg")) is None
+
+    def test_sidecars_go_with_their_file(self, tmp_path):
+        base = str(tmp_path / "store")
+        digest = MdMediaStore.put_file(base, _png(tmp_path / "a.png"), "png")
+        stored = MdMediaStore.blob_path(base, digest, "png")
+        os.makedirs(os.path.join(MdMediaStore.sidecar_path(stored, "tiles"), "0"))
+        legacy = _png(tmp_path / "17.png")
+        os.makedirs(MdMediaStore.sidecar_path(legacy, "tiles"))
+
+        assert MdMediaStore.remove_blob(base, digest) == 1
+        MdMediaStore.remove_file(legacy)
+
+        assert os.listdir(os.path.dirname(stored)) == []
+        assert not os.path.exists(MdMediaStore.sidecar_path(legacy, "tiles"))
+
+    def test_derived_files_of_outside_files_go_into_the_store(self, tmp_path):
+        base = str(tmp_path / "store")
+        stored = MdMediaStore.blob_path(base, MdMediaStore.put_file(base, _png(tmp_path / "a.png"), "png"), "png")
+        assert MdMediaStore.derived_path(stored, "tiles", base) == MdMediaStore.sidecar_path(stored, "tiles")
+        assert MdMediaStore.derived_path(stored, "tiles", None) == MdMediaStore.sidecar_path(stored, "tiles")
+        outside = _png(tmp_path / "b.png", color=(1, 2, 3))
+        digest = _md5(outside)
+        expected = MdMediaStore.sidecar_path(MdMediaStore.blob_path(base, digest, "png"), "tiles")
+        assert MdMediaStore.derived_path(outside, "tiles", base) == expected
+        assert MdMediaStore.derived_path(outside, "tiles", base, digest) == expected
+        assert MdMediaStore.derived_path(outside, "tiles", None) is None
+
+    def test_atomic_write_leaves_the_old_file_or_the_new_one(self, tmp_path):
+        target = str(tmp_path / "manifest.json")
+        MdMediaStore.write_atomically(target, lambda f: f.write(b"old"))
+
+        def fail(f):
+            f.write(b"half")
+            raise OSError("disk full")
+
+        with pytest.raises(OSError):
+            MdMediaStore.write_atomically(target, fail)
+        assert os.listdir(tmp_path) == ["manifest.json"]
+        with open(target, "rb") as f:
+            assert f.read() == b"old"
+
+
+class TestSharedFiles:
+    def test_a_file_outlives_all_but_its_last_reference(self, dataset, storage, tmp_path):
+        controller = ModanController()
+        source = _png(tmp_path / "photo.png")
+        first = _pictured(dataset, "first", source)
+        second = _pictured(dataset, "second", source)
+        stored = first.get_image().get_file_path()
+        assert second.get_image().get_file_path() == stored
+        assert _stored_files(storage) == [os.path.basename(stored)]
+
+        assert controller.delete_object(first.id, storage)
+        assert os.path.exists(stored)
+
+        assert controller.delete_object(second.id, storage)
+        assert not os.path.exists(stored)
+
+    def test_a_copied_dataset_keeps_the_files_its_source_loses(self, dataset, storage, tmp_path):
+        source_object = _pictured(dataset, "original", _png(tmp_path / "photo.png"))
+        copy = MdModel.MdDataset.create(dataset_name="Copy", dimension=2)
+        copied = source_object.copy_object(copy)
+        copied.save()
+        source_object.get_image().copy_image(copied).save()
+        stored = copied.get_image().get_file_path()
+
+        assert ModanController().delete_dataset(dataset.id, storage)
+
+        assert os.path.exists(stored)
+        assert _stored_files(storage) == [os.path.basename(stored)]
+
+
+class TestAdoptingLegacyFiles:
+    def _legacy(self, obj, source, storage, original=None):
+        """Attach ``source`` the way it was stored before the media store."""
+        image = MdModel.MdImage(object=obj, original_path=source)
+        image.load_file_info(source)
+        path = image.get_file_path(storage)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(source, "rb") as src, open(path, "wb") as dst:
+            dst.write(src.read())
+        if original:
+            archived = image.get_original_file_path(storage)
+            os.makedirs(os.path.dirname(archived), exist_ok=True)
+            with open(original, "rb") as src, open(archived, "wb") as dst:
+                dst.write(src.read())
+        image.save()
+        return image
+
+    def test_files_move_into_the_store_and_duplicates_merge(self, dataset, storage, tmp_path):
+        photo = _png(tmp_path / "photo.png")
+        full = _png(tmp_path / "full.png", size=(80, 60))
+        objects = [MdModel.MdObject.create(dataset=dataset, object_name=f"o{i}") for i in range(3)]
+        self._legacy(objects[0], photo, storage)
+        self._legacy(objects[1], photo, storage, original=full)
+        missing = self._legacy(objects[2], photo, storage)
+        os.remove(missing.get_file_path(storage))
+
+        assert MdModel.adopt_legacy_media_files() == 2
+
+        images = [MdModel.MdImage.get(MdModel.MdImage.object == obj.id) for obj in objects]
+        assert images[0].file_hash == images[1].file_hash == _md5(photo)
+        assert images[0].original_hash is None
+        assert images[1].original_hash == _md5(full)
+        assert images[2].file_hash is None
+        assert _md5(images[1].get_file_path()) == _md5(photo)
+        assert _md5(images[1].get_original_file_path()) == _md5(full)
+        # The per-object layout is gone; only the store remains.
+        assert sorted(os.listdir(storage)) == [MdMediaStore.BLOB_DIRNAME]
+        assert _stored_files(storage) == sorted([f"{_md5(photo)}.png", f"{_md5(full)}.png"])
+
+    def test_a_second_run_finds_nothing_to_do(self, dataset, storage, tmp_path):
+        obj = MdModel.MdObject.create(dataset=dataset, object_name="o")
+        self._legacy(obj, _png(tmp_path / "photo.png"), storage)
+
+        assert MdModel.adopt_legacy_media_files() == 1
+        assert MdModel.adopt_legacy_media_files() == 0
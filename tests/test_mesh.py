@@ -0,0 +1,303 @@
+"""Tests for mesh loading (MdMesh) and the OBJ model built on it."""
+
+import mmap
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import MdMediaStore
+import MdMesh
+from objloader import OBJ
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def _write(path, text):
+    with open(path, "w") as f:
+        f.write(text)
+    return str(path)
+
+
+def _sphere(n=40):
+    """A closed, bumpy sphere of about n * n triangles: vertices and faces."""
+    theta, phi = np.meshgrid(np.linspace(0, 2 * np.pi, n, endpoint=False), np.linspace(0, np.pi, n // 2 + 1)[1:-1])
+    radius = 1 + 0.1 * np.sin(5 * theta) * np.sin(4 * phi)
+    ring = np.stack(
+        [radius * np.sin(phi) * np.cos(theta), radius * np.sin(phi) * np.sin(theta), radius * np.cos(phi)], -1
+    )
+    vertices = np.vstack([ring.reshape(-1, 3), [[0, 0, 1], [0, 0, -1]]])
+    index = np.arange(ring.shape[0] * n).reshape(-1, n)
+    nxt = np.roll(index, -1, axis=1)
+    a, b, c, d = index[:-1].ravel(), nxt[:-1].ravel(), nxt[1:].ravel(), index[1:].ravel()
+    top, bottom = len(vertices) - 2, len(vertices) - 1
+    faces = np.vstack(
+        [
+            np.column_stack([a, d, c]),
+            np.column_stack([a, c, b]),
+            np.column_stack([np.full(n, top), index[0], nxt[0]]),
+            np.column_stack([np.full(n, bottom), nxt[-1], index[-1]]),
+        ]
+    )
+    return vertices, faces
+
+
+def _obj_text(vertices, faces):
+    return "".join(f"v {x} {y} {z}\n" for x, y, z in vertices) + "".join(
+        f"f {a + 1} {b + 1} {c + 1}\n" for a, b, c in faces
+    )
+
+
+def _mapped(array):
+    while isinstance(array, np.ndarray):
+        array = array.base
+    return isinstance(array, mmap.mmap)
+
+
+class TestParseObj:
+    def test_quads_are_split_into_triangle_fans(self):
+        mesh = MdMesh.parse_obj(os.path.join(FIXTURES, "sample_3d.obj"))
+        assert mesh.vertices.dtype == np.float32 and mesh.vertices.shape == (8, 3)
+        assert mesh.faces.dtype == np.int32 and mesh.faces.shape == (12, 3)
+        assert mesh.faces[:2].tolist() == [[0, 1, 2], [0, 2, 3]]
+        assert np.all(mesh.face_normals == -1)
+        assert mesh.normals.shape == (0, 3)
+
+    def test_corner_formats(self, tmp_path):
+        head = "v 0 0 0\nv 1 0 0\nv 0 1 0 0.5 0.5 0.5\nvt 0 0\nvn 0 0 1\nvn 0 0 -1\n"
+        for face in ("f 1//2 2//2 3//1", "f 1/1/2 2/1/2 3/1/1", "f -3//-1 -2//-1 -1//-2"):
+            mesh = MdMesh.parse_obj(_write(tmp_path / "tri.obj", head + face + "\n"))
+            assert mesh.faces.tolist() == [[0, 1, 2]], face
+            assert mesh.face_normals.tolist() == [[1, 1, 0]], face
+        mesh = MdMesh.parse_obj(_write(tmp_path / "tri.obj", head + "f 1/1 2/1 3/1\n"))
+        assert mesh.face_normals.tolist() == [[-1, -1, -1]]
+        assert mesh.vertices[2].tolist() == [0.0, 1.0, 0.0]
+
+    def test_mixed_corner_formats(self, tmp_path):
+        text = "v 0 0 0\nv 1 0 0\nv 0 1 0\nv 1 1 0\nvn 0 0 1\nf 1//1 2//1 3//1\nf 2 4 3\n"
+        mesh = MdMesh.parse_obj(_write(tmp_path / "mixed.obj", text))
+        assert mesh.faces.tolist() == [[0, 1, 2], [1, 3, 2]]
+        assert mesh.face_normals.tolist() == [[0, 0, 0], [-1, -1, -1]]
+
+    def test_relative_indices_count_from_their_line(self, tmp_path):
+        text = "v 0 0 0\nv 1 0 0\nv 0 1 0\nf -3 -2 -1\nv 1 1 0\nf -3 -1 -2\n"
+        mesh = MdMesh.parse_obj(_write(tmp_path / "relative.obj", text))
+        assert mesh.faces.tolist() == [[0, 1, 2], [1, 3, 2]]
+
+    def test_malformed_files(self, tmp_path):
+        with pytest.raises(ValueError):
+            MdMesh.parse_obj(_write(tmp_path / "empty.obj", "# nothing\n"))
+        with pytest.raises(ValueError):
+            MdMesh.parse_obj(_write(tmp_path / "bad.obj", "v 0 0 zero\nf 1 1 1\n"))
+        with pytest.raises(ValueError):
+            MdMesh.parse_obj(_write(tmp_path / "out.obj", "v 0 0 0\nv 1 0 0\nv 0 1 0\nf 1 2 4\n"))
+
+
+class TestVertexNormals:
+    VERTICES = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0], [0, 0, 1]], dtype=np.float32)
+    FACES = np.array([[0, 1, 2], [0, 3, 1]], dtype=np.int32)
+
+    def test_normals_indexed_like_the_vertices_are_kept(self):
+        normals = np.eye(4, 3, dtype=np.float32)
+        assert MdMesh.vertex_normals(self.VERTICES, self.FACES, normals, self.FACES) is normals
+
+    def test_corner_normals_averaged_per_vertex(self):
+        normals = np.array([[0, 0, 1], [0, 1, 0]], dtype=np.float32)
+        result = MdMesh.vertex_normals(self.VERTICES, self.FACES, normals, np.array([[0, 0, 0], [1, 1, 1]]))
+        np.testing.assert_allclose(result[0], [0, np.sqrt(0.5), np.sqrt(0.5)], atol=1e-6)
+        np.testing.assert_allclose(result[2], [0, 0, 1])
+        np.testing.assert_allclose(result[3], [0, 1, 0])
+
+    def test_computed_from_the_triangles_without_normals(self):
+        result = MdMesh.vertex_normals(self.VERTICES, self.FACES, np.zeros((0, 3)), np.full((2, 3), -1))
+        assert result.dtype == np.float32 and result.shape == (4, 3)
+        np.testing.assert_allclose(result[2], [0, 0, 1])
+        np.testing.assert_allclose(result[3], [0, 1, 0])
+        np.testing.assert_allclose(np.linalg.norm(result, axis=1), 1.0, atol=1e-6)
+
+    def test_unused_vertex_gets_a_zero_normal(self):
+        result = MdMesh.vertex_normals(self.VERTICES, self.FACES[:1], np.zeros((0, 3)), np.full((1, 3), -1))
+        assert result[3].tolist() == [0, 0, 0]
+
+
+class TestDecimate:
+    def test_close_below_the_target_and_on_the_surface(self):
+        vertices, faces = _sphere(80)
+        for target in (2000, 500):
+            level = MdMesh.decimate(vertices, faces, target)
+            assert MdMesh._DECIMATE_CLOSE * target <= len(level.faces) <= target
+            assert level.faces.dtype == np.int32 and level.faces.max() == len(level.vertices) - 1
+            radius = np.linalg.norm(level.vertices, axis=1)
+            assert radius.min() > 0.85 and radius.max() < 1.15
+
+    def test_keeps_the_winding(self):
+        # Clustering folds a few triangles over; nearly all still face out.
+        vertices, faces = _sphere(80)
+        level = MdMesh.decimate(vertices, faces, 1000)
+        corners = level.vertices[level.faces].astype(float)
+        normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+        assert np.mean(np.einsum("ij,ij->i", normals, corners.mean(axis=1)) > 0) > 0.95
+
+    def test_small_mesh_unchanged(self):
+        vertices, faces = _sphere(10)
+        level = MdMesh.decimate(vertices, faces, len(faces))
+        assert np.array_equal(level.faces, faces)
+
+
+class TestMeshLevels:
+    @pytest.fixture
+    def model(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(MdMesh, "LEVEL_FACE_COUNTS", (2000, 500, 100_000))
+        return _write(tmp_path / "sphere.obj", _obj_text(*_sphere(60)))
+
+    @pytest.fixture
+    def storage(self, tmp_path):
+        return str(tmp_path)
+
+    def test_built_once_then_memory_mapped(self, model, storage, monkeypatch):
+        levels = MdMesh.load_levels(model, storage)
+        assert [len(level.faces) <= count for level, count in zip(levels, (2000, 500))] == [True, True]
+        assert len(levels) == 2 and len(levels[0].faces) > len(levels[1].faces)
+        assert os.path.isfile(os.path.join(MdMesh.cache_directory(model, storage), MdMesh.LEVELS_MANIFEST_NAME))
+
+        monkeypatch.setattr(MdMesh, "decimate", lambda *args: pytest.fail("decimated again"))
+        again = MdMesh.load_levels(model, storage)
+        assert _mapped(again[1].faces)
+        assert again[1].faces.tolist() == levels[1].faces.tolist()
+
+    def test_rebuilt_for_a_changed_file_or_other_counts(self, model, storage, monkeypatch):
+        MdMesh.load_levels(model, storage)
+        monkeypatch.setattr(MdMesh, "LEVEL_FACE_COUNTS", (1000,))
+        assert len(MdMesh.load_levels(model, storage)[0].faces) <= 1000
+        _write(model, "v 0 0 0\nv 2 0 0\nv 0 2 0\nf 1 2 3\n")
+        assert MdMesh.load_levels(model, storage) == []
+
+    def test_levels_kept_when_they_cannot_be_written(self, model, storage, monkeypatch):
+        def fail(*args):
+            raise OSError("read-only")
+
+        monkeypatch.setattr(MdMesh, "_write_levels", fail)
+        assert len(MdMesh.load_levels(model, storage)) == 2
+
+
+class TestReadMesh:
+    @pytest.mark.parametrize("extension", ["obj", "stl", "ply"])
+    def test_every_format_reads_into_arrays(self, extension):
+        mesh = MdMesh.read_mesh(os.path.join(FIXTURES, f"sample_3d.{extension}"))
+        assert mesh.vertices.dtype == np.float32 and mesh.vertices.shape == (8, 3)
+        assert mesh.faces.dtype == np.int32 and len(mesh.faces) > 0
+        assert mesh.faces.max() < len(mesh.vertices)
+
+    def test_stl_gets_vertex_normals(self):
+        mesh = MdMesh.read_mesh(os.path.join(FIXTURES, "sample_3d.stl"))
+        assert mesh.normals.shape == mesh.vertices.shape
+        assert np.array_equal(mesh.face_normals, mesh.faces)
+
+    def test_unsupported_or_broken_files(self, tmp_path):
+        with pytest.raises(ValueError):
+            MdMesh.read_mesh(os.path.join(FIXTURES, "invalid_file.txt"))
+        with pytest.raises(ValueError):
+            MdMesh.read_mesh(_write(tmp_path / "broken.stl", "solid nothing\nendsolid\n"))
+
+
+class TestMeshCache:
+    @pytest.fixture
+    def model(self, tmp_path):
+        return _write(tmp_path / "cube.obj", open(os.path.join(FIXTURES, "sample_3d.obj")).read())
+
+    @pytest.fixture
+    def storage(self, tmp_path):
+        return str(tmp_path)
+
+    def test_parsed_once_then_memory_mapped(self, model, storage, monkeypatch):
+        assert not MdMesh.is_cached(model, storage)
+        first = MdMesh.load_mesh(model, storage)
+        assert MdMesh.is_cached(model, storage)
+        assert os.path.isfile(os.path.join(MdMesh.cache_directory(model, storage), MdMesh.MANIFEST_NAME))
+
+        monkeypatch.setattr(MdMesh, "parse_obj", lambda path: pytest.fail("parsed again"))
+        again = MdMesh.load_mesh(model, storage)
+        assert _mapped(again.vertices) and _mapped(again.faces)
+        assert again.faces.tolist() == first.faces.tolist()
+
+    def test_changed_file_is_parsed_again(self, model, storage):
+        MdMesh.load_mesh(model, storage)
+        _write(model, "v 0 0 0\nv 2 0 0\nv 0 2 0\nf 1 2 3\n")
+        assert not MdMesh.is_cached(model, storage)
+        assert MdMesh.load_mesh(model, storage).faces.shape == (1, 3)
+
+    def test_mesh_kept_when_the_cache_cannot_be_written(self, model, storage, monkeypatch):
+        def fail(*args):
+            raise OSError("read-only")
+
+        monkeypatch.setattr(MdMesh, "_write_cache", fail)
+        assert MdMesh.load_mesh(model, storage).faces.shape == (12, 3)
+        assert not MdMesh.is_cached(model, storage)
+
+    def test_unstored_file_cached_under_the_storage_directory(self, tmp_path):
+        storage = str(tmp_path / "storage")
+        scan = os.path.join(FIXTURES, "sample_3d.stl")
+        digest = MdMediaStore.md5_of_file(scan)
+        directory = MdMesh.cache_directory(scan, storage)
+        assert directory == MdMediaStore.sidecar_path(MdMediaStore.blob_path(storage, digest, "stl"), "mesh")
+
+        MdMesh.load_mesh(scan, storage)
+        assert MdMesh.is_cached(scan, storage)
+        assert MdMesh.cache_directory(scan) is None
+
+        # Storing the file finds the arrays in place, and removing it removes them.
+        MdMediaStore.put_file(storage, scan, "stl")
+        stored = MdMediaStore.blob_path(storage, digest, "stl")
+        assert MdMesh.is_cached(stored)
+        MdMediaStore.remove_blob(storage, digest)
+        assert not os.path.exists(directory)
+
+    def test_nothing_written_beside_a_file_without_a_storage_directory(self, model, tmp_path, monkeypatch):
+        monkeypatch.setattr(MdMesh, "LEVEL_FACE_COUNTS", (6,))
+        assert MdMesh.cache_directory(model) is None
+        assert MdMesh.load_mesh(model).faces.shape == (12, 3)
+        assert len(MdMesh.load_levels(model)) == 1
+        assert OBJ(model).mesh.faces.shape == (12, 3)
+        assert not MdMesh.is_cached(model)
+        assert os.listdir(tmp_path) == ["cube.obj"]
+
+
+class TestObjModel:
+    def test_scaled_and_centred(self, tmp_path):
+        model = _write(tmp_path / "box.obj", "v 0 0 0\nv 2 0 0\nv 2 1 0\nv 0 1 1.1\nf 1 2 3 4\n")
+        obj = OBJ(model)
+        assert (obj.center_x, obj.center_y, obj.width, obj.height) == (1.0, 0.5, 2.0, 1.0)
+        assert obj.scale == 1.25
+        np.testing.assert_allclose(obj.vertices[0], [-1.25, -0.625, -0.6875])
+        assert obj.vertex_coords(3) == [0.0, 1.0, 1.1]
+
+    def test_rotation(self, tmp_path):
+        obj = OBJ(_write(tmp_path / "tri.obj", "v 0 0 0\nv 1 0 0\nv 0 1 0\nvn 0 0 1\nf 1//1 2//1 3//1\n"))
+        obj.rotate(np.pi / 2, 0)
+        np.testing.assert_allclose(obj.normals[0], [1, 0, 0], atol=1e-6)
+        np.testing.assert_allclose(obj.vertices[1], [0, -1.25, -1.25], atol=1e-6)
+
+    def test_rotate_3d_keeps_the_pose_matrix(self, tmp_path):
+        obj = OBJ(_write(tmp_path / "tri.obj", "v 0 0 0\nv 1 0 0\nv 0 1 0\nf 1 2 3\n"))
+        obj.rotate(0.3, 0.2)
+        obj.rotate_3d(0.5, "Z")
+        expected = obj.scaled_centered_vertices @ obj.rotation_matrix[:3, :3].T
+        np.testing.assert_allclose(obj.vertices, expected, atol=1e-6)
+
+    def test_coarse_level_drawn_within_a_face_count(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(MdMesh, "LEVEL_FACE_COUNTS", (2000, 500))
+        obj = OBJ(_write(tmp_path / "sphere.obj", _obj_text(*_sphere(60))))
+        assert obj.level_for(2000) is None  # not built yet
+        obj.load_levels_in_background().join()
+        assert [len(level.faces) <= count for level, count in zip(obj.levels, (2000, 500))] == [True, True]
+        assert obj.level_for(None) is None and obj.level_for(len(obj.faces)) is None
+        finest, coarsest = (len(level.faces) for level in obj.levels)
+        assert obj.level_for(finest) is obj.levels[0] and obj.level_for(finest - 1) is obj.levels[1]
+        assert obj.level_for(coarsest - 1) is None
+        level = obj.levels[0]
+        assert level.normals.shape == level.vertices.shape
+        # Scaled and centred like the full mesh.
+        assert np.abs(level.vertices).max() == pytest.approx(np.abs(obj.scaled_centered_vertices).max(), rel=0.1)
@@ -0,0 +1,115 @@
+"""Tests for ray picking on meshes (MdMeshPicker) and the 3D viewer's use of it."""
+
+import os
+import shutil
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import MdMeshPicker
+from objloader import OBJ
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def _cube(tmp_path):
+    """The unit-cube fixture, copied where its mesh cache may be written."""
+    return OBJ(shutil.copy(os.path.join(FIXTURES, "sample_3d.obj"), tmp_path))
+
+
+def _wavy_grid(n=20):
+    """A rippled (n x n)-vertex sheet over [-1, 1]^2 at z around 0."""
+    xs, ys = np.meshgrid(np.linspace(-1, 1, n), np.linspace(-1, 1, n))
+    vertices = np.column_stack([xs.ravel(), ys.ravel(), 0.2 * np.sin(3 * xs.ravel()) * np.cos(2 * ys.ravel())])
+    index = np.arange(n * n).reshape(n, n)
+    a, b, c, d = index[:-1, :-1].ravel(), index[:-1, 1:].ravel(), index[1:, 1:].ravel(), index[1:, :-1].ravel()
+    return vertices, np.column_stack([np.r_[a, a], np.r_[b, c], np.r_[c, d]])
+
+
+def _first_hit(vertices, faces, origin, direction):
+    """The nearest triangle hit, by testing every triangle."""
+    best, best_t = None, np.inf
+    for i, (v0, v1, v2) in enumerate(vertices[faces]):
+        edge1, edge2 = v1 - v0, v2 - v0
+        p = np.cross(direction, edge2)
+        det = edge1 @ p
+        if abs(det) < 1e-12:
+            continue
+        s = origin - v0
+        u, q = (s @ p) / det, np.cross(s, edge1)
+        v, t = (direction @ q) / det, (edge2 @ q) / det
+        if u >= 0 and v >= 0 and u + v <= 1 and 0 < t < best_t:
+            best, best_t = i, t
+    return best
+
+
+def _ray(origin, target):
+    origin = np.asarray(origin, dtype=float)
+    direction = np.asarray(target, dtype=float) - origin
+    return origin, direction / np.linalg.norm(direction)
+
+
+class TestIntersect:
+    def test_matches_every_triangle_tested(self):
+        vertices, faces = _wavy_grid()
+        picker = MdMeshPicker.MeshPicker(vertices, faces)
+        assert picker.depth > 1
+        rng = np.random.default_rng(0)
+        for _ in range(15):
+            origin, direction = _ray([*rng.uniform(-2, 2, 2), 3.0], [*rng.uniform(-1.2, 1.2, 2), 0.0])
+            hit = picker.intersect(origin, direction)
+            expected = _first_hit(vertices.astype(np.float32).astype(float), faces, origin, direction)
+            assert (hit and hit[0]) == expected
+            if hit is not None:
+                face, point, distance = hit
+                np.testing.assert_allclose(point, origin + distance * direction)
+
+    def test_nearest_surface_of_a_closed_mesh(self, tmp_path):
+        obj = _cube(tmp_path)
+        picker = MdMeshPicker.MeshPicker(obj.original_vertices, obj.faces)
+        for origin in ([0.5, 0.5, 5.0], [0.5, 0.5, -5.0]):
+            _face, point, _distance = picker.intersect(*_ray(origin, [0.5, 0.5, 0.5]))
+            assert point[2] == pytest.approx(1.0 if origin[2] > 0 else 0.0)
+
+    def test_misses(self):
+        picker = MdMeshPicker.MeshPicker(*_wavy_grid(10))
+        assert picker.intersect(*_ray([0, 0, 3], [0, 5, 3])) is None
+        assert picker.intersect(*_ray([0, 0, 3], [0, 0, 4])) is None  # the sheet is behind the ray
+        single = MdMeshPicker.MeshPicker([[0, 0, 0], [1, 0, 0], [0, 1, 0]], [[0, 1, 2]])
+        assert single.depth == 0
+        assert single.intersect(*_ray([0.2, 0.2, 1], [0.2, 0.2, 0]))[0] == 0
+        assert single.intersect(*_ray([0.8, 0.8, 1], [0.8, 0.8, 0])) is None
+
+
+class TestPick:
+    def test_corner_nearest_the_hit(self):
+        vertices, faces = _wavy_grid(11)
+        picker = MdMeshPicker.MeshPicker(vertices, faces)
+        target = vertices[60] + [0.03, -0.02, 0.0]
+        assert picker.pick(*_ray(target + [0, 0, 3], target), 0.1) == 60
+
+    def test_ray_missing_the_surface_picks_a_vertex_near_it(self):
+        picker = MdMeshPicker.MeshPicker([[0, 0, 0], [1, 0, 0], [0, 1, 0]], [[0, 1, 2]])
+        assert picker.pick(*_ray([1.05, 0, 1], [1.05, 0, 0]), 0.1) == 1
+        assert picker.pick(*_ray([1.5, 0, 1], [1.5, 0, 0]), 0.1) is None
+        assert picker.pick(*_ray([1.05, 0, -1], [1.05, 0, -2]), 0.1) is None  # vertex behind the ray
+
+    def test_point_cloud(self):
+        points = np.random.default_rng(1).uniform(-1, 1, (500, 3))
+        picker = MdMeshPicker.MeshPicker(points, np.zeros((0, 3)))
+        assert picker.intersect(*_ray([0, 0, 5], [0, 0, 0])) is None
+        assert picker.pick(*_ray(points[42] + [0, 0, 5], points[42]), 0.001) == 42
+
+
+class TestModelPicking:
+    def test_ray_turned_back_into_the_unrotated_model(self, tmp_path):
+        obj = _cube(tmp_path)
+        obj.rotate(0.6, -0.4)
+        for index in range(len(obj.vertices)):
+            target = obj.vertices[index].astype(float)
+            origin, direction = _ray(target * 3, target)
+            assert obj.pick_vertex(origin, direction, 0.1) == index
+        assert obj.picker is not None
@@ -6,10 +6,13 @@ the real cause with "cannot rollback, no transaction is active", leaving nothing
 useful in the log. These checks catch the failure modes here instead.
 """
 
+import io
+import json
 import os
 import sys
 from pathlib import Path
 
+import numpy as np
 import pytest
 from peewee import SqliteDatabase
 from peewee_migrate import Router
@@ -88,3 +91,68 @@ def test_chart_settings_column_exists_after_migrating(tmp_path):
         assert "chart_settings_json" in columns
     finally:
         db.close()
+
+
+def test_landmark_blob_column_exists_after_migrating(tmp_path):
+    db = SqliteDatabase(str(tmp_path / "blob.db"), pragmas={"foreign_keys": 1})
+    db.connect()
+    try:
+        Router(db, migrate_dir=str(MIGRATIONS_DIR)).run()
+        columns = [row[1] for row in db.execute_sql("PRAGMA table_info(mdobject)")]
+        assert "landmark_blob" in columns
+    finally:
+        db.close()
+
+
+def test_object_summary_columns_exist_after_migrating(tmp_path):
+    db = SqliteDatabase(str(tmp_path / "summary.db"), pragmas={"foreign_keys": 1})
+    db.connect()
+    try:
+        Router(db, migrate_dir=str(MIGRATIONS_DIR)).run()
+        columns = {row[1] for row in db.execute_sql("PRAGMA table_info(mdobject)")}
+        assert {
+            "summary_landmark_count",
+            "summary_missing_count",
+            "summary_curve_count",
+            "summary_centroid_size",
+        } <= columns
+    finally:
+        db.close()
+
+
+def test_media_hash_columns_exist_and_are_indexed_after_migrating(tmp_path):
+    db = SqliteDatabase(str(tmp_path / "media.db"), pragmas={"foreign_keys": 1})
+    db.connect()
+    try:
+        Router(db, migrate_dir=str(MIGRATIONS_DIR)).run()
+        for table, columns in {"mdimage": {"file_hash", "original_hash"}, "mdthreedmodel": {"file_hash"}}.items():
+            assert columns <= {row[1] for row in db.execute_sql(f"PRAGMA table_info({table})")}
+            indexed = {column for index in db.get_indexes(table) for column in index.columns}
+            assert columns <= indexed
+    finally:
+        db.close()
+
+
+def test_analysis_results_are_moved_into_arrays(tmp_path):
+    db = SqliteDatabase(str(tmp_path / "results.db"), pragmas={"foreign_keys": 1})
+    db.connect()
+    try:
+        router = Router(db, migrate_dir=str(MIGRATIONS_DIR))
+        router.run("010_20260724")
+        db.execute_sql(
+            "INSERT INTO mdanalysis (analysis_name, dimension, superimposition_method, pca_rotation_matrix_json,"
+            " raw_landmark_json, object_info_json, created_at, modified_at)"
+            " VALUES ('a', 2, 'Procrustes', ?, ?, '[]', '2026-01-01', '2026-01-01')",
+            (json.dumps([[1.0, 0.0], [0.0, 1.0]]), json.dumps([[[1.0, 2.0]], []])),
+        )
+        router.run()
+
+        blob, rotation_json, raw_json = db.execute_sql(
+            "SELECT result_arrays, pca_rotation_matrix_json, raw_landmark_json FROM mdanalysis"
+        ).fetchone()
+        arrays = np.load(io.BytesIO(blob))
+        assert arrays["pca_rotation_matrix"].tolist() == [[1.0, 0.0], [0.0, 1.0]]
+        assert rotation_json is None
+        assert json.loads(raw_json) == [[[1.0, 2.0]], []]  # ragged: stays JSON
+    finally:
+        db.close()
@@ -108,9 +108,19 @@ class _Settings:
         self._store[key] = value
 
 
-class _ImportData:
-    def __init__(self, landmark_data):
-        self.landmark_data = landmark_data
+def _tps_stream(tmp_path, landmarks, invert_y=False):
+    """A surveyed TPS stream over one specimen with ``landmarks``."""
+    from components.formats import TPSStream
+
+    path = tmp_path / "sentinels.tps"
+    rows = "\n".join(" ".join(str(v) for v in row) for row in landmarks)
+    path.write_text(f"LM={len(landmarks)}\n{rows}\nID=A\n")
+    return TPSStream(str(path), "ds", invert_y).survey()
+
+
+def _read_back(stream):
+    """The landmarks the stream yields, missing ones as None."""
+    return {s.name: [[None if v != v else v for v in row] for row in s.landmarks.tolist()] for s in stream}
 
 
 class TestResolveMissingSentinels:
@@ -134,92 +144,94 @@ class TestResolveMissingSentinels:
 
         dialog._ask_about_sentinels = _ask
 
-    def test_no_sentinel_does_not_ask(self, dialog):
+    def test_no_sentinel_does_not_ask(self, dialog, tmp_path):
         self._stub_answer(dialog, True)
-        data = _ImportData({"A": [[1.0, 2.0]]})
-        assert dialog._resolve_missing_sentinels(data, False) is True
+        stream = _tps_stream(tmp_path, [[1.0, 2.0]])
+        assert dialog._resolve_missing_sentinels(stream) is True
         assert dialog.asked == 0
-        assert data.landmark_data == {"A": [[1.0, 2.0]]}
+        assert _read_back(stream) == {"A": [[1.0, 2.0]]}
 
-    def test_yes_converts_to_none(self, dialog):
+    def test_yes_converts_to_none(self, dialog, tmp_path):
         self._stub_answer(dialog, True)
-        data = _ImportData({"A": [[1.0, -999.0]]})
-        assert dialog._resolve_missing_sentinels(data, False) is True
+        stream = _tps_stream(tmp_path, [[1.0, -999.0]])
+        assert dialog._resolve_missing_sentinels(stream) is True
         assert dialog.asked == 1
-        assert data.landmark_data == {"A": [[1.0, None]]}
+        assert _read_back(stream) == {"A": [[1.0, None]]}
 
-    def test_no_keeps_literal_values(self, dialog):
+    def test_no_keeps_literal_values(self, dialog, tmp_path):
         self._stub_answer(dialog, False)
-        data = _ImportData({"A": [[1.0, -999.0]]})
-        assert dialog._resolve_missing_sentinels(data, False) is True
-        assert data.landmark_data == {"A": [[1.0, -999.0]]}
+        stream = _tps_stream(tmp_path, [[1.0, -999.0]])
+        assert dialog._resolve_missing_sentinels(stream) is True
+        assert _read_back(stream) == {"A": [[1.0, -999.0]]}
 
-    def test_cancel_aborts_the_import(self, dialog):
+    def test_cancel_aborts_the_import(self, dialog, tmp_path):
         self._stub_answer(dialog, None)
-        data = _ImportData({"A": [[1.0, -999.0]]})
-        assert dialog._resolve_missing_sentinels(data, False) is False
+        stream = _tps_stream(tmp_path, [[1.0, -999.0]])
+        assert dialog._resolve_missing_sentinels(stream) is False
         # Untouched — nothing should be converted on an aborted import.
-        assert data.landmark_data == {"A": [[1.0, -999.0]]}
+        assert _read_back(stream) == {"A": [[1.0, -999.0]]}
 
-    def test_reports_the_hit_count(self, dialog):
+    def test_reports_the_hit_count(self, dialog, tmp_path):
         self._stub_answer(dialog, True)
-        dialog._resolve_missing_sentinels(_ImportData({"A": [[-999.0, -999.0], [1.0, -999.0]]}), False)
+        dialog._resolve_missing_sentinels(_tps_stream(tmp_path, [[-999.0, -999.0], [1.0, -999.0]]))
         assert dialog.last_count == 3
 
-    def test_always_is_remembered(self, dialog):
+    def test_always_is_remembered(self, dialog, tmp_path):
         from dialogs.import_dialog import SENTINEL_SETTING_KEY
 
         self._stub_answer(dialog, True, always=True)
-        dialog._resolve_missing_sentinels(_ImportData({"A": [[1.0, -999.0]]}), False)
+        dialog._resolve_missing_sentinels(_tps_stream(tmp_path, [[1.0, -999.0]]))
         assert dialog.m_app.settings.value(SENTINEL_SETTING_KEY) is True
 
-    def test_without_always_nothing_is_remembered(self, dialog):
+    def test_without_always_nothing_is_remembered(self, dialog, tmp_path):
         from dialogs.import_dialog import SENTINEL_SETTING_KEY
 
         self._stub_answer(dialog, True, always=False)
-        dialog._resolve_missing_sentinels(_ImportData({"A": [[1.0, -999.0]]}), False)
+        dialog._resolve_missing_sentinels(_tps_stream(tmp_path, [[1.0, -999.0]]))
         assert dialog.m_app.settings.value(SENTINEL_SETTING_KEY) is None
 
-    def test_remembered_yes_skips_the_prompt(self, dialog):
+    def test_remembered_yes_skips_the_prompt(self, dialog, tmp_path):
         from dialogs.import_dialog import SENTINEL_SETTING_KEY
 
         dialog.m_app.settings = _Settings({SENTINEL_SETTING_KEY: True})
         self._stub_answer(dialog, False)  # would say no if asked
-        data = _ImportData({"A": [[1.0, -999.0]]})
-        dialog._resolve_missing_sentinels(data, False)
+        stream = _tps_stream(tmp_path, [[1.0, -999.0]])
+        dialog._resolve_missing_sentinels(stream)
         assert dialog.asked == 0
-        assert data.landmark_data == {"A": [[1.0, None]]}
+        assert _read_back(stream) == {"A": [[1.0, None]]}
 
-    def test_remembered_no_skips_the_prompt(self, dialog):
+    def test_remembered_no_skips_the_prompt(self, dialog, tmp_path):
         from dialogs.import_dialog import SENTINEL_SETTING_KEY
 
         dialog.m_app.settings = _Settings({SENTINEL_SETTING_KEY: False})
         self._stub_answer(dialog, True)
-        data = _ImportData({"A": [[1.0, -999.0]]})
-        dialog._resolve_missing_sentinels(data, False)
+        stream = _tps_stream(tmp_path, [[1.0, -999.0]])
+        dialog._resolve_missing_sentinels(stream)
         assert dialog.asked == 0
-        assert data.landmark_data == {"A": [[1.0, -999.0]]}
+        assert _read_back(stream) == {"A": [[1.0, -999.0]]}
 
-    def test_remembered_value_survives_qsettings_stringification(self, dialog):
+    def test_remembered_value_survives_qsettings_stringification(self, dialog, tmp_path):
         """QSettings hands booleans back as "true"/"false" strings."""
         from dialogs.import_dialog import SENTINEL_SETTING_KEY
 
         dialog.m_app.settings = _Settings({SENTINEL_SETTING_KEY: "true"})
         self._stub_answer(dialog, False)
-        data = _ImportData({"A": [[1.0, -999.0]]})
-        dialog._resolve_missing_sentinels(data, False)
+        stream = _tps_stream(tmp_path, [[1.0, -999.0]])
+        dialog._resolve_missing_sentinels(stream)
         assert dialog.asked == 0
-        assert data.landmark_data == {"A": [[1.0, None]]}
+        assert _read_back(stream) == {"A": [[1.0, None]]}
 
-    def test_invert_y_is_passed_through(self, dialog):
+    def test_invert_y_is_taken_into_account(self, dialog, tmp_path):
         self._stub_answer(dialog, True)
-        data = _ImportData({"A": [[1.0, 999.0]]})
-        dialog._resolve_missing_sentinels(data, True)
-        assert data.landmark_data == {"A": [[1.0, None]]}
+        # -999 in the file's Y column reads as +999 once Y is inverted.
+        stream = _tps_stream(tmp_path, [[1.0, -999.0], [2.0, 999.0]], invert_y=True)
+        dialog._resolve_missing_sentinels(stream)
+        assert dialog.last_count == 1
+        assert _read_back(stream) == {"A": [[1.0, None], [2.0, -999.0]]}
 
-    def test_missing_landmark_data_attribute_is_tolerated(self, dialog):
+    def test_a_source_without_a_count_is_tolerated(self, dialog):
         self._stub_answer(dialog, True)
-        assert dialog._resolve_missing_sentinels(object(), False) is True
+        assert dialog._resolve_missing_sentinels(object()) is True
         assert dialog.asked == 0
 
 
@@ -314,3 +314,66 @@ class TestTreeViewObjectCount:
         root = main_window.dataset_model.invisibleRootItem()
         item = root.child(0, 0)
         assert "(0)" in item.text()
+
+
+class TestTreeViewIncrementalUpdates:
+    """The tree follows the controller's signals without being rebuilt."""
+
+    def test_load_is_two_queries(self, qtbot, main_window, mock_database, caplog):
+        import logging
+
+        import MdModel as mm
+
+        for i in range(5):
+            parent = mm.MdDataset.create(dataset_name=f"P{i}", dimension=2)
+            child = mm.MdDataset.create(dataset_name=f"C{i}", dimension=2, parent=parent)
+            mm.MdObject.create(dataset=child, object_name="o")
+            mm.MdAnalysis.create(dataset=child, analysis_name=f"A{i}", superimposition_method="Procrustes")
+
+        with caplog.at_level(logging.DEBUG, logger="peewee"):
+            main_window.dataset_model.load()
+        queries = [r for r in caplog.records if r.name == "peewee" and "SELECT" in str(r.msg)]
+        assert len(queries) == 2
+
+        root = main_window.dataset_model.invisibleRootItem()
+        child_item = root.child(2, 0).child(0, 0)
+        assert child_item.text() == "C2 (1)"
+        assert child_item.child(0, 0).text() == "A2"
+
+    def test_signals_update_nodes_in_place(self, qtbot, main_window, mock_database):
+        import MdModel as mm
+
+        parent = mm.MdDataset.create(dataset_name="Parent", dimension=2)
+        main_window.load_dataset()
+        parent_item = main_window.dataset_model.dataset_item(parent.id)
+
+        with patch.object(main_window.dataset_model, "load", side_effect=AssertionError("tree rebuilt")):
+            child = mm.MdDataset.create(dataset_name="Child", dimension=3, parent=parent)
+            main_window.controller.dataset_created.emit(child)
+            obj = mm.MdObject.create(dataset=child, object_name="o")
+            main_window.controller.object_added.emit(obj)
+            analysis = mm.MdAnalysis.create(dataset=child, analysis_name="PCA", superimposition_method="Procrustes")
+            main_window.controller.analysis_completed.emit(analysis)
+            child.dataset_name = "Renamed"
+            main_window.controller.dataset_updated.emit(child)
+
+        child_item = parent_item.child(0, 0)
+        assert child_item.text() == "Renamed (1)"
+        assert child_item.child(0, 0).data() == analysis
+
+        main_window.controller.dataset_deleted.emit(child.id)
+        assert parent_item.rowCount() == 0
+        assert main_window.dataset_model.dataset_item(child.id) is None
+
+    def test_selecting_an_analysis_reads_its_results(self, qtbot, main_window, mock_database):
+        import MdModel as mm
+
+        dataset = mm.MdDataset.create(dataset_name="D", dimension=2)
+        analysis = mm.MdAnalysis.create(dataset=dataset, analysis_name="PCA", superimposition_method="Procrustes")
+        analysis.set_result("pca_eigenvalues", [[1.0, 0.5]])
+        analysis.save()
+        main_window.load_dataset()
+
+        item = main_window.dataset_model.invisibleRootItem().child(0, 0).child(0, 0)
+        main_window.treeView.selectionModel().select(item.index(), QItemSelectionModel.ClearAndSelect)
+        assert main_window.selected_analysis.get_result_list("pca_eigenvalues") == [[1.0, 0.5]]
@@ -0,0 +1,148 @@
+"""Tests for loading neighbouring objects ahead of the object dialog.
+
+Previous/Next find the next image decoded on the prefetch worker, and the
+viewers reuse one dataset-level MdDatasetOps for the whole session.
+"""
+
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+from PIL import Image
+from PyQt5.QtCore import QIdentityProxyModel
+from PyQt5.QtWidgets import QTableView
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import components.viewers.object_viewer_2d as ov2d
+import MdModel
+import MdUtils as mu
+from components.viewers.object_viewer_2d import ObjectViewer2D
+from components.widgets.table_view import MdObjectTableModel
+from dialogs.object_dialog import ObjectDialog
+from dialogs.object_prefetch import ImagePrefetcher, load_image
+
+
+def _image(path, size=(600, 400), color=(30, 90, 150)):
+    Image.new("RGB", size, color).save(str(path))
+    return str(path)
+
+
+@pytest.fixture
+def prefetcher(qapp):
+    prefetcher = ImagePrefetcher()
+    yield prefetcher
+    prefetcher.shutdown()
+
+
+class TestImagePrefetcher:
+    def test_images_are_decoded_with_their_fitting_level(self, prefetcher, tmp_path):
+        path = _image(tmp_path / "a.png")
+        prefetcher.prefetch([path], canvas_size=(150, 150), storage_base=str(tmp_path))
+
+        prefetched = prefetcher.take(path)
+        assert (prefetched.image.width(), prefetched.image.height()) == (600, 400)
+        # 600 px into 150 px is a quarter: level 2 is ready, the others are not.
+        assert sorted(os.listdir(prefetched.pyramid.directory)) == ["2", "pyramid.json"]
+        assert prefetcher.take(path) is prefetched
+
+    def test_images_no_longer_wanted_are_dropped(self, prefetcher, tmp_path):
+        first = _image(tmp_path / "a.png")
+        second = _image(tmp_path / "b.png")
+        prefetcher.prefetch([first, second])
+        prefetcher.prefetch([second])
+
+        assert prefetcher.take(first) is None
+        assert prefetcher.take(second) is not None
+
+    def test_unreadable_images_are_not_held(self, prefetcher, tmp_path):
+        path = tmp_path / "broken.png"
+        path.write_bytes(b"not an image")
+        prefetcher.prefetch([str(path)])
+
+        assert prefetcher.take(str(path)) is None
+        assert load_image(str(tmp_path / "missing.png")) is None
+
+    def test_the_viewer_takes_a_prefetched_image(self, prefetcher, qtbot, tmp_path):
+        path = _image(tmp_path / "a.png")
+        prefetcher.prefetch([path])
+        viewer = ObjectViewer2D()
+        qtbot.addWidget(viewer)
+        viewer.prefetcher = prefetcher
+
+        viewer.set_image(path)
+
+        assert viewer.pyramid is prefetcher.take(path).pyramid
+        assert (viewer.orig_pixmap.width(), viewer.orig_pixmap.height()) == (600, 400)
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    directory = str(tmp_path / "storage")
+    os.makedirs(directory)
+    monkeypatch.setattr(mu, "get_storage_directory", lambda: directory)
+    return directory
+
+
+@pytest.fixture
+def stepping_dialog(qtbot, mock_database, storage, tmp_path):
+    """An object dialog on the first of five pictured objects, as the main window opens it."""
+    dataset = MdModel.MdDataset.create(dataset_name="Steps", dimension=2, landmark_count=1)
+    objects = []
+    for i in range(5):
+        obj = MdModel.MdObject.create(
+            dataset=dataset, object_name=f"o{i}", sequence=i + 1, landmark_str="1\t2", pixels_per_mm=1.0
+        )
+        obj.add_image(_image(tmp_path / f"{i}.png", color=(i * 40, 0, 0))).save()
+        objects.append(obj)
+
+    object_model = MdObjectTableModel()
+    object_model.setHorizontalHeader(["ID", "Seq.", "Name", "LM Count", "Curve", "CSize"])
+    object_model.set_dataset(dataset)
+    proxy = QIdentityProxyModel()
+    proxy.setSourceModel(object_model)
+    table = QTableView()
+    qtbot.addWidget(table)
+    table.setModel(proxy)
+
+    dialog = ObjectDialog(SimpleNamespace(object_model=object_model, pos=lambda: None))
+    qtbot.addWidget(dialog)
+    dialog.set_dataset(dataset)
+    dialog.set_object(objects[0])
+    dialog.set_tableview(table)
+    yield dialog, objects
+    dialog.prefetcher.shutdown()
+
+
+def test_stepping_shows_prefetched_images(stepping_dialog, monkeypatch):
+    dialog, objects = stepping_dialog
+    paths = MdModel.object_image_paths(obj.id for obj in objects)
+    # Opening the dialog queued the two objects after the first.
+    assert set(dialog.prefetcher._pending) == {paths[objects[1].id], paths[objects[2].id]}
+    ahead = dialog.prefetcher.take(paths[objects[1].id])
+
+    dialog.Next()
+
+    assert dialog.object.id == objects[1].id
+    assert dialog.object_view_2d.pyramid is ahead.pyramid
+    assert set(dialog.prefetcher._pending) == {paths[obj.id] for obj in (objects[0], objects[2], objects[3])}
+
+
+def test_dataset_ops_are_built_once_across_steps(stepping_dialog, monkeypatch):
+    dialog, objects = stepping_dialog
+    built = []
+    original = ov2d.MdDatasetOps
+
+    def counting(dataset, *args, **kwargs):
+        built.append(dataset.id)
+        return original(dataset, *args, **kwargs)
+
+    monkeypatch.setattr(ov2d, "MdDatasetOps", counting)
+    for _ in range(3):
+        dialog.Next()
+    dialog.Previous()
+
+    assert dialog.object.id == objects[2].id
+    assert built == []
+    assert dialog.object_view_2d.ds_ops is dialog._dataset_ops
@@ -0,0 +1,137 @@
+"""Tests for how ObjectViewer3D draws and picks on its 3D model and landmarks."""
+
+import os
+import shutil
+import sys
+
+import numpy as np
+import pytest
+
+import MdMesh
+import MdModel as mm
+import objloader
+from components.viewers import object_viewer_3d as v3
+from components.viewers.object_viewer_3d import ObjectViewer3D
+from objloader import OBJ
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def _paint(viewer):
+    """Draw the viewer's object and model in its GL context."""
+    viewer.makeCurrent()
+    viewer.draw_object(viewer.obj_ops)
+
+
+class TestSphereGeometry:
+    def test_unit_sphere_faces_outward(self):
+        vertices, triangles = v3.unit_sphere(8, 6)
+        assert vertices.dtype == np.float32 and triangles.dtype == np.uint32
+        assert vertices.shape == (7 * 9, 3) and triangles.shape == (2 * 8 * 6, 3)
+        np.testing.assert_allclose(np.linalg.norm(vertices, axis=1), 1.0, atol=1e-6)
+
+        corners = vertices[triangles]
+        normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+        drawn = np.linalg.norm(normals, axis=1) > 1e-6
+        assert np.all(np.einsum("ij,ij->i", normals[drawn], corners[drawn].mean(axis=1)) > 0)
+
+    def test_batch_of_spheres(self):
+        centers = [[0, 0, 0], [1, 2, 3]]
+        colors = [[1, 0, 0], [0, 0, 1]]
+        vertices, normals, vertex_colors, triangles = v3.sphere_batch(centers, 0.5, colors)
+        sphere, sphere_triangles = v3.unit_sphere()
+        count = len(sphere)
+        assert vertices.shape == normals.shape == vertex_colors.shape == (2 * count, 3)
+        np.testing.assert_allclose(vertices[count:], [1, 2, 3] + 0.5 * sphere, atol=1e-6)
+        assert vertex_colors[count - 1].tolist() == [1, 0, 0] and vertex_colors[count].tolist() == [0, 0, 1]
+        assert np.array_equal(triangles[len(sphere_triangles) :], sphere_triangles + count)
+        assert triangles.max() == 2 * count - 1
+
+
+class TestPicking:
+    def test_vertex_under_the_pointer(self, qtbot, tmp_path, monkeypatch):
+        viewer = ObjectViewer3D(None)
+        qtbot.addWidget(viewer)
+        viewer.threed_model = OBJ(shutil.copy(os.path.join(FIXTURES, "sample_3d.obj"), tmp_path))
+        viewer.threed_model.rotate(0.3, 0.2)
+        target = viewer.threed_model.vertices[3].astype(float)
+        direction = -target / np.linalg.norm(target)
+        monkeypatch.setattr(viewer, "unproject_mouse", lambda x, y: (target * 3, direction))
+        assert viewer.pick_element(10, 10) == 3
+        monkeypatch.setattr(viewer, "unproject_mouse", lambda x, y: (target * 3, -direction))
+        assert viewer.pick_element(10, 10) is None
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="needs a usable offscreen GL context")
+class TestModelRendering:
+    @pytest.fixture
+    def viewer(self, qtbot, mock_database, monkeypatch, tmp_path):
+        monkeypatch.setattr(v3.mu, "get_storage_directory", lambda: str(tmp_path))
+        dataset = mm.MdDataset.create(dataset_name="Scan", dimension=3, landmark_count=3)
+        obj = mm.MdObject.create(dataset=dataset, object_name="cube", landmark_str="0,0,0\n1,1,1\n1,0,1")
+        viewer = ObjectViewer3D(None)
+        qtbot.addWidget(viewer)
+        viewer.resize(200, 200)
+        viewer.show()
+        qtbot.wait(50)
+        viewer.set_object(obj)
+        viewer.set_threed_model(os.path.join(FIXTURES, "sample_3d.obj"))
+        return viewer
+
+    def test_model_and_landmarks_render(self, viewer):
+        viewer.show_index = True
+        viewer.selected_landmark_idx = 1
+        viewer.cursor_on_vertex = 0
+        _paint(viewer)
+        assert viewer.threed_model.generated
+        assert viewer.threed_model.vertex_normals.shape == viewer.threed_model.vertices.shape
+
+    def test_replaced_model_is_freed(self, viewer):
+        _paint(viewer)
+        first = viewer.threed_model
+        viewer.set_threed_model(os.path.join(FIXTURES, "sample_3d.stl"))
+        assert viewer.threed_model is not first
+        assert not first.generated and first.buffers == ()
+
+    def test_rotation_does_not_upload_again(self, viewer, monkeypatch):
+        _paint(viewer)
+        monkeypatch.setattr(viewer.threed_model, "generate", lambda: pytest.fail("uploaded again"))
+        viewer.temp_rotate_x = 30
+        viewer.sync_rotation()
+        _paint(viewer)
+
+    def test_coarse_level_while_the_view_moves(self, viewer, monkeypatch):
+        drawn = []
+        monkeypatch.setattr(viewer.threed_model, "render", lambda max_faces=None: drawn.append(max_faces))
+        viewer.is_dragging = True
+        _paint(viewer)
+        viewer.is_dragging = False
+        _paint(viewer)
+        viewer.auto_rotate = True
+        _paint(viewer)
+        viewer.edit_mode = v3.MODE["EDIT_LANDMARK"]
+        _paint(viewer)
+        assert drawn == [v3.DRAGGED_FACES, None, v3.TURNING_FACES, None]
+
+    def test_drag_reaches_the_coarsest_level(self, viewer, qtbot, tmp_path, monkeypatch):
+        assert sorted((v3.DRAGGED_FACES, v3.TURNING_FACES)) == sorted(MdMesh.LEVEL_FACE_COUNTS)
+        monkeypatch.setattr(MdMesh, "LEVEL_FACE_COUNTS", (2000, 500))
+        monkeypatch.setattr(v3, "TURNING_FACES", 2000)
+        monkeypatch.setattr(v3, "DRAGGED_FACES", 500)
+        vertices, triangles = v3.unit_sphere(60, 40)
+        lines = [f"v {x} {y} {z}" for x, y, z in vertices] + [f"f {a + 1} {b + 1} {c + 1}" for a, b, c in triangles]
+        model = tmp_path / "sphere.obj"
+        model.write_text("\n".join(lines) + "\n")
+        viewer.set_threed_model(str(model))
+        qtbot.waitUntil(lambda: len(viewer.threed_model.levels) == 2)
+        drawn = []
+        monkeypatch.setattr(objloader, "_draw", lambda vertices, normals, faces, buffers: drawn.append(len(faces)))
+        viewer.is_dragging = True
+        _paint(viewer)
+        viewer.is_dragging = False
+        viewer.auto_rotate = True
+        _paint(viewer)
+        viewer.auto_rotate = False
+        _paint(viewer)
+        finest, coarsest = (len(level.faces) for level in viewer.threed_model.levels)
+        assert drawn == [coarsest, finest, len(viewer.threed_model.faces)]
@@ -0,0 +1,221 @@
+"""Tests for the array-backed Procrustes engine (MdProcrustes).
+
+The engine replaces the per-object list loops of ``MdDatasetOps``; these tests
+pin it to the list implementation it has to reproduce, step by step and end to
+end, for complete data and for data with gaps.
+"""
+
+import copy
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import MdProcrustes as mp
+from MdModel import MdDatasetOps, MdObjectOps, impute_missing_landmarks
+
+
+def _random_dataset(dim, n_objects=12, n_landmarks=8, gaps=False, seed=0):
+    rng = np.random.default_rng(seed)
+    base = rng.normal(size=(n_landmarks, dim))
+    shapes = []
+    for i in range(n_objects):
+        q, _ = np.linalg.qr(rng.normal(size=(dim, dim)))
+        shape = (base + rng.normal(scale=0.05, size=base.shape)) * rng.uniform(0.5, 3) @ q + rng.normal(size=dim)
+        landmarks = shape.tolist()
+        if gaps and i % 3 == 0:
+            landmarks[i % n_landmarks] = [None] * dim
+        shapes.append(landmarks)
+    return shapes
+
+
+def _ops_from_lists(shapes, dim):
+    """MdDatasetOps/MdObjectOps around plain lists, bypassing the database."""
+    ds_ops = MdDatasetOps.__new__(MdDatasetOps)
+    ds_ops.id = None
+    ds_ops.dimension = dim
+    ds_ops.object_list = []
+    for landmarks in shapes:
+        obj = MdObjectOps.__new__(MdObjectOps)
+        obj.object_name = "obj"
+        obj.landmark_list = copy.deepcopy(landmarks)
+        obj.centroid_size = -1
+        ds_ops.object_list.append(obj)
+    return ds_ops
+
+
+def _as_array(landmark_lists, dim):
+    return mp.landmarks_to_array(landmark_lists, dim)
+
+
+class TestConversion:
+    def test_round_trip_with_missing(self):
+        lists = [[[1.0, 2.0], [None, None]], [[3.0, 4.0], [5.0, 6.0]]]
+        arr = mp.landmarks_to_array(lists, 2)
+        assert arr.shape == (2, 2, 2)
+        assert np.isnan(arr[0, 1]).all()
+        assert [mp.array_to_landmarks(s) for s in arr] == lists
+
+    def test_ragged_input_is_padded(self):
+        arr = mp.landmarks_to_array([[[1.0, 2.0]], [[3.0, 4.0], [5.0]]], 2)
+        assert arr.shape == (2, 2, 2)
+        assert np.isnan(arr[0, 1]).all()
+        assert arr[1, 1, 0] == 5.0 and np.isnan(arr[1, 1, 1])
+
+    def test_empty(self):
+        assert mp.landmarks_to_array([], 3).shape == (0, 0, 3)
+
+
+class TestNormalisation:
+    @pytest.mark.parametrize("dim", [2, 3])
+    def test_centroid_sizes_match_object_ops(self, dim):
+        shapes = _random_dataset(dim, gaps=True)
+        engine = mp.ProcrustesEngine.from_landmark_lists(shapes, dim)
+        ds_ops = _ops_from_lists(shapes, dim)
+        expected = [obj.get_centroid_size(True) for obj in ds_ops.object_list]
+        assert np.allclose(engine.compute_centroid_sizes(), expected, atol=1e-12)
+
+    def test_center_and_scale_gives_unit_size(self):
+        engine = mp.ProcrustesEngine.from_landmark_lists(_random_dataset(2), 2)
+        engine.center_and_scale()
+        assert np.allclose(engine.centroids(), 0.0, atol=1e-12)
+        assert np.allclose(engine.compute_centroid_sizes(), 1.0)
+
+    def test_coincident_points_left_unscaled(self):
+        engine = mp.ProcrustesEngine(np.zeros((1, 3, 2)))
+        engine.center_and_scale()
+        assert np.all(engine.shapes == 0.0)
+
+
+class TestRotation:
+    @pytest.mark.parametrize("dim", [2, 3])
+    @pytest.mark.parametrize("gaps", [False, True])
+    def test_rotate_to_matches_list_rotation(self, dim, gaps):
+        shapes = _random_dataset(dim, gaps=gaps, seed=3)
+        reference = _random_dataset(dim, n_objects=1, seed=4)[0]
+
+        ds_ops = _ops_from_lists(shapes, dim)
+        ref_ops = MdObjectOps.__new__(MdObjectOps)
+        ref_ops.landmark_list = reference
+        ds_ops.set_reference_shape(ref_ops)
+        for i in range(len(shapes)):
+            ds_ops.rotate_gls_to_reference_shape(i)
+
+        engine = mp.ProcrustesEngine.from_landmark_lists(shapes, dim)
+        engine.rotate_to(_as_array([reference], dim)[0])
+
+        expected = _as_array([obj.landmark_list for obj in ds_ops.object_list], dim)
+        assert np.allclose(engine.shapes, expected, atol=1e-12, equal_nan=True)
+
+    def test_object_with_too_few_observed_points_is_not_rotated(self):
+        shape = [[1.0, 0.0], [0.0, 1.0], [None, None], [None, None]]
+        engine = mp.ProcrustesEngine.from_landmark_lists([shape], 2)
+        before = engine.shapes.copy()
+        engine.rotate_to(np.array([[0.0, 1.0], [-1.0, 0.0], [1.0, 1.0], [0.0, 0.0]]))
+        assert np.array_equal(engine.shapes, before, equal_nan=True)
+
+
+class TestSuperimposition:
+    @pytest.mark.parametrize("dim", [2, 3])
+    @pytest.mark.parametrize("gaps", [False, True])
+    def test_align_matches_list_gpa(self, dim, gaps):
+        """The engine's GPA reproduces the list-based reference loop."""
+        shapes = _random_dataset(dim, gaps=gaps, seed=7)
+
+        # Reference: the list implementation's loop, written out.
+        ds_ops = _ops_from_lists(shapes, dim)
+        for obj in ds_ops.object_list:
+            obj.move_to_center()
+            obj.rescale_to_unitsize()
+        average = None
+        for _ in range(100):
+            previous, average = average, ds_ops.get_average_shape()
+            if previous is not None and ds_ops.is_same_shape(previous, average):
+                break
+            ds_ops.set_reference_shape(average)
+            for i in range(len(shapes)):
+                ds_ops.rotate_gls_to_reference_shape(i)
+
+        engine = mp.ProcrustesEngine.from_landmark_lists(shapes, dim)
+        engine.center_and_scale()
+        mean = engine.align()
+
+        expected = _as_array([obj.landmark_list for obj in ds_ops.object_list], dim)
+        assert np.allclose(engine.shapes, expected, atol=1e-9, equal_nan=True)
+        assert np.allclose(mean, _as_array([average.landmark_list], dim)[0], atol=1e-9, equal_nan=True)
+
+    def test_dataset_ops_writes_back_landmark_lists(self):
+        shapes = _random_dataset(2, seed=11)
+        ds_ops = _ops_from_lists(shapes, 2)
+        assert ds_ops.procrustes_superimposition() is True
+        for obj in ds_ops.object_list:
+            assert isinstance(obj.landmark_list, list)
+            assert obj.centroid_size > 0
+            assert obj.get_centroid_size(True) == pytest.approx(1.0)
+
+    def test_degenerate_data_raises_value_error(self):
+        engine = mp.ProcrustesEngine(np.full((2, 3, 2), np.inf))
+        with pytest.raises(ValueError, match="Cannot compute alignment rotation"):
+            engine.rotate_to(np.ones((3, 2)))
+
+
+class TestImputation:
+    @pytest.mark.parametrize("dim", [2, 3])
+    def test_fill_gaps_matches_impute_missing_landmarks(self, dim):
+        shapes = _random_dataset(dim, gaps=True, seed=5)
+        reference = _random_dataset(dim, n_objects=1, seed=6)[0]
+
+        engine = mp.ProcrustesEngine.from_landmark_lists(shapes, dim)
+        gaps = engine.gap_mask()
+        assert engine.fill_gaps(_as_array([reference], dim)[0], gaps) == 0
+
+        expected = _as_array([impute_missing_landmarks(s, reference, dim) for s in shapes], dim)
+        assert not np.isnan(engine.shapes).any()
+        assert np.allclose(engine.shapes, expected, atol=1e-12)
+
+    def test_fill_gaps_keeps_unfittable_objects_open(self):
+        shape = [[1.0, 0.0], [None, None], [None, None]]
+        engine = mp.ProcrustesEngine.from_landmark_lists([shape], 2)
+        unfitted = engine.fill_gaps(np.array([[1.0, 0.0], [0.0, 1.0], [1.0, 1.0]]), engine.gap_mask())
+        assert unfitted == 1
+        assert np.isnan(engine.shapes[0, 1:]).all()
+
+    def test_estimates_converged(self):
+        previous = np.array([[0.1, 0.2], [np.nan, np.nan]])
+        assert mp.ProcrustesEngine.estimates_converged(previous, previous + 1e-10)
+        assert not mp.ProcrustesEngine.estimates_converged(previous, previous + 1e-6)
+        assert not mp.ProcrustesEngine.estimates_converged(previous, np.nan_to_num(previous))
+        assert not mp.ProcrustesEngine.estimates_converged(previous, previous[:1])
+
+    @pytest.mark.parametrize("dim", [2, 3])
+    def test_imputation_recovers_noise_free_gaps(self, dim):
+        """On exact similarity copies of one shape, EM recovers the removed landmarks."""
+        rng = np.random.default_rng(9)
+        base = rng.normal(size=(10, dim))
+        truth, shapes = [], []
+        for i in range(15):
+            q, _ = np.linalg.qr(rng.normal(size=(dim, dim)))
+            if np.linalg.det(q) < 0:
+                q[:, 0] = -q[:, 0]
+            shape = base * rng.uniform(0.5, 2) @ q + rng.normal(size=dim)
+            truth.append(shape)
+            landmarks = shape.tolist()
+            if i % 2:
+                landmarks[i % 10] = [None] * dim
+            shapes.append(landmarks)
+
+        engine = mp.ProcrustesEngine.from_landmark_lists(shapes, dim)
+        engine.superimpose_with_imputation(max_refinements=5)
+        assert not engine.has_missing()
+
+        complete = mp.ProcrustesEngine(np.array(truth))
+        complete.center_and_scale()
+        complete.align(final_rotation=True)
+        # Same shapes up to one common rotation of the whole aligned set.
+        a = engine.shapes.reshape(-1, dim)
+        b = complete.shapes.reshape(-1, dim)
+        u, _, vt = np.linalg.svd(b.T @ a)
+        assert np.allclose(a, b @ (u @ vt), atol=1e-6)
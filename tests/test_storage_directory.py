@@ -208,7 +208,7 @@ class TestMutationsStayInTheChosenDirectory:
         assert replacement.get_file_path().startswith(storage)
         assert os.path.exists(replacement.get_file_path())
 
-    def test_moving_an_object_moves_its_media(self, test_database, storage, tmp_path, no_default_writes):
+    def test_moving_an_object_keeps_its_media(self, test_database, storage, tmp_path, no_default_writes):
         source_ds = mm.MdDataset.create(dataset_name="From", dimension=2)
         target_ds = mm.MdDataset.create(dataset_name="To", dimension=2)
         obj = _object(dataset=source_ds)
@@ -219,10 +219,11 @@ class TestMutationsStayInTheChosenDirectory:
 
         obj.change_dataset(target_ds)
 
+        # Stored by content, so the path does not involve the dataset.
         new_path = obj.get_image().get_file_path()
-        assert new_path.startswith(os.path.join(storage, str(target_ds.id)))
+        assert new_path == old_path
+        assert new_path.startswith(storage)
         assert os.path.exists(new_path)
-        assert not os.path.exists(old_path)
 
     def test_copying_an_image_lands_there(self, test_database, storage, tmp_path, no_default_writes):
         obj = _object()
@@ -259,7 +260,7 @@ class TestMutationsStayInTheChosenDirectory:
         assert img.has_archived_original()
         assert img.get_original_file_path().startswith(storage)
 
-    def test_deleting_a_dataset_removes_its_directory_there(self, test_database, storage, tmp_path, no_default_writes):
+    def test_deleting_a_dataset_removes_its_files_there(self, test_database, storage, tmp_path, no_default_writes):
         from ModanController import ModanController
 
         obj = _object()
@@ -267,11 +268,15 @@ class TestMutationsStayInTheChosenDirectory:
         img = mm.MdImage(object=obj)
         img.add_file(_png(tmp_path / "a.png"))
         img.save()
-        assert os.path.isdir(os.path.join(storage, str(dataset_id)))
+        stored = img.get_file_path()
+        legacy = os.path.join(storage, str(dataset_id))
+        os.makedirs(legacy)
+        assert os.path.exists(stored)
 
-        ModanController()._remove_dataset_directory(dataset_id)
+        assert ModanController().delete_dataset(dataset_id)
 
-        assert not os.path.exists(os.path.join(storage, str(dataset_id)))
+        assert not os.path.exists(stored)
+        assert not os.path.exists(legacy)
 
 
 class TestExport:
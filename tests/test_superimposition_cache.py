@@ -0,0 +1,166 @@
+"""Tests for the persistent superimposition cache (MdSuperimpositionCache).
+
+Covers the content key, the on-disk entries and their LRU budget, invalidation
+when an input changes, and the controller reusing a cached superimposition.
+"""
+
+import os
+import sys
+import time
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import MdModel
+from MdSuperimpositionCache import SuperimpositionCache, content_key
+from ModanController import ModanController
+
+ROWS = [(1, "0\t0\n1\t0\n0\t1", None), (2, "0\t0\n2\t0\n0\t2", None)]
+
+
+class TestContentKey:
+    def test_stable(self):
+        assert content_key("Procrustes", 2, "", None, ROWS) == content_key("procrustes ", 2, "", None, ROWS)
+
+    @pytest.mark.parametrize(
+        "changed",
+        [
+            ("Bookstein", 2, "", None, ROWS),
+            ("Procrustes", 3, "", None, ROWS),
+            ("Procrustes", 2, "1,2", None, ROWS),
+            ("Procrustes", 2, "", '[{"id": "c1", "n": 5}]', ROWS),
+            ("Procrustes", 2, "", None, ROWS[::-1]),
+            ("Procrustes", 2, "", None, [ROWS[0], (2, "0\t0\n2\t0\n0\t2.5", None)]),
+            ("Procrustes", 2, "", None, [ROWS[0], (2, "0\t0\n2\t0\n0\t2", '{"c1": [[0, 0], [1, 1]]}')]),
+        ],
+    )
+    def test_any_input_changes_the_key(self, changed):
+        assert content_key(*changed) != content_key("Procrustes", 2, "", None, ROWS)
+
+    def test_fields_do_not_run_together(self):
+        assert content_key("p", 2, "ab", "c", []) != content_key("p", 2, "a", "bc", [])
+
+
+class TestCacheEntries:
+    def test_round_trip_keeps_missing_values(self, tmp_path):
+        cache = SuperimpositionCache(str(tmp_path))
+        lists = [[[0.1, 0.2], [None, None]], [[0.3, 0.4], [0.5, 0.6]]]
+        assert cache.put(7, "a" * 64, [10, 11], lists)
+
+        object_ids, landmarks = cache.get(7, "a" * 64)
+        assert object_ids == [10, 11]
+        assert landmarks.shape == (2, 2, 2)
+        assert np.isnan(landmarks[0, 1]).all()
+        assert cache.get(7, "b" * 64) is None
+
+    def test_ragged_result_is_not_stored(self, tmp_path):
+        cache = SuperimpositionCache(str(tmp_path))
+        assert not cache.put(1, "a" * 64, [1, 2], [[[0.0, 0.0]], [[0.0, 0.0], [1.0, 1.0]]])
+        assert cache.get(1, "a" * 64) is None
+
+    def test_corrupt_entry_is_a_miss_and_removed(self, tmp_path):
+        cache = SuperimpositionCache(str(tmp_path))
+        path = tmp_path / f"ds1_{'a' * 64}.npz"
+        path.write_bytes(b"not an npz file")
+        assert cache.get(1, "a" * 64) is None
+        assert not path.exists()
+
+    def test_invalidate_dataset_only_drops_that_dataset(self, tmp_path):
+        cache = SuperimpositionCache(str(tmp_path))
+        cache.put(1, "a" * 64, [1], [[[0.0, 0.0]]])
+        cache.put(2, "b" * 64, [2], [[[0.0, 0.0]]])
+        cache.invalidate_dataset(1)
+        assert cache.get(1, "a" * 64) is None
+        assert cache.get(2, "b" * 64) is not None
+
+    def test_index_is_rebuilt_from_disk(self, tmp_path):
+        SuperimpositionCache(str(tmp_path)).put(3, "c" * 64, [1], [[[0.0, 0.0]]])
+        reopened = SuperimpositionCache(str(tmp_path))
+        reopened.invalidate_dataset(3)
+        assert not list(tmp_path.iterdir())
+
+    def test_least_recently_used_entry_is_evicted(self, tmp_path):
+        lists = [[[float(i), float(i)] for i in range(200)]]
+        probe = SuperimpositionCache(str(tmp_path / "probe"))
+        probe.put(1, "0" * 64, [1], lists)
+        entry_size = os.path.getsize(probe._path(1, "0" * 64))
+
+        cache = SuperimpositionCache(str(tmp_path / "lru"), max_bytes=entry_size * 2)
+        cache.put(1, "a" * 64, [1], lists)
+        cache.put(1, "b" * 64, [1], lists)
+        past = time.time() - 100
+        os.utime(cache._path(1, "a" * 64), (past, past))
+        os.utime(cache._path(1, "b" * 64), (past + 1, past + 1))
+        cache.get(1, "a" * 64)  # a is now the most recently used
+        cache.put(1, "c" * 64, [1], lists)
+
+        assert cache.get(1, "a" * 64) is not None
+        assert cache.get(1, "b" * 64) is None
+        assert cache.get(1, "c" * 64) is not None
+
+
+def _make_dataset(n_objects=4):
+    dataset = MdModel.MdDataset.create(dataset_name="cached", dimension=2)
+    rng = np.random.default_rng(0)
+    base = np.array([[0.0, 0.0], [2.0, 0.0], [2.0, 1.0], [0.0, 1.5]])
+    for i in range(n_objects):
+        shape = base + rng.normal(scale=0.1, size=base.shape)
+        MdModel.MdObject.create(
+            dataset=dataset,
+            object_name=f"o{i}",
+            sequence=i + 1,
+            landmark_str="\n".join(f"{x}\t{y}" for x, y in shape),
+        )
+    return dataset
+
+
+class TestControllerUsesCache:
+    def test_second_run_skips_superimposition(self, mock_database):
+        controller = ModanController()
+        controller.set_current_dataset(_make_dataset())
+
+        ds_ops, first = controller._prepare_landmarks("Procrustes")
+        with patch.object(MdModel.MdDatasetOps, "procrustes_superimposition") as spy:
+            cached_ops, second = controller._prepare_landmarks("Procrustes")
+        spy.assert_not_called()
+        assert [o.id for o in cached_ops.object_list] == [o.id for o in ds_ops.object_list]
+        assert np.allclose(np.array(second), np.array(first))
+
+    def test_method_is_part_of_the_key(self, mock_database):
+        controller = ModanController()
+        dataset = _make_dataset()
+        dataset.baseline = "1,2"
+        dataset.save()
+        controller.set_current_dataset(dataset)
+
+        controller._prepare_landmarks("Procrustes")
+        _ops, bookstein = controller._prepare_landmarks("Bookstein")
+        assert bookstein[0][0] == pytest.approx([-0.5, 0.0])
+
+    def test_object_save_invalidates(self, mock_database, _isolated_superimposition_cache):
+        controller = ModanController()
+        dataset = _make_dataset()
+        controller.set_current_dataset(dataset)
+        controller._prepare_landmarks("Procrustes")
+        assert _isolated_superimposition_cache._load_index().get(dataset.id)
+
+        obj = dataset.object_list.first()
+        obj.landmark_str = "0\t0\n3\t0\n3\t1\n0\t2"
+        obj.save()
+        assert not _isolated_superimposition_cache._load_index().get(dataset.id)
+
+        with patch.object(MdModel.MdDatasetOps, "procrustes_superimposition", autospec=True, return_value=True) as spy:
+            controller._prepare_landmarks("Procrustes")
+        spy.assert_called_once()
+
+    def test_curve_config_change_invalidates(self, mock_database, _isolated_superimposition_cache):
+        controller = ModanController()
+        dataset = _make_dataset()
+        controller.set_current_dataset(dataset)
+        controller._prepare_landmarks("Procrustes")
+
+        dataset.set_curve_config([{"id": "c1", "n": 3, "method": "equidistant", "start": 4}])
+        assert not _isolated_superimposition_cache._load_index().get(dataset.id)
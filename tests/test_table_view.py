@@ -11,9 +11,12 @@ Note: Full integration testing with drag-and-drop and complex UI interactions
 requires comprehensive setup. These tests focus on core functionality.
 """
 
+from unittest.mock import patch
+
 from PyQt5.QtCore import Qt
 
-from components.widgets.table_view import MdTableModel, MdTableView
+import MdModel
+from components.widgets.table_view import MISSING_COUNT_ROLE, MdObjectTableModel, MdTableModel, MdTableView
 
 
 class TestMdTableModel:
@@ -264,3 +267,119 @@ class TestMdTableViewAndModel:
 
         index = model.index(0, 0)
         assert model.data(index, Qt.DisplayRole) == "Value"
+
+
+def _make_dataset(n_objects=5):
+    dataset = MdModel.MdDataset.create(dataset_name="paged", dimension=2, propertyname_str="Sex,Age")
+    for i in range(n_objects):
+        MdModel.MdObject.create(
+            dataset=dataset,
+            object_name=f"o{i}",
+            sequence=n_objects - i,
+            landmark_str="0\t0\n1\t0\nMissing\tMissing" if i == 0 else "0\t0\n1\t0\n0\t" + str(i),
+            property_str=f"{'MF'[i % 2]},{10 - i}",
+        )
+    return dataset
+
+
+class TestMdObjectTableModel:
+    """The database-backed object table (MdObjectTableModel)"""
+
+    def _cell(self, model, row, column, role=Qt.DisplayRole):
+        return model.data(model.index(row, column), role)
+
+    def test_rows_follow_the_sequence(self, mock_database):
+        model = MdObjectTableModel()
+        model.set_dataset(_make_dataset())
+
+        assert model.rowCount() == 5
+        assert model.columnCount() == 8
+        assert [self._cell(model, row, 2) for row in range(5)] == ["o4", "o3", "o2", "o1", "o0"]
+        assert self._cell(model, 4, 3) == 2
+        assert self._cell(model, 4, 3, MISSING_COUNT_ROLE) == 1
+        assert self._cell(model, 0, 6) == "M"
+        assert self._cell(model, 0, 7) == "6"
+
+    def test_only_shown_pages_are_read(self, mock_database):
+        model = MdObjectTableModel()
+        model.PAGE_SIZE = 2
+        model.set_dataset(_make_dataset())
+
+        with patch.object(model, "_read_page", wraps=model._read_page) as spy:
+            self._cell(model, 0, 2)
+            self._cell(model, 1, 5)
+        spy.assert_called_once_with(0)
+
+    def test_sorting_is_done_by_the_query(self, mock_database):
+        model = MdObjectTableModel()
+        model.set_dataset(_make_dataset())
+
+        model.sort(5, Qt.DescendingOrder)
+        sizes = [self._cell(model, row, 5) for row in range(5)]
+        assert sizes == sorted(sizes, reverse=True)
+
+        model.sort(7, Qt.AscendingOrder)  # a variable column: Age, numerically
+        assert [self._cell(model, row, 7) for row in range(5)] == ["6", "7", "8", "9", "10"]
+
+    def test_sorting_keeps_the_selection_on_its_object(self, mock_database, qtbot):
+        view = MdTableView()
+        qtbot.addWidget(view)
+        model = MdObjectTableModel()
+        model.setHorizontalHeader(["ID", "Seq.", "Name", "LM Count", "Curve", "CSize", "Sex", "Age"])
+        model.set_dataset(_make_dataset())
+        view.setModel(model)
+        view.selectRow(0)
+        selected = model.object_id(0)
+
+        model.sort(1, Qt.DescendingOrder)
+        assert model.object_id(view.selectionModel().selectedRows()[0].row()) == selected
+
+    def test_edits_are_saved_per_object(self, mock_database):
+        model = MdObjectTableModel()
+        dataset = _make_dataset()
+        model.set_dataset(dataset)
+        object_id = model.object_id(0)
+
+        assert model.setData(model.index(0, 6), "F")
+        assert not model.setData(model.index(0, 7), "6")  # unchanged
+        assert self._cell(model, 0, 6, Qt.BackgroundRole) is not None
+        model.save_object_info()
+        model.resetColors()
+
+        assert MdModel.MdObject.get_by_id(object_id).property_str == "F,6"
+        assert self._cell(model, 0, 6) == "F"
+        assert self._cell(model, 0, 6, Qt.BackgroundRole) is None
+
+    def test_refresh_object_rereads_its_row(self, mock_database):
+        model = MdObjectTableModel()
+        model.set_dataset(_make_dataset())
+        object_id = model.object_id(0)
+        assert self._cell(model, 0, 3) == 3
+
+        obj = MdModel.MdObject.get_by_id(object_id)
+        obj.landmark_str = "0\t0\n1\t1"
+        obj.save()
+        model.refresh_object(object_id)
+        assert self._cell(model, 0, 3) == 2
+        assert model.row_of(object_id) == 0
+
+    def test_appended_objects_are_read_from_the_database(self, mock_database):
+        model = MdObjectTableModel()
+        dataset = _make_dataset()
+        model.set_dataset(dataset)
+        assert model.setData(model.index(0, 6), "F")
+        MdModel.MdObject.create(dataset=dataset, object_name="new", sequence=0, landmark_str="0\t0")
+
+        model.appendRows([[None, 0, "new"]])
+        assert model.rowCount() == 6
+        assert self._cell(model, 0, 2) == "new"
+        assert self._cell(model, 1, 6) == "F"  # the edit stays with its object
+        model.load_data([])
+        assert model.rowCount() == 6
+
+    def test_tooltip_tells_the_missing_landmarks(self, mock_database):
+        model = MdObjectTableModel()
+        model.set_dataset(_make_dataset())
+        assert self._cell(model, 4, 3, Qt.ToolTipRole) == "1 missing landmark"
+        assert self._cell(model, 0, 3, Qt.ToolTipRole) is None
+        assert self._cell(model, 4, 2, Qt.ToolTipRole) is None
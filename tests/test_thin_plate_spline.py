@@ -0,0 +1,137 @@
+"""Tests for thin-plate spline warps (MdThinPlateSpline) and the viewer's TPS grid."""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import MdModel as mm
+import MdThinPlateSpline as tps
+from components.viewers.object_viewer_2d import TPS_GRID_LINES, ObjectViewer2D
+
+SOURCE = np.array([[0.0, 0.0], [1.0, 0.0], [1.0, 1.0], [0.0, 1.0], [0.5, 0.5]])
+TARGET = np.array([[0.0, 0.1], [1.1, 0.0], [1.0, 1.2], [-0.1, 0.9], [0.6, 0.4]])
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache():
+    tps.clear_cache()
+    yield
+    tps.clear_cache()
+
+
+def _point_by_point(spline, point):
+    """The warp as the viewer used to compute it, one point at a time."""
+    r = np.linalg.norm(spline.source - point, axis=1)
+    u = np.where(r > 0, r * r * np.log(np.where(r > 0, r, 1.0)), 0.0)
+    return u @ spline.weights + spline.affine[0] + point @ spline.affine[1:]
+
+
+class TestThinPlateSpline:
+    def test_maps_source_onto_target(self):
+        spline = tps.ThinPlateSpline(SOURCE, TARGET)
+        np.testing.assert_allclose(spline.transform(SOURCE), TARGET, atol=1e-9)
+
+    def test_matches_point_by_point_warp(self):
+        spline = tps.ThinPlateSpline(SOURCE, TARGET)
+        points = np.random.default_rng(0).uniform(-0.5, 1.5, (50, 2))
+        expected = np.array([_point_by_point(spline, p) for p in points])
+        np.testing.assert_allclose(spline.transform(points), expected, atol=1e-9)
+        np.testing.assert_allclose(spline.transform(points[3]), expected[3], atol=1e-9)
+
+    def test_affine_target_is_reproduced_everywhere(self):
+        matrix = np.array([[1.2, 0.3], [-0.2, 0.9]])
+        spline = tps.ThinPlateSpline(SOURCE, SOURCE @ matrix + [2.0, -1.0])
+        np.testing.assert_allclose(spline.weights, 0.0, atol=1e-9)
+        points = np.random.default_rng(1).uniform(-3, 3, (20, 2))
+        np.testing.assert_allclose(spline.transform(points), points @ matrix + [2.0, -1.0], atol=1e-9)
+
+    def test_three_dimensions(self):
+        rng = np.random.default_rng(2)
+        source = rng.uniform(0, 1, (10, 3))
+        target = source + rng.normal(0, 0.05, (10, 3))
+        spline = tps.ThinPlateSpline(source, target)
+        np.testing.assert_allclose(spline.transform(source), target, atol=1e-9)
+
+    def test_transform_in_chunks(self, monkeypatch):
+        points = np.random.default_rng(3).uniform(0, 1, (25, 2))
+        spline = tps.ThinPlateSpline(SOURCE, TARGET)
+        whole = spline.transform(points)
+        monkeypatch.setattr(tps, "_CHUNK", 4)
+        np.testing.assert_allclose(spline.transform(points), whole)
+
+    def test_mismatched_configurations(self):
+        with pytest.raises(ValueError):
+            tps.ThinPlateSpline(SOURCE, TARGET[:4])
+        with pytest.raises(ValueError):
+            tps.ThinPlateSpline(SOURCE[:2], TARGET[:2])
+
+
+class TestGrid:
+    def test_lines_in_two_dimensions(self):
+        lines = tps.grid_lines([0, 0], [1, 2], lines=5, samples=11)
+        assert len(lines) == 10
+        assert [axis for axis, _points in lines] == [1] * 5 + [0] * 5
+        axis, points = lines[0]
+        assert points.shape == (11, 2)
+        assert np.all(points[:, 0] == 0.0) and points[-1, 1] == 2.0
+
+    def test_lines_in_three_dimensions(self):
+        lines = tps.grid_lines([0, 0, 0], [1, 1, 1], lines=4, samples=6)
+        assert len(lines) == 3 * 4 * 4
+        assert all(points.shape == (6, 3) for _axis, points in lines)
+
+    def test_warped_grid_is_kept(self):
+        spline = tps.ThinPlateSpline(SOURCE, TARGET)
+        straight, warped = spline.warp_grid([0, 0], [1, 1], lines=8, samples=30)
+        assert len(straight) == len(warped) == 16
+        np.testing.assert_allclose(warped[4][1], spline.transform(straight[4][1]))
+        assert spline.warp_grid([0, 0], [1, 1], lines=8, samples=30)[1] is warped
+        assert spline.warp_grid([0, 0], [1, 1], lines=9)[1] is not warped
+
+
+class TestSplineCache:
+    def test_same_shapes_share_a_spline(self):
+        spline = tps.spline_between(SOURCE, TARGET)
+        assert tps.spline_between(SOURCE.copy(), TARGET.copy()) is spline
+        assert tps.spline_between(SOURCE, TARGET + 0.01) is not spline
+
+    def test_least_recently_used_is_dropped(self, monkeypatch):
+        monkeypatch.setattr(tps, "SPLINE_CACHE_SIZE", 2)
+        first = tps.spline_between(SOURCE, TARGET)
+        tps.spline_between(SOURCE, TARGET + 1)
+        tps.spline_between(SOURCE, TARGET)
+        tps.spline_between(SOURCE, TARGET + 2)
+        assert tps.spline_between(SOURCE, TARGET) is first
+        assert len(tps._splines) == 2
+
+
+class TestViewerGrid:
+    @pytest.fixture
+    def viewer(self, qtbot, mock_database):
+        dataset = mm.MdDataset.create(dataset_name="Pair", dimension=2, landmark_count=5)
+        for name, points in (("source", SOURCE), ("target", TARGET)):
+            landmark_str = "\n".join(f"{x},{y}" for x, y in points)
+            mm.MdObject.create(dataset=dataset, object_name=name, landmark_str=landmark_str)
+        viewer = ObjectViewer2D()
+        qtbot.addWidget(viewer)
+        viewer.set_ds_ops(mm.MdDatasetOps(dataset))
+        return viewer
+
+    def test_grid_of_the_configured_density(self, viewer):
+        viewer.generate_tps_grid()
+        assert len(viewer.grid_lines_transformed) == 2 * TPS_GRID_LINES
+        viewer.tps_grid_lines, viewer.tps_grid_samples = 40, 160
+        viewer.update_tps_grid()
+        assert len(viewer.grid_lines_transformed) == 80
+        assert viewer.grid_lines_transformed[0][1].shape == (160, 2)
+        viewer.grab()
+
+    def test_degenerate_shapes_draw_no_grid(self, viewer):
+        for obj in viewer.ds_ops.object_list:
+            obj.landmark_list = [[0.0, 0.0]] * 5
+        viewer.update_tps_grid()
+        assert viewer.grid_lines_transformed == []
@@ -0,0 +1,194 @@
+"""Tests for the image tile pyramid ObjectViewer2D draws from.
+
+Levels are made on first use and kept in a directory of the storage
+directory, next to a stored image; the viewer draws only the tiles of the nearest level that are on the
+canvas.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+from PIL import Image
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QColor, QImage, QPainter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import components.viewers.tile_pyramid as tp
+import MdMediaStore
+import MdUtils as mu
+from components.viewers.object_viewer_2d import ObjectViewer2D
+from components.viewers.tile_pyramid import TILE_SIZE, TilePyramid
+
+
+def _image(path, size, color=(200, 40, 40)):
+    Image.new("RGB", size, color).save(str(path))
+    return str(path)
+
+
+# Tiles are QPixmaps, which need the application.
+pytestmark = pytest.mark.usefixtures("qapp")
+
+
+def _level_files(pyramid, level):
+    return sorted(os.listdir(os.path.join(pyramid.directory, str(level))))
+
+
+class TestLevels:
+    def test_levels_halve_down_to_one_tile(self, tmp_path):
+        pyramid = TilePyramid(_image(tmp_path / "a.png", (1000, 600)))
+        assert pyramid.levels == [(1000, 600), (500, 300), (250, 150)]
+
+    def test_nearest_level_keeps_at_least_the_detail_shown(self, tmp_path):
+        pyramid = TilePyramid(_image(tmp_path / "a.png", (1000, 600)))
+        assert pyramid.level_for(0.5) == 0
+        assert pyramid.level_for(1.9) == 0
+        assert pyramid.level_for(2.0) == 1
+        assert pyramid.level_for(3.9) == 1
+        assert pyramid.level_for(40) == 2
+
+    def test_only_tiles_over_the_region_are_returned(self, tmp_path):
+        pyramid = TilePyramid(_image(tmp_path / "a.png", (1000, 600)))
+        rects = [rect for rect, _ in pyramid.tiles(0, 300, 10, 520, 200)]
+        assert rects == [(256, 0, 512, 256), (512, 0, 768, 256)]
+        # Coarser levels report their tiles in level-0 pixels too.
+        rects = [rect for rect, _ in pyramid.tiles(1, 0, 0, 1000, 600)]
+        assert rects == [(0, 0, 512, 512), (512, 0, 1000, 512), (0, 512, 512, 600), (512, 512, 1000, 600)]
+
+
+class TestCache:
+    def test_levels_are_written_once_on_first_use(self, tmp_path):
+        path = _image(tmp_path / "a.png", (1000, 600))
+        pyramid = TilePyramid(path, storage_base=str(tmp_path))
+        assert not os.path.exists(pyramid.directory)
+
+        pyramid.tile(1, 0, 0)
+        assert _level_files(pyramid, 1) == ["0_0.png", "0_1.png", "1_0.png", "1_1.png"]
+        assert not os.path.exists(os.path.join(pyramid.directory, "0"))
+
+        reopened = TilePyramid(path, storage_base=str(tmp_path))
+        reopened._level_image = None  # nothing left to generate
+        assert reopened.tile(1, 1, 1).size().width() == 500 - TILE_SIZE
+
+    def test_a_changed_file_rebuilds(self, tmp_path):
+        path = _image(tmp_path / "a.png", (1000, 600))
+        TilePyramid(path, storage_base=str(tmp_path)).tile(2, 0, 0)
+        _image(path, (600, 1000), color=(0, 0, 255))
+
+        pyramid = TilePyramid(path, storage_base=str(tmp_path))
+        assert not os.path.exists(pyramid.directory)
+        tile = pyramid.tile(2, 0, 0).toImage()
+        assert (tile.width(), tile.height()) == (150, 250)
+        assert QColor(tile.pixel(10, 10)).blue() > 200
+
+    def test_unwritable_sidecar_keeps_tiles_in_memory(self, tmp_path, monkeypatch):
+        pyramid = TilePyramid(_image(tmp_path / "a.png", (1000, 600)), storage_base=str(tmp_path))
+
+        def refuse(*args, **kwargs):
+            raise PermissionError("read-only")
+
+        monkeypatch.setattr(tp.os, "makedirs", refuse)
+        tile = pyramid.tile(0, 3, 2)
+        assert (tile.width(), tile.height()) == (1000 - 3 * TILE_SIZE, 600 - 2 * TILE_SIZE)
+        assert not os.path.exists(pyramid.directory)
+
+    def test_image_outside_the_store_is_cached_by_its_content(self, tmp_path):
+        photos = tmp_path / "photos"
+        photos.mkdir()
+        path = _image(photos / "a.png", (1000, 600))
+        storage = str(tmp_path / "storage")
+        pyramid = TilePyramid(path, storage_base=storage)
+        pyramid.tile(1, 0, 0)
+        assert os.listdir(photos) == ["a.png"]
+        digest = MdMediaStore.md5_of_file(path)
+        assert pyramid.directory == MdMediaStore.sidecar_path(MdMediaStore.blob_path(storage, digest, "png"), "tiles")
+        assert _level_files(pyramid, 1) == ["0_0.png", "0_1.png", "1_0.png", "1_1.png"]
+        MdMediaStore.remove_blob(storage, digest)
+        assert not os.path.exists(pyramid.directory)
+
+    def test_without_a_storage_directory_tiles_stay_in_memory(self, tmp_path):
+        pyramid = TilePyramid(_image(tmp_path / "a.png", (1000, 600)))
+        assert pyramid.directory is None
+        assert pyramid.tile(1, 1, 1).width() == 500 - TILE_SIZE
+        assert os.listdir(tmp_path) == ["a.png"]
+
+    def test_decoded_tiles_are_kept_up_to_the_cache_size(self, tmp_path):
+        pyramid = TilePyramid(_image(tmp_path / "a.png", (1000, 600)), cache_size=3)
+        for col in range(4):
+            pyramid.tile(0, col, 0)
+        assert list(pyramid._tiles) == [(0, 1, 0), (0, 2, 0), (0, 3, 0)]
+
+    @pytest.mark.parametrize("name", ["noise.png", "noise.jpg"])
+    def test_level_0_shows_the_file_s_own_pixels(self, tmp_path, name):
+        noise = np.random.default_rng(0).integers(0, 256, (300, 400, 3), dtype=np.uint8)
+        path = str(tmp_path / name)
+        Image.fromarray(noise).save(path)
+        with Image.open(path) as img:
+            source = np.asarray(img.convert("RGB"))
+        pyramid = TilePyramid(path, storage_base=str(tmp_path))
+        for col, row in ((0, 0), (1, 1)):
+            pyramid.tile(0, col, row)
+            left, top, right, bottom = pyramid._tile_box(0, col, row)
+            with Image.open(pyramid._tile_path(0, col, row)) as tile:
+                assert np.array_equal(np.asarray(tile.convert("RGB")), source[top:bottom, left:right])
+        pyramid.tile(1, 0, 0)
+        assert _level_files(pyramid, 1) == ["0_0." + ("jpg" if name.endswith("jpg") else "png")]
+
+    def test_coarse_jpeg_levels_have_their_exact_size(self, tmp_path):
+        pyramid = TilePyramid(_image(tmp_path / "a.jpg", (3001, 2001)))
+        assert pyramid._level_image(3).size == pyramid.levels[3] == (376, 251)
+
+    def test_unreadable_file_has_no_pyramid(self, tmp_path):
+        path = tmp_path / "broken.png"
+        path.write_bytes(b"not an image")
+        assert TilePyramid.open(str(path)) is None
+
+
+@pytest.fixture
+def viewer(qtbot, tmp_path, monkeypatch):
+    monkeypatch.setattr(mu, "get_storage_directory", lambda: str(tmp_path))
+    viewer = ObjectViewer2D()
+    qtbot.addWidget(viewer)
+    viewer.resize(400, 400)
+    return viewer
+
+
+def _shown(viewer, path, zoom_steps=0):
+    viewer.set_image(path)
+    viewer.calculate_resize()
+    for _ in range(zoom_steps):
+        viewer.adjust_scale(0.5, recurse=False)
+    image = QImage(viewer.width(), viewer.height(), QImage.Format_RGB32)
+    image.fill(Qt.white)
+    painter = QPainter(image)
+    viewer._paint_image(painter)
+    painter.end()
+    return image
+
+
+def test_viewer_draws_the_image_seamlessly_from_tiles(viewer, tmp_path):
+    image = _shown(viewer, _image(tmp_path / "a.png", (2000, 1000), color=(0, 200, 0)))
+    # Fitted to the 400 px canvas: 2000 px shown at a fifth, from level 2.
+    assert viewer._render_source() is viewer.pyramid
+    assert sorted(os.listdir(viewer.pyramid.directory)) == ["2", "pyramid.json"]
+    for x in range(0, 400, 7):
+        for y in range(0, 198, 7):
+            assert QColor(image.pixel(x, y)).green() > 180, (x, y)
+
+
+def test_zooming_in_draws_from_finer_levels(viewer, tmp_path):
+    _shown(viewer, _image(tmp_path / "a.png", (2000, 1000)), zoom_steps=4)
+    assert "0" in os.listdir(viewer.pyramid.directory)
+    # Only the tiles under the canvas were made into pixmaps, not all 32.
+    finest = [key for key in viewer.pyramid._tiles if key[0] == 0]
+    assert 0 < len(finest) < 8
+
+
+def test_previewing_an_image_outside_the_store_writes_nothing_beside_it(viewer, tmp_path):
+    photos = tmp_path.parent / (tmp_path.name + "-photos")
+    photos.mkdir()
+    _shown(viewer, _image(photos / "a.png", (2000, 1000)), zoom_steps=4)
+    assert os.listdir(photos) == ["a.png"]
+    assert viewer.pyramid.directory.startswith(str(tmp_path))
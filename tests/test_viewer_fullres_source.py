@@ -34,35 +34,36 @@ def _viewer_with_working_copy(qtbot, tmp_path):
 def test_fullres_source_does_not_change_coordinate_space(qtbot, tmp_path):
     viewer = _viewer_with_working_copy(qtbot, tmp_path)
     ratio_before = viewer.image_canvas_ratio
-    size_before = (viewer.curr_pixmap.width(), viewer.curr_pixmap.height())
+    rect_before = viewer._image_rect()
 
     viewer.set_fullres_source(_write_png(tmp_path / "original.png", 400, 200))
 
     # coordinate space still keyed to the 100x50 working copy
     assert (viewer.orig_pixmap.width(), viewer.orig_pixmap.height()) == (100, 50)
     assert viewer.image_canvas_ratio == ratio_before
-    # render pixmap same displayed size, just resampled from the original
-    assert (viewer.curr_pixmap.width(), viewer.curr_pixmap.height()) == size_before
-    assert viewer.fullres_pixmap.width() == 400
+    # same displayed size, just drawn from the original's tiles
+    assert viewer._image_rect() == rect_before
+    assert viewer._render_source() is viewer.fullres_pyramid
+    assert viewer.fullres_pyramid.width == 400
 
 
 def test_fullres_source_off_returns_to_working_copy(qtbot, tmp_path):
     viewer = _viewer_with_working_copy(qtbot, tmp_path)
     viewer.set_fullres_source(_write_png(tmp_path / "original.png", 400, 200))
     viewer.set_fullres_source(None)
-    assert viewer.fullres_pixmap is None
-    assert viewer._render_source() is viewer.orig_pixmap
+    assert viewer.fullres_pyramid is None
+    assert viewer._render_source() is viewer.pyramid
 
 
 def test_loading_new_image_drops_fullres_source(qtbot, tmp_path):
     viewer = _viewer_with_working_copy(qtbot, tmp_path)
     viewer.set_fullres_source(_write_png(tmp_path / "original.png", 400, 200))
     viewer.set_image(_write_png(tmp_path / "other.png", 80, 40))
-    assert viewer.fullres_pixmap is None
+    assert viewer.fullres_pyramid is None
 
 
 def test_unreadable_fullres_source_falls_back_to_working_copy(qtbot, tmp_path):
     viewer = _viewer_with_working_copy(qtbot, tmp_path)
     viewer.set_fullres_source(str(tmp_path / "missing.png"))
-    assert viewer.fullres_pixmap is None
-    assert viewer._render_source() is viewer.orig_pixmap
+    assert viewer.fullres_pyramid is None
+    assert viewer._render_source() is viewer.pyramid
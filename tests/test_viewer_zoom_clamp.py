@@ -1,9 +1,9 @@
 """Zoom clamp in ObjectViewer2D.adjust_scale.
 
-The zoom scale grows near-exponentially under repeated zoom-in and the render
-pixmap is allocated proportionally to it; without a clamp a burst of wheel
-events requested a multi-GB allocation and took the process down with a kernel
-OOM (devlog 220). The clamp caps the scaled pixmap's longer side.
+The zoom scale grows near-exponentially under repeated zoom-in; when the render
+pixmap was allocated proportionally to it, a burst of wheel events requested a
+multi-GB allocation and took the process down with a kernel OOM (devlog 220).
+The clamp caps the displayed image's longer side.
 """
 
 import os
@@ -36,12 +36,13 @@ def _zoomed_viewer(qtbot, tmp_path, zoom_steps):
 
 
 def test_repeated_zoom_in_is_clamped(qtbot, tmp_path, monkeypatch):
-    """60 zoom-in steps (the OOM scenario) stay bounded by the pixmap cap."""
+    """60 zoom-in steps (the OOM scenario) stay bounded by the cap."""
     monkeypatch.setattr(ov2d, "MAX_SCALED_PIXMAP_DIM", 512)
     viewer = _zoomed_viewer(qtbot, tmp_path, 60)
 
-    assert max(viewer.curr_pixmap.width(), viewer.curr_pixmap.height()) <= 512
-    # the scale itself is pinned, not just the pixmap
+    rect = viewer._image_rect()
+    assert max(rect.width(), rect.height()) <= 512
+    # the scale itself is pinned, not just the displayed size
     expected_max_scale = 512 * viewer.image_canvas_ratio / 400
     assert viewer.scale <= expected_max_scale
 